@@ -0,0 +1,134 @@
+"""
+Aggregates Benchmark - status and summary fields from maintained counters vs full scans
+Fills a MemoryManager with --conversations conversations (messages, entities, half of them
+flagged as scams) and times the status metrics as counters against a copy of the scans
+they replace, then does the same for the memory summary of one long conversation. Checks
+that every counter equals its scan, before and after conversations are deleted, in both
+memory stores, and that "today" counts roll over with the date while totals carry on.
+
+Run: python benchmarks/bench_aggregates.py [--conversations 10000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from dataclasses import asdict
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src import memory_store_complete
+from src.aggregates import DailyCounters
+from src.memory_store import MemoryManager
+
+ENTITY_TYPES = ["upi_ids", "phone_numbers", "bank_accounts", "phishing_links", "email_addresses"]
+
+def scan_status(manager) -> tuple:
+    """The status metrics as they were computed: a walk over every conversation"""
+    memories = manager.active_conversations.values()
+    return (sum(1 for memory in memories if memory.current_state.scam_detected),
+            sum(len(entities) for memory in memories for entities in memory.extracted_intelligence.values()))
+
+def scan_summary(memory) -> dict:
+    """MemoryStore.get_memory_summary as it was: recounting history and entities"""
+    intelligence = memory.extracted_intelligence
+    total = sum(len(e) for e in intelligence.values())
+    weighted = (len(intelligence["phishing_links"]) * 1.0 + len(intelligence["upi_ids"]) * 0.9 +
+                len(intelligence["phone_numbers"]) * 0.7 + len(intelligence["bank_accounts"]) * 0.8 +
+                len(intelligence["email_addresses"]) * 0.5)
+    return {
+        "conversation_id": memory.conversation_id,
+        "persona": memory.persona_name,
+        "duration_minutes": round((memory.updated_at - memory.created_at).total_seconds() / 60, 1),
+        "message_count": len(memory.message_history),
+        "scammer_messages": sum(1 for m in memory.message_history if m.role == "scammer"),
+        "victim_messages": sum(1 for m in memory.message_history if m.role == "victim"),
+        "current_state": asdict(memory.current_state),
+        "unique_entities_count": total,
+        "high_confidence_entities": len(memory.get_high_confidence_entities()),
+        "extraction_score": round(min(weighted / 10, 1.0), 2) if total else 0.0,
+        "mentioned_entity_types": {k: len(v) for k, v in memory.mentioned_entities.items() if v}
+    }
+
+def per_call_us(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        best = min(best, (time.perf_counter() - started) / repeat)
+    return best * 1e6
+
+def fill(manager, conversations: int):
+    for n in range(conversations):
+        memory = manager.get_or_create(f"conv-{n}", "")
+        memory.add_message("scammer", f"pay to user{n}@paytm now", extracted_entities={"upi_ids": [{"value": f"user{n}@paytm"}]})
+        memory.add_message("victim", "which account?")
+        memory.update_state(scam_detected=n % 2 == 0)
+        memory.add_extracted_intelligence("upi_ids", f"user{n}@paytm", 0.9)
+        memory.add_extracted_intelligence("phone_numbers", f"98{n:08d}", 0.6 + (n % 5) / 10)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--conversations", type=int, default=10000)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"[BENCH] MAINTAINED AGGREGATES ({args.conversations} conversations)")
+    print("=" * 80)
+    manager = MemoryManager(args.conversations * 2, 7200)
+    fill(manager, args.conversations)
+    counters = lambda: (manager.get_scam_count_today(), manager.get_total_intelligence_count())
+    scan_us = per_call_us(lambda: scan_status(manager), 5)
+    counter_us = per_call_us(counters, 1000)
+    print(f"status metrics     scan {scan_us:10.1f}us   counters {counter_us:7.2f}us")
+    errors = int(counters() != scan_status(manager))
+
+    memory = manager.get_or_create("long", "")
+    for n in range(2000):
+        memory.add_message("scammer" if n % 2 == 0 else "victim", f"message {n}")
+        if n % 40 == 0:
+            memory.add_extracted_intelligence(ENTITY_TYPES[n % 5], f"entity-{n}", 0.5 + (n % 7) / 10)
+    memory.update_state(scam_detected=True)
+    errors += int(memory.get_memory_summary() != scan_summary(memory))
+    scan_us = per_call_us(lambda: scan_summary(memory), 20)
+    counter_us = per_call_us(memory.get_memory_summary, 20)
+    print(f"memory summary     scan {scan_us:10.1f}us   counters {counter_us:7.2f}us   "
+          f"({len(memory.message_history)} messages)")
+
+    for n in range(0, args.conversations, 3):
+        manager.delete_conversation(f"conv-{n}")
+    scam_count, intelligence = scan_status(manager)
+    errors += int(manager.get_total_intelligence_count() != intelligence)
+    errors += int(manager.get_aggregates()["totals"]["scam_detections"] != scam_count)
+    errors += int(manager.get_aggregates()["totals"]["conversations"] != manager.get_active_count())
+
+    complete = memory_store_complete.MemoryManager(args.conversations * 2)
+    for n in range(1000):
+        memory = complete.get_or_create(f"conv-{n}")
+        memory.update_state(scam_detected=n % 3 == 0)
+        memory.add_message("scammer", "send otp", extracted_entities={"upi_ids": [{"value": f"u{n}@ybl"}] * (n % 3)})
+    errors += int(complete.get_scam_count_today() != 334)
+    errors += int(complete.get_total_intelligence_count() !=
+                  sum(len(entities) for memory in complete.conversations.values()
+                      for message in memory.message_history for entities in message.extracted_entities.values()))
+
+    day = [date(2026, 1, 1)]
+    daily = DailyCounters(days=2, today=lambda: day[0])
+    daily.incr("scam_detections", 3)
+    day[0] += timedelta(days=1)
+    rolled = daily.today("scam_detections") == 0 and daily.total("scam_detections") == 3
+    daily.incr("scam_detections")
+    day[0] += timedelta(days=1)
+    daily.incr("scam_detections")
+    rolled = rolled and list(daily.get_stats()["daily"]) == ["2026-01-02", "2026-01-03"]
+    print(f"[INFO] {errors} counters differ from their scans; today's counts roll over with the date: {rolled}")
+
+    ok = errors == 0 and rolled
+    print(f"{'[OK]' if ok else '[FAIL]'} status and summary fields match the scans without walking "
+          f"{args.conversations} conversations")
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
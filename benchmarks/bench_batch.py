@@ -0,0 +1,69 @@
+"""
+Batch Detection Benchmark - one batch request vs one request per message
+Sends the same SMS burst through /api/v1/detect-scam and /api/v1/detect-scam/batch
+using the Flask test client and checks both return identical detections.
+
+Run: python benchmarks/bench_batch.py [--messages 500]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import main as main_api
+
+HEADERS = {"X-API-Key": main_api.API_KEY}
+
+SAMPLES = [
+    "URGENT: Your account will be blocked. Verify UPI immediately at scammer@ybl",
+    "Congratulations! You won the lottery, claim your prize now",
+    "Hi, are we still meeting for lunch tomorrow?",
+    "Your KYC is pending, update PAN details to avoid suspension",
+    "I am calling from HDFC bank security, share the OTP sent to you",
+    "Invest 10000 today and get guaranteed double returns in a week",
+    "Package delivery failed, pay customs fee to release your parcel",
+    "Meeting moved to 4pm, see you there",
+]
+
+def build_burst(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [rng.choice(SAMPLES) + (f" ref {rng.randint(1, 50)}" if rng.random() < 0.5 else "")
+            for _ in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=500)
+    args = parser.parse_args()
+    messages = build_burst(min(args.messages, main_api.MAX_BATCH_SIZE))
+    client = main_api.app.test_client()
+    # Measure per-request overhead, not result cache or campaign hits
+    main_api.scam_detector.cache = main_api.DetectionCache(max_entries=0)
+    main_api.scam_detector.campaigns = None
+
+    print("=" * 80)
+    print(f"[BENCH] BATCH DETECTION ({len(messages)} messages)")
+    print("=" * 80)
+
+    start = time.perf_counter()
+    single = [client.post('/api/v1/detect-scam', json={"message": m}, headers=HEADERS).get_json()["detection"]
+              for m in messages]
+    single_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    response = client.post('/api/v1/detect-scam/batch', json={"messages": messages}, headers=HEADERS)
+    batch_s = time.perf_counter() - start
+    batch = response.get_json()["detections"]
+
+    identical = single == batch
+    print(f"{'[OK]' if identical else '[FAIL]'} batch detections match single requests, in order")
+    print(f"[INFO] single requests: {single_s * 1000:8.1f}ms ({single_s / len(messages) * 1e6:7.1f}us/message)")
+    print(f"[INFO] one batch:       {batch_s * 1000:8.1f}ms ({batch_s / len(messages) * 1e6:7.1f}us/message)")
+    print(f"[INFO] speedup: {single_s / batch_s:.1f}x")
+    sys.exit(0 if identical else 1)
+
+if __name__ == '__main__':
+    main()
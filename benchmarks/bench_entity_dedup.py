@@ -0,0 +1,123 @@
+"""
+Entity Dedup Benchmark - extracted intelligence stored once per canonical entity
+Plays a long generated conversation in which the scammer keeps repeating a few UPI IDs,
+numbers and links, in varying case and spelling, through MemoryStores (src and the
+main.py monolith) that dedupe at insert time and ones that append every occurrence, as
+before. Checks that both keep the same set of canonical entities with the same best
+confidence, and reports stored records and the size of the intelligence that summary
+and export responses carry.
+
+Run: python benchmarks/bench_entity_dedup.py [--turns 200]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import main as monolith
+from src.intelligence_extractor import IntelligenceExtractor, canonical_entity
+from src.memory_store import MemoryStore
+
+GLUE = ["please pay", "call me on", "send the amount to", "urgent, your KYC is pending", "or visit",
+        "my account no", "dear customer", "last chance"]
+
+def spellings(rng: random.Random) -> list:
+    """A few entities, each in the ways a scammer retypes it"""
+    entities = []
+    for _ in range(6):
+        phone = f"{rng.choice('6789')}{rng.randint(0, 999999999):09d}"
+        handle = rng.choice(["help", "pay.desk", "kyc_team", "refund"]) + str(rng.randint(0, 999))
+        host = rng.choice(["sbi-kyc.in", "secure-login.bank.in"])
+        entities += [
+            [phone, f"+91 {phone}", f"0{phone}"],
+            [f"{handle}@ybl", f"{handle.upper()}@YBL"],
+            [f"{handle}@gmail.com", f"{handle.capitalize()}@Gmail.com"],
+            [f"{rng.randint(1000, 9999)}{rng.randint(10 ** 9, 10 ** 10 - 1)}"],
+            [f"https://{host}/{handle}", f"HTTPS://{host.upper()}/{handle}", f"https://{host}:443/{handle}."],
+        ]
+    return entities
+
+class LegacyMemoryStore(MemoryStore):
+    """Every occurrence appended, as before"""
+
+    def add_extracted_intelligence(self, entity_type, value, confidence, metadata=None):
+        if entity_type in self.extracted_intelligence:
+            self.extracted_intelligence[entity_type].append({
+                "value": value,
+                "confidence": confidence,
+                "metadata": metadata or {},
+                "first_appeared": self._find_first_mention(value),
+                "appearance_count": self._count_mentions(value)
+            })
+
+class LegacyMonolithStore(monolith.MemoryStore):
+    def add_intelligence(self, entity_type, value, confidence):
+        self.extracted_intelligence[entity_type].append({"value": value, "confidence": confidence})
+
+def best_confidences(intelligence: dict) -> dict:
+    """(type, canonical value) -> highest confidence among its records"""
+    best = {}
+    for entity_type, records in intelligence.items():
+        for record in records:
+            key = (entity_type, canonical_entity(entity_type, record["value"]))
+            best[key] = max(best.get(key, 0.0), record["confidence"])
+    return best
+
+def size(payload) -> int:
+    return len(json.dumps(payload, default=str))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(18)
+    entities = spellings(rng)
+    extractor = IntelligenceExtractor()
+    main_extractor = monolith.IntelligenceExtractor()
+    stores = {"src legacy": LegacyMemoryStore("c", "elderly"), "src dedup": MemoryStore("c", "elderly"),
+              "main legacy": LegacyMonolithStore("c", "elderly"), "main dedup": monolith.MemoryStore("c", "elderly")}
+
+    print("=" * 80)
+    print(f"[BENCH] ENTITY DEDUP ({args.turns} turns)")
+    print("=" * 80)
+    for _ in range(args.turns):
+        parts = []
+        for forms in rng.sample(entities, rng.randint(1, 3)):
+            parts += [rng.choice(GLUE), rng.choice(forms)]
+        text = " ".join(parts)
+        extracted = extractor.extract(text)
+        main_extracted = main_extractor.extract(text)
+        for label, memory in stores.items():
+            if label.startswith("src"):
+                memory.add_message("scammer", text, extracted_entities={
+                    k.value: [e.to_dict() for e in v] for k, v in extracted.items()})
+                for entity_type, found in extracted.items():
+                    for entity in found:
+                        memory.add_extracted_intelligence(entity_type.value, entity.value, entity.confidence)
+            else:
+                memory.add_message("scammer", text)
+                for entity_type, found in main_extracted.items():
+                    for entity in found:
+                        memory.add_intelligence(entity_type.value, entity.value, entity.confidence)
+        for memory in stores.values():
+            memory.add_message("victim", "ok, which one should I use?")
+
+    ok = True
+    for engine in ("src", "main"):
+        legacy, dedup = stores[f"{engine} legacy"], stores[f"{engine} dedup"]
+        same = best_confidences(legacy.extracted_intelligence) == best_confidences(dedup.extracted_intelligence)
+        ok = ok and same
+        for label, memory in ((f"{engine} legacy", legacy), (f"{engine} dedup", dedup)):
+            records = sum(len(v) for v in memory.extracted_intelligence.values())
+            # The export also carries the message history, which dedup leaves alone
+            print(f"{label:12} {records:6} records   intelligence {size(memory.extracted_intelligence) / 1024:7.1f} KiB")
+        print(f"[INFO] {engine}: same canonical entities and best confidences: {same}")
+    print(f"{'[OK]' if ok else '[FAIL]'} one record per canonical entity in src and main, nothing lost")
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
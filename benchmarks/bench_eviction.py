@@ -0,0 +1,136 @@
+"""
+Eviction Benchmark - conversation eviction by last activity
+Creates --conversations one-off conversations through the MemoryManager with the
+EvictionEngine and through a copy of the creation-age cleanup it replaces (a scan of every
+conversation under the lock whenever the cap is crossed), and reports the cost of a create
+and how many conversations each holds at the end. Then replays an hour of simulated
+traffic in which a few long conversations stay active while one-off ones come and go,
+checking that the long ones survive and idle ones do not, that agent controllers leave
+with their conversations, and that the background sweeper expires idle conversations.
+
+Run: python benchmarks/bench_eviction.py [--conversations 20000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+import types
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import src.eviction as eviction
+from src.memory_store import MemoryManager, MemoryStore
+
+CAP = 1000
+
+class LegacyMemoryManager:
+    """memory_store_complete.MemoryManager as it was: eviction by creation age, by full scan"""
+
+    def __init__(self, max_conversations: int, retention_minutes: float, clock=datetime.now):
+        self.conversations = {}
+        self.creation_times = {}
+        self.lock = threading.Lock()
+        self.max_conversations = max_conversations
+        self.retention_minutes = retention_minutes
+        self.clock = clock
+
+    def get_or_create(self, conversation_id: str) -> MemoryStore:
+        with self.lock:
+            if conversation_id in self.conversations:
+                return self.conversations[conversation_id]
+            memory = MemoryStore(conversation_id, "")
+            self.conversations[conversation_id] = memory
+            self.creation_times[conversation_id] = self.clock()
+            if len(self.conversations) > self.max_conversations:
+                now = self.clock()
+                to_delete = [conv_id for conv_id, created in self.creation_times.items()
+                             if (now - created).total_seconds() / 60 > self.retention_minutes]
+                for conv_id in to_delete:
+                    del self.conversations[conv_id]
+                    del self.creation_times[conv_id]
+            return memory
+
+def create_latencies_us(get_or_create, count: int) -> list:
+    timings = []
+    for n in range(count):
+        started = time.perf_counter()
+        get_or_create(f"one-off-{n}")
+        timings.append((time.perf_counter() - started) * 1e6)
+    return sorted(timings)
+
+def simulated_hour(clock: list) -> dict:
+    """Five long conversations active every minute, a one-off one every two seconds"""
+    eviction.time = types.SimpleNamespace(monotonic=lambda: clock[0], perf_counter=time.perf_counter)
+    start = datetime(2026, 1, 1)
+    legacy = LegacyMemoryManager(CAP, 20, clock=lambda: start + timedelta(seconds=clock[0]))
+    manager = MemoryManager(CAP, 20 * 60)
+    agents = {"long-0": object()}
+    manager.add_eviction_listener(lambda conversation_id, memory, reason: agents.pop(conversation_id, None))
+    for second in range(0, 3600, 2):
+        clock[0] = float(second)
+        if second % 60 == 0:
+            for n in range(5):
+                legacy.get_or_create(f"long-{n}")
+                manager.get_or_create(f"long-{n}")
+        legacy.get_or_create(f"one-off-{second}")
+        manager.get_or_create(f"one-off-{second}")
+        agents[f"one-off-{second}"] = object()
+    result = {
+        "legacy_long": sum(1 for n in range(5) if f"long-{n}" in legacy.conversations),
+        "legacy_size": len(legacy.conversations),
+        "long": sum(1 for n in range(5) if f"long-{n}" in manager.active_conversations),
+        # One-off conversations last seen more than 20 simulated minutes ago
+        "idle_held": sum(1 for second in range(0, 3600 - 20 * 60 - 2, 2)
+                         if f"one-off-{second}" in manager.active_conversations),
+        "size": manager.get_active_count(),
+        "agents": len(agents),
+        "stats": manager.get_stats()
+    }
+    eviction.time = time
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--conversations", type=int, default=20000)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"[BENCH] CONVERSATION EVICTION ({args.conversations} conversations, cap {CAP})")
+    print("=" * 80)
+    legacy = LegacyMemoryManager(CAP, 120)
+    manager = MemoryManager(CAP, 7200)
+    legacy_us = create_latencies_us(legacy.get_or_create, args.conversations)
+    engine_us = create_latencies_us(manager.get_or_create, args.conversations)
+    for label, timings, held in (("creation-age scan", legacy_us, len(legacy.conversations)),
+                                 ("eviction engine", engine_us, manager.get_active_count())):
+        print(f"{label:18} create p50 {statistics.median(timings):7.1f}us   "
+              f"p99 {timings[int(len(timings) * 0.99)]:8.1f}us   {held:6} conversations held")
+
+    hour = simulated_hour([0.0])
+    print(f"[INFO] simulated hour: creation-age scan kept {hour['legacy_long']}/5 long conversations "
+          f"({hour['legacy_size']} held); engine kept {hour['long']}/5 ({hour['size']} held, "
+          f"{hour['idle_held']} idle past the TTL, {hour['stats']['expirations']} expired)")
+    print(f"[INFO] agent controllers left with their conversations: {hour['agents']} remain "
+          f"for {hour['size']} conversations")
+
+    swept = MemoryManager(CAP, 0.2, sweep_interval_seconds=0.05)
+    for n in range(100):
+        swept.create_conversation(f"idle-{n}", "")
+    time.sleep(0.5)
+    sweeper_ok = swept.get_active_count() == 0 and swept.get_stats()["sweeps"] > 0
+    swept.shutdown()
+    print(f"[INFO] background sweeper expired 100 idle conversations: {sweeper_ok}")
+
+    ok = (hour["long"] == 5 and hour["idle_held"] == 0 and hour["agents"] <= hour["size"] and sweeper_ok
+          and manager.get_active_count() == CAP
+          and statistics.median(engine_us) < statistics.median(legacy_us))
+    print(f"{'[OK]' if ok else '[FAIL]'} active conversations kept, idle ones evicted, "
+          f"creates {statistics.median(legacy_us) / statistics.median(engine_us):.0f}x cheaper at the cap")
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Intelligence Index Benchmark - cross-conversation entity lookups
+Plays generated scam conversations that share a pool of UPI IDs, numbers, links and
+emails through MemoryStores and the IntelligenceIndex, checks that every value's
+conversations and entity types match a scan of all stores' extracted_intelligence,
+then grows the index to --entities values and reports lookup latency (hits and misses)
+against that scan.
+
+Run: python benchmarks/bench_intelligence_index.py [--entities 1000000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.intelligence_extractor import IntelligenceExtractor, canonical_value
+from src.intelligence_index import IntelligenceIndex
+from src.memory_store import MemoryStore
+
+GLUE = ["please pay", "call me on", "send the amount to", "urgent, your KYC is pending", "or visit",
+        "my account no", "mail the receipt to", "dear customer", "thanks"]
+
+def entity_pool(rng: random.Random, size: int = 200) -> list:
+    pool = []
+    for _ in range(size):
+        phone = f"{rng.choice('6789')}{rng.randint(0, 999999999):09d}"
+        handle = rng.choice(["help", "Pay.Desk", "kyc_team", "refund"]) + str(rng.randint(0, 999))
+        pool.append(rng.choice([
+            phone,
+            f"{handle}@{rng.choice(['ybl', 'okaxis', 'paytm'])}",
+            f"{handle}@{rng.choice(['gmail.com', 'bank-secure.in'])}",
+            f"{rng.randint(10 ** 11, 10 ** 13)}",
+            f"https://{rng.choice(['sbi-kyc', 'secure-login.bank'])}.in/{handle}",
+        ]))
+    return pool
+
+def play(conversations: int, rng: random.Random, index: IntelligenceIndex) -> list:
+    """Conversations as api.process_message handles them; returns their MemoryStores"""
+    extractor = IntelligenceExtractor()
+    pool = entity_pool(rng)
+    stores = []
+    for n in range(conversations):
+        memory = MemoryStore(f"conv-{n}", "elderly")
+        for _ in range(rng.randint(1, 8)):
+            parts = []
+            for entity in rng.sample(pool, rng.randint(0, 3)):
+                parts += [rng.choice(GLUE), entity]
+            text = " ".join(parts + [rng.choice(GLUE)])
+            extracted = extractor.extract(text, mention_counts=memory.mention_counts)
+            memory.add_message(role="scammer", content=text,
+                               extracted_entities={k.value: [e.to_dict() for e in v] for k, v in extracted.items()})
+            for entity_type, entities in extracted.items():
+                for entity in entities:
+                    memory.add_extracted_intelligence(entity_type.value, entity.value, entity.confidence)
+            index.record(memory.conversation_id,
+                         [(t.value, e.value) for t, entities in extracted.items() for e in entities])
+        stores.append(memory)
+    return stores
+
+def scan_lookup(stores: list, value: str) -> dict:
+    """The lookup without an index: every store's every extracted entity"""
+    key = canonical_value(value)
+    conversations, types = set(), set()
+    for memory in stores:
+        for entity_type, entities in memory.extracted_intelligence.items():
+            for entity in entities:
+                if canonical_value(entity["value"]) == key:
+                    conversations.add(memory.conversation_id)
+                    types.add(entity_type)
+    return {"conversations": conversations, "entity_types": types} if conversations else None
+
+def latencies_us(fn, values: list) -> list:
+    timings = []
+    for value in values:
+        started = time.perf_counter()
+        fn(value)
+        timings.append((time.perf_counter() - started) * 1e6)
+    return sorted(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--conversations", type=int, default=300)
+    parser.add_argument("--entities", type=int, default=1000000)
+    args = parser.parse_args()
+    rng = random.Random(17)
+
+    print("=" * 80)
+    print(f"[BENCH] INTELLIGENCE INDEX ({args.conversations} conversations, {args.entities} entities)")
+    print("=" * 80)
+    index = IntelligenceIndex()
+    stores = play(args.conversations, rng, index)
+    values = {entity["value"] for memory in stores
+              for entities in memory.extracted_intelligence.values() for entity in entities}
+    # Other spellings of stored values must find them too
+    respelled = [f"+91 {v[:5]} {v[5:]}" if v.isdigit() and len(v) == 10 else v.upper() for v in sorted(values)]
+    queries = list(values) + rng.sample(respelled, 50) + ["nobody@ybl"]
+    mismatches = 0
+    for value in queries:
+        expected, found = scan_lookup(stores, value), index.lookup(value, limit=len(stores))
+        if expected is None or found is None:
+            mismatches += (expected is None) != (found is None)
+        elif (expected["conversations"] != set(found["conversations"])
+              or expected["entity_types"] != set(found["entity_types"])):
+            mismatches += 1
+    print(f"[INFO] {len(values)} distinct values in {len(stores)} conversations, "
+          f"{len(queries)} lookups compared with a scan of every store")
+    scan_us = statistics.median(latencies_us(lambda v: scan_lookup(stores, v), queries[:200]))
+
+    started = time.perf_counter()
+    first = len(index)
+    for n in range(first, args.entities // 2):
+        index.record(f"conv-{n % 50000}", [("upi_ids", f"user{n}@ybl"), ("phone_numbers", f"9{n:09d}")])
+    fill_s = time.perf_counter() - started
+    hits = [rng.choice([f"USER{n}@ybl", f"+91 9{n:09d}"])
+            for n in (rng.randrange(first, args.entities // 2) for _ in range(20000))]
+    misses = [f"nobody{n}@ybl" for n in range(20000)]
+    hit_us, miss_us = latencies_us(index.lookup, hits), latencies_us(index.lookup, misses)
+    p99_hit, p99_miss = hit_us[int(len(hit_us) * 0.99)], miss_us[int(len(miss_us) * 0.99)]
+    print(f"[INFO] filled to {len(index)} entities in {fill_s:.1f}s")
+    print(f"scan of {len(stores)} stores  p50 {scan_us:9.1f}us")
+    print(f"index hit          p50 {statistics.median(hit_us):9.1f}us   p99 {p99_hit:6.1f}us")
+    print(f"index miss         p50 {statistics.median(miss_us):9.1f}us   p99 {p99_miss:6.1f}us")
+
+    ok = mismatches == 0 and max(p99_hit, p99_miss) < 1000
+    print(f"{'[OK]' if ok else '[FAIL]'} lookups match the scan ({mismatches} mismatches), "
+          f"p99 under 1ms at {len(index)} entities")
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
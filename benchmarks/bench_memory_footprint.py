@@ -0,0 +1,186 @@
+"""
+Memory Footprint Benchmark - bytes per conversation under tracemalloc
+Builds --conversations conversations of --turns turns each, every scammer message carrying
+freshly extracted entities as a request would, and measures with tracemalloc what the
+message history and state take per conversation: held as the dataclass messages they were
+(ISO timestamp strings, lists, and a dict copy of every entity) against the slotted
+messages that keep the entities themselves, for src and for main.py. Then measures whole
+src conversations through the MemoryManager, and checks that the exported JSON of a
+conversation is what the dict-copying messages gave.
+
+Run: python benchmarks/bench_memory_footprint.py [--conversations 1000] [--turns 50]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import main as monolith
+from src.intelligence_extractor import ExtractedEntity, IntelligenceExtractor
+from src.memory_store import ConversationState, MemoryManager, MemoryStore
+from src.messages import Message
+
+SCAM_MESSAGES = [
+    "URGENT: your SBI account is blocked. Pay the fine to verify@paytm or call 9876543210",
+    "Your KYC expired, update at http://sbi-kyc-update.xyz/login within 2 hours",
+    "Transfer Rs 4999 to account 123456789012 IFSC SBIN0001234 to release your refund",
+    "Mail your documents to refunds.desk@gmail.com and share the OTP sent to you",
+    "Sir this is the final warning, police case will be filed today itself",
+]
+REPLY = "Which bank are you calling from sir? Can you explain again slowly?"
+
+@dataclass
+class LegacyMessage:
+    """memory_store.Message as it was"""
+    role: str
+    content: str
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+    scam_indicators: List[str] = field(default_factory=list)
+    extracted_entities: Dict = field(default_factory=dict)
+
+@dataclass
+class LegacyState:
+    """memory_store.ConversationState as it was"""
+    conversation_id: str
+    persona_name: str
+    scam_detected: bool = False
+    scam_type: Optional[str] = None
+    current_strategy: str = "identification"
+    emotional_state: str = "neutral"
+    trust_level: float = 0.0
+    honeypot_exposure_risk: float = 0.0
+
+def fresh(extracted: dict, entity_class=ExtractedEntity) -> dict:
+    """A copy of an extraction result with new entity objects, as a new request's extract() gives"""
+    copy = {}
+    for entity_type, found in extracted.items():
+        copy[entity_type] = [entity_class(*(getattr(entity, name) for name in entity.__dataclass_fields__))
+                             for entity in found]
+    return copy
+
+def measure(build, conversations: int) -> float:
+    """Bytes per conversation still allocated after build(n) for every conversation"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = [build(n) for n in range(conversations)]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return (after - before) / conversations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--conversations", type=int, default=1000)
+    parser.add_argument("--turns", type=int, default=50)
+    args = parser.parse_args()
+
+    extractor = IntelligenceExtractor()
+    extracted = [extractor.extract(text) for text in SCAM_MESSAGES]
+    extracted_main = [monolith.intelligence_extractor.extract(text) for text in SCAM_MESSAGES]
+    keywords = ["urgent", "blocked", "verify"]
+
+    def legacy_history(n):
+        history = []
+        for turn in range(args.turns):
+            found = fresh(extracted[turn % len(SCAM_MESSAGES)])
+            history.append(LegacyMessage("scammer", f"{SCAM_MESSAGES[turn % len(SCAM_MESSAGES)]} [{n}:{turn}]",
+                                         scam_indicators=list(keywords),
+                                         extracted_entities={k.value: [e.to_dict() for e in v] for k, v in found.items()}))
+            history.append(LegacyMessage("victim", f"{REPLY} [{n}:{turn}]"))
+        return LegacyState(f"conv-{n}", "Rajesh"), history
+
+    def compact_history(n):
+        history = []
+        for turn in range(args.turns):
+            found = fresh(extracted[turn % len(SCAM_MESSAGES)])
+            history.append(Message.create("scammer", f"{SCAM_MESSAGES[turn % len(SCAM_MESSAGES)]} [{n}:{turn}]",
+                                          keywords, found))
+            history.append(Message.create("victim", f"{REPLY} [{n}:{turn}]"))
+        return ConversationState(f"conv-{n}", "Rajesh"), history
+
+    def legacy_main(n):
+        history = []
+        for turn in range(args.turns):
+            found = fresh(extracted_main[turn % len(SCAM_MESSAGES)], monolith.ExtractedEntity)
+            history.append(LegacyMessage("scammer", f"{SCAM_MESSAGES[turn % len(SCAM_MESSAGES)]} [{n}:{turn}]",
+                                         scam_indicators=list(keywords),
+                                         extracted_entities={k.value: [e.to_dict() for e in v] for k, v in found.items()}))
+            history.append(LegacyMessage("victim", f"{REPLY} [{n}:{turn}]"))
+        return history
+
+    def compact_main(n):
+        memory = monolith.MemoryStore(f"conv-{n}", "Rajesh")
+        for turn in range(args.turns):
+            found = fresh(extracted_main[turn % len(SCAM_MESSAGES)], monolith.ExtractedEntity)
+            memory.add_message("scammer", f"{SCAM_MESSAGES[turn % len(SCAM_MESSAGES)]} [{n}:{turn}]", keywords, found)
+            memory.add_message("victim", f"{REPLY} [{n}:{turn}]")
+        return memory.message_history
+
+    manager = MemoryManager(args.conversations * 2, 7200)
+
+    def whole_conversation(n):
+        memory = manager.get_or_create(f"conv-{n}", "Rajesh")
+        for turn in range(args.turns):
+            found = fresh(extracted[turn % len(SCAM_MESSAGES)])
+            memory.add_message("scammer", f"{SCAM_MESSAGES[turn % len(SCAM_MESSAGES)]} [{n}:{turn}]", keywords, found)
+            for entity_type, entities in found.items():
+                for entity in entities:
+                    memory.add_extracted_intelligence(entity_type.value, entity.value, entity.confidence, entity.metadata)
+            memory.add_message("victim", f"{REPLY} [{n}:{turn}]")
+        return memory
+
+    print("=" * 80)
+    print(f"[BENCH] MEMORY FOOTPRINT ({args.conversations} conversations x {args.turns} turns)")
+    print("=" * 80)
+    results = {}
+    for label, build in (("src dataclass", legacy_history), ("src slotted", compact_history),
+                         ("main dataclass", legacy_main), ("main slotted", compact_main),
+                         ("src conversation", whole_conversation)):
+        results[label] = measure(build, args.conversations)
+        print(f"{label:18} {results[label] / 1024:8.1f} KiB per conversation   "
+              f"{results[label] * args.conversations / 2 ** 20:7.1f} MiB in all")
+
+    # Exported JSON: a conversation holding entity objects exports what dict copies gave
+    by_reference = MemoryStore("json", "Rajesh")
+    by_copy = MemoryStore("json", "Rajesh")
+    for turn, text in enumerate(SCAM_MESSAGES):
+        found = fresh(extracted[turn])
+        by_reference.add_message("scammer", text, keywords, found)
+        by_copy.add_message("scammer", text, keywords, {k.value: [e.to_dict() for e in v] for k, v in found.items()})
+        by_reference.add_message("victim", REPLY)
+        by_copy.add_message("victim", REPLY)
+    for reference, copy in zip(by_reference.message_history, by_copy.message_history):
+        copy.created = reference.created
+    exported = by_reference.export_to_dict()
+    expected = by_copy.export_to_dict()
+    for memory, export in ((by_reference, exported), (by_copy, expected)):
+        for message, record in zip(memory.message_history, export["message_history"]):
+            legacy = asdict(LegacyMessage(message.role, message.content, message.timestamp,
+                                          list(message.scam_indicators), message.extracted_entities))
+            if record != legacy:
+                export["mismatch"] = True
+        export.pop("created_at"), export.pop("updated_at"), export["summary"].pop("duration_minutes")
+    json_ok = json.dumps(exported) == json.dumps(expected) and "mismatch" not in expected
+    stamp = datetime.fromisoformat(exported["message_history"][0]["timestamp"])
+    json_ok = json_ok and abs((datetime.now() - stamp).total_seconds()) < 60
+    print(f"[INFO] exported conversation JSON unchanged: {json_ok}")
+
+    src_saving = 1 - results["src slotted"] / results["src dataclass"]
+    main_saving = 1 - results["main slotted"] / results["main dataclass"]
+    ok = json_ok and src_saving > 0.25 and main_saving > 0.25
+    print(f"{'[OK]' if ok else '[FAIL]'} message history and state {src_saving:.0%} smaller in src, "
+          f"{main_saving:.0%} in main")
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Mention Index Benchmark - cross-validation bonus and mention lookups on long conversations
+Plays the same generated conversation (scammer messages reusing a small pool of UPI
+IDs, phone and account numbers and links, victim replies in between) through two
+MemoryStores: one extracting against the rebuilt message list and rescanning the
+history for first_appeared/appearance_count, as before, and one using the store's
+incremental mention index. Checks that confidences and appearance counts agree and
+reports the per-turn cost late in the conversation. Then checks that the index counts
+one entity written two ways (a UPI ID in other case, a link with a trailing slash) as
+one, where a substring scan does not.
+
+Run: python benchmarks/bench_mention_index.py [--turns 1000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.intelligence_extractor import IntelligenceExtractor
+from src.memory_store import MemoryStore
+
+GLUE = ["please pay", "call me on", "send the amount to", "urgent, your KYC is pending", "or visit",
+        "my account no", "ok sir", "dear customer", "last chance", "thanks"]
+REPLIES = ["ok, what should I do?", "I am trying, please wait", "which app should I use?",
+           "my son handles the bank things", "it says failed, can you send again?"]
+
+def entity_pool(rng: random.Random, size: int = 40) -> list:
+    pool = []
+    for _ in range(size):
+        phone = f"{rng.choice('6789')}{rng.randint(0, 999999999):09d}"
+        handle = rng.choice(["help", "pay.desk", "kyc_team", "refund"]) + str(rng.randint(0, 999))
+        pool.append(rng.choice([
+            phone,
+            f"{handle}@{rng.choice(['ybl', 'okaxis', 'paytm'])}",
+            f"{handle}@{rng.choice(['gmail.com', 'bank-secure.in'])}",
+            f"{rng.randint(10 ** 11, 10 ** 13)}",
+            f"https://{rng.choice(['sbi-kyc', 'secure-login.bank'])}.in/{handle}",
+        ]))
+    return pool
+
+def build_conversation(turns: int, rng: random.Random) -> list:
+    pool = entity_pool(rng)
+    messages = []
+    for _ in range(turns):
+        parts = []
+        for entity in rng.sample(pool, rng.randint(0, 3)):
+            parts.append(rng.choice(GLUE))
+            parts.append(entity)
+        parts.append(rng.choice(GLUE))
+        messages.append(("scammer", " ".join(parts)))
+        messages.append(("victim", rng.choice(REPLIES)))
+    return messages
+
+class LegacyMemoryStore(MemoryStore):
+    """Mention lookups as they were: a substring scan of every message"""
+
+    def _find_first_mention(self, value):
+        for msg in self.message_history:
+            if value in msg.content:
+                return msg.timestamp
+        return None
+
+    def _count_mentions(self, value):
+        return sum(1 for msg in self.message_history if value in msg.content)
+
+def play(memory: MemoryStore, extractor: IntelligenceExtractor, role: str, text: str, indexed: bool) -> list:
+    """One turn as api.process_message handles it; returns (value, confidence, count) per entity"""
+    if role == "victim":
+        memory.add_message(role=role, content=text)
+        return []
+    if indexed:
+        extracted = extractor.extract(text, mention_counts=memory.mention_counts)
+    else:
+        extracted = extractor.extract(text, [m.content for m in memory.message_history])
+    memory.add_message(role=role, content=text,
+                       extracted_entities={k.value: [e.to_dict() for e in v] for k, v in extracted.items()})
+    for entity_type, entities in extracted.items():
+        for entity in entities:
+            memory.add_extracted_intelligence(entity_type.value, entity.value, entity.confidence)
+    return [(e.value, e.confidence, memory._count_mentions(e.value)) for v in extracted.values() for e in v]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=1000)
+    args = parser.parse_args()
+    rng = random.Random(16)
+    conversation = build_conversation(args.turns, rng)
+    extractor = IntelligenceExtractor()
+
+    print("=" * 80)
+    print(f"[BENCH] MENTION INDEX ({args.turns} turns, {len(conversation)} messages)")
+    print("=" * 80)
+    timings = {}
+    outcomes = {}
+    for label, memory, indexed in [("history scan", LegacyMemoryStore("legacy", "elderly"), False),
+                                   ("mention index", MemoryStore("indexed", "elderly"), True)]:
+        late = []
+        outcomes[label] = []
+        for n, (role, text) in enumerate(conversation):
+            started = time.perf_counter()
+            outcomes[label].append(play(memory, extractor, role, text, indexed))
+            if n >= len(conversation) - 200:
+                late.append(time.perf_counter() - started)
+        timings[label] = sum(late) / len(late) * 1e6
+        bonus = sum(1 for turn in outcomes[label] for _, confidence, _ in turn if confidence > 0.8)
+        print(f"{label:14} last 100 turns {timings[label]:8.1f}us/message   {bonus} entities with the bonus")
+
+    mismatches = sum(1 for old, new in zip(*outcomes.values()) if old != new)
+    speedup = timings["history scan"] / timings["mention index"]
+    print(f"[INFO] {speedup:.1f}x faster per message at {len(conversation)} messages of history")
+
+    # Mentions are counted per entity, not per spelling
+    respelled = MemoryStore("respelled", "elderly")
+    for text in ["pay to Refund.Desk@YBL now", "send it to refund.desk@ybl", "login at https://SBI-kyc.in"]:
+        play(respelled, extractor, "scammer", text, True)
+    last = play(respelled, extractor, "scammer", "refund.desk@ybl or https://sbi-kyc.in/", True)
+    counted = sorted((value, count) for value, _, count in last)
+    respelled_ok = counted == [("https://sbi-kyc.in/", 2), ("refund.desk@ybl", 3)]
+    print(f"[INFO] mentions across spellings: {counted}")
+    ok = mismatches == 0 and speedup > 1 and respelled_ok
+    print(f"{'[OK]' if ok else '[FAIL]'} identical confidences and appearance counts on every turn "
+          f"({mismatches} mismatches)")
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
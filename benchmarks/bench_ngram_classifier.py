@@ -0,0 +1,164 @@
+"""
+N-gram Classifier Benchmark - hashed n-gram tier vs pattern_matching + nlp + keywords
+Trains the classifier from MemoryStore exports of synthetic honeypot conversations, then
+scores held-out messages written with different phrasing: accuracy, precision and recall
+of the rule tiers, the classifier alone and both together, plus model load time and
+single vs vectorized batch latency.
+
+Run: python benchmarks/bench_ngram_classifier.py [--conversations 400]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.scam_detector import ScamDetectionEngine
+from src.memory_store import MemoryStore
+from src.ngram_classifier import HashedNgramClassifier, samples_from_exports
+
+# Training and held-out scams share vocabulary but not sentences
+TRAIN_SCAMS = [
+    "Dear customer your {bank} account will be blocked today, verify your UPI by sending Rs {amount} to {handle}",
+    "Your KYC is pending, update PAN details within 24 hours or your {bank} account gets suspended",
+    "Congratulations you won a lottery of Rs {amount}, pay processing fee to {handle} to claim the prize",
+    "I am calling from {bank} security, share the OTP sent to {phone} to stop the transaction",
+    "Invest Rs {amount} today and get guaranteed double returns in one week, transfer to {handle}",
+    "Your parcel is held at customs, pay Rs {amount} clearance fee to {handle} to release it",
+    "Your electricity connection will be disconnected tonight, pay the pending bill of Rs {amount} to {handle}",
+    "Work from home job, earn Rs {amount} daily, pay registration fee to {handle} to start",
+]
+TEST_SCAMS = [
+    "Sir the KYC on your {bank} card expired, send Rs {amount} to {handle} now else card gets suspended",
+    "Final notice: electricity supply cut at 9pm, clear dues of Rs {amount} by paying {handle}",
+    "You are selected for a part time job, daily income Rs {amount}, registration charge payable to {handle}",
+    "Customs department holding your courier, release charge Rs {amount}, pay on {handle}",
+    "Refund of Rs {amount} pending, share the OTP received on {phone} to credit it to your {bank} account",
+    "Pending KYC, your {bank} netbanking will stop tonight, update it by sending Rs {amount} to {handle}",
+]
+TRAIN_BENIGN = [
+    "Hi, are we still meeting for lunch tomorrow near the {bank} branch?",
+    "I paid the electricity bill of Rs {amount} yesterday, can you check the receipt?",
+    "The parcel arrived this morning, thanks for sending it",
+    "Can you send me the notes from today's class?",
+    "Happy birthday! Let's celebrate this weekend",
+    "Please transfer my share of Rs {amount} for the dinner when you get time",
+    "The job interview went well, they will call me next week",
+    "Mom asked if you can pick up vegetables on the way home",
+]
+TEST_BENIGN = [
+    "Reached office, will call you after the meeting",
+    "I sent you Rs {amount} for the movie tickets, check your {bank} app",
+    "Courier guy came while you were out, I kept the box inside",
+    "Did you watch the match last night? What a finish",
+    "Electricity was out for an hour, all fine now",
+    "Got the offer letter from the new job, joining next month",
+    "Your OTP for {bank} netbanking login is 482913, do not share it with anyone",
+    "Paid Rs {amount} to {handle} for the groceries, thanks for the reminder",
+]
+BANKS = ["SBI", "HDFC", "ICICI", "Axis", "Kotak", "PNB"]
+VICTIM_REPLIES = ["Ok sir, what should I do?", "Who is this?", "Sure, thanks"]
+
+def fill(template: str, rng: random.Random) -> str:
+    return template.format(
+        bank=rng.choice(BANKS), amount=rng.randint(100, 99999),
+        handle=f"{rng.choice(['pay', 'help', 'desk'])}{rng.randint(1, 999)}@{rng.choice(['ybl', 'okaxis', 'paytm'])}",
+        phone=f"9{rng.randint(100000000, 999999999)}"
+    )
+
+def build_exports(count: int, rng: random.Random) -> list:
+    """Exported conversations, like GET /api/v1/conversation/<id>/export returns"""
+    exports = []
+    for number in range(count):
+        scam = rng.random() < 0.5
+        memory = MemoryStore(f"train-{number}", "bench")
+        for _ in range(rng.randint(1, 4)):
+            memory.add_message("scammer", fill(rng.choice(TRAIN_SCAMS if scam else TRAIN_BENIGN), rng))
+            memory.add_message("victim", rng.choice(VICTIM_REPLIES))
+        memory.update_state(scam_detected=scam)
+        exports.append(memory.export_to_dict())
+    return exports
+
+def build_test_set(count: int, rng: random.Random) -> list:
+    """(message, is_scam) pairs in held-out phrasing"""
+    cases = []
+    for _ in range(count):
+        scam = rng.random() < 0.5
+        cases.append((fill(rng.choice(TEST_SCAMS if scam else TEST_BENIGN), rng), scam))
+    return cases
+
+def evaluate(label: str, predictions: list, latencies: list, cases: list):
+    tp = sum(1 for p, (_, y) in zip(predictions, cases) if p and y)
+    fp = sum(1 for p, (_, y) in zip(predictions, cases) if p and not y)
+    fn = sum(1 for p, (_, y) in zip(predictions, cases) if not p and y)
+    accuracy = sum(1 for p, (_, y) in zip(predictions, cases) if p == y) / len(cases)
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / (tp + fn) if tp + fn else 0.0
+    print(f"{label:30} accuracy {accuracy:6.1%}  precision {precision:6.1%}  recall {recall:6.1%}  "
+          f"p50 {statistics.median(latencies) * 1e6:7.1f}us")
+    return accuracy, precision, recall
+
+def run_engine(engine: ScamDetectionEngine, cases: list) -> tuple:
+    predictions, latencies = [], []
+    for message, _ in cases:
+        start = time.perf_counter()
+        predictions.append(engine.detect(message).is_scam)
+        latencies.append(time.perf_counter() - start)
+    return predictions, latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--conversations", type=int, default=400)
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+    rng = random.Random(5)
+
+    print("=" * 80)
+    print("[BENCH] N-GRAM CLASSIFIER TIER")
+    print("=" * 80)
+    texts, labels = samples_from_exports(build_exports(args.conversations, rng))
+    cases = build_test_set(args.messages, rng)
+
+    started = time.perf_counter()
+    classifier = HashedNgramClassifier().fit(texts, labels)
+    print(f"[INFO] trained on {len(texts)} exported messages ({sum(labels)} scam) "
+          f"in {(time.perf_counter() - started) * 1000:.0f}ms")
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "ngram_classifier.npz")
+        classifier.save(path)
+        started = time.perf_counter()
+        classifier = HashedNgramClassifier.load(path)
+        load_ms = (time.perf_counter() - started) * 1000
+        print(f"[INFO] model file {os.path.getsize(path) / 1024:.0f} KiB, loaded in {load_ms:.2f}ms")
+
+    # Load the sentiment lexicon before timing
+    ScamDetectionEngine().detect(cases[0][0])
+    rules = evaluate("pattern_matching+nlp+keywords", *run_engine(ScamDetectionEngine(), cases), cases)
+    single = []
+    predictions = []
+    for message, _ in cases:
+        start = time.perf_counter()
+        predictions.append(classifier.score(message) >= classifier.threshold)
+        single.append(time.perf_counter() - start)
+    alone = evaluate("n-gram classifier alone", predictions, single, cases)
+    combined = evaluate("rules + n-gram tier", *run_engine(ScamDetectionEngine(classifier=classifier), cases), cases)
+
+    started = time.perf_counter()
+    classifier.predict_proba([message for message, _ in cases])
+    batch_us = (time.perf_counter() - started) / len(cases) * 1e6
+    print(f"[INFO] classifier batch of {len(cases)}: {batch_us:.1f}us/message vectorized "
+          f"vs {statistics.mean(single) * 1e6:.1f}us one at a time")
+
+    # Held-out phrasing: the tier has to add recall without costing accuracy overall
+    ok = load_ms < 50 and combined[0] > rules[0] and combined[2] >= rules[2] and alone[0] > 0.5
+    print(f"{'[OK]' if ok else '[FAIL]'} accuracy {rules[0]:.1%} -> {combined[0]:.1%}, recall {rules[2]:.1%} -> "
+          f"{combined[2]:.1%} with the n-gram tier, model load {load_ms:.2f}ms")
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Normalization Benchmark - evasion variants of known scams, with and without the normalization stage
+Rewrites scam messages with full-width letters, Cyrillic/Greek lookalikes, zero-width
+characters, spaced-out and dotted words and mathematical letters. Reports how many
+variants still match a rule on the raw text vs the normalized text, checks that both
+engines (src and the main.py monolith) give every variant the plain message's verdict,
+and times normalize_text against a full detection.
+
+Run: python benchmarks/bench_normalization.py [--messages 2000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import main as monolith
+from src.scam_detector import ScamDetectionEngine
+from src.intelligence_extractor import IntelligenceExtractor
+from src.text_normalization import normalize_text
+
+SCAMS = [
+    "URGENT: Your account will be blocked today. Verify your KYC immediately",
+    "Verify UPI now or your bank account will be suspended",
+    "Congratulations! You won the lottery, claim your prize now",
+    "Share the OTP sent to your phone to stop the transaction",
+]
+BENIGN = [
+    "Hi, are we still meeting for lunch tomorrow?",
+    "Can you send me the notes from today's class?",
+    "Paid the electricity bill, receipt is in your mail",
+]
+LOOKALIKES = {"a": "а", "e": "е", "o": "о", "p": "р", "c": "с", "y": "у", "x": "х", "i": "і", "A": "А",
+              "B": "В", "E": "Е", "K": "К", "M": "М", "O": "О", "P": "Р", "T": "Т", "o ": "ο "}
+
+def full_width(text: str, rng: random.Random) -> str:
+    return "".join(chr(ord(c) + 0xFEE0) if "!" <= c <= "~" else c for c in text)
+
+def lookalikes(text: str, rng: random.Random) -> str:
+    return "".join(LOOKALIKES.get(c, c) if rng.random() < 0.7 else c for c in text)
+
+def zero_width(text: str, rng: random.Random) -> str:
+    return "".join(c + rng.choice(["​", "‌", "‍", "⁠", "­"]) if c.isalpha() else c
+                   for c in text)
+
+def spaced(text: str, rng: random.Random) -> str:
+    separator = rng.choice([" ", ".", "-", "*"])
+    return " ".join(separator.join(word) if len(word) > 3 and word.isalpha() else word for word in text.split())
+
+def math_bold(text: str, rng: random.Random) -> str:
+    def bold(c):
+        if "A" <= c <= "Z":
+            return chr(0x1D400 + ord(c) - ord("A"))
+        if "a" <= c <= "z":
+            return chr(0x1D41A + ord(c) - ord("a"))
+        return c
+    return "".join(bold(c) for c in text)
+
+EVASIONS = [full_width, lookalikes, zero_width, spaced, math_bold]
+
+def p50_us(fn, texts: list) -> float:
+    latencies = []
+    for text in texts:
+        started = time.perf_counter()
+        fn(text)
+        latencies.append(time.perf_counter() - started)
+    return statistics.median(latencies) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=2000)
+    args = parser.parse_args()
+    rng = random.Random(14)
+
+    print("=" * 80)
+    print("[BENCH] UNICODE / SPACING NORMALIZATION")
+    print("=" * 80)
+    # No campaign index: a variant must not inherit the plain message's verdict
+    engine = ScamDetectionEngine()
+    legacy = monolith.ScamDetectionEngine()
+    legacy.campaigns = None
+
+    plain_hits = sum(1 for text in SCAMS if engine.matcher.match(text.lower())[0])
+    ok = True
+    for evasion in EVASIONS:
+        variants = [evasion(text, rng) for text in SCAMS + BENIGN]
+        raw_hits = sum(1 for v in variants[:len(SCAMS)] if engine.matcher.match(v.lower())[0])
+        normalized_hits = sum(1 for v in variants[:len(SCAMS)] if engine.matcher.match(normalize_text(v).lower())[0])
+        same = sum(1 for text, variant in zip(SCAMS + BENIGN, variants)
+                   if engine.detect(variant).is_scam == engine.detect(text).is_scam
+                   and legacy.detect(variant).is_scam == legacy.detect(text).is_scam)
+        ok = ok and normalized_hits == plain_hits and same == len(variants)
+        print(f"{evasion.__name__:12} rule hits raw {raw_hits}/{plain_hits} -> normalized {normalized_hits}/{plain_hits}"
+              f"   verdict unchanged {same}/{len(variants)}")
+
+    entities = IntelligenceExtractor().extract("pay to s​upport@уbl or call 9876543210")
+    found = {e.value for values in entities.values() for e in values}
+    extracted = {"support@ybl", "9876543210"} <= found
+    print(f"[INFO] extracted from an obfuscated message: {sorted(found)}")
+
+    # Only spaced-out letters are joined; dotted and spaced digits are data
+    literal = ["server ip 1.2.3.4", "version 2.0.1", "pay Rs 1.5 lakh", "otp 4 5 6 7"]
+    kept = sum(normalize_text(text) == text and monolith.normalize_text(text) == text for text in literal)
+    extracted = extracted and kept == len(literal)
+    print(f"[INFO] digit runs left as written: {kept}/{len(literal)}")
+
+    plain = [rng.choice(SCAMS + BENIGN) + f" ref {n}" for n in range(args.messages)]
+    obfuscated = [rng.choice(EVASIONS)(text, rng) for text in plain]
+    normalize_text(obfuscated[0])  # Build the table outside the timing
+    ascii_us = p50_us(normalize_text, plain)
+    unicode_us = p50_us(normalize_text, obfuscated)
+    engine.detect(plain[0])  # Load the sentiment lexicon outside the timing
+    detect_us = p50_us(engine.detect, plain)
+    print(f"[INFO] normalize_text p50: {ascii_us:.1f}us ASCII, {unicode_us:.1f}us obfuscated; "
+          f"detect p50 {detect_us:.1f}us")
+
+    ok = ok and extracted and ascii_us < detect_us * 0.1
+    print(f"{'[OK]' if ok else '[FAIL]'} every evasion variant keeps its verdict, normalization "
+          f"{ascii_us / detect_us:.1%} of detection time on plain text")
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Offload Benchmark - inline vs process-pool execution under concurrent load
+Client threads send a mix of short chat messages and long pasted scam texts through
+ScamDetectionEngine.detect + IntelligenceExtractor.extract, the way request threads of a
+threaded server do. Reports p50/p99 per execution mode and message size, and fails if the
+two modes disagree on any verdict or extracted entity. Then scores one large
+detect_batch inline and split across the workers, and checks the verdicts agree.
+
+Run: python benchmarks/bench_offload.py [--requests 600] [--clients 8] [--workers 2]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.scam_detector import ScamDetectionEngine
+from src.intelligence_extractor import IntelligenceExtractor
+from src.offload import ProcessOffloader
+
+SHORT = [
+    "Hi, are we still meeting for lunch tomorrow? ref {n}",
+    "URGENT: Your account will be blocked. Verify UPI immediately at help{n}@ybl",
+    "Congratulations! You won the lottery, claim your prize now {n}",
+    "Meeting moved to 4pm, see you there {n}",
+]
+LONG_LINE = ("Dear customer, your KYC is pending and the account will be blocked today. Verify UPI at "
+             "help{n}@ybl or call 98765{n:05d}, or update at http://sbi-kyc{n}.in/login with card {n:012d}. ")
+
+def build_requests(count: int, long_share: float, long_lines: int, seed: int = 9) -> list:
+    rng = random.Random(seed)
+    requests = []
+    for number in range(count):
+        if rng.random() < long_share:
+            requests.append(("long", "".join(LONG_LINE.format(n=number * 1000 + i) for i in range(long_lines))))
+        else:
+            requests.append(("short", rng.choice(SHORT).format(n=number)))
+    return requests
+
+def handle(engine: ScamDetectionEngine, extractor: IntelligenceExtractor, text: str) -> tuple:
+    """What a conversation request does with a message: detect, then extract"""
+    started = time.perf_counter()
+    detection = engine.detect(text).to_dict()
+    entities = {k.value: [e.to_dict() for e in v] for k, v in extractor.extract(text).items()}
+    return time.perf_counter() - started, (detection, entities)
+
+def run(mode: str, requests: list, clients: int, offloader: ProcessOffloader = None) -> tuple:
+    engine = ScamDetectionEngine(offloader=offloader)
+    extractor = IntelligenceExtractor(offloader=offloader)
+    handle(engine, extractor, SHORT[0].format(n=0))  # Lexicon load outside the timing
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        outcomes = list(pool.map(lambda request: handle(engine, extractor, request[1]), requests))
+    elapsed = time.perf_counter() - started
+
+    print(f"\n{mode} ({len(requests) / elapsed:.0f} requests/s)")
+    for size in ("short", "long"):
+        latencies = sorted(o[0] * 1000 for o, r in zip(outcomes, requests) if r[0] == size)
+        if latencies:
+            p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)]
+            print(f"  {size:5} x{len(latencies):4}  p50 {statistics.median(latencies):7.2f}ms  p99 {p99:7.2f}ms")
+    return [o[1] for o in outcomes]
+
+def run_batch(texts: list, offloader: ProcessOffloader = None) -> tuple:
+    """(seconds, verdicts) of one detect_batch on a fresh engine"""
+    engine = ScamDetectionEngine(offloader=offloader)
+    started = time.perf_counter()
+    results = engine.detect_batch(texts)
+    return time.perf_counter() - started, [result.to_dict() for result in results]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--long-share", type=float, default=0.2)
+    parser.add_argument("--long-lines", type=int, default=60, help="~240 chars per line")
+    parser.add_argument("--batch", type=int, default=500, help="Distinct messages in the batch run")
+    args = parser.parse_args()
+    requests = build_requests(args.requests, args.long_share, args.long_lines)
+
+    print("=" * 80)
+    print(f"[BENCH] DETECTION OFFLOAD ({args.requests} requests, {args.clients} client threads, "
+          f"{os.cpu_count()} CPUs)")
+    print("=" * 80)
+    inline = run("inline", requests, args.clients)
+
+    offloader = ProcessOffloader(min_chars=2000, workers=args.workers)
+    started = time.perf_counter()
+    offloader.warm_up(wait_seconds=60)
+    print(f"\n[INFO] {args.workers} workers warm in {(time.perf_counter() - started) * 1000:.0f}ms")
+    try:
+        offloaded = run(f"process (messages >= {offloader.min_chars} chars offloaded)", requests,
+                        args.clients, offloader)
+        stats = offloader.get_stats()
+        batch = [SHORT[n % len(SHORT)].format(n=n) for n in range(args.batch)]
+        inline_s, inline_batch = run_batch(batch)
+        offloaded_s, offloaded_batch = run_batch(batch, offloader)
+        batch_tasks = offloader.get_stats()["detect"]["tasks"] - stats["detect"]["tasks"]
+    finally:
+        offloader.shutdown()
+    print(f"\n[INFO] offloaded: {stats['detect']['tasks']} detections (avg {stats['detect']['avg_ms']}ms), "
+          f"{stats['extract']['tasks']} extractions (avg {stats['extract']['avg_ms']}ms)")
+
+    batch_mismatches = sum(1 for a, b in zip(inline_batch, offloaded_batch) if a != b)
+    print(f"[INFO] detect_batch of {args.batch}: inline {inline_s * 1000:.0f}ms, split into {batch_tasks} "
+          f"worker tasks {offloaded_s * 1000:.0f}ms ({batch_mismatches} mismatches)")
+
+    mismatches = sum(1 for a, b in zip(inline, offloaded) if a != b) + batch_mismatches
+    print(f"{'[OK]' if mismatches == 0 else '[FAIL]'} identical verdicts and entities in both modes "
+          f"({mismatches} mismatches)")
+    sys.exit(0 if mismatches == 0 else 1)
+
+if __name__ == '__main__':
+    main()
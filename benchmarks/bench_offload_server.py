@@ -0,0 +1,111 @@
+"""
+Offload Server Check - long messages through the worker pool of a running server
+Starts the API the way the Dockerfile does (python -m src.api) in process execution mode,
+with persistence and rule profiling on and the campaign index off, and sends long messages
+over HTTP. Spawned workers re-import the server's __main__ module; the check fails if any
+of them runs the server's startup again (restoring conversations, starting a pool of its
+own), if the pool ever restarts, if the long messages were not scored by a worker, or if
+the server's tier statistics and rule profile leave out what the workers scored.
+
+Run: python benchmarks/bench_offload_server.py [--messages 20] [--workers 2]
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+HEADERS = {"Content-Type": "application/json", "X-API-Key": "test_key_12345"}
+LONG_LINE = ("Dear customer, your KYC is pending and the account will be blocked today. Verify UPI at "
+             "help{n}@ybl or call 98765{n:05d}, or update at http://sbi-kyc{n}.in/login right now. ")
+
+def call(port: int, path: str, payload: dict = None) -> dict:
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(f"http://127.0.0.1:{port}{path}", data=data, headers=HEADERS)
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return json.loads(response.read())
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--long-lines", type=int, default=20, help="~190 chars per line")
+    args = parser.parse_args()
+
+    port = free_port()
+    workdir = tempfile.mkdtemp(prefix="bench_offload_server_")
+    env = dict(os.environ, API_PORT=str(port), DETECTION_EXECUTION_MODE="process",
+               OFFLOAD_WORKERS=str(args.workers), CAMPAIGN_INDEX_ENABLED="false", PERSIST_CONVERSATIONS="true",
+               RULE_PROFILING_ENABLED="true",
+               DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'honeypot.db')}")
+    log_path = os.path.join(workdir, "server.log")
+    print("=" * 80)
+    print(f"[BENCH] OFFLOAD THROUGH A RUNNING SERVER (python -m src.api, {args.workers} workers)")
+    print("=" * 80)
+
+    with open(log_path, "w") as log:
+        server = subprocess.Popen([sys.executable, "-m", "src.api"], cwd=ROOT, env=env,
+                                  stdout=log, stderr=subprocess.STDOUT)
+        try:
+            deadline = time.time() + 60
+            while True:
+                try:
+                    call(port, "/health")
+                    break
+                except OSError:
+                    if time.time() > deadline or server.poll() is not None:
+                        raise RuntimeError("server did not come up")
+                    time.sleep(0.2)
+            # Let every worker finish its warm-up before counting tasks
+            time.sleep(2)
+            started = time.perf_counter()
+            verdicts = [call(port, "/api/v1/detect-scam", {"message": "".join(
+                LONG_LINE.format(n=n * 100 + i) for i in range(args.long_lines))})["detection"]
+                for n in range(args.messages)]
+            elapsed = time.perf_counter() - started
+            statistics = call(port, "/api/v1/statistics")
+            offload = statistics["offload"]
+            evaluated = statistics["detection_tiers"]["evaluated"]
+            profiled = call(port, "/api/v1/debug/rules")["messages"]
+        finally:
+            server.send_signal(signal.SIGINT)
+            try:
+                server.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                server.kill()
+    with open(log_path) as log:
+        output = log.read()
+
+    restores = output.count("persisted conversations")
+    worker_startups = output.count("__mp_main__")
+    errors = output.count("RuntimeError")
+    print(f"[INFO] {args.messages} long messages in {elapsed * 1000:.0f}ms, "
+          f"{sum(v['is_scam'] for v in verdicts)} flagged")
+    print(f"[INFO] offload: {offload['detect']['tasks']} detections (avg {offload['detect']['avg_ms']}ms), "
+          f"{offload['restarts']} pool restarts")
+    print(f"[INFO] server stats: {evaluated} messages through the tiers, {profiled} rule-profiled")
+    print(f"[INFO] server startups logged: {restores}, by a worker: {worker_startups}, RuntimeErrors: {errors}")
+
+    ok = (offload["detect"]["tasks"] >= args.messages and offload["restarts"] == 0 and
+          restores == 1 and worker_startups == 0 and errors == 0 and
+          evaluated >= args.messages and profiled >= args.messages)
+    print(f"{'[OK]' if ok else '[FAIL]'} long messages scored by the workers and counted by the server, "
+          f"startup ran once, in the server")
+    if not ok:
+        print(output[-3000:])
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+"""
+Persistence Benchmark - write-behind SQLite against the in-memory store
+Plays --conversations conversations of --turns turns through a MemoryManager (scammer
+message with entities, intelligence records, state update, victim reply) three ways:
+memory only, written behind to SQLite, and written through (committing inside every turn,
+what a request waiting on disk would pay). Reports turns per second and per-turn p99, and
+how long the writer takes to drain. Then checks the database is in WAL mode and holds every
+row, that a fresh manager restores conversations exporting the same JSON, that a
+conversation evicted for capacity comes back with its history rather than replacing it,
+that rows idle past the timeout are pruned, and that a process killed mid-stream loses
+only what was queued since the last flush.
+
+Run: python benchmarks/bench_persistence.py [--conversations 2000] [--turns 10]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.intelligence_extractor import IntelligenceExtractor
+from src.memory_store import MemoryManager
+from src.persistence import ConversationPersistence
+
+SCAM_MESSAGES = [
+    "URGENT: your SBI account is blocked. Pay the fine to verify@paytm or call 9876543210",
+    "Your KYC expired, update at http://sbi-kyc-update.xyz/login within 2 hours",
+    "Transfer Rs 4999 to account 123456789012 IFSC SBIN0001234 to release your refund",
+    "Mail your documents to refunds.desk@gmail.com and share the OTP sent to you",
+    "Sir this is the final warning, police case will be filed today itself",
+]
+REPLY = "Which bank are you calling from sir? Can you explain again slowly?"
+KEYWORDS = ["urgent", "blocked", "verify"]
+CRASH_FLUSH_INTERVAL = 0.2
+
+def play_turn(manager, extracted, n: int, turn: int):
+    """One request's worth of updates to conversation n"""
+    memory = manager.get_or_create(f"conv-{n}", "Rajesh")
+    found = extracted[turn % len(SCAM_MESSAGES)]
+    with memory.lock:
+        memory.add_message("scammer", f"{SCAM_MESSAGES[turn % len(SCAM_MESSAGES)]} [{n}:{turn}]", KEYWORDS, found)
+        for entity_type, entities in found.items():
+            for entity in entities:
+                memory.add_extracted_intelligence(entity_type.value, entity.value, entity.confidence, entity.metadata)
+        memory.update_state(scam_detected=True, strategy="extraction", trust_level=min(turn / 10, 1.0))
+        memory.add_message("victim", f"{REPLY} [{n}:{turn}]")
+
+def run(manager, extracted, conversations: int, turns: int, after_turn=None) -> tuple:
+    """(turns per second, p99 ms) playing every conversation turn by turn"""
+    latencies = []
+    started = time.perf_counter()
+    for turn in range(turns):
+        for n in range(conversations):
+            turn_started = time.perf_counter()
+            play_turn(manager, extracted, n, turn)
+            if after_turn:
+                after_turn()
+            latencies.append(time.perf_counter() - turn_started)
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return len(latencies) / elapsed, latencies[int(len(latencies) * 0.99)] * 1000
+
+def exported(manager) -> dict:
+    """conversation_id -> exported JSON, less the summary's wall-clock duration"""
+    exports = {}
+    for memory in manager.active_conversations.values():
+        export = memory.export_to_dict()
+        export["summary"].pop("duration_minutes")
+        exports[memory.conversation_id] = json.dumps(export, sort_keys=True, default=str)
+    return exports
+
+def crash_child(path: str):
+    """Write, let the writer catch up, write more, then die without closing"""
+    extractor = IntelligenceExtractor()
+    extracted = [extractor.extract(text) for text in SCAM_MESSAGES]
+    manager = MemoryManager(1000, 7200, persistence=ConversationPersistence(path, CRASH_FLUSH_INTERVAL))
+    run(manager, extracted, 100, 2)
+    time.sleep(CRASH_FLUSH_INTERVAL * 5)
+    run(manager, extracted, 100, 2)
+    os._exit(1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--conversations", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--crash-child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.crash_child:
+        crash_child(args.crash_child)
+
+    extractor = IntelligenceExtractor()
+    extracted = [extractor.extract(text) for text in SCAM_MESSAGES]
+    workdir = tempfile.mkdtemp(prefix="bench_persistence_")
+    capacity = args.conversations * 2
+
+    print("=" * 80)
+    print(f"[BENCH] WRITE-BEHIND PERSISTENCE ({args.conversations} conversations x {args.turns} turns)")
+    print("=" * 80)
+    memory_rate, memory_p99 = run(MemoryManager(capacity, 7200), extracted, args.conversations, args.turns)
+    print(f"memory only        {memory_rate:9.0f} turns/s   p99 {memory_p99:6.3f}ms")
+
+    path = os.path.join(workdir, "behind.db")
+    persistence = ConversationPersistence(path)
+    manager = MemoryManager(capacity, 7200, persistence=persistence)
+    behind_rate, behind_p99 = run(manager, extracted, args.conversations, args.turns)
+    drain_started = time.perf_counter()
+    persistence.flush()
+    drain_ms = (time.perf_counter() - drain_started) * 1000
+    stats = persistence.get_stats()
+    print(f"write-behind       {behind_rate:9.0f} turns/s   p99 {behind_p99:6.3f}ms   "
+          f"({stats['flushes']} flushes, {drain_ms:.0f}ms to drain the rest)")
+
+    through = ConversationPersistence(os.path.join(workdir, "through.db"), flush_interval_seconds=3600)
+    through_manager = MemoryManager(capacity, 7200, persistence=through)
+    through_rate, through_p99 = run(through_manager, extracted, min(args.conversations, 500), args.turns,
+                                    after_turn=through.flush)
+    through.close()
+    print(f"write-through      {through_rate:9.0f} turns/s   p99 {through_p99:6.3f}ms   "
+          f"(commit in every turn, {min(args.conversations, 500)} conversations)")
+
+    # Database: WAL mode and every row
+    reader = sqlite3.connect(path)
+    journal_mode = reader.execute("PRAGMA journal_mode").fetchone()[0]
+    conversations = reader.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+    messages = reader.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+    records = reader.execute("SELECT COUNT(*) FROM intelligence").fetchone()[0]
+    reader.close()
+    expected_records = sum(sum(len(entities) for entities in memory.extracted_intelligence.values())
+                           for memory in manager.active_conversations.values())
+    rows_ok = (journal_mode == "wal" and conversations == args.conversations and
+               messages == args.conversations * args.turns * 2 and records == expected_records and
+               stats["dropped"] == 0)
+    print(f"[INFO] journal_mode={journal_mode}, {conversations} conversations, {messages} messages, "
+          f"{records} intelligence records saved: {rows_ok}")
+
+    # Restart: a new manager restores conversations exporting the same JSON
+    before = exported(manager)
+    manager.shutdown()
+    restarted = MemoryManager(capacity, 7200, persistence=ConversationPersistence(path))
+    restore_started = time.perf_counter()
+    restored = restarted.restore()
+    restore_s = time.perf_counter() - restore_started
+    after = exported(restarted)
+    restore_ok = restored == args.conversations and after == before
+    restore_ok = restore_ok and restarted.get_total_intelligence_count() == expected_records
+    print(f"[INFO] restored {restored} conversations in {restore_s:.2f}s, exports identical: {restore_ok}")
+    restarted.shutdown()
+
+    # Resume: one shard with room for 10, so every turn evicts conv-0 whatever the hash seed. With no
+    # flush in between, conv-0 first comes back from its queued writes, then from the database
+    resume_path = os.path.join(workdir, "resume.db")
+    resume = ConversationPersistence(resume_path, flush_interval_seconds=3600)
+    small = MemoryManager(10, 7200, shards=1, persistence=resume)
+    run(small, extracted, 20, 2)
+    evicted = "conv-0" not in small.active_conversations
+    queued = small.get_or_create("conv-0", "Rajesh")
+    from_queue = len(queued.message_history)
+    before_eviction = json.dumps(queued.export_to_dict(), sort_keys=True, default=str)
+    resume.flush()
+    for n in range(10, 20):
+        small.get_or_create(f"conv-{n}", "Rajesh")
+    evicted = evicted and "conv-0" not in small.active_conversations
+    memory = small.get_or_create("conv-0", "Rajesh")
+    from_database = json.dumps(memory.export_to_dict(), sort_keys=True, default=str)
+    resume.flush()
+    reader = sqlite3.connect(resume_path)
+    kept = reader.execute("SELECT COUNT(*) FROM messages WHERE conversation_id = 'conv-0'").fetchone()[0]
+    resume_ok = (evicted and from_queue == 4 and kept == 4 and memory.current_state.scam_detected and
+                 memory is not queued and from_database == before_eviction)
+    print(f"[INFO] evicted conversation resumed with {from_queue}/4 messages from the queue, the same from "
+          f"the database, {kept}/4 still saved: {resume_ok}")
+
+    # Retention: an evicted conversation idle past the timeout is pruned with its rows, and not resumed
+    reader.execute("UPDATE conversations SET updated_at = updated_at - 7260 WHERE conversation_id = 'conv-2'")
+    reader.commit()
+    stale = resume.load_conversation("conv-2", time.time() - 7200)
+    pruned = resume.prune(time.time() - 7200)
+    orphans = reader.execute("SELECT COUNT(*) FROM messages WHERE conversation_id = 'conv-2'").fetchone()[0]
+    remaining = reader.execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+    reader.close()
+    prune_ok = stale is None and pruned == 1 and orphans == 0 and remaining == 19
+    print(f"[INFO] pruned {pruned} conversation idle past the timeout, {remaining} kept, "
+          f"{orphans} orphaned messages: {prune_ok}")
+    small.shutdown()
+
+    # Crash: everything queued before the last flush survives a killed process
+    crash_path = os.path.join(workdir, "crash.db")
+    subprocess.run([sys.executable, os.path.abspath(__file__), "--crash-child", crash_path])
+    reader = sqlite3.connect(crash_path)
+    integrity = reader.execute("PRAGMA integrity_check").fetchone()[0]
+    survived = reader.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+    reader.close()
+    crash_ok = integrity == "ok" and 400 <= survived <= 800
+    print(f"[INFO] killed mid-stream: {survived}/800 messages survived, the 400 written before the last "
+          f"flush interval all kept, integrity {integrity}: {crash_ok}")
+
+    ok = rows_ok and restore_ok and resume_ok and prune_ok and crash_ok and behind_rate > through_rate
+    print(f"{'[OK]' if ok else '[FAIL]'} write-behind runs at {behind_rate / memory_rate:.0%} of memory-only "
+          f"throughput, {behind_rate / through_rate:.1f}x write-through")
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Phishing Analysis Benchmark - cached link risk scoring on campaign traffic
+Scores generated campaign links (a few hundred registered domains, each sent with many
+paths and subdomains) with the cached PhishingAnalyzer and with the per-call regex
+scoring analyze_phishing_risk used before. Checks a labelled set of links (brands' own
+domains, impersonations, look-alikes, shorteners, obfuscated hosts) and that extraction
+attaches a verdict to every link, and reports the cost per link cold and cached.
+
+Run: python benchmarks/bench_phishing.py [--links 100000]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.intelligence_extractor import IntelligenceExtractor
+from src.phishing_analysis import PhishingAnalyzer
+
+# (link, brand it belongs to or imitates, whether it should score as risky)
+LABELLED = [
+    ("https://www.hdfcbank.com/personal/login", "hdfc", False),
+    ("https://retail.onlinesbi.sbi/retail/login.htm", "sbi", False),
+    ("https://kyc.sbi.bank.in/", "sbi", False),
+    ("https://www.amazon.in/deal", "amazon", False),
+    ("https://example.com/about", None, False),
+    ("https://hdfcbank-login.com/verify", "hdfc", True),
+    ("https://sbi-kyc-update.in/", "sbi", True),
+    ("https://secure.icici.account-verify.co.in/", "icici", True),
+    ("https://paypa1.com/signin", "paypal", True),
+    ("https://flipkrt.shop/big-sale", "flipkart", True),
+    ("https://micros0ft-support.com/", "microsoft", True),
+    ("https://sbi-rewards.vercel.app/claim", "sbi", True),
+    ("https://bit.ly/3xKyc", None, True),
+    ("https://secure-login-bankingsecure.com/", None, True),
+    ("https://www.sbi.co.in@paytm-refund.xyz/", "paytm", True),
+    ("http://103.21.4.8/netbanking", None, True),
+]
+
+def legacy_risk(url: str) -> dict:
+    """analyze_phishing_risk as it was: four regexes and a brand loop on every call"""
+    risk_factors = {"mimics_legitimate": False, "suspicious_domain": False, "obfuscated": False, "risk_score": 0.0}
+    suspicious_patterns = [r'bit\.ly|tinyurl|short\.link', r'secure-.*-.*\.',
+                           r'verify.*\..*\.(.*\.)?.*\.com', r'.*login.*bankingsecure']
+    for pattern in suspicious_patterns:
+        if re.search(pattern, url, re.IGNORECASE):
+            risk_factors["suspicious_domain"] = True
+            risk_factors["risk_score"] += 0.3
+    for domain in ['hdfc', 'icici', 'axis', 'sbi', 'paypal', 'google', 'amazon']:
+        if domain in url.lower() and url.count('.') > 2:
+            risk_factors["mimics_legitimate"] = True
+            risk_factors["risk_score"] += 0.4
+    risk_factors["risk_score"] = min(risk_factors["risk_score"], 1.0)
+    return risk_factors
+
+def campaign_links(count: int, rng: random.Random) -> list:
+    """Links from a few hundred campaign domains, each with varying subdomains and paths"""
+    brands = ["sbi", "hdfc", "icici", "axis", "paytm", "amazon", "flipkart", "kotak"]
+    words = ["kyc", "update", "secure", "verify", "reward", "refund", "alert", "login"]
+    suffixes = ["in", "co.in", "com", "xyz", "top", "online", "vercel.app"]
+    domains = [f"{rng.choice(brands)}-{rng.choice(words)}{rng.randint(1, 99)}.{rng.choice(suffixes)}"
+               for _ in range(300)]
+    links = []
+    for _ in range(count):
+        host = rng.choice(domains)
+        if rng.random() < 0.3:
+            host = f"{rng.choice(words)}.{host}"
+        links.append(f"https://{host}/{rng.choice(words)}?id={rng.randint(0, 10 ** 6)}")
+    return links
+
+def per_link_us(fn, links: list, rounds: int = 3) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for link in links:
+            fn(link)
+        best = min(best, time.perf_counter() - started)
+    return best / len(links) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--links", type=int, default=100000)
+    args = parser.parse_args()
+    rng = random.Random(20)
+
+    print("=" * 80)
+    print(f"[BENCH] PHISHING ANALYSIS ({args.links} links)")
+    print("=" * 80)
+    errors = 0
+    analyzer = PhishingAnalyzer()
+    for link, brand, risky in LABELLED:
+        verdict = analyzer.analyze(link)
+        wrong = verdict["impersonates"] != brand or (verdict["risk_score"] >= 0.3) != risky
+        errors += wrong
+        print(f"{'MISS' if wrong else 'ok':4} {link:50} {verdict['risk_score']:.2f} {','.join(verdict['reasons'])}")
+
+    extracted = IntelligenceExtractor().extract(" and ".join(link for link, _, _ in LABELLED))
+    scored = sum(1 for v in extracted.values() for e in v if "phishing_risk" in (e.metadata or {}))
+    links_found = sum(len(v) for k, v in extracted.items() if k.value == "phishing_links")
+    errors += scored != links_found or scored == 0
+    print(f"[INFO] extraction attached a verdict to {scored} of {links_found} links")
+
+    links = campaign_links(args.links, rng)
+    legacy_us = per_link_us(legacy_risk, links)
+    cold = PhishingAnalyzer()
+    cold_us = per_link_us(cold.analyze, links, rounds=1)
+    cached_us = per_link_us(cold.analyze, links)
+    stats = cold.get_stats()
+    print(f"legacy regex scoring   {legacy_us:6.2f}us/link")
+    print(f"analyzer, first pass   {cold_us:6.2f}us/link   ({stats['size']} domains analyzed)")
+    print(f"analyzer, cached       {cached_us:6.2f}us/link   hit rate {stats['hit_rate']:.4f}")
+
+    ok = errors == 0 and cached_us < legacy_us
+    print(f"{'[OK]' if ok else '[FAIL]'} labelled links scored as expected ({errors} errors), "
+          f"cached scoring {legacy_us / cached_us:.1f}x faster than the regex scoring")
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
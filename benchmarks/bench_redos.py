@@ -0,0 +1,151 @@
+"""
+Adversarial Matching Benchmark - worst-case latency of the detection patterns
+Feeds crafted inputs up to the 5000-character engage_scammer limit to the original
+re.search loops and to the linear-time RuleMatcher of both detection engines, and checks
+that rule-pack fragments which would backtrack are refused when compiled.
+
+Run: python benchmarks/bench_redos.py [--sizes 500,1000,2000,5000]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import main as main_api
+from src.rule_matcher import RuleMatcher, compile_chains
+from src.scam_detector import ScamDetectionEngine
+
+# Tokens that open a `.*` chain but never complete it
+ADVERSARIAL_UNITS = {
+    "verify-no-upi": "verify ",
+    "single-i": "i ",
+    "account-no-block": "account ",
+    "won-no-lottery": "won ",
+    "bank-name-no-bank": "hdfc ",
+    "urgent-no-atm": "urgent ",
+    "fragment-soup": "confirm update claim get send ",
+}
+
+# Rule-pack patterns whose fragments re.search could backtrack on, and ones it cannot
+REJECTED_PATTERNS = [r"\w+\w+\w+!", r"\w+!", r"a\w*!", r"(?:\w+)+x", r"(a)\1", r"@\w+.*x"]
+ACCEPTED_PATTERNS = [r"@[a-zA-Z0-9._-]+", r"from\s+(?:hdfc|sbi)", r"pay.*to\s+\d{10}", r"otp.*@\w+"]
+
+def build_message(unit: str, size: int) -> str:
+    """Repeat unit up to size characters"""
+    return (unit * (size // len(unit) + 1))[:size]
+
+def main_legacy(text: str) -> set:
+    """Original main.py loop: re.search per phishing pattern"""
+    text = text.lower()
+    return {i for i, (pattern, _, _) in enumerate(main_api.scam_detector.phishing_patterns)
+            if re.search(pattern, text)}
+
+def main_linear(text: str) -> set:
+    hits, _ = main_api.scam_detector.matcher.match(text.lower())
+    return {rule.index for rule in hits}
+
+def src_legacy(patterns: list, text: str) -> set:
+    """Original src/scam_detector loop: re.search per pattern, IGNORECASE"""
+    text = text.lower()
+    return {i for i, pattern in enumerate(patterns) if re.search(pattern, text, re.IGNORECASE)}
+
+def worst_ms(fn, text: str, repeats: int = 3) -> float:
+    """Worst wall time over a few runs, in milliseconds"""
+    worst = 0.0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(text)
+        worst = max(worst, time.perf_counter() - start)
+    return worst * 1000
+
+def fuzz_corpus(fragments: list, count: int, seed: int = 11) -> list:
+    rng = random.Random(seed)
+    glue = [" ", "", "\n", "@ybl ", " from  ", "ing ", "!\n", "x"]
+    return ["".join(rng.choice(fragments) + rng.choice(glue) for _ in range(rng.randint(1, 8)))
+            for _ in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="500,1000,2000,5000")
+    parser.add_argument("--budget-ms", type=float, default=0.05)
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    src_engine = ScamDetectionEngine()
+    src_patterns = [rule.pattern for rule in src_engine.matcher.rules]
+
+    def src_linear(text: str) -> set:
+        hits, _ = src_engine.matcher.match(text.lower())
+        return {rule.index for rule in hits}
+
+    print("=" * 80)
+    print("[BENCH] ADVERSARIAL PATTERN MATCHING")
+    print("=" * 80)
+
+    # Same verdicts as the backtracking engine
+    failures = 0
+    for name, legacy, linear, matcher in (
+        ("main", main_legacy, main_linear, main_api.scam_detector.matcher),
+        ("src", lambda t: src_legacy(src_patterns, t), src_linear, src_engine.matcher),
+    ):
+        fragments = sorted({f for rule in matcher.rules for chain in rule.chains
+                            for f in chain if isinstance(f, str)})
+        corpus = fuzz_corpus(fragments, 10000) + [build_message(u, 800) for u in ADVERSARIAL_UNITS.values()]
+        mismatches = sum(1 for text in corpus if legacy(text) != linear(text))
+        failures += mismatches
+        status = "[OK]" if mismatches == 0 else "[FAIL]"
+        print(f"{status} {name:5} identical rule hits on {len(corpus)} messages ({mismatches} mismatches)")
+
+    # Worst-case latency growth
+    worst_linear = 0.0
+    for name, legacy, linear in (
+        ("main", main_legacy, main_linear),
+        ("src", lambda t: src_legacy(src_patterns, t), src_linear),
+    ):
+        print(f"\n[INFO] {name} engine - worst ms per message")
+        print(f"{'input':20} {'chars':>6} {'backtracking':>13} {'linear':>9}")
+        print("-" * 52)
+        for label, unit in ADVERSARIAL_UNITS.items():
+            for size in sizes:
+                text = build_message(unit, size)
+                before = worst_ms(legacy, text)
+                after = worst_ms(linear, text)
+                worst_linear = max(worst_linear, after)
+                print(f"{label:20} {size:6} {before:13.2f} {after:9.2f}")
+
+    # Rule packs: backtracking fragments are refused, the rest stay linear
+    accepted = []
+    for pattern in REJECTED_PATTERNS + ACCEPTED_PATTERNS:
+        verdicts = []
+        for compile_pattern in (lambda p: compile_chains(p, re.IGNORECASE), main_api._compile_chains):
+            try:
+                compile_pattern(pattern)
+                verdicts.append(True)
+            except ValueError:
+                verdicts.append(False)
+        if verdicts != [pattern in ACCEPTED_PATTERNS] * 2:
+            failures += 1
+        accepted.append(f"{pattern}={'/'.join('ok' if v else 'refused' for v in verdicts)}")
+    pack = RuleMatcher([(pattern, pattern, 1.0, None) for pattern in ACCEPTED_PATTERNS], ignore_case=True)
+    pack_ms = max(worst_ms(lambda t: pack.match(t), build_message(unit, max(sizes)))
+                  for unit in ("a", "@a", "from ", "otp @", "pay to 1"))
+    print(f"\n[INFO] Rule pack fragments (src/main): {', '.join(accepted)}")
+    print(f"[INFO] Accepted fragments, worst ms at {max(sizes)} chars: {pack_ms:.2f}")
+
+    # Budget: evaluation stops early and reports an incomplete verdict
+    text = build_message("verify upi account verify won lottery claim prize hdfc bank ", max(sizes))
+    start = time.perf_counter()
+    hits, complete = src_engine.matcher.match(text.lower(), args.budget_ms / 1000)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"\n[INFO] Budget {args.budget_ms}ms: {len(hits)} hits, complete={complete}, {elapsed:.2f}ms")
+
+    print(f"\n[INFO] Worst linear-mode latency: {worst_linear:.2f}ms")
+    sys.exit(0 if failures == 0 else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Rule Matcher Benchmark - main.ScamDetectionEngine.detect
+Compares the compiled RuleMatcher against the original per-pattern re.search loop
+and checks that every verdict is identical.
+
+Run: python benchmarks/bench_rule_matcher.py [--iterations N]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from main import ScamDetectionEngine, ScamDetectionResult, ScamType, SCAM_TYPE_BY_NAME
+
+SAMPLE_MESSAGES = [
+    "Your account will be blocked today. Verify your UPI immediately at helpdesk@ybl",
+    "Congratulations! You have won 10 lakh rupees in the lottery. Claim your prize now!",
+    "Hello, just checking in with you about dinner tonight",
+    "Dear customer, your package delivery failed. Update payment details to reschedule delivery.",
+    "This is calling from the bank on behalf of the RBI. Share your password for security verification.",
+    "Invest in crypto today and double your money with guaranteed returns!",
+    "I have photo of you. Send money unless you want me to post everywhere.",
+    "Your computer is infected with malware, click here to fix it",
+    "Meeting moved to 3pm, see you in the conference room",
+    "Tax return pending. Avoid fine and legal action by paying now.",
+]
+
+def legacy_detect(engine: ScamDetectionEngine, message: str) -> ScamDetectionResult:
+    """The pre-RuleMatcher implementation: one re.search per pattern"""
+    message_lower = message.lower()
+    keywords = re.findall(r'\b\w+\b', message_lower)
+    max_confidence = 0.0
+    detected_type = ScamType.UNKNOWN
+    matched_pattern = ""
+    
+    for pattern, scam_name, confidence in engine.phishing_patterns:
+        if re.search(pattern, message_lower):
+            if confidence > max_confidence:
+                max_confidence = confidence
+                matched_pattern = scam_name
+                if scam_name in SCAM_TYPE_BY_NAME:
+                    detected_type = SCAM_TYPE_BY_NAME[scam_name]
+    
+    return ScamDetectionResult(
+        is_scam=max_confidence > 0.5,
+        scam_type=detected_type,
+        confidence=max_confidence,
+        detection_method="pattern_matching",
+        extracted_keywords=keywords[:5],
+        explanation=f"Matched {matched_pattern}" if matched_pattern else "No specific pattern matched"
+    )
+
+def fuzz_messages(engine: ScamDetectionEngine, count: int, seed: int = 7) -> list:
+    """Random messages built from rule fragments, glue text and newlines"""
+    rng = random.Random(seed)
+    fragments = sorted({f for rule in engine.matcher.rules for chain in rule.chains
+                        for f in chain if isinstance(f, str)})
+    glue = [" ", "", "\n", " the ", "x", "ing ", ", ", "!\n", "you", "on"]
+    messages = []
+    for _ in range(count):
+        parts = []
+        for _ in range(rng.randint(1, 8)):
+            parts.append(rng.choice(fragments).upper() if rng.random() < 0.2 else rng.choice(fragments))
+            parts.append(rng.choice(glue))
+        messages.append("".join(parts))
+    return messages
+
+def time_per_message(fn, messages: list, iterations: int) -> float:
+    """Average microseconds per message"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for message in messages:
+            fn(message)
+    return (time.perf_counter() - start) / (iterations * len(messages)) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--fuzz", type=int, default=20000)
+    args = parser.parse_args()
+    
+    engine = ScamDetectionEngine()
+    # Time the matcher itself, not the result cache in front of it
+    detect = lambda m: engine._detect_uncached(m, engine.matcher)[0]
+    
+    print("=" * 80)
+    print("[BENCH] RULE MATCHER - main.ScamDetectionEngine.detect")
+    print("=" * 80)
+    
+    # Equivalence
+    corpus = SAMPLE_MESSAGES + fuzz_messages(engine, args.fuzz)
+    mismatches = 0
+    for message in corpus:
+        # Compare the served verdict; results also carry per-rule evidence the legacy loop lacks
+        if detect(message).to_dict() != legacy_detect(engine, message).to_dict():
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"[FAIL] Mismatch for: {message!r}")
+    status = "[OK]" if mismatches == 0 else "[FAIL]"
+    print(f"\n{status} Identical results on {len(corpus)} messages ({mismatches} mismatches)")
+    
+    # Throughput
+    print(f"\n{'message':58} {'legacy us':>10} {'compiled us':>12} {'speedup':>8}")
+    print("-" * 92)
+    for message in SAMPLE_MESSAGES:
+        before = time_per_message(lambda m: legacy_detect(engine, m), [message], args.iterations)
+        after = time_per_message(detect, [message], args.iterations)
+        print(f"{message[:56]:58} {before:10.1f} {after:12.1f} {before / after:7.2f}x")
+    
+    before = time_per_message(lambda m: legacy_detect(engine, m), SAMPLE_MESSAGES, args.iterations // 10)
+    after = time_per_message(detect, SAMPLE_MESSAGES, args.iterations // 10)
+    print("-" * 92)
+    print(f"{'AVERAGE':58} {before:10.1f} {after:12.1f} {before / after:7.2f}x")
+    
+    sys.exit(0 if mismatches == 0 else 1)
+
+if __name__ == '__main__':
+    main()
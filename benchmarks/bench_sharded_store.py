@@ -0,0 +1,167 @@
+"""
+Sharded Store Benchmark - conversation store contention under hundreds of threads
+Runs --threads threads against one store, each looking up, creating and counting
+conversations from a shared pool, first through a single lock (one shard, as before) and
+then lock-striped, for the src MemoryManager and the main.py monolith. Reports throughput
+and per-operation latency. Then has the threads post turns (a scammer message and its
+reply) to a few shared conversations while holding each conversation's lock, and checks
+that no turn interleaves with another and none is lost; the same turns without the lock
+are counted for comparison.
+
+Run: python benchmarks/bench_sharded_store.py [--threads 256] [--rounds 3]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import main as monolith
+from src.memory_store import MemoryManager, MemoryStore
+
+POOL = 5000
+
+class LegacyMonolithManager:
+    """main.MemoryManager as it was: one dict behind one lock"""
+
+    def __init__(self):
+        self.conversations = {}
+        self.lock = threading.Lock()
+
+    def create_conversation(self, conversation_id, persona_name):
+        with self.lock:
+            if conversation_id in self.conversations:
+                return self.conversations[conversation_id]
+            store = monolith.MemoryStore(conversation_id, persona_name)
+            self.conversations[conversation_id] = store
+            return store
+
+    def get_conversation(self, conversation_id):
+        with self.lock:
+            return self.conversations.get(conversation_id)
+
+    def get_active_count(self):
+        with self.lock:
+            return len(self.conversations)
+
+def hammer(threads: int, ops: int, lookup, create, count) -> dict:
+    """threads threads doing ops operations each: 80% lookups, 15% creates, 5% counts"""
+    barrier = threading.Barrier(threads + 1)
+    latencies = [[] for _ in range(threads)]
+
+    def worker(n):
+        rng = random.Random(n)
+        timings = latencies[n]
+        barrier.wait()
+        for _ in range(ops):
+            roll = rng.random()
+            conversation_id = f"conv-{rng.randrange(POOL)}"
+            started = time.perf_counter()
+            if roll < 0.80:
+                lookup(conversation_id)
+            elif roll < 0.95:
+                create(conversation_id)
+            else:
+                count()
+            timings.append(time.perf_counter() - started)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    timings = sorted(t for thread_timings in latencies for t in thread_timings)
+    return {
+        "ops_per_s": len(timings) / elapsed,
+        "p50_us": statistics.median(timings) * 1e6,
+        "p99_us": timings[int(len(timings) * 0.99)] * 1e6,
+        "max_ms": timings[-1] * 1e3
+    }
+
+def post_turns(threads: int, turns: int, locked: bool) -> tuple:
+    """Every thread posts turns to a few shared conversations; returns (interleaved, lost) turns"""
+    conversations = [MemoryStore(f"shared-{n}", "") for n in range(4)]
+    barrier = threading.Barrier(threads)
+
+    def worker(n):
+        rng = random.Random(n)
+        barrier.wait()
+        for turn in range(turns):
+            memory = rng.choice(conversations)
+            tag = f"{n}:{turn}"
+            if locked:
+                with memory.lock:
+                    memory.add_message("scammer", tag)
+                    memory.add_message("victim", tag)
+            else:
+                memory.add_message("scammer", tag)
+                memory.add_message("victim", tag)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    interleaved = 0
+    stored = 0
+    for memory in conversations:
+        history = memory.message_history
+        stored += len(history)
+        for scammer, victim in zip(history[::2], history[1::2]):
+            interleaved += scammer.role != "scammer" or victim.content != scammer.content
+    return interleaved, threads * turns - stored // 2
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=256)
+    parser.add_argument("--ops", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"[BENCH] SHARDED CONVERSATION STORE ({args.threads} threads x {args.ops} operations)")
+    print("=" * 80)
+    # Switch threads often, as a busy server does, so lock holders get preempted
+    sys.setswitchinterval(0.0005)
+    results = {}
+    managers = {"src, 1 shard": lambda: MemoryManager(POOL * 2, 7200, shards=1),
+                "src, 16 shards": lambda: MemoryManager(POOL * 2, 7200, shards=16),
+                "main, one lock": LegacyMonolithManager,
+                "main, 16 shards": lambda: monolith.MemoryManager(16)}
+    for label, make in managers.items():
+        # Thread scheduling makes single runs noisy; keep the best of --rounds fresh stores
+        runs = []
+        for _ in range(args.rounds):
+            manager = make()
+            runs.append(hammer(args.threads, args.ops, manager.get_conversation,
+                               lambda conversation_id: manager.create_conversation(conversation_id, ""),
+                               manager.get_active_count))
+        results[label] = r = max(runs, key=lambda run: run["ops_per_s"])
+        print(f"{label:16} {r['ops_per_s']:10.0f} ops/s   p50 {r['p50_us']:6.1f}us   "
+              f"p99 {r['p99_us']:8.1f}us   max {r['max_ms']:7.1f}ms")
+
+    interleaved, lost = post_turns(args.threads, 50, locked=True)
+    bare_interleaved, bare_lost = post_turns(args.threads, 50, locked=False)
+    print(f"[INFO] turns under the conversation lock: {interleaved} interleaved, {lost} lost; "
+          f"without it: {bare_interleaved} interleaved, {bare_lost} lost")
+
+    ok = interleaved == 0 and lost == 0
+    for engine, single, sharded in (("src", "src, 1 shard", "src, 16 shards"),
+                                    ("main", "main, one lock", "main, 16 shards")):
+        speedup = results[sharded]["ops_per_s"] / results[single]["ops_per_s"]
+        print(f"[INFO] {engine}: {speedup:.2f}x throughput, p99 {results[single]['p99_us']:.0f}us -> "
+              f"{results[sharded]['p99_us']:.0f}us with lock striping")
+    print(f"{'[OK]' if ok else '[FAIL]'} every turn applied whole and in order under "
+          f"{args.threads} threads")
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
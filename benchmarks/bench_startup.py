@@ -0,0 +1,92 @@
+"""
+Startup Benchmark - cold start of the src API and its sentiment tier
+Each measurement runs in a fresh interpreter, the way a scaled-to-zero container starts.
+Also checks that the NLTK-free fallback scores exactly like NLTK's VADER.
+
+Run: python benchmarks/bench_startup.py [--runs 5]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+# Hiding nltk from the import system simulates an install without it
+WITHOUT_NLTK = "import sys; sys.modules['nltk'] = None\n"
+
+SCENARIOS = [
+    ("nltk SentimentIntensityAnalyzer()",
+     "from nltk.sentiment import SentimentIntensityAnalyzer\nSentimentIntensityAnalyzer()"),
+    ("compact lexicon analyzer",
+     "from src.sentiment import get_sentiment_analyzer\nget_sentiment_analyzer()"),
+    ("import src.api",
+     "import src.api"),
+    ("import src.api + first detect",
+     "import src.api\nsrc.api.scam_detector.detect('URGENT: verify your account now!')"),
+    ("import src.api + first detect (no nltk)",
+     WITHOUT_NLTK + "import src.api\nsrc.api.scam_detector.detect('URGENT: verify your account now!')"),
+]
+
+def time_snippet(code: str) -> float:
+    """Milliseconds to run code in a fresh interpreter, excluding interpreter startup"""
+    script = ("import time\n_start = time.perf_counter()\n" + code +
+              "\nprint((time.perf_counter() - _start) * 1000)")
+    output = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True,
+                            text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+def check_fallback(count: int) -> int:
+    """Compare the pure-Python scorer with NLTK's on random lexicon text"""
+    from nltk.sentiment import SentimentIntensityAnalyzer
+    from src.sentiment import CompactLexicon, LexiconSentimentAnalyzer
+
+    reference = SentimentIntensityAnalyzer()
+    fallback = LexiconSentimentAnalyzer(CompactLexicon())
+    rng = random.Random(5)
+    vocabulary = list(reference.lexicon)[::5] + [
+        "not", "never", "so", "this", "very", "kind", "of", "but", "least", "at",
+        "URGENT", "BLOCKED", "don't", "account", "verify", "immediately",
+    ]
+    mismatches = 0
+    for _ in range(count):
+        text = " ".join(rng.choice(vocabulary) + rng.choice(["", "", ",", "!", "?", "!!", "."])
+                        for _ in range(rng.randint(1, 15)))
+        if fallback.polarity_scores(text) != reference.polarity_scores(text):
+            mismatches += 1
+    return mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--fuzz", type=int, default=10000)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("[BENCH] COLD START")
+    print("=" * 80)
+    print(f"{'scenario':44} {'median ms':>10} {'max ms':>9}")
+    print("-" * 65)
+    for label, code in SCENARIOS:
+        try:
+            samples = [time_snippet(code) for _ in range(args.runs)]
+        except subprocess.CalledProcessError as e:
+            print(f"{label:44} failed: {e.stderr.strip().splitlines()[-1]}")
+            continue
+        print(f"{label:44} {statistics.median(samples):10.1f} {max(samples):9.1f}")
+
+    try:
+        mismatches = check_fallback(args.fuzz)
+    except LookupError:
+        print("\n[INFO] vader_lexicon not downloaded; skipping fallback equivalence")
+        return
+    status = "[OK]" if mismatches == 0 else "[FAIL]"
+    print(f"\n{status} fallback scores identical to NLTK on {args.fuzz} texts ({mismatches} mismatches)")
+    sys.exit(0 if mismatches == 0 else 1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Watchlist Benchmark - memory-mapped known-identifier matching at scale
+Builds a watchlist of --entries generated UPI IDs, phone numbers and domains from three
+feeds, maps it, and checks that listed values are found under every spelling with their
+sources, that unlisted values are not, and that a link matches its listed domain. Reports
+build and open time, match latency per entity and the extractor's cost per entity with
+and without the watchlist. Also builds a small index through the CLI from CSV.
+
+Run: python benchmarks/bench_watchlist.py [--entries 10000000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from src.intelligence_extractor import IntelligenceExtractor
+from src.watchlist import Watchlist, build_watchlist
+
+FEEDS = ["bank-reports", "telecom-blocklist", "phishing-domains"]
+
+def listed(n: int) -> tuple:
+    """The nth watchlist entry and its feed, generated so any n can be re-derived"""
+    kind = n % 3
+    if kind == 0:
+        return f"fraud{n}@ybl", FEEDS[0]
+    if kind == 1:
+        return f"{6 + n % 4}{n:09d}", FEEDS[1]
+    return f"scam-{n}.in", FEEDS[2]
+
+def entries(count: int):
+    for n in range(count):
+        yield listed(n)
+        if n % 1000 == 0:
+            yield listed(n)[0], FEEDS[(n % 3 + 1) % 3]  # Some values are on two feeds
+
+def latencies_us(fn, values: list) -> list:
+    timings = []
+    for value in values:
+        started = time.perf_counter()
+        fn(value)
+        timings.append((time.perf_counter() - started) * 1e6)
+    return sorted(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=10000000)
+    args = parser.parse_args()
+    rng = random.Random(19)
+
+    print("=" * 80)
+    print(f"[BENCH] WATCHLIST ({args.entries} entries)")
+    print("=" * 80)
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "watchlist.idx")
+        meta = build_watchlist(entries(args.entries), path)
+        started = time.perf_counter()
+        watchlist = Watchlist(path)
+        open_ms = (time.perf_counter() - started) * 1000
+        print(f"[INFO] built {meta['entries']} entries in {meta['build_seconds']:.1f}s, "
+              f"{os.path.getsize(path) / 2 ** 20:.0f} MiB, mapped in {open_ms:.2f}ms")
+
+        errors = 0
+        samples = [rng.randrange(args.entries) for _ in range(20000)]
+        for n in samples:
+            value, feed = listed(n)
+            expected = {feed} | ({FEEDS[(n % 3 + 1) % 3]} if n % 1000 == 0 else set())
+            spelled = f"+91 {value[:5]} {value[5:]}" if value.isdigit() else value.upper()
+            errors += set(watchlist.match(value)) != expected or set(watchlist.match(spelled)) != expected
+        misses = [f"honest{n}@ybl" for n in range(100000)]
+        false_positives = sum(1 for value in misses if watchlist.match(value))
+        domain = listed(2)[0]
+        errors += watchlist.match_entity("phishing_links", f"https://login.{domain}/verify") != [FEEDS[2]]
+        print(f"[INFO] {len(samples)} listed values checked in two spellings, {false_positives} false positives "
+              f"in {len(misses)} unlisted")
+
+        hit_us = latencies_us(watchlist.match, [listed(n)[0] for n in samples])
+        miss_us = latencies_us(watchlist.match, misses[:20000])
+        print(f"match hit   p50 {statistics.median(hit_us):6.2f}us   p99 {hit_us[int(len(hit_us) * 0.99)]:6.2f}us")
+        print(f"match miss  p50 {statistics.median(miss_us):6.2f}us   p99 {miss_us[int(len(miss_us) * 0.99)]:6.2f}us")
+
+        # Every entity kind, about one in three of them listed
+        messages = [f"pay to {listed(n)[0] if n % 3 == 0 else f'help{n}@ybl'} or call {6 + n % 4}{n:09d} "
+                    f"and visit https://secure.{listed(n)[0] if n % 3 == 2 else f'kyc-{n}.in'}/verify"
+                    for n in samples[:5000]]
+        entity_count = sum(len(v) for m in messages for v in IntelligenceExtractor().extract(m).values())
+        costs = {}
+        for label, extractor in (("without", IntelligenceExtractor()), ("with", IntelligenceExtractor(watchlist=watchlist))):
+            best = float("inf")
+            for _ in range(3):
+                started = time.perf_counter()
+                for message in messages:
+                    extractor.extract(message)
+                best = min(best, time.perf_counter() - started)
+            costs[label] = best / entity_count * 1e6
+        flagged = IntelligenceExtractor(watchlist=watchlist).extract(messages[0])
+        reported = any("watchlist" in (e.metadata or {}) for v in flagged.values() for e in v)
+        added_us = costs["with"] - costs["without"]
+        print(f"[INFO] extraction {costs['without']:.2f}us/entity without, {costs['with']:.2f}us/entity with "
+              f"the watchlist (+{added_us:.2f}us)")
+        watchlist.close()
+
+        feed = os.path.join(workdir, "feed.csv")
+        with open(feed, "w") as f:
+            f.write("value,source\nfraud1@ybl,upi-feed\n9876543210,telecom\nevil-kyc.in,domains\n")
+        small = os.path.join(workdir, "small.idx")
+        built = subprocess.run([sys.executable, "-m", "src.watchlist", feed, "--out", small],
+                               cwd=ROOT, capture_output=True, text=True)
+        cli = Watchlist(small)
+        cli_ok = built.returncode == 0 and cli.match("+91 98765 43210") == ["telecom"] and len(cli) == 3
+        cli.close()
+        print(f"[INFO] CLI build from CSV: {'ok' if cli_ok else built.stderr.strip()}")
+
+    ok = errors == 0 and false_positives == 0 and reported and cli_ok and added_us < 20
+    print(f"{'[OK]' if ok else '[FAIL]'} every listed value found with its sources ({errors} errors), "
+          f"{added_us:.2f}us added per entity at {meta['entries']} entries")
+    sys.exit(0 if ok else 1)
+
+if __name__ == '__main__':
+    main()
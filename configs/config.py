@@ -22,6 +22,10 @@ class Config:
     
     # Database
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///honeypot.db")
+    PERSIST_CONVERSATIONS = os.getenv("PERSIST_CONVERSATIONS", "false").lower() == "true"  # Write-behind to DATABASE_URL
+    PERSISTENCE_FLUSH_INTERVAL_SECONDS = float(os.getenv("PERSISTENCE_FLUSH_INTERVAL_SECONDS", 0.5))  # Most a crash loses
+    PERSISTENCE_BATCH_SIZE = int(os.getenv("PERSISTENCE_BATCH_SIZE", 500))  # Queued writes that flush early
+    PERSISTENCE_MAX_QUEUE = int(os.getenv("PERSISTENCE_MAX_QUEUE", 100000))  # Writes dropped past this backlog
     
     # Redis Cache
     REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
@@ -31,9 +35,38 @@ class Config:
     # Agent Configuration
     MAX_CONVERSATION_TURNS = int(os.getenv("MAX_CONVERSATION_TURNS", 50))
     CONVERSATION_TIMEOUT_MINUTES = int(os.getenv("CONVERSATION_TIMEOUT_MINUTES", 60))
+    MAX_ACTIVE_CONVERSATIONS = int(os.getenv("MAX_ACTIVE_CONVERSATIONS", 10000))
+    CONVERSATION_IDLE_TTL_SECONDS = float(os.getenv("CONVERSATION_IDLE_TTL_SECONDS", 7200))
+    CONVERSATION_SWEEP_INTERVAL_SECONDS = float(os.getenv("CONVERSATION_SWEEP_INTERVAL_SECONDS", 60))  # 0: no sweeper
+    CONVERSATION_SHARDS = int(os.getenv("CONVERSATION_SHARDS", 16))  # Independently locked slices of the store
+    
+    # Scam Detection
+    DETECTION_CPU_BUDGET_MS = float(os.getenv("DETECTION_CPU_BUDGET_MS", 50))
+    DETECTION_BATCH_MAX_SIZE = int(os.getenv("DETECTION_BATCH_MAX_SIZE", 500))
+    # Batches with this many distinct messages are split across the offload workers ("process" mode)
+    DETECTION_BATCH_PARALLEL_THRESHOLD = int(os.getenv("DETECTION_BATCH_PARALLEL_THRESHOLD", 64))
+    DETECTION_CACHE_SIZE = int(os.getenv("DETECTION_CACHE_SIZE", 10000))
+    DETECTION_CACHE_TTL_SECONDS = float(os.getenv("DETECTION_CACHE_TTL_SECONDS", 3600))
+    # Skip NLP when the cheap tiers decide the verdict: same verdicts, but confidence leaves NLP out
+    DETECTION_EARLY_EXIT = os.getenv("DETECTION_EARLY_EXIT", "false").lower() == "true"
+    CAMPAIGN_INDEX_ENABLED = os.getenv("CAMPAIGN_INDEX_ENABLED", "true").lower() == "true"
+    CAMPAIGN_INDEX_SIZE = int(os.getenv("CAMPAIGN_INDEX_SIZE", 5000))
+    CAMPAIGN_TTL_SECONDS = float(os.getenv("CAMPAIGN_TTL_SECONDS", 86400))
+    CAMPAIGN_MAX_DISTANCE = int(os.getenv("CAMPAIGN_MAX_DISTANCE", 8))
+    RULE_PROFILING_ENABLED = os.getenv("RULE_PROFILING_ENABLED", "false").lower() == "true"
+    RULE_PROFILE_DUMP_PATH = os.getenv("RULE_PROFILE_DUMP_PATH", "logs/rule_profile.json")
+    RULE_PACK_PATH = os.getenv("RULE_PACK_PATH") or None  # None: bundled src/data/rules/default.json
+    NGRAM_MODEL_PATH = os.getenv("NGRAM_MODEL_PATH") or None  # Trained n-gram classifier; tier off when unset
+    # "inline" scores on the request thread; "process" hands long messages to a worker pool
+    DETECTION_EXECUTION_MODE = os.getenv("DETECTION_EXECUTION_MODE", "inline").lower()
+    OFFLOAD_MIN_CHARS = int(os.getenv("OFFLOAD_MIN_CHARS", 2000))
+    OFFLOAD_WORKERS = int(os.getenv("OFFLOAD_WORKERS", 0)) or None  # None: one per CPU
     
     # Intelligence Extraction
     MIN_ENTITY_CONFIDENCE = float(os.getenv("MIN_ENTITY_CONFIDENCE", 0.75))
+    WATCHLIST_PATH = os.getenv("WATCHLIST_PATH") or None  # Index built by `python -m src.watchlist`; no matching when unset
+    PHISHING_CACHE_SIZE = int(os.getenv("PHISHING_CACHE_SIZE", 10000))
+    PHISHING_CACHE_TTL_SECONDS = float(os.getenv("PHISHING_CACHE_TTL_SECONDS", 3600))
     ENABLE_REGEX_EXTRACTION = os.getenv("ENABLE_REGEX_EXTRACTION", "true").lower() == "true"
     ENABLE_NLP_EXTRACTION = os.getenv("ENABLE_NLP_EXTRACTION", "true").lower() == "true"
     
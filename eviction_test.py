@@ -0,0 +1,209 @@
+"""
+Eviction Test - conversations evicted idle or over capacity, and listeners cleaning up after them
+Idle expiry runs against a stand-in clock swapped into src.eviction, so no check
+sleeps or depends on timing; stores use one shard where eviction order matters.
+
+Run: python eviction_test.py
+"""
+
+import sys
+import zlib
+
+sys.path.insert(0, '.')
+
+from src import eviction
+from src.conversation_store import ShardedConversationStore
+from src.eviction import CAPACITY, DELETED, IDLE, EvictionEngine
+from src.memory_store import MemoryManager
+from src.memory_store_complete import MemoryManager as CompleteMemoryManager
+
+class Clock:
+    """Stand-in for the time module that only moves when advanced"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+def with_clock(test):
+    """Run test(clock) with src.eviction reading the stand-in clock"""
+    def run():
+        real, eviction.time = eviction.time, Clock()
+        try:
+            test(eviction.time)
+        finally:
+            eviction.time = real
+    run.__name__, run.__doc__ = test.__name__, test.__doc__
+    return run
+
+def recorder(engine) -> list:
+    left = []
+    engine.add_listener(lambda key, value, reason: left.append((key, value, reason)))
+    return left
+
+@with_clock
+def test_capacity_evicts_least_recently_active(clock):
+    """Over capacity the least recently active entry goes, and a touch keeps one"""
+    engine = EvictionEngine(max_entries=3, idle_ttl_seconds=60)
+    left = recorder(engine)
+    for key in ("a", "b", "c"):
+        engine.put(key, key.upper())
+        clock.advance(1)
+    assert engine.get("a") == "A"
+    engine.put("d", "D")
+    assert left == [("b", "B", CAPACITY)]
+    assert "b" not in engine and "a" in engine
+    assert engine.values() == ["C", "A", "D"]
+    assert engine.get_stats()["evictions"] == 1
+
+@with_clock
+def test_idle_entries_expire(clock):
+    """Entries idle past the TTL expire on lookup, on insert and on expire()"""
+    engine = EvictionEngine(max_entries=10, idle_ttl_seconds=60)
+    left = recorder(engine)
+    engine.put("a", 1)
+    engine.put("b", 2)
+    clock.advance(30)
+    engine.put("c", 3)
+    clock.advance(30)
+    assert engine.get("a") is None
+    assert left == [("a", 1, IDLE)]
+    assert engine.get("c") == 3
+    engine.put("d", 4)
+    assert left[-1] == ("b", 2, IDLE)
+    clock.advance(59)
+    assert engine.expire() == 0
+    clock.advance(1)
+    assert engine.expire() == 2
+    assert len(engine) == 0
+    assert engine.get_stats()["expirations"] == 4
+
+@with_clock
+def test_get_or_create_replaces_expired_entry(clock):
+    """get_or_create keeps a live entry and replaces an expired one, reporting it idle"""
+    engine = EvictionEngine(max_entries=10, idle_ttl_seconds=60)
+    left = recorder(engine)
+    assert engine.get_or_create("a", lambda: "first") == "first"
+    clock.advance(59)
+    assert engine.get_or_create("a", lambda: "second") == "first"
+    clock.advance(60)
+    assert engine.get_or_create("a", lambda: "third") == "third"
+    assert left == [("a", "first", IDLE)]
+
+@with_clock
+def test_deletes_notify_listeners(clock):
+    """pop() and a put() replacing another value report the old one as deleted"""
+    engine = EvictionEngine(max_entries=10, idle_ttl_seconds=60)
+    left = recorder(engine)
+    value = object()
+    engine.put("a", value)
+    engine.put("a", value)
+    assert left == []
+    engine.put("a", "other")
+    assert left == [("a", value, DELETED)]
+    assert engine.pop("a") == "other"
+    assert engine.pop("a") is None
+    assert left[-1] == ("a", "other", DELETED)
+    assert engine.get_stats()["deletions"] == 2
+
+@with_clock
+def test_failing_listener_does_not_stop_others(clock):
+    """A listener that raises is logged, and the listeners after it still run"""
+    engine = EvictionEngine(max_entries=1, idle_ttl_seconds=60)
+
+    def fail(key, value, reason):
+        raise RuntimeError("listener failed")
+
+    engine.add_listener(fail)
+    left = recorder(engine)
+    engine.put("a", 1)
+    engine.put("b", 2)
+    assert left == [("a", 1, CAPACITY)]
+    assert engine.get("b") == 2
+
+def test_shards_share_capacity():
+    """Shard caps add up to max_entries, there are never more shards than entries, and ids hash by CRC-32"""
+    store = ShardedConversationStore(shards=16, max_entries=50, idle_ttl_seconds=60)
+    assert sum(shard.max_entries for shard in store._shards) == 50
+    assert {shard.max_entries for shard in store._shards} == {3, 4}
+    assert len(ShardedConversationStore(shards=16, max_entries=4)._shards) == 4
+    assert len(ShardedConversationStore(shards=0, max_entries=4)._shards) == 1
+    for n in range(20):
+        key = f"conv-{n}"
+        assert store.shard(key) is store._shards[zlib.crc32(key.encode()) % 16]
+    for n in range(200):
+        store.put(f"conv-{n}", n)
+    assert len(store) == 50
+    assert store.get_stats()["evictions"] == 150
+
+def test_evicted_conversation_is_cleaned_up():
+    """Eviction takes a conversation off the aggregates and runs the listeners, as the API's drop its agent"""
+    for manager in (MemoryManager(2, 7200, shards=1), CompleteMemoryManager(2, 120, shards=1)):
+        agent_controllers = {}
+        manager.add_eviction_listener(lambda conversation_id, memory, reason: agent_controllers.pop(conversation_id, None))
+        first = manager.get_or_create("conv-0", "Rajesh")
+        first.add_message("scammer", "Pay the fine to verify@paytm now")
+        first.update_state(scam_detected=True)
+        for n in range(3):
+            agent_controllers[f"conv-{n}"] = object()
+            manager.get_or_create(f"conv-{n}", "Rajesh")
+        assert sorted(agent_controllers) == ["conv-1", "conv-2"]
+        assert first.aggregates is None
+        assert manager.get_active_count() == 2
+        assert manager.aggregates.total("messages") == 0
+        assert manager.aggregates.total("scam_detections") == 0
+        # Still counted for today: it was first flagged today, evicted or not
+        assert manager.get_scam_count_today() == 1
+        # Changes to an evicted conversation no longer reach the aggregates
+        first.add_message("scammer", "Hello?")
+        assert manager.aggregates.total("messages") == 0
+
+def test_deleted_conversation_is_cleaned_up():
+    """Deleting a conversation runs the listeners too"""
+    manager = MemoryManager(10, 7200, shards=1)
+    left = []
+    manager.add_eviction_listener(lambda conversation_id, memory, reason: left.append((conversation_id, reason)))
+    memory = manager.get_or_create("conv-0", "Rajesh")
+    memory.add_message("scammer", "Pay the fine to verify@paytm now")
+    manager.delete_conversation("conv-0")
+    assert left == [("conv-0", DELETED)]
+    assert memory.aggregates is None
+    assert manager.get_active_count() == 0
+    assert manager.aggregates.total("messages") == 0
+
+TESTS = [
+    test_capacity_evicts_least_recently_active,
+    test_idle_entries_expire,
+    test_get_or_create_replaces_expired_entry,
+    test_deletes_notify_listeners,
+    test_failing_listener_does_not_stop_others,
+    test_shards_share_capacity,
+    test_evicted_conversation_is_cleaned_up,
+    test_deleted_conversation_is_cleaned_up,
+]
+
+def main():
+    print("=" * 80)
+    print("[TEST] CONVERSATION EVICTION")
+    print("=" * 80)
+    failures = 0
+    for test in TESTS:
+        try:
+            test()
+            print(f"[OK] {test.__doc__}")
+        except AssertionError as e:
+            failures += 1
+            print(f"[FAIL] {test.__doc__} {e}")
+    print("=" * 80)
+    print(f"[OK] ALL {len(TESTS)} TESTS PASSED" if not failures else f"[FAIL] {failures}/{len(TESTS)} TESTS FAILED")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
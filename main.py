@@ -6,16 +6,26 @@ A sophisticated scam detection and engagement system using autonomous agents
 from flask import Flask, request, jsonify, Request, send_from_directory
 from flask_cors import CORS
 from datetime import datetime
+import os
+import signal
+import sys
 import uuid
+import hashlib
 import logging
 import re
 import random
 import threading
+import time
 import json
+import unicodedata
+import zlib
 from enum import Enum
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, asdict, replace
 from typing import List, Dict, Optional, Tuple
-from collections import defaultdict
+from collections import defaultdict, OrderedDict, deque
+from itertools import islice
+from functools import lru_cache
+from urllib.parse import urlsplit, urlunsplit
 from werkzeug.exceptions import BadRequest, HTTPException
 from werkzeug.datastructures import Headers
 
@@ -33,7 +43,20 @@ logger = logging.getLogger(__name__)
 # ============================================================================
 API_KEY = "test_key_12345"  # Use this for X-API-Key header
 MAX_CONVERSATIONS = 1000
+MEMORY_SHARDS = 16  # Independently locked slices of the conversation table
 CONVERSATION_TIMEOUT_MINUTES = 120
+DETECTION_CPU_BUDGET_MS = 50  # Per-message pattern matching budget before degrading
+MAX_BATCH_SIZE = 500  # Messages accepted per /api/v1/detect-scam/batch request
+DETECTION_CACHE_SIZE = 10000  # Distinct messages whose detection result is kept
+DETECTION_CACHE_TTL_SECONDS = 3600
+CAMPAIGN_INDEX_SIZE = 5000  # Scam campaigns whose fingerprint is kept
+CAMPAIGN_TTL_SECONDS = 86400
+CAMPAIGN_MAX_DISTANCE = 8  # SimHash bits two messages of one campaign may differ in
+# Opt-in per-rule hit/latency counters served at /api/v1/debug/rules
+RULE_PROFILING = os.environ.get('RULE_PROFILING', 'false').lower() == 'true'
+# JSON rule pack (src/data/rules format) replacing the built-in pattern table;
+# reloaded on SIGHUP or POST /api/v1/admin/rules/reload
+RULE_PACK_PATH = os.environ.get('RULE_PACK_PATH')
 
 # ============================================================================
 # CUSTOM REQUEST HANDLING - Parse JSON safely
@@ -91,9 +114,12 @@ class ScamDetectionResult:
     detection_method: str
     extracted_keywords: List[str]
     explanation: str
+    # Matched scam name -> its highest rule confidence (not serialized)
+    matched_patterns: Dict[str, float] = field(default_factory=dict)
+    campaign_id: Optional[str] = None
     
     def to_dict(self) -> dict:
-        return {
+        data = {
             "is_scam": self.is_scam,
             "scam_type": self.scam_type.value,
             "confidence": round(self.confidence, 3),
@@ -101,6 +127,809 @@ class ScamDetectionResult:
             "extracted_keywords": self.extracted_keywords,
             "explanation": self.explanation
         }
+        if self.campaign_id:
+            data["campaign_id"] = self.campaign_id
+        return data
+
+# Scam names from phishing_patterns mapped to their ScamType. Names missing
+# from this table still raise the confidence but leave the detected type as-is.
+SCAM_TYPE_BY_NAME = {
+    "UPI Verification": ScamType.PHISHING_UPI,
+    "Account Compromise": ScamType.PHISHING_BANKING,
+    "Account Blocked": ScamType.PHISHING_BANKING,
+    "Card Block": ScamType.PHISHING_BANKING,
+    "Lottery Scam": ScamType.LOTTERY_SCAM,
+    "Prize/Reward Scam": ScamType.PRIZE_REWARD,
+    "Investment Fraud": ScamType.INVESTMENT_FRAUD,
+    "Romance Scam": ScamType.ROMANCE_SCAM,
+    "Tech Support": ScamType.TECH_SUPPORT,
+    "Fake Job Offer": ScamType.FAKE_JOB_OFFER,
+    "Package Delivery": ScamType.PACKAGE_DELIVERY,
+    "Tax/Government": ScamType.TAX_GOVERNMENT,
+    "Cryptocurrency": ScamType.CRYPTOCURRENCY,
+    "Social Engineering": ScamType.SOCIAL_ENGINEERING,
+    "Impersonation": ScamType.IMPERSONATION,
+    "Blackmail/Extortion": ScamType.BLACKMAIL_EXTORTION,
+    "Inheritance/Money": ScamType.INHERITANCE_MONEY,
+}
+
+class ConversationScamState:
+    """Conversation-level verdict, updated in O(1) per message instead of rescanning history"""
+    
+    def __init__(self):
+        self.messages = 0
+        self.scam_messages = 0
+        self.patterns: Dict[str, float] = {}
+        # Noisy-OR over distinct patterns: confidence = 1 - prod(1 - c)
+        self._miss_probability = 1.0
+        self.scam_type = ScamType.UNKNOWN
+        self._type_confidence = 0.0
+    
+    def update(self, result: ScamDetectionResult):
+        self.messages += 1
+        self.scam_messages += result.is_scam
+        for name, confidence in result.matched_patterns.items():
+            previous = self.patterns.get(name, 0.0)
+            if confidence <= previous:
+                continue
+            self.patterns[name] = confidence
+            self._miss_probability *= (1.0 - confidence) / (1.0 - previous)
+        # The result's type comes from its strongest rule, whichever rule set matched it
+        strongest = max(result.matched_patterns.values(), default=0.0)
+        if strongest > self._type_confidence and result.scam_type != ScamType.UNKNOWN:
+            self._type_confidence = strongest
+            self.scam_type = result.scam_type
+    
+    @property
+    def confidence(self) -> float:
+        return 1.0 - self._miss_probability
+    
+    @property
+    def is_scam(self) -> bool:
+        return self.confidence > 0.5
+    
+    def to_dict(self) -> dict:
+        return {
+            "is_scam": self.is_scam,
+            "scam_type": self.scam_type.value,
+            "confidence": round(self.confidence, 3),
+            "detection_method": "conversation",
+            "messages_scored": self.messages,
+            "scam_messages": self.scam_messages,
+            "matched_patterns": sorted(self.patterns)
+        }
+
+WORD_PATTERN = re.compile(r'\b\w+\b')
+
+# Evasion undoing applied before detection and extraction: invisible characters are
+# deleted, odd spaces become spaces, compatibility forms (full-width, math letters)
+# and Cyrillic/Greek lookalikes become ASCII, and "v e r i f y" runs are re-joined
+_INVISIBLE = [0x00AD, 0x034F, 0x061C, 0x115F, 0x1160, 0x17B4, 0x17B5, 0x180E,
+              *range(0x200B, 0x2010), *range(0x202A, 0x202F), *range(0x2060, 0x2070), 0xFEFF]
+_SPACES = [0x00A0, 0x1680, *range(0x2000, 0x200B), 0x202F, 0x205F, 0x3000]
+_COMPATIBILITY_RANGES = [(0xFB00, 0xFB07), (0xFF01, 0xFF5F), (0x2460, 0x24EA),
+                         (0x1D400, 0x1D800), (0x1F130, 0x1F18A)]
+_HOMOGLYPHS = (
+    "аa вb еe кk мm нh оo рp сc тt уy хx ѕs іi јj ԁd һh ӏl ԛq ԝw ɡg ɑa "
+    "АA ВB ЕE КK МM НH ОO РP СC ТT ХX ЅS ІI ЈJ ԌG ӀI "
+    "αa βb εe ιi κk νv οo ρp τt υu χx "
+    "ΑA ΒB ΕE ΖZ ΗH ΙI ΚK ΜM ΝN ΟO ΡP ΤT ΥY ΧX"
+)
+_SPACED_OUT = re.compile(r'(?<![^\W_])(?:[^\W\d_][ .\-_*]){2,}[^\W\d_](?![^\W_])')
+
+@lru_cache(maxsize=None)
+def _translation_table() -> Dict[int, Optional[str]]:
+    table = {code: None for code in _INVISIBLE}
+    table.update((code, " ") for code in _SPACES)
+    for start, end in _COMPATIBILITY_RANGES:
+        for code in range(start, end):
+            plain = unicodedata.normalize("NFKC", chr(code))
+            if plain != chr(code) and plain.isascii() and plain.strip():
+                table[code] = plain
+    table.update((ord(pair[0]), pair[1]) for pair in _HOMOGLYPHS.split())
+    return table
+
+def normalize_text(text: str) -> str:
+    """O(n), at most one new string per pass; ASCII text skips the table pass"""
+    if not text.isascii():
+        text = text.translate(_translation_table())
+    return _SPACED_OUT.sub(lambda m: m.group()[::2], text)
+
+# Characters that make a fragment a regex rather than a literal
+_META = set('.^$*+?{}[]\\|()')
+
+# (?:a|b|c) with literal alternatives and optional literal prefix/suffix
+_LITERAL_GROUP = re.compile(r'^([^.^$*+?{}\[\]\\|()]*)\(\?:([^.^$*+?{}\[\]\\()]+)\)([^.^$*+?{}\[\]\\|()]*)$')
+
+# A quantifier following an atom, greedy, lazy or possessive
+_QUANTIFIER = re.compile(r'(?:[*+?]|\{\d*,?\d*\})[?+]?')
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """A phishing pattern compiled into fragment chains.
+
+    Each chain is one top-level alternative of the pattern, split on ``.*``.
+    Fragments are plain strings when literal and compiled patterns otherwise.
+    """
+    index: int
+    pattern: str
+    scam_name: str
+    confidence: float
+    scam_type: Optional[ScamType]
+    chains: Tuple[tuple, ...] = ()
+
+def _split_top_level(pattern: str, separator: str) -> List[str]:
+    """Split pattern on separator outside groups, classes and escapes"""
+    parts, start, depth, i = [], 0, 0, 0
+    in_class = False
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if in_class:
+            if ch == ']':
+                in_class = False
+        elif ch == '[':
+            in_class = True
+            if pattern[i + 1:i + 2] == ']':
+                i += 1
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif depth == 0 and pattern.startswith(separator, i):
+            parts.append(pattern[start:i])
+            i += len(separator)
+            # A lazy .*? means the same as .* for a search
+            if separator == '.*' and pattern[i:i + 1] == '?':
+                i += 1
+            start = i
+            continue
+        i += 1
+    parts.append(pattern[start:])
+    return parts
+
+def _atoms(fragment: str) -> List[Tuple[str, str]]:
+    """Split a regex fragment into (atom, quantifier) pairs; classes and groups stay whole"""
+    atoms, i = [], 0
+    while i < len(fragment):
+        ch = fragment[i]
+        if ch == '\\':
+            end = i + 2
+        elif ch == '[':
+            end = i + 1
+            if fragment[end:end + 1] == '^':
+                end += 1
+            if fragment[end:end + 1] == ']':
+                end += 1
+            while end < len(fragment) and fragment[end] != ']':
+                end += 2 if fragment[end] == '\\' else 1
+            end += 1
+        elif ch == '(':
+            end, depth = i, 0
+            while end < len(fragment):
+                if fragment[end] == '\\':
+                    end += 1
+                elif fragment[end] == '(':
+                    depth += 1
+                elif fragment[end] == ')':
+                    depth -= 1
+                    if depth == 0:
+                        break
+                end += 1
+            end += 1
+        else:
+            end = i + 1
+        quantifier = _QUANTIFIER.match(fragment, end)
+        atoms.append((fragment[i:end], quantifier.group() if quantifier else ''))
+        i = quantifier.end() if quantifier else end
+    return atoms
+
+def _unbounded(quantifier: str) -> bool:
+    return quantifier[:1] in ('*', '+') or quantifier.rstrip('?+').endswith(',}')
+
+def _repeats_inside(group: str) -> bool:
+    """Whether anything inside a group, at any depth, repeats without bound"""
+    return any(_unbounded(quantifier) or (atom[0] == '(' and _repeats_inside(atom))
+               for atom, quantifier in _atoms(group[1:-1]))
+
+def _is_literal(atom: str) -> bool:
+    return (len(atom) == 1 and atom not in _META) or (len(atom) == 2 and atom[0] == '\\' and not atom[1].isalnum())
+
+def _linear_time(fragment: str) -> bool:
+    """Whether re.search of fragment stays linear in the length of the text.
+
+    No backreferences, no unbounded quantifier inside or on a group, and at
+    most one atom repeating without bound, right after a literal character
+    it cannot match, so the runs a search scans never overlap.
+    """
+    unbounded = 0
+    previous = None
+    for atom, quantifier in _atoms(fragment):
+        if atom[0] == '\\' and atom[1:2].isdigit() and atom[1] != '0':
+            return False
+        if atom[0] == '(' and (_unbounded(quantifier) or _repeats_inside(atom)):
+            return False
+        if _unbounded(quantifier):
+            unbounded += 1
+            anchored = (previous is not None and not previous[1] and _is_literal(previous[0])
+                        and re.fullmatch(atom, previous[0][-1]) is None)
+            if unbounded > 1 or not anchored:
+                return False
+        previous = (atom, quantifier)
+    return True
+
+def _expand_fragment(fragment: str) -> list:
+    """Turn one fragment into literal alternatives, or a single compiled regex"""
+    if fragment and not any(ch in _META for ch in fragment):
+        return [fragment]
+    group = _LITERAL_GROUP.match(fragment)
+    if group:
+        prefix, body, suffix = group.groups()
+        options = [prefix + option + suffix for option in body.split('|')]
+        if all(options):
+            return options
+    if not fragment or not _linear_time(fragment):
+        raise ValueError(f"Pattern fragment {fragment!r} cannot be matched in linear time")
+    return [re.compile(fragment)]
+
+def _compile_chains(pattern: str) -> Tuple[tuple, ...]:
+    """Compile ``a.*b|(?:c|d)`` into (("a", "b"), ("c",), ("d",)); a regex fragment may only end a chain"""
+    chains = []
+    for alternative in _split_top_level(pattern, '|'):
+        expanded = [()]
+        fragments = _split_top_level(alternative, '.*')
+        for position, fragment in enumerate(fragments):
+            options = _expand_fragment(fragment)
+            if position < len(fragments) - 1 and not all(isinstance(option, str) for option in options):
+                raise ValueError(f"Pattern fragment {fragment!r} has to be the last of its .* chain")
+            expanded = [chain + (option,) for chain in expanded for option in options]
+        chains.extend(expanded)
+    return tuple(dict.fromkeys(chains))
+
+def _trie_pattern(words: List[str]) -> str:
+    """Fold literal words into a prefix-trie regex.
+
+    At every node the branches start with distinct characters and the greedy
+    optional group prefers the longer word, so a match is always the longest
+    word starting at that position - the same as a longest-first alternation,
+    but without retrying every word at every offset.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+    
+    def render(node: dict) -> str:
+        branches = [re.escape(ch) + render(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if '' in node else body
+    
+    return render(trie)
+
+def _find(text: str, fragment, start: int, end: int) -> Tuple[int, int]:
+    """Leftmost (start, end) of fragment inside text[start:end], or (-1, -1)"""
+    if isinstance(fragment, str):
+        pos = text.find(fragment, start, end)
+        return (pos, pos + len(fragment)) if pos != -1 else (-1, -1)
+    match = fragment.search(text, start, end)
+    return match.span() if match else (-1, -1)
+
+def _chain_matches(text: str, chain: tuple) -> bool:
+    """In-order check equivalent to re.search('f1.*f2.*...', text).
+
+    ``.`` does not match newlines, so a chain has to fit in one line. Taking
+    the earliest occurrence of every fragment is always optimal for literal
+    fragments, but not for a regex one, whose leftmost match need not end
+    earliest; _compile_chains therefore only lets a regex fragment end a
+    chain. Each line is visited once, so the cost stays linear in the
+    length of the text however many partial matches it contains.
+    """
+    if len(chain) == 1:
+        if isinstance(chain[0], str):
+            return chain[0] in text
+        return chain[0].search(text) is not None
+    
+    length = len(text)
+    pos, cursor = _find(text, chain[0], 0, length)
+    while pos != -1:
+        line_end = text.find('\n', pos)
+        if line_end == -1:
+            line_end = length
+        for fragment in chain[1:]:
+            found, cursor = _find(text, fragment, cursor, line_end)
+            if found == -1:
+                break
+        else:
+            return True
+        if line_end == length:
+            return False
+        pos, cursor = _find(text, chain[0], line_end + 1, length)
+    return False
+
+class RuleMatcher:
+    """Matches the whole phishing pattern table against a message in linear time.
+
+    All literal fragments are folded into one trie regex and found with a
+    single ``findall``. That scan is non-overlapping, so fragments hidden
+    inside or across a reported match are recovered from tables built at
+    compile time: fragments contained in another are implied by it, and
+    fragments that can straddle its end are re-checked directly. Only rules
+    whose literal fragments are all present get their chains resolved.
+    
+    Rules are evaluated in descending confidence so that, when the CPU budget
+    cuts evaluation short, the hits found so far are the strongest ones.
+    """
+    
+    def __init__(self, patterns: List[tuple]):
+        """patterns: (pattern, scam name, confidence[, ScamType]); the type defaults to SCAM_TYPE_BY_NAME"""
+        self.rules: List[CompiledRule] = [
+            CompiledRule(
+                index=index,
+                pattern=pattern,
+                scam_name=scam_name,
+                confidence=confidence,
+                scam_type=scam_type[0] if scam_type else SCAM_TYPE_BY_NAME.get(scam_name),
+                chains=_compile_chains(pattern)
+            )
+            for index, (pattern, scam_name, confidence, *scam_type) in enumerate(patterns)
+        ]
+        # Identifies this exact rule set, e.g. for invalidating cached verdicts
+        self.fingerprint = hashlib.sha256(
+            repr([(r.pattern, r.scam_name, r.confidence, r.scam_type) for r in self.rules]).encode()
+        ).hexdigest()[:16]
+        
+        fragments = sorted({f for rule in self.rules for chain in rule.chains
+                            for f in chain if isinstance(f, str)})
+        self._scan = re.compile(_trie_pattern(fragments)) if fragments else None
+        # fragment -> fragments it contains (itself included)
+        self._implied = {f: frozenset(g for g in fragments if g in f) for f in fragments}
+        # fragment -> fragments that may start inside it and run past its end
+        self._straddling = {
+            f: tuple(g for g in fragments
+                     if any(g.startswith(f[i:]) and len(g) > len(f) - i for i in range(1, len(f))))
+            for f in fragments
+        }
+        
+        # Rules reachable from a literal fragment; rules with a chain made only
+        # of regex fragments have to be tried on every message
+        rules_by_fragment = defaultdict(set)
+        always = set()
+        for rule in self.rules:
+            for chain in rule.chains:
+                literals = [f for f in chain if isinstance(f, str)]
+                if literals:
+                    rules_by_fragment[literals[0]].add(rule.index)
+                else:
+                    always.add(rule.index)
+        self._rules_by_fragment = {f: frozenset(r) for f, r in rules_by_fragment.items()}
+        self._always = frozenset(always)
+        self._priority = {rule.index: (-rule.confidence, rule.index) for rule in self.rules}
+        # Per rule: (literal fragments required, chain, resolved by presence alone)
+        self._plans = {
+            rule.index: tuple(
+                (frozenset(f for f in chain if isinstance(f, str)), chain,
+                 len(chain) == 1 and isinstance(chain[0], str))
+                for chain in rule.chains
+            )
+            for rule in self.rules
+        }
+        # Optional RuleProfiler; None keeps match() free of timing calls
+        self.profiler = None
+    
+    def attach_profiler(self, profiler):
+        if profiler is not None:
+            profiler.register(self.rules)
+        self.profiler = profiler
+    
+    def present_fragments(self, text: str) -> set:
+        """Set of every literal fragment that occurs anywhere in text"""
+        if self._scan is None:
+            return set()
+        present = set()
+        for fragment in set(self._scan.findall(text)):
+            present |= self._implied[fragment]
+            for candidate in self._straddling[fragment]:
+                if candidate not in present and candidate in text:
+                    present.add(candidate)
+        return present
+    
+    def match(self, text: str, budget_seconds: Optional[float] = None) -> Tuple[List[CompiledRule], bool]:
+        """Return (every matching rule in table order, whether all candidates were evaluated)"""
+        if self.profiler is not None:
+            return self._match_profiled(text, budget_seconds)
+        deadline = time.perf_counter() + budget_seconds if budget_seconds is not None else None
+        present = self.present_fragments(text)
+        
+        hits = []
+        complete = True
+        for index in self._candidates(present):
+            if deadline is not None and time.perf_counter() > deadline:
+                complete = False
+                break
+            if self._rule_matches(text, index, present):
+                hits.append(self.rules[index])
+        hits.sort(key=lambda rule: rule.index)
+        return hits, complete
+    
+    def _match_profiled(self, text: str, budget_seconds: Optional[float]) -> Tuple[List[CompiledRule], bool]:
+        """match() with every candidate rule timed and reported to the profiler"""
+        clock = time.perf_counter
+        started = clock()
+        deadline = started + budget_seconds if budget_seconds is not None else None
+        present = self.present_fragments(text)
+        scanned = clock()
+        
+        hits = []
+        evaluations = []
+        complete = True
+        for index in self._candidates(present):
+            rule_start = clock()
+            if deadline is not None and rule_start > deadline:
+                complete = False
+                break
+            hit = self._rule_matches(text, index, present)
+            evaluations.append((self.rules[index], clock() - rule_start, hit))
+            if hit:
+                hits.append(self.rules[index])
+        self.profiler.record_message(scanned - started, evaluations)
+        hits.sort(key=lambda rule: rule.index)
+        return hits, complete
+    
+    def _candidates(self, present: set) -> List[int]:
+        """Rules worth checking given the literal fragments present, strongest first"""
+        candidates = set(self._always)
+        for fragment in present:
+            if fragment in self._rules_by_fragment:
+                candidates |= self._rules_by_fragment[fragment]
+        return sorted(candidates, key=self._priority.__getitem__)
+    
+    def _rule_matches(self, text: str, index: int, present: set) -> bool:
+        for needs, chain, resolved in self._plans[index]:
+            if needs <= present and (resolved or _chain_matches(text, chain)):
+                return True
+        return False
+
+class RuleProfiler:
+    """
+    Per-rule evaluation counters, fed by RuleMatcher when attached.
+    
+    Rules are keyed by pattern text. A rule is evaluated when the literal
+    prefilter makes it a candidate; the shared scan is timed separately.
+    Latencies keep a bounded window of recent samples for the p99.
+    """
+    
+    def __init__(self, sample_size: int = 1024):
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._messages = 0
+        self._scan_seconds = 0.0
+        self._rules = {}
+    
+    def register(self, rules: List[CompiledRule]):
+        with self._lock:
+            for rule in rules:
+                if rule.pattern not in self._rules:
+                    self._rules[rule.pattern] = {
+                        "name": rule.scam_name, "evaluations": 0, "hits": 0, "seconds": 0.0,
+                        "samples": deque(maxlen=self.sample_size)
+                    }
+    
+    def record_message(self, scan_seconds: float, evaluations: List[tuple]):
+        with self._lock:
+            self._messages += 1
+            self._scan_seconds += scan_seconds
+            for rule, seconds, hit in evaluations:
+                stats = self._rules.get(rule.pattern)
+                if stats is None:
+                    continue
+                stats["evaluations"] += 1
+                stats["hits"] += hit
+                stats["seconds"] += seconds
+                stats["samples"].append(seconds)
+    
+    def reset(self):
+        with self._lock:
+            self._started = time.time()
+            self._messages = 0
+            self._scan_seconds = 0.0
+            for stats in self._rules.values():
+                stats.update(evaluations=0, hits=0, seconds=0.0)
+                stats["samples"].clear()
+    
+    def report(self) -> dict:
+        """Per-rule counters, most expensive rule first"""
+        with self._lock:
+            rules = []
+            for pattern, stats in self._rules.items():
+                samples = sorted(stats["samples"])
+                p99 = samples[min(int(len(samples) * 0.99), len(samples) - 1)] if samples else 0.0
+                evaluations = stats["evaluations"]
+                rules.append({
+                    "name": stats["name"],
+                    "pattern": pattern,
+                    "evaluations": evaluations,
+                    "hits": stats["hits"],
+                    "hit_rate": round(stats["hits"] / self._messages, 4) if self._messages else 0.0,
+                    "total_ms": round(stats["seconds"] * 1000, 3),
+                    "mean_us": round(stats["seconds"] / evaluations * 1e6, 2) if evaluations else 0.0,
+                    "p99_us": round(p99 * 1e6, 2)
+                })
+            rules.sort(key=lambda r: r["total_ms"], reverse=True)
+            return {
+                "since": self._started,
+                "messages": self._messages,
+                "scan_ms": round(self._scan_seconds * 1000, 3),
+                "rules": rules,
+                "dead_rules": [r["name"] + ": " + r["pattern"] for r in rules if r["hits"] == 0]
+            }
+
+class DetectionCache:
+    """Bounded LRU/TTL cache of detection results keyed by a hash of the message.
+    
+    Lookups carry the fingerprint of the rule set that produced the results;
+    when it changes every entry is dropped, so rule updates never serve stale
+    verdicts.
+    """
+    
+    def __init__(self, max_entries: int = DETECTION_CACHE_SIZE, ttl_seconds: float = DETECTION_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, result)
+        self._rules_version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+    
+    @staticmethod
+    def key(message: str) -> str:
+        return hashlib.sha256(message.encode('utf-8', 'surrogatepass')).hexdigest()
+    
+    def get(self, key: str, rules_version: str):
+        with self._lock:
+            self._check_version(rules_version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key: str, value, rules_version: str):
+        with self._lock:
+            self._check_version(rules_version)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def _check_version(self, rules_version: str):
+        if rules_version != self._rules_version:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            self._rules_version = rules_version
+    
+    def get_stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+# Links and handles are single campaign tokens; numbers are masked before tokenizing
+CAMPAIGN_TOKEN = re.compile(r'https?://\S+|www\.\S+|[\w.\-]+@[\w.\-]+|\w+')
+DIGITS = re.compile(r'\d+')
+_SPREAD = bytes.maketrans(b'01', b'\x00\x01')
+
+@lru_cache(maxsize=65536)
+def _shingle_lanes(shingle: str) -> int:
+    """64-bit hash of a shingle spread to one byte per bit, so summing lanes counts votes"""
+    digest = hashlib.blake2b(shingle.encode(), digest_size=8).digest()
+    return int.from_bytes(format(int.from_bytes(digest, 'big'), '064b').encode().translate(_SPREAD), 'big')
+
+@lru_cache(maxsize=None)
+def _majority_table(count: int) -> bytes:
+    return bytes(ord('1') if 2 * votes > count else ord('0') for votes in range(256))
+
+class CampaignIndex:
+    """
+    Bounded SimHash index of classified scams.
+    
+    Messages are fingerprinted with a 64-bit SimHash over word bigrams after
+    masking numbers, links and handles, so a template resent with another
+    amount, name or UPI handle lands within a few bits of the original.
+    The fingerprint is split into max_distance + 1 bands; near-duplicates
+    share at least one band exactly, so lookups only compare a few candidates.
+    """
+    
+    def __init__(self, max_entries: int = CAMPAIGN_INDEX_SIZE, ttl_seconds: float = CAMPAIGN_TTL_SECONDS,
+                 max_distance: int = CAMPAIGN_MAX_DISTANCE, min_tokens: int = 8):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self.min_tokens = min_tokens
+        self._band_width = 64 // (max_distance + 1)
+        self._bands = [{} for _ in range(max_distance + 1)]  # band value -> fingerprints
+        self._campaigns = OrderedDict()  # fingerprint -> campaign dict
+        self._by_id = {}
+        self._rules_version = None
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.near_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+    
+    def fingerprint(self, text: str) -> Optional[int]:
+        words = [
+            'handletoken' if '@' in token else 'urltoken' if token.startswith(('http', 'www.')) else token
+            for token in CAMPAIGN_TOKEN.findall(DIGITS.sub('0', text.lower()))
+        ]
+        if len(words) < self.min_tokens:
+            return None
+        # Vote counters are one byte per bit, so at most 255 shingles count
+        shingles = list(dict.fromkeys(map(" ".join, zip(words, words[1:]))))[:255]
+        votes = sum(map(_shingle_lanes, shingles)).to_bytes(64, 'big')
+        return int(votes.translate(_majority_table(len(shingles))), 2)
+    
+    def _bands_of(self, fingerprint: int) -> List[int]:
+        mask = (1 << self._band_width) - 1
+        return [(fingerprint >> (i * self._band_width)) & mask for i in range(len(self._bands))]
+    
+    def match(self, text: str, rules_version: str, record: bool = True) -> Optional[Tuple[dict, int]]:
+        """(campaign, Hamming distance) of the campaign text is a near-duplicate of, or None"""
+        fingerprint = self.fingerprint(text)
+        with self._lock:
+            self._check_version(rules_version)
+            if record:
+                self.lookups += 1
+            if fingerprint is None:
+                return None
+            candidates = set().union(*(buckets.get(band, ()) for band, buckets
+                                       in zip(self._bands_of(fingerprint), self._bands)))
+            distance, nearest = min(((bin(candidate ^ fingerprint).count('1'), candidate)
+                                     for candidate in candidates), default=(None, None))
+            if nearest is None or distance > self.max_distance:
+                return None
+            campaign = self._campaigns[nearest]
+            now = time.time()
+            if campaign["expires_at"] <= now:
+                self._remove(nearest)
+                self.expirations += 1
+                return None
+            if record:
+                campaign["hits"] += 1
+                campaign["last_seen"] = now
+                campaign["expires_at"] = now + self.ttl_seconds
+                self._campaigns.move_to_end(nearest)
+                self.near_hits += 1
+            return campaign, distance
+    
+    def add(self, text: str, result: "ScamDetectionResult", rules_version: str) -> Optional[str]:
+        """Start a campaign from a classified scam; returns its id"""
+        fingerprint = self.fingerprint(text)
+        if fingerprint is None:
+            return None
+        with self._lock:
+            self._check_version(rules_version)
+            if fingerprint in self._campaigns:
+                return self._campaigns[fingerprint]["campaign_id"]
+            now = time.time()
+            campaign_id = f"campaign-{fingerprint:016x}"
+            self._campaigns[fingerprint] = {
+                "campaign_id": campaign_id, "fingerprint": fingerprint, "result": result,
+                "sample": text[:200], "hits": 0, "created_at": now, "last_seen": now,
+                "expires_at": now + self.ttl_seconds
+            }
+            self._by_id[campaign_id] = fingerprint
+            for band, buckets in zip(self._bands_of(fingerprint), self._bands):
+                buckets.setdefault(band, set()).add(fingerprint)
+            while len(self._campaigns) > self.max_entries:
+                self._remove(next(iter(self._campaigns)))
+                self.evictions += 1
+            return campaign_id
+    
+    def get(self, campaign_id: str) -> Optional[dict]:
+        with self._lock:
+            fingerprint = self._by_id.get(campaign_id)
+            return self._campaigns[fingerprint] if fingerprint is not None else None
+    
+    def top(self, limit: int = 20) -> List[dict]:
+        with self._lock:
+            return sorted(self._campaigns.values(), key=lambda c: c["hits"], reverse=True)[:limit]
+    
+    @staticmethod
+    def describe(campaign: dict) -> dict:
+        return {
+            "campaign_id": campaign["campaign_id"],
+            "fingerprint": f"{campaign['fingerprint']:016x}",
+            "sample": campaign["sample"],
+            "hits": campaign["hits"],
+            "created_at": campaign["created_at"],
+            "last_seen": campaign["last_seen"]
+        }
+    
+    def _remove(self, fingerprint: int):
+        campaign = self._campaigns.pop(fingerprint)
+        del self._by_id[campaign["campaign_id"]]
+        for band, buckets in zip(self._bands_of(fingerprint), self._bands):
+            bucket = buckets[band]
+            bucket.discard(fingerprint)
+            if not bucket:
+                del buckets[band]
+    
+    def _check_version(self, rules_version: str):
+        if rules_version != self._rules_version:
+            if self._campaigns:
+                self._campaigns.clear()
+                self._by_id.clear()
+                for buckets in self._bands:
+                    buckets.clear()
+                self.invalidations += 1
+            self._rules_version = rules_version
+    
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "campaigns": len(self._campaigns),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "max_distance": self.max_distance,
+                "lookups": self.lookups,
+                "near_hits": self.near_hits,
+                "near_hit_rate": round(self.near_hits / self.lookups, 4) if self.lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
+
+class RulePackError(ValueError):
+    """A rule pack that cannot be loaded; the running rules stay in place"""
+
+def parse_rule_pack(data: dict) -> Tuple[str, List[tuple]]:
+    """(version, matcher rules) from a decoded rule pack; keyword_weights are not used here"""
+    if not isinstance(data, dict) or data.get("format") != 1:
+        raise RulePackError("rule pack must be a JSON object with format 1")
+    version = data.get("version")
+    groups = data.get("groups")
+    if not isinstance(version, str) or not version or not isinstance(groups, list) or not groups:
+        raise RulePackError("rule pack needs a version and a non-empty list of groups")
+    patterns = []
+    for group in groups:
+        try:
+            scam_type = ScamType(group["scam_type"])
+            weight = float(group["weight"])
+            patterns.extend((pattern, group["name"], weight, scam_type) for pattern in group["patterns"])
+        except (KeyError, TypeError, ValueError) as e:
+            raise RulePackError(f"invalid group {group!r:.80}: {e}") from None
+        if not 0.0 <= weight <= 1.0:
+            raise RulePackError(f"group {group['name']!r}: weight must be between 0 and 1")
+    return version, patterns
 
 class ScamDetectionEngine:
     def __init__(self):
@@ -156,55 +985,102 @@ class ScamDetectionEngine:
             (r"inherited.*million|relative.*passed|legacy.*fund", "Inheritance/Money", 0.86),
             (r"bank.*detail|transfer.*money|claim.*inheritance", "Inheritance/Money", 0.82),
         ]
+        # Compiled once; carries the name -> ScamType mapping per rule
+        self.matcher = RuleMatcher(self.phishing_patterns)
+        self.rule_profiler = RuleProfiler() if RULE_PROFILING else None
+        self.matcher.attach_profiler(self.rule_profiler)
+        self.rules_version = "builtin"
+        self.rules_source = None
+        self._rules_digest = None
+        self._reload_lock = threading.Lock()
+        self.cache = DetectionCache()
+        self.campaigns = CampaignIndex()
+        if RULE_PACK_PATH:
+            try:
+                self.reload_rules(RULE_PACK_PATH)
+            except RulePackError as e:
+                logger.error(f"Rule pack not loaded, using built-in patterns: {e}")
+    
+    def reload_rules(self, path: Optional[str] = None) -> bool:
+        """Compile a rule pack and swap it in atomically; False when the file is unchanged"""
+        path = path or self.rules_source or RULE_PACK_PATH
+        if not path:
+            raise RulePackError("No rule pack configured (set RULE_PACK_PATH)")
+        with self._reload_lock:
+            started = time.perf_counter()
+            try:
+                with open(path, 'rb') as f:
+                    raw = f.read()
+                digest = hashlib.sha256(raw).hexdigest()
+                if digest == self._rules_digest:
+                    return False
+                version, patterns = parse_rule_pack(json.loads(raw))
+                matcher = RuleMatcher(patterns)
+            except (OSError, ValueError) as e:
+                raise RulePackError(f"{path}: {e}") from None
+            matcher.attach_profiler(self.rule_profiler)
+            # Requests already running keep the matcher they started with
+            self.matcher = matcher
+            previous, self.rules_version = self.rules_version, version
+            self.rules_source = path
+            self._rules_digest = digest
+            logger.info(f"Loaded rule pack {version} from {path}: {len(matcher.rules)} rules in "
+                        f"{(time.perf_counter() - started) * 1000:.1f}ms (was {previous})")
+            return True
+    
+    def rules_info(self) -> dict:
+        return {
+            "version": self.rules_version,
+            "source": self.rules_source or "builtin",
+            "fingerprint": self.matcher.fingerprint,
+            "rules": len(self.matcher.rules)
+        }
     
     def detect(self, message: str) -> ScamDetectionResult:
+        matcher = self.matcher
+        key = DetectionCache.key(message)
+        cached = self.cache.get(key, matcher.fingerprint)
+        if cached is not None:
+            return cached
+        # Every stage below reads the text with lookalikes and spacing tricks undone
+        normalized = normalize_text(message)
+        # Edited copies of a known scam template reuse its verdict
+        near = self.campaigns.match(normalized, matcher.fingerprint) if self.campaigns else None
+        if near is not None:
+            # The campaign's verdict; keywords are this message's own, and no rule ran on it
+            campaign, distance = near
+            template = campaign["result"]
+            return replace(
+                template,
+                detection_method="campaign_fingerprint",
+                extracted_keywords=[m.group() for m in islice(WORD_PATTERN.finditer(normalized.lower()), 5)],
+                explanation=f"Near-duplicate of scam campaign {template.campaign_id} ({distance} bits apart)",
+                matched_patterns={}
+            )
+        result, complete = self._detect_uncached(normalized, matcher)
+        # Verdicts cut short by the CPU budget depend on load, not content
+        if complete:
+            if result.is_scam and self.campaigns:
+                result.campaign_id = self.campaigns.add(normalized, result, matcher.fingerprint)
+            self.cache.put(key, result, matcher.fingerprint)
+        return result
+    
+    def _detect_uncached(self, message: str, matcher: RuleMatcher) -> Tuple[ScamDetectionResult, bool]:
         message_lower = message.lower()
-        keywords = re.findall(r'\b\w+\b', message_lower)
+        keywords = [m.group() for m in islice(WORD_PATTERN.finditer(message_lower), 5)]
         max_confidence = 0.0
         detected_type = ScamType.UNKNOWN
         matched_pattern = ""
+        matched_patterns = {}
         
-        for pattern, scam_name, confidence in self.phishing_patterns:
-            if re.search(pattern, message_lower):
-                if confidence > max_confidence:
-                    max_confidence = confidence
-                    matched_pattern = scam_name
-                    
-                    # Map scam names to ScamType enum
-                    if scam_name == "UPI Verification":
-                        detected_type = ScamType.PHISHING_UPI
-                    elif scam_name == "Account Compromise":
-                        detected_type = ScamType.PHISHING_BANKING
-                    elif scam_name == "Account Blocked":
-                        detected_type = ScamType.PHISHING_BANKING
-                    elif scam_name == "Card Block":
-                        detected_type = ScamType.PHISHING_BANKING
-                    elif scam_name == "Lottery Scam":
-                        detected_type = ScamType.LOTTERY_SCAM
-                    elif scam_name == "Prize/Reward Scam":
-                        detected_type = ScamType.PRIZE_REWARD
-                    elif scam_name == "Investment Fraud":
-                        detected_type = ScamType.INVESTMENT_FRAUD
-                    elif scam_name == "Romance Scam":
-                        detected_type = ScamType.ROMANCE_SCAM
-                    elif scam_name == "Tech Support":
-                        detected_type = ScamType.TECH_SUPPORT
-                    elif scam_name == "Fake Job Offer":
-                        detected_type = ScamType.FAKE_JOB_OFFER
-                    elif scam_name == "Package Delivery":
-                        detected_type = ScamType.PACKAGE_DELIVERY
-                    elif scam_name == "Tax/Government":
-                        detected_type = ScamType.TAX_GOVERNMENT
-                    elif scam_name == "Cryptocurrency":
-                        detected_type = ScamType.CRYPTOCURRENCY
-                    elif scam_name == "Social Engineering":
-                        detected_type = ScamType.SOCIAL_ENGINEERING
-                    elif scam_name == "Impersonation":
-                        detected_type = ScamType.IMPERSONATION
-                    elif scam_name == "Blackmail/Extortion":
-                        detected_type = ScamType.BLACKMAIL_EXTORTION
-                    elif scam_name == "Inheritance/Money":
-                        detected_type = ScamType.INHERITANCE_MONEY
+        hits, complete = matcher.match(message_lower, DETECTION_CPU_BUDGET_MS / 1000)
+        for rule in hits:
+            matched_patterns[rule.scam_name] = max(rule.confidence, matched_patterns.get(rule.scam_name, 0.0))
+            if rule.confidence > max_confidence:
+                max_confidence = rule.confidence
+                matched_pattern = rule.scam_name
+                if rule.scam_type is not None:
+                    detected_type = rule.scam_type
         
         is_scam = max_confidence > 0.5
         
@@ -212,10 +1088,19 @@ class ScamDetectionEngine:
             is_scam=is_scam,
             scam_type=detected_type,
             confidence=max_confidence,
-            detection_method="pattern_matching",
-            extracted_keywords=keywords[:5],
-            explanation=f"Matched {matched_pattern}" if matched_pattern else "No specific pattern matched"
-        )
+            detection_method="pattern_matching" if complete else "pattern_matching (cpu budget exceeded)",
+            extracted_keywords=keywords,
+            explanation=f"Matched {matched_pattern}" if matched_pattern else "No specific pattern matched",
+            matched_patterns=matched_patterns
+        ), complete
+    
+    def detect_batch(self, messages: List[str]) -> List[ScamDetectionResult]:
+        """Detect a batch of messages; results come back in input order"""
+        # Bursts repeat the same SMS a lot - lowercase, tokenize and match each text once
+        # Scored one after another: matching is pure Python, so threads would only take turns on the GIL
+        unique = list(dict.fromkeys(messages))
+        by_message = {message: self.detect(message) for message in unique}
+        return [by_message[message] for message in messages]
 
 # ============================================================================
 # CONVERSATION ENGINE
@@ -289,7 +1174,7 @@ class EntityType(Enum):
     PHISHING_LINK = "phishing_links"
     EMAIL_ADDRESS = "email_addresses"
 
-@dataclass
+@dataclass(slots=True)
 class ExtractedEntity:
     value: str
     type: EntityType
@@ -304,45 +1189,151 @@ class ExtractedEntity:
             "context": self.context
         }
 
+# Span kinds in scan order; links and handles are rescanned within themselves for the kinds
+# after their own (a UPI ID inside a link, the phone number in phone@upi)
+ENTITY_SPAN_KINDS = (
+    ("link", r'https?://[^\s)]+'),
+    # UPI and email local parts combined, tried only where a run of them starts or resumes
+    ("handle", r'(?:(?<![\w.%+-])|(?=[%+]))[\w.%+-]+@[\w.-]+'),
+    ("account", r'\b(?:\d{4}[\s-]?)?\d{10,14}\b'),
+    ("phone", r'(?<!\d)[6-9]\d{9}(?!\d)'),
+)
+# Anchors every entity of a kind holds (links ://, handles @, account and phone numbers ten
+# digits in a row); kinds whose anchor is missing are left out of the scan
+TEN_DIGITS = re.compile(r'\d{10}')
+
+@lru_cache(maxsize=None)
+def entity_scanner(first: int, links: bool, handles: bool, numbers: bool):
+    present = {"link": links, "handle": handles, "account": numbers, "phone": numbers}
+    alternatives = [f"(?P<{kind}>{pattern})" for kind, pattern in ENTITY_SPAN_KINDS[first:] if present[kind]]
+    return re.compile("|".join(alternatives)) if alternatives else None
+
 class IntelligenceExtractor:
     def __init__(self):
         self.patterns = {
             EntityType.UPI_ID: r'[\w.-]+@[\w.-]+',
-            EntityType.PHONE_NUMBER: r'(?:^|\D)([6-9]\d{9})(?:\D|$)',
+            EntityType.PHONE_NUMBER: r'(?<!\d)[6-9]\d{9}(?!\d)',
             EntityType.BANK_ACCOUNT: r'\b(?:\d{4}[\s-]?)?\d{10,14}\b',
             EntityType.PHISHING_LINK: r'https?://[^\s)]+',
             EntityType.EMAIL_ADDRESS: r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',
         }
+        self.upi_search = re.compile(self.patterns[EntityType.UPI_ID])
+        self.phone_search = re.compile(self.patterns[EntityType.PHONE_NUMBER])
+        self.email_search = re.compile(self.patterns[EntityType.EMAIL_ADDRESS])
     
     def extract(self, message: str) -> Dict[EntityType, List[ExtractedEntity]]:
         results = {entity_type: [] for entity_type in EntityType}
+        message = normalize_text(message)
+        context = message[:100]
         
-        for entity_type, pattern in self.patterns.items():
-            matches = re.findall(pattern, message)
-            for match in matches:
-                results[entity_type].append(
-                    ExtractedEntity(
-                        value=match,
-                        type=entity_type,
-                        confidence=0.85,
-                        context=message[:100]
-                    )
+        for entity_type, value in self._scan(message, 0, len(message), 0, []):
+            results[entity_type].append(
+                ExtractedEntity(
+                    value=value,
+                    type=entity_type,
+                    confidence=0.85,
+                    context=context
                 )
+            )
         
         return results
+    
+    def _scan(self, message: str, pos: int, endpos: int, first: int, found: list) -> list:
+        """(type, value) of every entity of ENTITY_SPAN_KINDS[first:] in message[pos:endpos]"""
+        scanner = entity_scanner(
+            first,
+            first == 0 and message.find("://", pos, endpos) != -1,
+            first <= 1 and message.find("@", pos, endpos) != -1,
+            TEN_DIGITS.search(message, pos, endpos) is not None
+        )
+        if scanner is None:
+            return found
+        for match in scanner.finditer(message, pos, endpos):
+            kind = match.lastgroup
+            start, end = match.span()
+            if kind == "link":
+                found.append((EntityType.PHISHING_LINK, match.group()))
+                self._scan(message, start, end, 1, found)
+            elif kind == "handle":
+                at = message.find("@", start, end)
+                local = message[start:at]
+                # Without an email-only character in the local part the whole handle is the UPI ID
+                if "%" not in local and "+" not in local:
+                    found.append((EntityType.UPI_ID, match.group()))
+                else:
+                    upi = self.upi_search.search(message, start, end)
+                    if upi is not None:
+                        found.append((EntityType.UPI_ID, upi.group()))
+                self._scan(message, start, end, 2, found)
+                # Only a handle whose domain has a dot can hold an email address
+                if message.find(".", at, end) != -1:
+                    email = self.email_search.search(message, start, end)
+                    if email is not None:
+                        found.append((EntityType.EMAIL_ADDRESS, email.group()))
+            elif kind == "account":
+                found.append((EntityType.BANK_ACCOUNT, match.group()))
+                phone = self.phone_search.search(message, start, end)
+                if phone is not None:
+                    found.append((EntityType.PHONE_NUMBER, phone.group()))
+            else:
+                found.append((EntityType.PHONE_NUMBER, match.group()))
+        return found
+
+# Canonical forms per entity type, so one entity written several ways is stored once
+MOBILE_NUMBER = re.compile(r'(?:\+?91|0)?[\s.-]*([6-9](?:[\s.-]*\d){9})')
+NOT_DIGITS = re.compile(r'\D')
+
+def canonical_link(value: str) -> str:
+    value = value.strip().rstrip(".,;:!?'\"")
+    try:
+        parts = urlsplit(value)
+        port = parts.port
+    except ValueError:
+        return value.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if "@" in parts.netloc:
+        host = parts.netloc.rsplit("@", 1)[0] + "@" + host
+    if port is not None and port != {"http": 80, "https": 443}.get(parts.scheme.lower()):
+        host = f"{host}:{port}"
+    return urlunsplit((parts.scheme.lower(), host, parts.path or "/", parts.query, ""))
+
+def canonical_entity(entity_type: str, value: str) -> str:
+    """E.164 phones, digits-only accounts, normalized links, lowercased UPI IDs and emails"""
+    value = value.strip()
+    if entity_type == "phone_numbers":
+        mobile = MOBILE_NUMBER.fullmatch(value)
+        return "+91" + NOT_DIGITS.sub("", mobile.group(1)) if mobile else NOT_DIGITS.sub("", value) or value
+    if entity_type == "bank_accounts":
+        return NOT_DIGITS.sub("", value) or value
+    if entity_type == "phishing_links":
+        return canonical_link(value)
+    return value.lower()
 
 # ============================================================================
 # MEMORY STORE
 # ============================================================================
-@dataclass
+@dataclass(slots=True)
 class Message:
+    # One per side of every turn, so slotted, stamped in epoch seconds and holding the
+    # extracted entities themselves; timestamp and entity dicts are built on demand
     role: str
     content: str
-    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
-    scam_indicators: List[str] = field(default_factory=list)
-    extracted_entities: Dict = field(default_factory=dict)
+    created: float = field(default_factory=time.time)
+    scam_indicators: Tuple[str, ...] = ()
+    entities: Tuple[ExtractedEntity, ...] = ()
+    
+    @property
+    def timestamp(self) -> str:
+        return datetime.fromtimestamp(self.created).isoformat()
+    
+    @property
+    def extracted_entities(self) -> Dict[str, List[dict]]:
+        found = defaultdict(list)
+        for entity in self.entities:
+            found[entity.type.value].append(entity.to_dict())
+        return dict(found)
 
-@dataclass
+@dataclass(slots=True)
 class ConversationState:
     conversation_id: str
     persona_name: str
@@ -352,6 +1343,9 @@ class ConversationState:
     trust_level: float = 0.0
 
 class MemoryStore:
+    __slots__ = ("conversation_id", "persona_name", "created_at", "message_history", "state",
+                 "scam_state", "extracted_intelligence", "intelligence_keys", "lock")
+    
     def __init__(self, conversation_id: str, persona_name: str):
         self.conversation_id = conversation_id
         self.persona_name = persona_name
@@ -361,25 +1355,42 @@ class MemoryStore:
             conversation_id=conversation_id,
             persona_name=persona_name
         )
+        self.scam_state = ConversationScamState()
         self.extracted_intelligence = defaultdict(list)
+        self.intelligence_keys = defaultdict(dict)  # entity type -> canonical value -> record
+        # Held by a request for its whole turn, so two messages on one session apply in order
+        self.lock = threading.RLock()
     
     def add_message(self, role: str, content: str, scam_indicators=None, extracted_entities=None):
+        # extracted_entities: EntityType -> ExtractedEntity list, as extract() returns it
         msg = Message(
-            role=role,
+            role=sys.intern(role),
             content=content,
-            scam_indicators=scam_indicators or [],
-            extracted_entities=extracted_entities or {}
+            scam_indicators=tuple(scam_indicators or ()),
+            entities=tuple(entity for found in (extracted_entities or {}).values() for entity in found)
         )
-        self.message_history.append(msg)
+        with self.lock:
+            self.message_history.append(msg)
     
     def update_phase(self, phase: str):
-        self.state.current_phase = phase
+        self.state.current_phase = sys.intern(phase)
     
     def add_intelligence(self, entity_type: str, value: str, confidence: float):
-        self.extracted_intelligence[entity_type].append({
-            "value": value,
-            "confidence": confidence
-        })
+        # A repeat of a stored entity updates its record instead of adding another
+        key = canonical_entity(entity_type, value)
+        with self.lock:
+            record = self.intelligence_keys[entity_type].get(key)
+            if record is not None:
+                record["confidence"] = max(record["confidence"], confidence)
+                record["occurrences"] += 1
+                return
+            record = {
+                "value": value,
+                "confidence": confidence,
+                "occurrences": 1
+            }
+            self.intelligence_keys[entity_type][key] = record
+            self.extracted_intelligence[entity_type].append(record)
     
     def get_summary(self) -> dict:
         return {
@@ -395,26 +1406,34 @@ class MemoryStore:
         }
 
 class MemoryManager:
-    def __init__(self):
-        self.conversations = {}
-        self.lock = threading.Lock()
+    """Conversations spread over shards by CRC-32 of the id, each shard with its own lock"""
+    
+    def __init__(self, shards: int = MEMORY_SHARDS):
+        self.shards = [{} for _ in range(shards)]
+        self.locks = [threading.Lock() for _ in range(shards)]
+    
+    def _shard(self, conversation_id: str) -> Tuple[dict, threading.Lock]:
+        n = zlib.crc32(conversation_id.encode()) % len(self.shards)
+        return self.shards[n], self.locks[n]
     
     def create_conversation(self, conversation_id: str, persona_name: str) -> MemoryStore:
-        with self.lock:
-            if conversation_id in self.conversations:
-                return self.conversations[conversation_id]
+        shard, lock = self._shard(conversation_id)
+        with lock:
+            if conversation_id in shard:
+                return shard[conversation_id]
             
             store = MemoryStore(conversation_id, persona_name)
-            self.conversations[conversation_id] = store
+            shard[conversation_id] = store
             return store
     
     def get_conversation(self, conversation_id: str) -> Optional[MemoryStore]:
-        with self.lock:
-            return self.conversations.get(conversation_id)
+        shard, lock = self._shard(conversation_id)
+        with lock:
+            return shard.get(conversation_id)
     
     def get_active_count(self) -> int:
-        with self.lock:
-            return len(self.conversations)
+        # Shard sizes are read without locking; the total is exact whenever no create is in flight
+        return sum(len(shard) for shard in self.shards)
 
 # ============================================================================
 # AGENT CONTROLLER
@@ -462,6 +1481,21 @@ conversation_engine = ConversationEngine()
 intelligence_extractor = IntelligenceExtractor()
 memory_manager = MemoryManager()
 
+def _reload_rules_in_background(signum, frame):
+    """SIGHUP: recompile the rule pack off the signal handler's frame"""
+    def run():
+        try:
+            scam_detector.reload_rules()
+        except RulePackError as e:
+            logger.error(f"Rule pack reload rejected: {e}")
+    threading.Thread(target=run, name="rule-pack-reload", daemon=True).start()
+
+if hasattr(signal, 'SIGHUP'):
+    try:
+        signal.signal(signal.SIGHUP, _reload_rules_in_background)
+    except ValueError:
+        pass  # Not the main thread (e.g. imported by a worker); the admin endpoint still works
+
 # ============================================================================
 # REQUEST HANDLERS - MUST BE BEFORE ROUTES
 # ============================================================================
@@ -669,9 +1703,68 @@ def health_check():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "active_conversations": memory_manager.get_active_count(),
+        "detection_cache": scam_detector.cache.get_stats(),
         "api_version": "1.0"
     })
 
+@app.route('/api/v1/statistics', methods=['GET'])
+@require_api_key
+def get_statistics():
+    """Get system statistics"""
+    return jsonify({
+        "timestamp": datetime.now().isoformat(),
+        "active_conversations": memory_manager.get_active_count(),
+        "detection_cache": scam_detector.cache.get_stats(),
+        "campaigns": scam_detector.campaigns.get_stats(),
+        "api_version": "v1"
+    }), 200
+
+@app.route('/api/v1/debug/rules', methods=['GET'])
+@require_api_key
+def debug_rules():
+    """Per-rule hit counts and match latency as JSON (?reset=true zeroes them after reading)"""
+    try:
+        profiler = scam_detector.rule_profiler
+        if profiler is None:
+            return jsonify({"error": "Rule profiling disabled (set RULE_PROFILING=true)"}), 404
+        
+        report = profiler.report()
+        if request.args.get('reset', 'false').lower() == 'true':
+            profiler.reset()
+        return jsonify(report), 200
+    
+    except Exception as e:
+        logger.error(f"Error in debug_rules: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+@app.route('/api/v1/admin/rules', methods=['GET'])
+@require_api_key
+def get_rules():
+    """Version, source and size of the rule set in use"""
+    return jsonify(scam_detector.rules_info()), 200
+
+@app.route('/api/v1/admin/rules/reload', methods=['POST'])
+@require_api_key
+def reload_rules():
+    """Reload the rule pack from RULE_PACK_PATH; an invalid pack is rejected and the running rules stay"""
+    try:
+        started = time.perf_counter()
+        previous = scam_detector.rules_version
+        changed = scam_detector.reload_rules()
+        return jsonify({
+            "reloaded": changed,
+            "previous_version": previous,
+            "rules": scam_detector.rules_info(),
+            "reload_ms": round((time.perf_counter() - started) * 1000, 2)
+        }), 200
+    
+    except RulePackError as e:
+        logger.error(f"Rule pack reload rejected: {str(e)}")
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in reload_rules: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
 @app.route('/api/v1/detect-scam', methods=['POST'])
 @require_api_key
 def detect_scam():
@@ -694,6 +1787,89 @@ def detect_scam():
         logger.error(f"Error in detect_scam: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
+@app.route('/api/v1/detect-scam/batch', methods=['POST'])
+@require_api_key
+def detect_scam_batch():
+    """Detect a batch of messages in one round trip; results keep request order"""
+    try:
+        data = request.get_json(force=False, silent=True)
+        
+        if not data or 'messages' not in data:
+            return jsonify({"error": "Missing required field: messages"}), 400
+        
+        messages = data['messages']
+        if not isinstance(messages, list) or not all(isinstance(m, str) for m in messages):
+            return jsonify({"error": "Field messages must be a list of strings"}), 400
+        if len(messages) > MAX_BATCH_SIZE:
+            return jsonify({"error": f"Batch too large (max {MAX_BATCH_SIZE} messages)"}), 413
+        
+        results = scam_detector.detect_batch(messages)
+        
+        return jsonify({
+            "timestamp": datetime.now().isoformat(),
+            "count": len(results),
+            "detections": [result.to_dict() for result in results]
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error in detect_scam_batch: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+@app.route('/api/v1/campaigns', methods=['GET'])
+@require_api_key
+def list_campaigns():
+    """Known scam campaigns, most active first (?limit=20)"""
+    try:
+        limit = request.args.get('limit', 20, type=int)
+        return jsonify({
+            "timestamp": datetime.now().isoformat(),
+            "campaigns": [CampaignIndex.describe(c) for c in scam_detector.campaigns.top(limit)],
+            "stats": scam_detector.campaigns.get_stats()
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error listing campaigns: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+@app.route('/api/v1/campaigns/<campaign_id>', methods=['GET'])
+@require_api_key
+def get_campaign(campaign_id):
+    """One campaign with the verdict shared by its messages"""
+    try:
+        campaign = scam_detector.campaigns.get(campaign_id)
+        if not campaign:
+            return jsonify({"error": "Campaign not found"}), 404
+        
+        return jsonify({**CampaignIndex.describe(campaign), "detection": campaign["result"].to_dict()}), 200
+    
+    except Exception as e:
+        logger.error(f"Error getting campaign: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+@app.route('/api/v1/campaigns/lookup', methods=['POST'])
+@require_api_key
+def lookup_campaign():
+    """Find the campaign a message is a near-duplicate of, without scoring it"""
+    try:
+        data = request.get_json(force=False, silent=True)
+        
+        if not data or not isinstance(data.get('message'), str):
+            return jsonify({"error": "Missing required field: message"}), 400
+        
+        match = scam_detector.campaigns.match(normalize_text(data['message']), scam_detector.matcher.fingerprint,
+                                              record=False)
+        if match is None:
+            return jsonify({"match": None}), 200
+        campaign, distance = match
+        return jsonify({
+            "match": {**CampaignIndex.describe(campaign), "distance": distance},
+            "detection": campaign["result"].to_dict()
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error in lookup_campaign: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
 @app.route('/api/v1/conversation', methods=['POST'])
 @require_api_key
 def create_conversation():
@@ -732,56 +1908,60 @@ def process_message(conversation_id):
         if not memory:
             return jsonify({"error": "Conversation not found"}), 404
         
-        # Detect scam
-        detection_result = scam_detector.detect(message)
-        memory.state.scam_detected = detection_result.is_scam
-        memory.state.scam_type = detection_result.scam_type.value
-        
-        # Extract intelligence
-        extracted = intelligence_extractor.extract(message)
-        
-        # Add message to memory
-        memory.add_message(
-            role='scammer',
-            content=message,
-            scam_indicators=detection_result.extracted_keywords,
-            extracted_entities={k.value: [e.to_dict() for e in v] for k, v in extracted.items()}
-        )
-        
-        # Store extracted intelligence
-        for entity_type, entities in extracted.items():
-            for entity in entities:
-                memory.add_intelligence(entity_type.value, entity.value, entity.confidence)
-        
-        # Agent decides strategy
-        agent = AgentController(memory)
-        decision = agent.decide_strategy(message, detection_result.confidence)
-        memory.update_phase(decision.strategy_phase.value)
-        
-        # Generate response
-        response = conversation_engine.generate_response(decision.strategy_phase)
-        memory.add_message(role='victim', content=response)
-        
-        # Calculate response delay (random between 1-5 seconds)
-        delay_ms = random.randint(1000, 5000)
-        
-        return jsonify({
-            "conversation_id": conversation_id,
-            "timestamp": datetime.now().isoformat(),
-            "scam_detection": detection_result.to_dict(),
-            "agent_response": {
-                "reply": response,
-                "strategy_phase": decision.strategy_phase.value,
-                "confidence": round(decision.confidence, 2),
-                "reasoning": decision.reasoning,
-                "behavioral_cues": {
-                    "response_delay_ms": delay_ms,
-                    "typing_indicators": True
-                }
-            },
-            "intelligence_extracted": {k.value: [e.to_dict() for e in v] for k, v in extracted.items()},
-            "memory_state": memory.get_summary()
-        }), 200
+        # One message at a time per conversation, applied in arrival order
+        with memory.lock:
+            # Detect scam; the conversation verdict accumulates across turns
+            detection_result = scam_detector.detect(message)
+            memory.scam_state.update(detection_result)
+            memory.state.scam_detected = memory.scam_state.is_scam
+            memory.state.scam_type = memory.scam_state.scam_type.value
+            
+            # Extract intelligence
+            extracted = intelligence_extractor.extract(message)
+            
+            # Add message to memory
+            memory.add_message(
+                role='scammer',
+                content=message,
+                scam_indicators=detection_result.extracted_keywords,
+                extracted_entities=extracted
+            )
+            
+            # Store extracted intelligence
+            for entity_type, entities in extracted.items():
+                for entity in entities:
+                    memory.add_intelligence(entity_type.value, entity.value, entity.confidence)
+            
+            # Agent decides strategy
+            agent = AgentController(memory)
+            decision = agent.decide_strategy(message, memory.scam_state.confidence)
+            memory.update_phase(decision.strategy_phase.value)
+            
+            # Generate response
+            response = conversation_engine.generate_response(decision.strategy_phase)
+            memory.add_message(role='victim', content=response)
+            
+            # Calculate response delay (random between 1-5 seconds)
+            delay_ms = random.randint(1000, 5000)
+            
+            return jsonify({
+                "conversation_id": conversation_id,
+                "timestamp": datetime.now().isoformat(),
+                "scam_detection": detection_result.to_dict(),
+                "conversation_detection": memory.scam_state.to_dict(),
+                "agent_response": {
+                    "reply": response,
+                    "strategy_phase": decision.strategy_phase.value,
+                    "confidence": round(decision.confidence, 2),
+                    "reasoning": decision.reasoning,
+                    "behavioral_cues": {
+                        "response_delay_ms": delay_ms,
+                        "typing_indicators": True
+                    }
+                },
+                "intelligence_extracted": {k.value: [e.to_dict() for e in v] for k, v in extracted.items()},
+                "memory_state": memory.get_summary()
+            }), 200
     
     except Exception as e:
         logger.error(f"Error processing message: {str(e)}")
@@ -808,6 +1988,5 @@ def get_conversation(conversation_id):
 # ENTRY POINT
 # ============================================================================
 if __name__ == '__main__':
-    import os
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=False)
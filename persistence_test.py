@@ -0,0 +1,176 @@
+"""
+Persistence Test - conversations written behind to SQLite, reloaded and pruned
+Every check runs on a fresh database in a temporary directory, with the writer's
+interval set past the test so rows land only on an explicit flush() or close(),
+and with one shard so capacity evicts the least recently active conversation overall.
+
+Run: python persistence_test.py
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, '.')
+
+from src.memory_store import MemoryManager
+from src.persistence import ConversationPersistence
+
+SCAM_MESSAGE = "Your SBI account is blocked, pay the fine to verify@paytm or call 9876543210"
+REPLY = "Which bank are you calling from sir?"
+IDLE_TIMEOUT = 7200
+
+def open_manager(path: str, max_conversations: int = 10, retention_seconds: float = 0) -> MemoryManager:
+    persistence = ConversationPersistence(path, flush_interval_seconds=3600, retention_seconds=retention_seconds)
+    return MemoryManager(max_conversations, IDLE_TIMEOUT, shards=1, persistence=persistence)
+
+def play_turn(manager: MemoryManager, conversation_id: str):
+    memory = manager.get_or_create(conversation_id, "Rajesh")
+    with memory.lock:
+        memory.add_message("scammer", f"{SCAM_MESSAGE} [{conversation_id}]", ["blocked"])
+        memory.add_extracted_intelligence("upi_ids", "verify@paytm", 0.9)
+        memory.add_extracted_intelligence("phone_numbers", "9876543210", 0.85)
+        memory.update_state(scam_detected=True, strategy="extraction", trust_level=0.4)
+        memory.add_message("victim", REPLY)
+    return memory
+
+def exported(memory) -> str:
+    export = memory.export_to_dict()
+    export["summary"].pop("duration_minutes")
+    return json.dumps(export, sort_keys=True, default=str)
+
+def count_rows(path: str, table: str, conversation_id: str = None) -> int:
+    reader = sqlite3.connect(path)
+    try:
+        if conversation_id is None:
+            return reader.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        return reader.execute(f"SELECT COUNT(*) FROM {table} WHERE conversation_id = ?",
+                              (conversation_id,)).fetchone()[0]
+    finally:
+        reader.close()
+
+def test_restart_restores_conversations(tmp_path):
+    """A new manager over the same database restores every conversation as it was exported"""
+    path = os.path.join(tmp_path, "restart.db")
+    manager = open_manager(path)
+    before = {}
+    for n in range(3):
+        before[f"conv-{n}"] = exported(play_turn(manager, f"conv-{n}"))
+    manager.shutdown()
+
+    restarted = open_manager(path)
+    assert restarted.restore() == 3
+    after = {memory.conversation_id: exported(memory) for memory in restarted.active_conversations.values()}
+    assert after == before
+    assert restarted.get_total_intelligence_count() == 6
+    restarted.shutdown()
+
+def test_evicted_conversation_reloads(tmp_path):
+    """Evicted for capacity, a conversation comes back from its queued writes, then from the database"""
+    path = os.path.join(tmp_path, "evicted.db")
+    manager = open_manager(path, max_conversations=2)
+    original = play_turn(manager, "conv-0")
+    expected = exported(original)
+    play_turn(manager, "conv-1")
+    play_turn(manager, "conv-2")
+    assert "conv-0" not in manager.active_conversations
+    assert count_rows(path, "messages") == 0
+
+    from_queue = manager.get_or_create("conv-0", "Rajesh")
+    assert from_queue is not original
+    assert exported(from_queue) == expected
+
+    manager.persistence.flush()
+    manager.get_or_create("conv-1", "Rajesh")
+    manager.get_or_create("conv-2", "Rajesh")
+    assert "conv-0" not in manager.active_conversations
+    from_database = manager.get_or_create("conv-0", "Rajesh")
+    assert from_database is not from_queue
+    assert exported(from_database) == expected
+    assert len(from_database.message_history) == 2
+    manager.shutdown()
+
+def test_deleted_conversation_is_not_reloaded(tmp_path):
+    """A deleted conversation's rows go, and its id starts fresh"""
+    path = os.path.join(tmp_path, "deleted.db")
+    manager = open_manager(path)
+    play_turn(manager, "conv-0")
+    play_turn(manager, "conv-1")
+    manager.persistence.flush()
+    manager.delete_conversation("conv-0")
+    manager.persistence.flush()
+    assert count_rows(path, "conversations", "conv-0") == 0
+    assert count_rows(path, "messages", "conv-0") == 0
+    assert count_rows(path, "intelligence", "conv-0") == 0
+    assert count_rows(path, "messages", "conv-1") == 2
+    assert manager.get_or_create("conv-0", "Rajesh").message_history == []
+    manager.shutdown()
+
+def test_prune_drops_idle_conversations(tmp_path):
+    """Conversations idle past the timeout are pruned with their rows, and neither restored nor resumed"""
+    path = os.path.join(tmp_path, "prune.db")
+    manager = open_manager(path)
+    for n in range(3):
+        play_turn(manager, f"conv-{n}")
+    stale = manager.active_conversations.get("conv-1")
+    stale.updated_at = datetime.now() - timedelta(seconds=IDLE_TIMEOUT + 60)
+    manager.persistence.flush()
+    since = time.time() - IDLE_TIMEOUT
+    assert manager.persistence.load_conversation("conv-1", since) is None
+    assert manager.persistence.load_conversation("conv-0", since) is not None
+
+    assert manager.persistence.prune(since) == 1
+    assert manager.persistence.prune(since) == 0
+    assert count_rows(path, "conversations") == 2
+    assert count_rows(path, "messages", "conv-1") == 0
+    assert count_rows(path, "intelligence", "conv-1") == 0
+    assert manager.persistence.get_stats()["pruned"] == 1
+    manager.shutdown()
+
+    restarted = open_manager(path)
+    assert restarted.restore() == 2
+    assert "conv-1" not in restarted.active_conversations
+    assert restarted.get_or_create("conv-1", "Rajesh").message_history == []
+    restarted.shutdown()
+
+def test_retention_prunes_on_close(tmp_path):
+    """With retention_seconds the writer prunes expired rows itself; without it rows stay"""
+    for retention, expected in ((IDLE_TIMEOUT, 1), (0, 2)):
+        path = os.path.join(tmp_path, f"retention-{retention}.db")
+        manager = open_manager(path, retention_seconds=retention)
+        play_turn(manager, "conv-0")
+        play_turn(manager, "conv-1").updated_at = datetime.now() - timedelta(seconds=IDLE_TIMEOUT + 60)
+        manager.shutdown()
+        assert count_rows(path, "conversations") == expected
+
+TESTS = [
+    test_restart_restores_conversations,
+    test_evicted_conversation_reloads,
+    test_deleted_conversation_is_not_reloaded,
+    test_prune_drops_idle_conversations,
+    test_retention_prunes_on_close,
+]
+
+def main():
+    print("=" * 80)
+    print("[TEST] CONVERSATION PERSISTENCE")
+    print("=" * 80)
+    failures = 0
+    for test in TESTS:
+        with tempfile.TemporaryDirectory() as workdir:
+            try:
+                test(workdir)
+                print(f"[OK] {test.__doc__}")
+            except AssertionError as e:
+                failures += 1
+                print(f"[FAIL] {test.__doc__} {e}")
+    print("=" * 80)
+    print(f"[OK] ALL {len(TESTS)} TESTS PASSED" if not failures else f"[FAIL] {failures}/{len(TESTS)} TESTS FAILED")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
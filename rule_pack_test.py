@@ -0,0 +1,194 @@
+"""
+Rule Pack Test - validation of declarative rule packs, and reloading them into a running engine
+Packs are built from the bundled default pack, edited in memory and written to a
+temporary directory; nothing depends on timing or on the default pack's exact rules.
+
+Run: python rule_pack_test.py
+"""
+
+import copy
+import hashlib
+import json
+import os
+import signal
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, '.')
+
+from src.rule_pack import (DEFAULT_RULE_PACK, RulePackError, install_reload_signal, load_rule_pack,
+                           parse_rule_pack)
+from src.scam_detector import ScamDetectionEngine, ScamType
+
+with open(DEFAULT_RULE_PACK, encoding="utf-8") as f:
+    DEFAULT = json.load(f)
+
+HAMPER_GROUP = {
+    "name": "gift_hamper",
+    "scam_type": "lottery_scam",
+    "weight": 0.9,
+    "patterns": ["gift hamper"],
+    "keywords": ["hamper"]
+}
+HAMPER_MESSAGE = "claim your free gift hamper today"
+
+def edited(**changes) -> dict:
+    """The default pack with top-level keys replaced"""
+    data = copy.deepcopy(DEFAULT)
+    data.update(changes)
+    return data
+
+def with_group(**changes) -> dict:
+    """The default pack with a copy of its first group, changed, appended"""
+    group = dict(DEFAULT["groups"][0], name="extra")
+    group.update(changes)
+    return edited(groups=copy.deepcopy(DEFAULT["groups"]) + [group])
+
+def write_pack(directory: str, name: str, data) -> str:
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(data if isinstance(data, str) else json.dumps(data))
+    return path
+
+def rule_names(engine: ScamDetectionEngine, text: str) -> set:
+    return {rule.name for rule in engine.rules.matcher.match(text)[0]}
+
+INVALID_PACKS = [
+    ("not an object", ["groups"], "must be a JSON object"),
+    ("unknown format", edited(format=2), "unsupported format"),
+    ("empty version", edited(version=""), "version must be a non-empty string"),
+    ("no groups", edited(groups=[]), "groups must be a non-empty list"),
+    ("unnamed group", with_group(name=""), "name must be a non-empty string"),
+    ("unknown scam type", with_group(scam_type="pyramid_scheme"), "unknown scam_type"),
+    ("weight above 1", with_group(weight=1.5), "weight must be a number between 0 and 1"),
+    ("boolean weight", with_group(weight=True), "weight must be a number between 0 and 1"),
+    ("empty patterns", with_group(patterns=[]), "patterns must be a non-empty list of strings"),
+    ("keyword not a string", with_group(keywords=["ok", 3]), "keywords must be a list of strings"),
+    ("keyword weight out of range", edited(keyword_weights={"urgent": -0.1}), "needs a weight between 0 and 1"),
+    ("backreference", with_group(patterns=["(a)\\1x"]), "cannot be matched in linear time"),
+    ("nested quantifier", with_group(patterns=["(a+)+"]), "cannot be matched in linear time"),
+    ("regex inside a chain", with_group(patterns=["x\\d+.*y"]), "has to be the last of its .* chain"),
+    ("unterminated class", with_group(patterns=["["]), "unterminated character set"),
+]
+
+def test_default_pack_is_valid():
+    """The bundled pack loads, and its fingerprint is the file's SHA-256"""
+    pack = load_rule_pack(DEFAULT_RULE_PACK, ScamType)
+    with open(DEFAULT_RULE_PACK, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    assert pack.digest == digest and pack.fingerprint == digest[:16]
+    assert pack.version == DEFAULT["version"]
+    assert pack.rule_count == sum(len(group["patterns"]) for group in DEFAULT["groups"])
+    assert pack.to_dict()["groups"] == len(DEFAULT["groups"])
+    assert parse_rule_pack(copy.deepcopy(DEFAULT), ScamType).rule_count == pack.rule_count
+
+def test_invalid_packs_are_rejected():
+    """Every malformed pack raises RulePackError naming the problem"""
+    for label, data, message in INVALID_PACKS:
+        try:
+            parse_rule_pack(data, ScamType, source="test.json")
+        except RulePackError as e:
+            assert message in str(e), f"{label}: {e}"
+            assert str(e).startswith("test.json"), f"{label}: {e}"
+        else:
+            raise AssertionError(f"{label}: accepted")
+
+def test_unreadable_files_are_rejected(tmp_path):
+    """Missing files and invalid JSON raise RulePackError too"""
+    for path in (os.path.join(tmp_path, "missing.json"), write_pack(tmp_path, "broken.json", "{\"format\": ")):
+        try:
+            load_rule_pack(path, ScamType)
+        except RulePackError as e:
+            assert str(e).startswith(path)
+        else:
+            raise AssertionError(f"{path}: accepted")
+
+def test_reload_swaps_rules(tmp_path):
+    """A changed pack is swapped in, and reloading an unchanged file compiles nothing"""
+    path = write_pack(tmp_path, "rules.json", DEFAULT)
+    engine = ScamDetectionEngine(rule_pack_path=path)
+    original = engine.rules
+    assert "gift_hamper" not in rule_names(engine, HAMPER_MESSAGE)
+    pack, changed = engine.reload_rules()
+    assert not changed and pack is original
+
+    write_pack(tmp_path, "rules.json", edited(version="test.2", groups=DEFAULT["groups"] + [HAMPER_GROUP]))
+    pack, changed = engine.reload_rules()
+    assert changed and engine.rules is pack and pack.version == "test.2"
+    assert pack.fingerprint != original.fingerprint
+    assert "gift_hamper" in rule_names(engine, HAMPER_MESSAGE)
+    assert "gift_hamper" in engine.detect(HAMPER_MESSAGE).matched_patterns
+
+    other = write_pack(tmp_path, "other.json", edited(version="test.3"))
+    pack, changed = engine.reload_rules(other)
+    assert changed and pack.version == "test.3" and engine.rule_pack_path == other
+    assert "gift_hamper" not in rule_names(engine, HAMPER_MESSAGE)
+
+def test_invalid_reload_keeps_running_rules(tmp_path):
+    """A reload that fails validation raises and leaves the running pack in place"""
+    path = write_pack(tmp_path, "rules.json", DEFAULT)
+    engine = ScamDetectionEngine(rule_pack_path=path)
+    running = engine.rules
+    for label, data, message in INVALID_PACKS:
+        write_pack(tmp_path, "rules.json", data)
+        try:
+            engine.reload_rules()
+        except RulePackError as e:
+            assert message in str(e), f"{label}: {e}"
+        else:
+            raise AssertionError(f"{label}: reloaded")
+        assert engine.rules is running and engine.rule_pack_path == path
+
+def test_sighup_triggers_reload():
+    """SIGHUP runs the reload callback on its own thread, and a rejected pack is only logged"""
+    if not hasattr(signal, "SIGHUP"):
+        return
+    done = threading.Event()
+    threads = []
+
+    def reload():
+        threads.append(threading.current_thread().name)
+        done.set()
+        raise RulePackError("rejected")
+
+    previous = signal.getsignal(signal.SIGHUP)
+    try:
+        assert install_reload_signal(reload)
+        os.kill(os.getpid(), signal.SIGHUP)
+        assert done.wait(5)
+        assert threads == ["rule-pack-reload"]
+        for thread in threading.enumerate():
+            if thread.name == "rule-pack-reload":
+                thread.join()
+    finally:
+        signal.signal(signal.SIGHUP, previous)
+
+TESTS = [
+    test_default_pack_is_valid,
+    test_invalid_packs_are_rejected,
+    test_unreadable_files_are_rejected,
+    test_reload_swaps_rules,
+    test_invalid_reload_keeps_running_rules,
+    test_sighup_triggers_reload,
+]
+
+def main():
+    print("=" * 80)
+    print("[TEST] RULE PACKS")
+    print("=" * 80)
+    failures = 0
+    for test in TESTS:
+        with tempfile.TemporaryDirectory() as workdir:
+            try:
+                test(workdir) if test.__code__.co_argcount else test()
+                print(f"[OK] {test.__doc__}")
+            except AssertionError as e:
+                failures += 1
+                print(f"[FAIL] {test.__doc__} {e}")
+    print("=" * 80)
+    print(f"[OK] ALL {len(TESTS)} TESTS PASSED" if not failures else f"[FAIL] {failures}/{len(TESTS)} TESTS FAILED")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
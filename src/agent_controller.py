@@ -4,10 +4,12 @@ Agent Controller - Autonomous decision-making and strategy management
 
 from enum import Enum
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 import random
 from datetime import datetime
 
+from src.message_analysis import AnalyzedMessage
+
 class StrategyPhase(Enum):
     """Conversation strategy phases"""
     IDENTIFICATION = "identification"
@@ -40,20 +42,21 @@ class AgentController:
         self.memory = memory_store
         self.decisions_history = []
         
-    def decide_strategy(self, scammer_message: str, 
+    def decide_strategy(self, scammer_message: Union[str, AnalyzedMessage], 
                        scam_detection_result: Dict,
                        extracted_entities: Dict) -> AgentDecision:
         """
         Make autonomous decision on strategy
         
         Args:
-            scammer_message: Latest scammer message
+            scammer_message: Latest scammer message (text or AnalyzedMessage)
             scam_detection_result: Output from scam detector
             extracted_entities: Entities extracted from message
             
         Returns:
             AgentDecision with strategy recommendation
         """
+        scammer_message = AnalyzedMessage.of(scammer_message)
         
         # Get current state
         current_phase = self.memory.current_state.current_strategy
@@ -183,15 +186,15 @@ class AgentController:
         
         return decision
     
-    def _confirm_scam_script(self, message: str) -> bool:
+    def _confirm_scam_script(self, message: AnalyzedMessage) -> bool:
         """Check if message shows consistent scam script"""
         # Look for script keywords appearing multiple times
         script_keywords = ["verify", "confirm", "authenticate", "urgent", "account", "blocked"]
-        keyword_count = sum(1 for kw in script_keywords if kw in message.lower())
+        keyword_count = message.count_present(script_keywords)
         
         return keyword_count >= 2
     
-    def _scammer_asking_for_action(self, message: str) -> bool:
+    def _scammer_asking_for_action(self, message: AnalyzedMessage) -> bool:
         """Check if scammer is asking victim to take action"""
         action_keywords = [
             "download", "click", "open", "link", "app", "install",
@@ -199,13 +202,11 @@ class AgentController:
             "share", "provide", "give", "tell"
         ]
         
-        message_lower = message.lower()
-        
         # Look for imperative forms
-        imperatives = sum(1 for kw in action_keywords if kw in message_lower)
+        imperatives = message.count_present(action_keywords)
         
         # Also check for question marks or exclamation (instruction language)
-        if imperatives >= 2 or message_lower.count("?") > 2:
+        if imperatives >= 2 or message.lower.count("?") > 2:
             return True
         
         return False
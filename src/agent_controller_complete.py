@@ -5,12 +5,13 @@ Orchestrates multi-turn engagement with adaptive strategy transitions
 
 from enum import Enum
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 import random
 from datetime import datetime
 from src.memory_store import Message
 from src.persona import PersonaEngine, Persona, LanguageStyle, TechnicalLevel, EmotionalState
 from src.conversation_engine import ConversationEngine
+from src.message_analysis import AnalyzedMessage
 
 class StrategyPhase(Enum):
     """Strategy phases for scammer engagement"""
@@ -133,7 +134,7 @@ class AgentController:
             return StrategyPhase.SAFE_EXIT
     
     def generate_response(self, 
-                         message: str,
+                         message: Union[str, AnalyzedMessage],
                          detection_confidence: float,
                          conversation_history: List[Message],
                          strategy_phase: StrategyPhase) -> str:
@@ -148,7 +149,7 @@ class AgentController:
         5. Add natural variations (typos, confusion)
         
         Args:
-            message: Scammer's latest message
+            message: Scammer's latest message (text or AnalyzedMessage)
             detection_confidence: Scam detection confidence
             conversation_history: Previous messages in conversation
             strategy_phase: Current engagement phase
@@ -156,6 +157,7 @@ class AgentController:
         Returns:
             Agent response string
         """
+        message = AnalyzedMessage.of(message)
         self.turn_count = len(conversation_history) // 2
         
         # Step 1: Get template responses for phase
@@ -189,7 +191,7 @@ class AgentController:
         return response
     
     def _select_response_template(self, 
-                                  message: str,
+                                  message: AnalyzedMessage,
                                   templates: dict,
                                   strategy_phase: StrategyPhase,
                                   turn_count: int) -> str:
@@ -204,13 +206,13 @@ class AgentController:
         
         if strategy_phase == StrategyPhase.IDENTIFICATION:
             # Goal: Get caller information
-            if "bank" in message.lower() or "hdfc" in message.lower() or "icici" in message.lower():
+            if "bank" in message.lower or "hdfc" in message.lower or "icici" in message.lower:
                 # Scammer mentioned bank
                 return "Which department are you calling from sir? Can you give me your employee ID?"
-            elif "verify" in message.lower() or "confirm" in message.lower():
+            elif "verify" in message.lower or "confirm" in message.lower:
                 # Scammer asking to verify
                 return "I'm worried sir... what exactly do I need to do?"
-            elif "urgent" in message.lower() or "immediate" in message.lower():
+            elif "urgent" in message.lower or "immediate" in message.lower:
                 # Scammer creating urgency
                 return "Oh no! What happened sir? Can you explain slowly?"
             else:
@@ -223,12 +225,12 @@ class AgentController:
         
         elif strategy_phase == StrategyPhase.BUILD_TRUST:
             # Goal: Show compliance, lower scammer's guard
-            if "please" in message.lower() or "need" in message.lower():
+            if "please" in message.lower or "need" in message.lower:
                 return random.choice(templates.get("compliance_statements", [
                     "Ok sir, I trust you. What should I do?",
                     "Yes sir, I will do whatever you say."
                 ]))
-            elif "?" in message:
+            elif "?" in message.text:
                 return random.choice(templates.get("reassurance_requests", [
                     "Sir, can you promise this is safe?",
                     "Will my money be safe sir?"
@@ -241,11 +243,11 @@ class AgentController:
         
         elif strategy_phase == StrategyPhase.EXTRACT_INTELLIGENCE:
             # Goal: Get scammer to provide details naturally
-            if "download" in message.lower() or "app" in message.lower():
+            if "download" in message.lower or "app" in message.lower:
                 return "Can you send me the link sir? Which app should I download?"
-            elif "account" in message.lower() or "details" in message.lower():
+            elif "account" in message.lower or "details" in message.lower:
                 return "But sir, isn't it risky to share these details? How do I know it's safe?"
-            elif "transfer" in message.lower() or "money" in message.lower():
+            elif "transfer" in message.lower or "money" in message.lower:
                 return "How much should I transfer sir? Where exactly should I send it?"
             else:
                 return random.choice(templates.get("how_questions", [
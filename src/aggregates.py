@@ -0,0 +1,82 @@
+"""
+Aggregates - Counters kept up to date as events are recorded, so status endpoints never scan
+Each counter has a running total, moved down again when what it counts goes away, and
+per-day buckets of what was recorded, which give real "today" figures
+"""
+
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Callable, Dict
+
+class DailyCounters:
+    """
+    Named counters with running totals and per-day event counts.
+
+    incr adds to a counter's total and, unless told otherwise, to today's
+    bucket; decr takes from the total only, since what was recorded today
+    still happened today. Buckets older than `days` are dropped as days
+    roll over. Reads and updates cost the same however many conversations
+    report into the counters. Thread-safe.
+    """
+
+    def __init__(self, days: int = 7, today: Callable[[], date] = date.today):
+        """
+        Initialize counters
+
+        Args:
+            days: Daily buckets kept, today included
+            today: Source of the current date
+        """
+        self.days = max(1, days)
+        self._today = today
+        self._totals: Dict[str, int] = {}
+        self._buckets: "OrderedDict[date, Dict[str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, n: int = 1, daily: bool = True):
+        """Add n to a counter's total and, if daily, to today's count"""
+        if n <= 0:
+            return
+        with self._lock:
+            self._totals[name] = self._totals.get(name, 0) + n
+            if daily:
+                bucket = self._bucket(self._today())
+                bucket[name] = bucket.get(name, 0) + n
+
+    def decr(self, name: str, n: int = 1):
+        """Take n off a counter's total; daily counts are left as recorded"""
+        if n <= 0:
+            return
+        with self._lock:
+            self._totals[name] = self._totals.get(name, 0) - n
+
+    def total(self, name: str) -> int:
+        """Running total of a counter"""
+        return self._totals.get(name, 0)
+
+    def on(self, name: str, day: date) -> int:
+        """How much was recorded under a counter on day, if still kept"""
+        return self._buckets.get(day, {}).get(name, 0)
+
+    def today(self, name: str) -> int:
+        """How much was recorded under a counter today"""
+        return self.on(name, self._today())
+
+    def _bucket(self, day: date) -> Dict[str, int]:
+        """The bucket for day, opened and the oldest dropped if new (lock held)"""
+        bucket = self._buckets.get(day)
+        if bucket is None:
+            bucket = self._buckets[day] = {}
+            while len(self._buckets) > self.days:
+                self._buckets.popitem(last=False)
+        return bucket
+
+    def get_stats(self) -> Dict:
+        """Totals, today's counts and the kept daily history"""
+        with self._lock:
+            return {
+                "totals": dict(self._totals),
+                "today": dict(self._buckets.get(self._today(), {})),
+                "daily": {day.isoformat(): dict(bucket) for day, bucket in self._buckets.items()}
+            }
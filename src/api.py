@@ -5,16 +5,29 @@ API Interface - Flask REST API for Honeypot System
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from datetime import datetime
+import os
+import atexit
 import uuid
 import logging
 from functools import wraps
 
 from src.scam_detector import ScamDetectionEngine, ScamType
+from src.detection_cache import DetectionCache
+from src.campaign_index import CampaignIndex
+from src.rule_profiler import RuleProfiler
+from src.rule_pack import RulePackError, install_reload_signal
+from src.ngram_classifier import load_classifier
+from src.offload import ProcessOffloader, in_worker_process
 from src.persona import get_persona
 from src.conversation_engine import ConversationEngine
 from src.agent_controller import AgentController
 from src.memory_store import MemoryManager
+from src.persistence import load_persistence
 from src.intelligence_extractor import IntelligenceExtractor
+from src.intelligence_index import IntelligenceIndex
+from src.watchlist import load_watchlist
+from src.phishing_analysis import PhishingAnalyzer
+from src.message_analysis import AnalyzedMessage
 
 # Initialize components
 app = Flask(__name__)
@@ -24,15 +37,74 @@ CORS(app)
 from configs.config import get_config
 config = get_config()
 
+# Offload workers are spawned, and spawn re-imports the server's __main__ module in each
+# of them - this module under `python -m src.api`. Threads, the database, signal handlers
+# and the worker pool belong to the server process only
+server_process = not in_worker_process()
+
 # Initialize global services
-scam_detector = ScamDetectionEngine()
-memory_manager = MemoryManager()
-intelligence_extractor = IntelligenceExtractor()
+ngram_classifier = load_classifier(config.NGRAM_MODEL_PATH)
+offloader = ProcessOffloader(
+    min_chars=config.OFFLOAD_MIN_CHARS,
+    workers=config.OFFLOAD_WORKERS,
+    rule_pack_path=config.RULE_PACK_PATH,
+    engine_options={
+        "cpu_budget_ms": config.DETECTION_CPU_BUDGET_MS,
+        "early_exit": config.DETECTION_EARLY_EXIT,
+        "classifier": ngram_classifier
+    },
+    profile_rules=config.RULE_PROFILING_ENABLED
+) if config.DETECTION_EXECUTION_MODE == "process" else None
+scam_detector = ScamDetectionEngine(
+    cpu_budget_ms=config.DETECTION_CPU_BUDGET_MS,
+    batch_parallel_threshold=config.DETECTION_BATCH_PARALLEL_THRESHOLD,
+    cache=DetectionCache(config.DETECTION_CACHE_SIZE, config.DETECTION_CACHE_TTL_SECONDS),
+    early_exit=config.DETECTION_EARLY_EXIT,
+    campaigns=CampaignIndex(
+        config.CAMPAIGN_INDEX_SIZE, config.CAMPAIGN_TTL_SECONDS, config.CAMPAIGN_MAX_DISTANCE
+    ) if config.CAMPAIGN_INDEX_ENABLED else None,
+    rule_profiler=RuleProfiler() if config.RULE_PROFILING_ENABLED else None,
+    rule_pack_path=config.RULE_PACK_PATH,
+    classifier=ngram_classifier,
+    offloader=offloader
+)
+memory_manager = MemoryManager(
+    config.MAX_ACTIVE_CONVERSATIONS,
+    config.CONVERSATION_IDLE_TTL_SECONDS,
+    config.CONVERSATION_SWEEP_INTERVAL_SECONDS if server_process else 0,
+    config.CONVERSATION_SHARDS,
+    persistence=load_persistence(
+        config.DATABASE_URL,
+        config.PERSISTENCE_FLUSH_INTERVAL_SECONDS,
+        config.PERSISTENCE_BATCH_SIZE,
+        config.PERSISTENCE_MAX_QUEUE,
+        config.CONVERSATION_IDLE_TTL_SECONDS  # Rows idle past the timeout can't be resumed, so go
+    ) if config.PERSIST_CONVERSATIONS and server_process else None
+)
+intelligence_extractor = IntelligenceExtractor(
+    offloader=offloader,
+    watchlist=load_watchlist(config.WATCHLIST_PATH),
+    phishing_analyzer=PhishingAnalyzer(config.PHISHING_CACHE_SIZE, config.PHISHING_CACHE_TTL_SECONDS)
+)
+intelligence_index = IntelligenceIndex()
 
 # Logging
 logging.basicConfig(level=config.LOG_LEVEL)
 logger = logging.getLogger(__name__)
 
+if server_process:
+    # Pick up the conversations saved before a restart, and commit queued writes on exit
+    if memory_manager.persistence:
+        logger.info(f"Restored {memory_manager.restore()} persisted conversations")
+        atexit.register(memory_manager.shutdown)
+    
+    # kill -HUP <pid> reloads the rule pack in place
+    install_reload_signal(scam_detector.reload_rules)
+    
+    # Start the worker processes now rather than on the first long message
+    if offloader is not None:
+        offloader.warm_up()
+
 def require_api_key(f):
     """Decorator to require API key"""
     @wraps(f)
@@ -63,7 +135,8 @@ def health_check():
     return jsonify({
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "active_conversations": memory_manager.get_active_count()
+        "active_conversations": memory_manager.get_active_count(),
+        "detection_cache": scam_detector.cache.get_stats()
     })
 
 @app.route('/api/v1/detect-scam', methods=['POST'])
@@ -103,6 +176,180 @@ def detect_scam():
         logger.error(f"Error in detect_scam: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/v1/detect-scam/batch', methods=['POST'])
+@require_api_key
+@require_ip_whitelist
+def detect_scam_batch():
+    """
+    Detect a batch of messages in one request
+    
+    Request JSON:
+    {
+        "messages": ["string", ...]
+    }
+    
+    Detections are returned in the same order as the messages.
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or 'messages' not in data:
+            return jsonify({"error": "Missing required fields"}), 400
+        
+        messages = data['messages']
+        if not isinstance(messages, list) or not all(isinstance(m, str) for m in messages):
+            return jsonify({"error": "messages must be a list of strings"}), 400
+        if len(messages) > config.DETECTION_BATCH_MAX_SIZE:
+            return jsonify({"error": f"Batch exceeds {config.DETECTION_BATCH_MAX_SIZE} messages"}), 413
+        
+        results = scam_detector.detect_batch(messages)
+        
+        logger.info(f"Batch scam detection: {len(results)} messages, "
+                    f"{sum(1 for r in results if r.is_scam)} flagged")
+        
+        return jsonify({
+            "timestamp": datetime.now().isoformat(),
+            "count": len(results),
+            "detections": [result.to_dict() for result in results]
+        })
+    
+    except Exception as e:
+        logger.error(f"Error in detect_scam_batch: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/v1/campaigns', methods=['GET'])
+@require_api_key
+@require_ip_whitelist
+def list_campaigns():
+    """List known scam campaigns, most active first (?limit=20)"""
+    try:
+        if scam_detector.campaigns is None:
+            return jsonify({"error": "Campaign index disabled"}), 404
+        
+        limit = request.args.get('limit', 20, type=int)
+        return jsonify({
+            "timestamp": datetime.now().isoformat(),
+            "campaigns": [campaign.to_dict() for campaign in scam_detector.campaigns.top(limit)],
+            "stats": scam_detector.campaigns.get_stats()
+        })
+    
+    except Exception as e:
+        logger.error(f"Error listing campaigns: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/v1/campaigns/<campaign_id>', methods=['GET'])
+@require_api_key
+@require_ip_whitelist
+def get_campaign(campaign_id):
+    """Get one campaign with the verdict shared by its messages"""
+    try:
+        campaign = scam_detector.campaigns.get(campaign_id) if scam_detector.campaigns else None
+        if not campaign:
+            return jsonify({"error": "Campaign not found"}), 404
+        
+        return jsonify({**campaign.to_dict(), "detection": campaign.value.to_dict()})
+    
+    except Exception as e:
+        logger.error(f"Error getting campaign: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/v1/campaigns/lookup', methods=['POST'])
+@require_api_key
+@require_ip_whitelist
+def lookup_campaign():
+    """
+    Find the campaign a message is a near-duplicate of, without scoring it
+    
+    Request JSON:
+    {
+        "message": "string"
+    }
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or 'message' not in data:
+            return jsonify({"error": "Missing required fields"}), 400
+        if scam_detector.campaigns is None:
+            return jsonify({"error": "Campaign index disabled"}), 404
+        
+        match = scam_detector.campaigns.match(AnalyzedMessage(data['message']).normalized,
+                                             scam_detector.rules.fingerprint, record=False)
+        if match is None:
+            return jsonify({"match": None})
+        campaign, distance = match
+        return jsonify({
+            "match": {**campaign.to_dict(), "distance": distance},
+            "detection": campaign.value.to_dict()
+        })
+    
+    except Exception as e:
+        logger.error(f"Error in lookup_campaign: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/v1/debug/rules', methods=['GET'])
+@require_api_key
+@require_ip_whitelist
+def debug_rules():
+    """
+    Per-rule hit counts and match latency, most expensive rule first
+    
+    Query: ?dump=true also writes the report to RULE_PROFILE_DUMP_PATH,
+           ?reset=true zeroes the counters after reading
+    """
+    try:
+        profiler = scam_detector.rule_profiler
+        if profiler is None:
+            return jsonify({"error": "Rule profiling disabled (set RULE_PROFILING_ENABLED=true)"}), 404
+        
+        report = profiler.report()
+        if request.args.get('dump', 'false').lower() == 'true':
+            os.makedirs(os.path.dirname(config.RULE_PROFILE_DUMP_PATH) or '.', exist_ok=True)
+            profiler.dump(config.RULE_PROFILE_DUMP_PATH)
+            report["dumped_to"] = config.RULE_PROFILE_DUMP_PATH
+        if request.args.get('reset', 'false').lower() == 'true':
+            profiler.reset()
+        return jsonify(report)
+    
+    except Exception as e:
+        logger.error(f"Error in debug_rules: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/v1/admin/rules', methods=['GET'])
+@require_api_key
+@require_ip_whitelist
+def get_rules():
+    """Version, source and size of the rule pack in use"""
+    return jsonify(scam_detector.rules.to_dict())
+
+@app.route('/api/v1/admin/rules/reload', methods=['POST'])
+@require_api_key
+@require_ip_whitelist
+def reload_rules():
+    """
+    Reload the rule pack from RULE_PACK_PATH and swap it in atomically
+    
+    An invalid pack is rejected with 400 and the running rules stay in place;
+    an unchanged file is not recompiled.
+    """
+    try:
+        started = datetime.now()
+        previous = scam_detector.rules.version
+        pack, changed = scam_detector.reload_rules()
+        return jsonify({
+            "reloaded": changed,
+            "previous_version": previous,
+            "rules": pack.to_dict(),
+            "reload_ms": round((datetime.now() - started).total_seconds() * 1000, 2)
+        })
+    
+    except RulePackError as e:
+        logger.error(f"Rule pack reload rejected: {str(e)}")
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in reload_rules: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/v1/conversation', methods=['POST'])
 @require_api_key
 @require_ip_whitelist
@@ -169,83 +416,94 @@ def process_message(conversation_id):
         # Get persona
         persona_engine = get_persona(memory.persona_name)
         
-        # Detect scam
-        detection_result = scam_detector.detect(message)
-        memory.update_state(
-            scam_detected=detection_result.is_scam,
-            scam_type=detection_result.scam_type.value
-        )
-        
-        # Extract intelligence
-        extracted = intelligence_extractor.extract(
-            message,
-            [m.content for m in memory.message_history]
-        )
-        
-        # Add to memory
-        memory.add_message(
-            role='scammer',
-            content=message,
-            scam_indicators=detection_result.extracted_keywords,
-            extracted_entities={k.value: [e.to_dict() for e in v] for k, v in extracted.items()}
-        )
-        
-        # Extract intelligence and store
-        for entity_type, entities in extracted.items():
-            for entity in entities:
-                memory.add_extracted_intelligence(
-                    entity_type.value,
-                    entity.value,
-                    entity.confidence,
-                    entity.metadata
-                )
-        
-        # Agent decides strategy
-        agent = AgentController(memory)
-        decision = agent.decide_strategy(
-            message,
-            detection_result.to_dict(),
-            {k.value: [e.to_dict() for e in v] for k, v in extracted.items()}
-        )
-        
-        # Generate response
-        conv_engine = ConversationEngine(persona_engine)
-        response = conv_engine.generate_response(
-            message,
-            decision.strategy_phase,
-            memory.get_memory_summary(),
-            []
-        )
-        
-        # Add victim response to memory
-        memory.add_message(
-            role='victim',
-            content=response
-        )
-        
-        # Calculate response delay
-        delay_ms = int(persona_engine.calculate_response_delay() * 1000)
-        
-        logger.info(f"Processed message for conversation {conversation_id}")
+        # Analyze once; every stage below reuses the same text and tokens
+        analyzed = AnalyzedMessage(message)
         
-        return jsonify({
-            "conversation_id": conversation_id,
-            "timestamp": datetime.now().isoformat(),
-            "scam_detection": detection_result.to_dict(),
-            "agent_response": {
-                "reply": response,
-                "strategy_phase": decision.strategy_phase.value,
-                "confidence": decision.confidence,
-                "reasoning": decision.reasoning,
-                "behavioral_cues": {
-                    "response_delay_ms": delay_ms,
-                    "emotional_tone": persona_engine.persona.emotional_state.value,
-                    "typing_indicators": True
-                }
-            },
-            "intelligence_extracted": {k.value: [e.to_dict() for e in v] for k, v in extracted.items()},
-            "memory_state": memory.get_memory_summary()
-        })
+        # One message at a time per conversation: detection state, mention counts and
+        # history are read and updated together
+        with memory.lock:
+            # Detect scam; the conversation verdict accumulates across turns
+            detection_result = scam_detector.detect(analyzed, conversation_state=memory.scam_state)
+            memory.update_state(
+                scam_detected=memory.scam_state.is_scam,
+                scam_type=memory.scam_state.scam_type.value
+            )
+            
+            # Extract intelligence
+            extracted = intelligence_extractor.extract(
+                analyzed,
+                mention_counts=memory.mention_counts
+            )
+            
+            # Add to memory
+            memory.add_message(
+                role='scammer',
+                content=message,
+                scam_indicators=detection_result.extracted_keywords,
+                extracted_entities=extracted
+            )
+            
+            # Extract intelligence and store
+            for entity_type, entities in extracted.items():
+                for entity in entities:
+                    memory.add_extracted_intelligence(
+                        entity_type.value,
+                        entity.value,
+                        entity.confidence,
+                        entity.metadata
+                    )
+            intelligence_index.record(
+                conversation_id,
+                [(entity_type.value, entity.value) for entity_type, entities in extracted.items() for entity in entities]
+            )
+            
+            # Agent decides strategy
+            agent = AgentController(memory)
+            decision = agent.decide_strategy(
+                analyzed,
+                memory.scam_state.to_dict(),
+                {k.value: [e.to_dict() for e in v] for k, v in extracted.items()}
+            )
+            
+            # Generate response
+            conv_engine = ConversationEngine(persona_engine)
+            response = conv_engine.generate_response(
+                analyzed,
+                decision.strategy_phase,
+                memory.get_memory_summary(),
+                []
+            )
+            
+            # Add victim response to memory
+            memory.add_message(
+                role='victim',
+                content=response
+            )
+            
+            # Calculate response delay
+            delay_ms = int(persona_engine.calculate_response_delay() * 1000)
+            
+            logger.info(f"Processed message for conversation {conversation_id}")
+            
+            return jsonify({
+                "conversation_id": conversation_id,
+                "timestamp": datetime.now().isoformat(),
+                "scam_detection": detection_result.to_dict(),
+                "conversation_detection": memory.scam_state.to_dict(),
+                "agent_response": {
+                    "reply": response,
+                    "strategy_phase": decision.strategy_phase.value,
+                    "confidence": decision.confidence,
+                    "reasoning": decision.reasoning,
+                    "behavioral_cues": {
+                        "response_delay_ms": delay_ms,
+                        "emotional_tone": persona_engine.persona.emotional_state.value,
+                        "typing_indicators": True
+                    }
+                },
+                "intelligence_extracted": {k.value: [e.to_dict() for e in v] for k, v in extracted.items()},
+                "memory_state": memory.get_memory_summary()
+            })
     
     except Exception as e:
         logger.error(f"Error processing message: {str(e)}")
@@ -299,6 +557,23 @@ def delete_conversation(conversation_id):
         logger.error(f"Error deleting conversation: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/v1/intelligence/lookup', methods=['GET'])
+@require_api_key
+@require_ip_whitelist
+def lookup_intelligence():
+    """Conversations an entity value appeared in, across all sessions (?value=...&limit=100)"""
+    try:
+        value = request.args.get('value', '')
+        if not value.strip():
+            return jsonify({"error": "Missing value"}), 400
+        
+        limit = request.args.get('limit', 100, type=int)
+        return jsonify({"entity": intelligence_index.lookup(value, limit)})
+    
+    except Exception as e:
+        logger.error(f"Error in lookup_intelligence: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/v1/statistics', methods=['GET'])
 @require_api_key
 def get_statistics():
@@ -306,6 +581,18 @@ def get_statistics():
     return jsonify({
         "timestamp": datetime.now().isoformat(),
         "active_conversations": memory_manager.get_active_count(),
+        "scam_detections_today": memory_manager.get_scam_count_today(),
+        "total_intelligence_extracted": memory_manager.get_total_intelligence_count(),
+        "activity": memory_manager.get_aggregates(),
+        "conversation_eviction": memory_manager.get_stats(),
+        "persistence": memory_manager.get_persistence_stats(),
+        "detection_cache": scam_detector.cache.get_stats(),
+        "detection_tiers": scam_detector.get_tier_stats(),
+        "campaigns": scam_detector.campaigns.get_stats() if scam_detector.campaigns else None,
+        "offload": offloader.get_stats() if offloader else None,
+        "intelligence_index": intelligence_index.get_stats(),
+        "watchlist": intelligence_extractor.watchlist.to_dict() if intelligence_extractor.watchlist else None,
+        "phishing_cache": intelligence_extractor.phishing_analyzer.get_stats(),
         "api_version": "v1"
     })
 
@@ -9,16 +9,28 @@ from datetime import datetime
 import uuid
 import logging
 import time
+import atexit
 import json
 from functools import wraps
 import traceback
 
 from src.scam_detector import ScamDetectionEngine, ScamType
+from src.detection_cache import DetectionCache
+from src.campaign_index import CampaignIndex
+from src.rule_profiler import RuleProfiler
+from src.rule_pack import install_reload_signal
+from src.ngram_classifier import load_classifier
+from src.offload import ProcessOffloader, in_worker_process
 from src.agent_controller import AgentController, StrategyPhase
 from src.persona import get_persona
 from src.conversation_engine import ConversationEngine
 from src.memory_store import MemoryManager, MemoryStore
+from src.persistence import load_persistence
 from src.intelligence_extractor import IntelligenceExtractor
+from src.intelligence_index import IntelligenceIndex
+from src.watchlist import load_watchlist
+from src.phishing_analysis import PhishingAnalyzer
+from src.message_analysis import AnalyzedMessage
 from configs.config import get_config
 
 # Initialize Flask app
@@ -33,11 +45,72 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Offload workers are spawned, and spawn re-imports the server's __main__ module in each
+# of them - this module under `python -m src.api_complete`. Threads, the database, signal handlers
+# and the worker pool belong to the server process only
+server_process = not in_worker_process()
+
 # Global service instances
-scam_detector = ScamDetectionEngine()
-memory_manager = MemoryManager()
-intelligence_extractor = IntelligenceExtractor()
+ngram_classifier = load_classifier(config.NGRAM_MODEL_PATH)
+offloader = ProcessOffloader(
+    min_chars=config.OFFLOAD_MIN_CHARS,
+    workers=config.OFFLOAD_WORKERS,
+    rule_pack_path=config.RULE_PACK_PATH,
+    engine_options={
+        "cpu_budget_ms": config.DETECTION_CPU_BUDGET_MS,
+        "early_exit": config.DETECTION_EARLY_EXIT,
+        "classifier": ngram_classifier
+    },
+    profile_rules=config.RULE_PROFILING_ENABLED
+) if config.DETECTION_EXECUTION_MODE == "process" else None
+scam_detector = ScamDetectionEngine(
+    cpu_budget_ms=config.DETECTION_CPU_BUDGET_MS,
+    batch_parallel_threshold=config.DETECTION_BATCH_PARALLEL_THRESHOLD,
+    cache=DetectionCache(config.DETECTION_CACHE_SIZE, config.DETECTION_CACHE_TTL_SECONDS),
+    early_exit=config.DETECTION_EARLY_EXIT,
+    campaigns=CampaignIndex(
+        config.CAMPAIGN_INDEX_SIZE, config.CAMPAIGN_TTL_SECONDS, config.CAMPAIGN_MAX_DISTANCE
+    ) if config.CAMPAIGN_INDEX_ENABLED else None,
+    rule_profiler=RuleProfiler() if config.RULE_PROFILING_ENABLED else None,
+    rule_pack_path=config.RULE_PACK_PATH,
+    classifier=ngram_classifier,
+    offloader=offloader
+)
+memory_manager = MemoryManager(
+    config.MAX_ACTIVE_CONVERSATIONS,
+    config.CONVERSATION_IDLE_TTL_SECONDS,
+    config.CONVERSATION_SWEEP_INTERVAL_SECONDS if server_process else 0,
+    config.CONVERSATION_SHARDS,
+    persistence=load_persistence(
+        config.DATABASE_URL,
+        config.PERSISTENCE_FLUSH_INTERVAL_SECONDS,
+        config.PERSISTENCE_BATCH_SIZE,
+        config.PERSISTENCE_MAX_QUEUE,
+        config.CONVERSATION_IDLE_TTL_SECONDS  # Rows idle past the timeout can't be resumed, so go
+    ) if config.PERSIST_CONVERSATIONS and server_process else None
+)
+intelligence_extractor = IntelligenceExtractor(
+    offloader=offloader,
+    watchlist=load_watchlist(config.WATCHLIST_PATH),
+    phishing_analyzer=PhishingAnalyzer(config.PHISHING_CACHE_SIZE, config.PHISHING_CACHE_TTL_SECONDS)
+)
+intelligence_index = IntelligenceIndex()
 agent_controllers = {}  # conversation_id -> AgentController
+# An agent goes with its conversation when that is evicted
+memory_manager.add_eviction_listener(lambda conversation_id, memory, reason: agent_controllers.pop(conversation_id, None))
+
+if server_process:
+    # Pick up the conversations saved before a restart, and commit queued writes on exit
+    if memory_manager.persistence:
+        logger.info(f"Restored {memory_manager.restore()} persisted conversations")
+        atexit.register(memory_manager.shutdown)
+    
+    # kill -HUP <pid> reloads the rule pack in place
+    install_reload_signal(scam_detector.reload_rules)
+    
+    # Start the worker processes now rather than on the first long message
+    if offloader is not None:
+        offloader.warm_up()
 
 # ============================================================================
 # MIDDLEWARE & DECORATORS
@@ -81,7 +154,8 @@ def health_check():
             "timestamp": datetime.utcnow().isoformat() + "Z",
             "service": "agentic-honeypot",
             "version": "1.0.0",
-            "active_conversations": memory_manager.get_active_count()
+            "active_conversations": memory_manager.get_active_count(),
+            "detection_cache": scam_detector.cache.get_stats()
         }), 200
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
@@ -94,7 +168,11 @@ def health_check():
 @app.route('/api/v1/status', methods=['GET'])
 @require_api_key
 def get_status():
-    """Get system status"""
+    """
+    Get system status. scam_detections_today counts conversations first
+    flagged as scams today by this process, including ones since evicted,
+    rather than the flagged conversations still active
+    """
     return jsonify({
         "success": True,
         "status": "operational",
@@ -102,7 +180,17 @@ def get_status():
         "metrics": {
             "active_conversations": memory_manager.get_active_count(),
             "scam_detections_today": memory_manager.get_scam_count_today(),
-            "total_intelligence_extracted": memory_manager.get_total_intelligence_count()
+            "total_intelligence_extracted": memory_manager.get_total_intelligence_count(),
+            "activity": memory_manager.get_aggregates(),
+            "conversation_eviction": memory_manager.get_stats(),
+            "persistence": memory_manager.get_persistence_stats(),
+            "detection_cache": scam_detector.cache.get_stats(),
+            "detection_tiers": scam_detector.get_tier_stats(),
+            "campaigns": scam_detector.campaigns.get_stats() if scam_detector.campaigns else None,
+            "offload": offloader.get_stats() if offloader else None,
+            "intelligence_index": intelligence_index.get_stats(),
+            "watchlist": intelligence_extractor.watchlist.to_dict() if intelligence_extractor.watchlist else None,
+            "phishing_cache": intelligence_extractor.phishing_analyzer.get_stats()
         }
     }), 200
 
@@ -179,98 +267,107 @@ def engage_scammer():
         # ===== STEP 2: GET OR CREATE CONVERSATION =====
         conv_memory = memory_manager.get_or_create(conversation_id)
         
-        # ===== STEP 3: DETECT SCAM (FAST PATH) =====
-        detection_result = scam_detector.detect(message)
-        
-        # Update memory with detection
-        conv_memory.current_state.scam_detected = detection_result.is_scam
-        if detection_result.is_scam:
-            conv_memory.current_state.scam_type = detection_result.scam_type.value
-        
-        # ===== STEP 4: EXTRACT INTELLIGENCE =====
-        extracted_entities = intelligence_extractor.extract(
-            message,
-            [m.content for m in conv_memory.message_history]
-        )
-        
-        # ===== STEP 5: GENERATE AGENT RESPONSE =====
-        if not detection_result.is_scam:
-            # Non-scam: generic response
-            agent_response = "I don't think that applies to me."
-            strategy_phase = "identification"
-        else:
-            # Get agent and generate response
-            agent = get_or_create_agent(conversation_id)
+        # Messages on one conversation are applied one at a time, in arrival order
+        with conv_memory.lock:
+            # ===== STEP 3: DETECT SCAM (FAST PATH) =====
+            # Analyzed once; detection, extraction and the agent share it
+            analyzed = AnalyzedMessage(message)
+            detection_result = scam_detector.detect(analyzed, conversation_state=conv_memory.scam_state)
+            conversation_detection = conv_memory.scam_state
             
-            agent_response = agent.generate_response(
-                message=message,
-                detection_confidence=detection_result.confidence,
-                conversation_history=conv_memory.message_history,
-                strategy_phase=agent.get_current_phase(len(conv_memory.message_history))
+            # Update memory with the conversation-level verdict
+            conv_memory.update_state(
+                scam_detected=conversation_detection.is_scam,
+                scam_type=conversation_detection.scam_type.value if conversation_detection.is_scam else None
             )
             
-            strategy_phase = agent.get_current_phase(len(conv_memory.message_history)).value
-            conv_memory.current_state.current_strategy = strategy_phase
-        
-        # ===== STEP 6: UPDATE MEMORY =====
-        conv_memory.add_message(
-            role='scammer',
-            content=message,
-            scam_indicators=detection_result.extracted_keywords,
-            extracted_entities={
-                k.value: [e.to_dict() for e in v] 
-                for k, v in extracted_entities.items()
-            }
-        )
-        
-        conv_memory.add_message(
-            role='victim',
-            content=agent_response
-        )
-        
-        # ===== STEP 7: CHECK TERMINATION CRITERIA =====
-        should_terminate, termination_reason = should_terminate_conversation(conv_memory)
-        
-        # ===== STEP 8: CALCULATE METRICS =====
-        turn_count = len(conv_memory.message_history) // 2
-        elapsed_seconds = time.time() - conv_memory.created_at.timestamp()
-        engagement_score = calculate_engagement_score(conv_memory)
-        
-        # ===== STEP 9: BUILD RESPONSE =====
-        response = {
-            "success": True,
-            "timestamp": datetime.utcnow().isoformat() + "Z",
-            "conversation_id": conversation_id,
-            "scam_detection": {
-                "is_scam": detection_result.is_scam,
-                "scam_type": detection_result.scam_type.value,
-                "confidence": round(detection_result.confidence, 3),
-                "detection_method": detection_result.detection_method
-            },
-            "engagement": {
-                "strategy_phase": strategy_phase,
-                "turn_number": turn_count,
-                "engagement_score": round(engagement_score, 3),
-                "should_terminate": should_terminate,
-                "termination_reason": termination_reason
-            },
-            "agent_response": agent_response,
-            "extracted_intelligence": {
-                "upi_ids": [e.to_dict() for e in extracted_entities.get("upi_ids", [])],
-                "phone_numbers": [e.to_dict() for e in extracted_entities.get("phone_numbers", [])],
-                "bank_accounts": [e.to_dict() for e in extracted_entities.get("bank_accounts", [])],
-                "phishing_links": [e.to_dict() for e in extracted_entities.get("phishing_links", [])],
-                "email_addresses": [e.to_dict() for e in extracted_entities.get("email_addresses", [])]
-            },
-            "conversation_metrics": {
-                "total_turns": turn_count,
-                "elapsed_seconds": round(elapsed_seconds, 3),
-                "honeypot_exposure_risk": round(conv_memory.current_state.honeypot_exposure_risk, 3)
-            },
-            "performance": {
-                "response_time_ms": round((time.time() - request_start_time) * 1000, 2)
+            # ===== STEP 4: EXTRACT INTELLIGENCE =====
+            extracted_entities = intelligence_extractor.extract(
+                analyzed,
+                mention_counts=conv_memory.mention_counts
+            )
+            
+            # ===== STEP 5: GENERATE AGENT RESPONSE =====
+            if not conversation_detection.is_scam:
+                # Non-scam: generic response
+                agent_response = "I don't think that applies to me."
+                strategy_phase = "identification"
+            else:
+                # Get agent and generate response
+                agent = get_or_create_agent(conversation_id)
+            
+                agent_response = agent.generate_response(
+                    message=analyzed,
+                    detection_confidence=conversation_detection.confidence,
+                    conversation_history=conv_memory.message_history,
+                    strategy_phase=agent.get_current_phase(len(conv_memory.message_history))
+                )
+            
+                strategy_phase = agent.get_current_phase(len(conv_memory.message_history)).value
+                conv_memory.update_state(strategy=strategy_phase)
+            
+            # ===== STEP 6: UPDATE MEMORY =====
+            conv_memory.add_message(
+                role='scammer',
+                content=message,
+                scam_indicators=detection_result.extracted_keywords,
+                extracted_entities=extracted_entities
+            )
+            
+            intelligence_index.record(
+                conversation_id,
+                [(k.value, e.value) for k, v in extracted_entities.items() for e in v]
+            )
+            
+            conv_memory.add_message(
+                role='victim',
+                content=agent_response
+            )
+            
+            # ===== STEP 7: CHECK TERMINATION CRITERIA =====
+            should_terminate, termination_reason = should_terminate_conversation(conv_memory)
+            
+            # ===== STEP 8: CALCULATE METRICS =====
+            turn_count = len(conv_memory.message_history) // 2
+            elapsed_seconds = time.time() - conv_memory.created_at.timestamp()
+            engagement_score = calculate_engagement_score(conv_memory)
+            
+            # ===== STEP 9: BUILD RESPONSE =====
+            response = {
+                "success": True,
+                "timestamp": datetime.utcnow().isoformat() + "Z",
+                "conversation_id": conversation_id,
+                "scam_detection": {
+                    "is_scam": detection_result.is_scam,
+                    "scam_type": detection_result.scam_type.value,
+                    "confidence": round(detection_result.confidence, 3),
+                    "detection_method": detection_result.detection_method
+                },
+                "conversation_detection": conversation_detection.to_dict(),
+                "engagement": {
+                    "strategy_phase": strategy_phase,
+                    "turn_number": turn_count,
+                    "engagement_score": round(engagement_score, 3),
+                    "should_terminate": should_terminate,
+                    "termination_reason": termination_reason
+                },
+                "agent_response": agent_response,
+                "extracted_intelligence": {
+                    "upi_ids": [e.to_dict() for e in extracted_entities.get("upi_ids", [])],
+                    "phone_numbers": [e.to_dict() for e in extracted_entities.get("phone_numbers", [])],
+                    "bank_accounts": [e.to_dict() for e in extracted_entities.get("bank_accounts", [])],
+                    "phishing_links": [e.to_dict() for e in extracted_entities.get("phishing_links", [])],
+                    "email_addresses": [e.to_dict() for e in extracted_entities.get("email_addresses", [])]
+                },
+                "conversation_metrics": {
+                    "total_turns": turn_count,
+                    "elapsed_seconds": round(elapsed_seconds, 3),
+                    "honeypot_exposure_risk": round(conv_memory.current_state.honeypot_exposure_risk, 3)
+                },
+                "performance": {
+                    "response_time_ms": round((time.time() - request_start_time) * 1000, 2)
+                }
             }
-        }
         
         # ===== STEP 10: LOG ENGAGEMENT =====
         logger.info(f"Engagement complete: {conversation_id} | "
@@ -289,6 +386,42 @@ def engage_scammer():
             500
         )
 
+# ============================================================================
+# INTELLIGENCE ENDPOINTS
+# ============================================================================
+
+@app.route('/api/v1/intelligence/lookup', methods=['GET'])
+@require_api_key
+def lookup_intelligence():
+    """
+    Conversations an entity value appeared in, across all sessions.
+    
+    Query: ?value=<UPI ID, phone, account, link or email>&limit=100
+    """
+    try:
+        value = request.args.get('value', '')
+        if not value.strip():
+            return make_error_response(
+                "Query parameter 'value' is required",
+                "VALIDATION_005",
+                400
+            )
+        
+        limit = request.args.get('limit', 100, type=int)
+        return jsonify({
+            "success": True,
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "entity": intelligence_index.lookup(value, limit)
+        }), 200
+    
+    except Exception as e:
+        logger.error(f"Error in lookup_intelligence: {str(e)}")
+        return make_error_response(
+            "Internal server error",
+            "SERVER_001",
+            500
+        )
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
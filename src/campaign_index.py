@@ -0,0 +1,246 @@
+"""
+Campaign Index - SimHash fingerprints of classified scam messages
+Scam templates are resent with small edits (amounts, names, UPI handles); a near-duplicate
+of an already classified message reuses its verdict and is grouped into the same campaign
+"""
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+FINGERPRINT_BITS = 64
+# Vote counters are one byte per bit, so at most this many shingles are counted
+MAX_SHINGLES = 255
+
+# Links and handles are single tokens; numbers are masked before tokenizing
+_TOKEN = re.compile(r'https?://\S+|www\.\S+|[\w.\-]+@[\w.\-]+|\w+')
+_DIGITS = re.compile(r'\d+')
+_SPREAD = bytes.maketrans(b'01', b'\x00\x01')
+
+@lru_cache(maxsize=65536)
+def _shingle_lanes(shingle: str) -> int:
+    """64-bit hash of a shingle spread to one byte per bit, so summing lanes counts votes"""
+    digest = hashlib.blake2b(shingle.encode(), digest_size=8).digest()
+    return int.from_bytes(format(int.from_bytes(digest, 'big'), '064b').encode().translate(_SPREAD), 'big')
+
+@lru_cache(maxsize=None)
+def _majority_table(count: int) -> bytes:
+    """Maps a per-bit vote count to b'1' when it is a strict majority of count"""
+    return bytes(ord('1') if 2 * votes > count else ord('0') for votes in range(256))
+
+@dataclass
+class Campaign:
+    """One group of near-duplicate scam messages"""
+    campaign_id: str
+    fingerprint: int
+    value: Any
+    sample: str
+    created_at: float
+    last_seen: float
+    expires_at: float
+    hits: int = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "campaign_id": self.campaign_id,
+            "fingerprint": f"{self.fingerprint:016x}",
+            "sample": self.sample,
+            "hits": self.hits,
+            "created_at": self.created_at,
+            "last_seen": self.last_seen
+        }
+
+class CampaignIndex:
+    """
+    Bounded SimHash index with LSH banding.
+
+    Each message is reduced to a 64-bit SimHash over word bigrams after
+    masking numbers, links and handles. Two messages within max_distance
+    bits are near-duplicates. Splitting the fingerprint into
+    max_distance + 1 bands guarantees that such a pair agrees exactly on at
+    least one band, so a lookup only compares against the few fingerprints
+    sharing a band bucket. Campaigns are evicted least recently seen first
+    or when their TTL lapses, and the whole index is dropped when the rule
+    set changes, like DetectionCache.
+    """
+
+    def __init__(self, max_entries: int = 5000, ttl_seconds: float = 86400,
+                 max_distance: int = 8, min_tokens: int = 8):
+        """
+        Initialize index
+
+        Args:
+            max_entries: Campaigns kept before the least recently seen is evicted
+            ttl_seconds: Lifetime of a campaign after its last hit
+            max_distance: Largest Hamming distance treated as a near-duplicate
+            min_tokens: Shorter messages are never fingerprinted; their SimHash is unstable
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self.min_tokens = min_tokens
+        self._band_count = max_distance + 1
+        self._band_width = FINGERPRINT_BITS // self._band_count
+        self._band_mask = (1 << self._band_width) - 1
+        self._campaigns: "OrderedDict[int, Campaign]" = OrderedDict()  # fingerprint -> campaign
+        self._by_id: Dict[str, int] = {}
+        self._bands: List[Dict[int, set]] = [{} for _ in range(self._band_count)]
+        self._rules_version: Optional[str] = None
+        self._lock = threading.Lock()
+
+        self.lookups = 0
+        self.near_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def fingerprint(self, text: str) -> Optional[int]:
+        """64-bit SimHash of text, or None when it is too short to fingerprint"""
+        words = [
+            'handletoken' if '@' in token else 'urltoken' if token.startswith(('http', 'www.')) else token
+            for token in _TOKEN.findall(_DIGITS.sub('0', text.lower()))
+        ]
+        if len(words) < self.min_tokens:
+            return None
+        shingles = list(dict.fromkeys(map(" ".join, zip(words, words[1:]))))[:MAX_SHINGLES]
+        # Majority vote per bit: add up the byte lanes, then threshold every byte at once
+        votes = sum(map(_shingle_lanes, shingles)).to_bytes(FINGERPRINT_BITS, 'big')
+        return int(votes.translate(_majority_table(len(shingles))), 2)
+
+    def match(self, text: str, rules_version: str, record: bool = True) -> Optional[Tuple[Campaign, int]]:
+        """
+        Find the campaign text is a near-duplicate of
+
+        Args:
+            text: Message text
+            rules_version: Fingerprint of the rule set in use
+            record: Count the lookup as a campaign hit
+
+        Returns:
+            (campaign, Hamming distance) or None
+        """
+        fingerprint = self.fingerprint(text)
+        with self._lock:
+            self._check_version(rules_version)
+            if record:
+                self.lookups += 1
+            if fingerprint is None:
+                return None
+            # A fingerprint shares several bands with its neighbours; compare each once
+            candidates = set().union(*(buckets.get(band, ()) for band, buckets
+                                       in zip(self._bands_of(fingerprint), self._bands)))
+            distance, nearest = min(((bin(candidate ^ fingerprint).count('1'), candidate)
+                                     for candidate in candidates), default=(None, None))
+            if nearest is None or distance > self.max_distance:
+                return None
+            campaign = self._campaigns[nearest]
+            now = time.time()
+            if campaign.expires_at <= now:
+                self._remove(nearest)
+                self.expirations += 1
+                return None
+            if record:
+                campaign.hits += 1
+                campaign.last_seen = now
+                campaign.expires_at = now + self.ttl_seconds
+                self._campaigns.move_to_end(nearest)
+                self.near_hits += 1
+            return campaign, distance
+
+    def add(self, text: str, value: Any, rules_version: str) -> Optional[str]:
+        """
+        Start a campaign from a classified message
+
+        Returns:
+            The campaign id, or None if text is too short to fingerprint
+        """
+        fingerprint = self.fingerprint(text)
+        if fingerprint is None:
+            return None
+        with self._lock:
+            self._check_version(rules_version)
+            existing = self._campaigns.get(fingerprint)
+            if existing is not None:
+                return existing.campaign_id
+            now = time.time()
+            campaign = Campaign(
+                campaign_id=f"campaign-{fingerprint:016x}",
+                fingerprint=fingerprint,
+                value=value,
+                sample=text[:200],
+                created_at=now,
+                last_seen=now,
+                expires_at=now + self.ttl_seconds
+            )
+            self._campaigns[fingerprint] = campaign
+            self._by_id[campaign.campaign_id] = fingerprint
+            for band, buckets in zip(self._bands_of(fingerprint), self._bands):
+                buckets.setdefault(band, set()).add(fingerprint)
+            while len(self._campaigns) > self.max_entries:
+                self._remove(next(iter(self._campaigns)))
+                self.evictions += 1
+            return campaign.campaign_id
+
+    def get(self, campaign_id: str) -> Optional[Campaign]:
+        """Campaign by id, or None"""
+        with self._lock:
+            fingerprint = self._by_id.get(campaign_id)
+            return self._campaigns[fingerprint] if fingerprint is not None else None
+
+    def top(self, limit: int = 20) -> List[Campaign]:
+        """Campaigns with the most near-duplicate hits"""
+        with self._lock:
+            return sorted(self._campaigns.values(), key=lambda c: c.hits, reverse=True)[:limit]
+
+    def clear(self):
+        """Drop every campaign"""
+        with self._lock:
+            self._campaigns.clear()
+            self._by_id.clear()
+            for buckets in self._bands:
+                buckets.clear()
+
+    def _bands_of(self, fingerprint: int) -> List[int]:
+        return [(fingerprint >> (i * self._band_width)) & self._band_mask for i in range(self._band_count)]
+
+    def _remove(self, fingerprint: int):
+        """Remove a campaign and its band entries (lock held)"""
+        campaign = self._campaigns.pop(fingerprint)
+        del self._by_id[campaign.campaign_id]
+        for band, buckets in zip(self._bands_of(fingerprint), self._bands):
+            bucket = buckets[band]
+            bucket.discard(fingerprint)
+            if not bucket:
+                del buckets[band]
+
+    def _check_version(self, rules_version: str):
+        """Drop all campaigns classified under a different rule set (lock held)"""
+        if rules_version != self._rules_version:
+            if self._campaigns:
+                self._campaigns.clear()
+                self._by_id.clear()
+                for buckets in self._bands:
+                    buckets.clear()
+                self.invalidations += 1
+            self._rules_version = rules_version
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for health and statistics endpoints"""
+        with self._lock:
+            return {
+                "campaigns": len(self._campaigns),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "max_distance": self.max_distance,
+                "lookups": self.lookups,
+                "near_hits": self.near_hits,
+                "near_hit_rate": round(self.near_hits / self.lookups, 4) if self.lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
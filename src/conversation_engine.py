@@ -2,10 +2,11 @@
 Conversation Engine - Multi-turn conversation handling and adaptive replies
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 import random
 from src.agent_controller import StrategyPhase
 from src.persona import PersonaEngine
+from src.message_analysis import AnalyzedMessage
 
 class ConversationEngine:
     """Handle multi-turn conversations with adaptive replies"""
@@ -114,14 +115,14 @@ class ConversationEngine:
             }
         }
     
-    def generate_response(self, scammer_message: str, strategy_phase: StrategyPhase,
+    def generate_response(self, scammer_message: Union[str, AnalyzedMessage], strategy_phase: StrategyPhase,
                          memory_context: Dict = None,
                          previous_questions: List[str] = None) -> str:
         """
         Generate contextual response based on strategy
         
         Args:
-            scammer_message: Message from scammer
+            scammer_message: Message from scammer (text or AnalyzedMessage)
             strategy_phase: Current strategy phase
             memory_context: Context from memory store
             previous_questions: List of previous questions to avoid repetition
@@ -134,7 +135,7 @@ class ConversationEngine:
         templates = self.conversation_template.get(strategy_phase, {})
         
         # Detect what scammer is asking/saying
-        message_lower = scammer_message.lower()
+        scammer_message = AnalyzedMessage.of(scammer_message)
         
         # Choose response category
         if strategy_phase == StrategyPhase.IDENTIFICATION:
@@ -164,26 +165,22 @@ class ConversationEngine:
         
         return response
     
-    def _generate_identification_response(self, scammer_message: str, templates: Dict) -> str:
+    def _generate_identification_response(self, scammer_message: AnalyzedMessage, templates: Dict) -> str:
         """Generate response during identification phase"""
         # Scammer initiates - express concern and ask clarifying questions
-        message_lower = scammer_message.lower()
-        
-        if any(word in message_lower for word in ["account", "hacked", "compromised"]):
+        if scammer_message.contains_any(["account", "hacked", "compromised"]):
             return f"{random.choice(templates['concern_expressions'])} {random.choice(templates['opening_questions'])}"
         
-        elif any(word in message_lower for word in ["verify", "confirm", "click"]):
+        elif scammer_message.contains_any(["verify", "confirm", "click"]):
             return random.choice(templates['confirmation_probes'])
         
         else:
             return random.choice(templates['opening_questions'])
     
-    def _generate_trust_response(self, scammer_message: str, templates: Dict) -> str:
+    def _generate_trust_response(self, scammer_message: AnalyzedMessage, templates: Dict) -> str:
         """Generate response during trust-building phase"""
-        message_lower = scammer_message.lower()
-        
         # If scammer is asking for action - show compliance with fear
-        if any(word in message_lower for word in ["do", "download", "click", "send", "verify"]):
+        if scammer_message.contains_any(["do", "download", "click", "send", "verify"]):
             compliance = random.choice(templates['compliance_statements'])
             concern = random.choice(templates['concern_expressions'])
             return f"{compliance} {concern}"
@@ -192,11 +189,9 @@ class ConversationEngine:
             # Just show eagerness to comply
             return random.choice(templates['reassurance_requests'])
     
-    def _generate_extraction_response(self, scammer_message: str, templates: Dict,
+    def _generate_extraction_response(self, scammer_message: AnalyzedMessage, templates: Dict,
                                      previous_questions: List[str] = None) -> str:
         """Generate response during intelligence extraction phase"""
-        message_lower = scammer_message.lower()
-        
         # Decide which type of question to ask
         response_type = random.choice(['why', 'how', 'alternative'])
         
@@ -213,17 +208,15 @@ class ConversationEngine:
             question = templates['fallback']
         
         # Wrap in context
-        if any(word in message_lower for word in ["download", "app", "link"]):
+        if scammer_message.contains_any(["download", "app", "link"]):
             return f"Sir, {question}"
         else:
             return question
     
-    def _generate_delay_response(self, scammer_message: str, templates: Dict) -> str:
+    def _generate_delay_response(self, scammer_message: AnalyzedMessage, templates: Dict) -> str:
         """Generate response during delay/probe phase"""
-        message_lower = scammer_message.lower()
-        
         # Introduce obstacles or probe for consistency
-        if any(word in message_lower for word in ["now", "quickly", "immediately", "urgent"]):
+        if scammer_message.contains_any(["now", "quickly", "immediately", "urgent"]):
             # Introduce obstacle
             return random.choice(templates['obstacle_introduction'])
         
@@ -231,7 +224,7 @@ class ConversationEngine:
             # Probe consistency
             return random.choice(templates['consistency_checks'])
     
-    def _generate_exit_response(self, scammer_message: str, templates: Dict) -> str:
+    def _generate_exit_response(self, scammer_message: AnalyzedMessage, templates: Dict) -> str:
         """Generate response during safe exit phase"""
         # Express need to exit gracefully
         exit_stmt = random.choice(templates['exit_statements'])
@@ -0,0 +1,113 @@
+"""
+Conversation Store - Conversations spread over lock-striped EvictionEngine shards
+Concurrent requests for different conversations take different locks; only requests that
+hash to the same shard ever wait for each other
+"""
+
+import zlib
+from typing import Any, Callable, Dict, List
+
+from src.eviction import EvictionEngine, Sweeper
+
+class ShardedConversationStore:
+    """
+    EvictionEngine split into independently locked shards.
+
+    A conversation id picks its shard by CRC-32, so the same id lands in
+    the same shard in every process whatever the hash seed, and every
+    operation on it takes only that shard's lock: with N shards unrelated
+    requests rarely contend. Each shard keeps its own activity order,
+    capped at its share of max_entries, so eviction is least recently
+    active per shard, not overall; for well-spread ids that is close, but
+    a full shard evicts even while others have room. Counts add up shard
+    sizes without taking any lock. One sweeper thread expires idle
+    conversations shard by shard, holding one shard lock at a time. The
+    interface is EvictionEngine's.
+    """
+
+    def __init__(self, shards: int = 16, max_entries: int = 10000, idle_ttl_seconds: float = 7200,
+                 sweep_interval_seconds: float = 0):
+        """
+        Initialize store
+
+        Args:
+            shards: Number of independently locked shards
+            max_entries: Conversations kept across all shards
+            idle_ttl_seconds: Inactivity after which a conversation expires
+            sweep_interval_seconds: Period of the background sweeper; 0 runs none
+        """
+        # No more shards than entries, so every shard holds at least one
+        shards = max(1, min(shards, max_entries))
+        self.max_entries = max_entries
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+        # Shard caps add up to max_entries exactly: the first max_entries % shards take one extra
+        base, extra = divmod(max_entries, shards)
+        self._shards = [EvictionEngine(max(1, base + (n < extra)), idle_ttl_seconds) for n in range(shards)]
+        self._sweeper = None
+        if sweep_interval_seconds > 0:
+            self.start_sweeper()
+
+    def shard(self, key: str) -> EvictionEngine:
+        """The shard holding key"""
+        return self._shards[zlib.crc32(key.encode()) % len(self._shards)]
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.shard(key)
+
+    def add_listener(self, listener: Callable[[str, Any, str], None]):
+        """Call listener(key, value, reason) for every conversation that leaves any shard"""
+        for shard in self._shards:
+            shard.add_listener(listener)
+
+    def get(self, key: str, touch: bool = True) -> Any:
+        return self.shard(key).get(key, touch)
+
+    def get_or_create(self, key: str, factory: Callable[[], Any]) -> Any:
+        return self.shard(key).get_or_create(key, factory)
+
+    def put(self, key: str, value: Any):
+        self.shard(key).put(key, value)
+
+    def pop(self, key: str) -> Any:
+        return self.shard(key).pop(key)
+
+    def values(self) -> List[Any]:
+        """Snapshot of every held value, taken one shard at a time"""
+        return [value for shard in self._shards for value in shard.values()]
+
+    def expire(self) -> int:
+        """Evict every conversation idle past the TTL; returns how many"""
+        return sum(shard.expire() for shard in self._shards)
+
+    def start_sweeper(self):
+        """Expire idle conversations every sweep_interval_seconds on a daemon thread"""
+        if self._sweeper is None and self.sweep_interval_seconds > 0:
+            self._sweeper = Sweeper(self.sweep_interval_seconds, self.expire)
+
+    def stop_sweeper(self):
+        """Stop the sweeper thread and wait for it"""
+        if self._sweeper is not None:
+            self._sweeper.stop()
+            self._sweeper = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for health and statistics endpoints, summed over shards"""
+        per_shard = [shard.get_stats() for shard in self._shards]
+        sizes = [stats["size"] for stats in per_shard]
+        return {
+            "size": sum(sizes),
+            "max_entries": self.max_entries,
+            "idle_ttl_seconds": self.idle_ttl_seconds,
+            "shards": len(self._shards),
+            "largest_shard": max(sizes),
+            "oldest_idle_seconds": max(stats["oldest_idle_seconds"] for stats in per_shard),
+            **{counter: sum(stats[counter] for stats in per_shard)
+               for counter in ("inserts", "evictions", "expirations", "deletions")},
+            "sweeper_running": self._sweeper is not None,
+            "sweeps": self._sweeper.sweeps if self._sweeper else 0,
+            "last_sweep_ms": self._sweeper.last_sweep_ms if self._sweeper else 0.0
+        }
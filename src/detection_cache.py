@@ -0,0 +1,101 @@
+"""
+Detection Cache - Content-addressed LRU/TTL cache of scam detection results
+Campaigns repeat the same script thousands of times; identical text is analyzed once
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+class DetectionCache:
+    """
+    Bounded LRU cache with a per-entry TTL.
+
+    Entries are keyed by a SHA-256 digest of the message text, so memory use
+    does not depend on message length. Every lookup carries the fingerprint
+    of the rule set that produced the cached results; when it changes the
+    whole cache is dropped, so a rule update can never serve stale verdicts.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600):
+        """
+        Initialize cache
+
+        Args:
+            max_entries: Entries kept before the least recently used is evicted
+            ttl_seconds: Lifetime of an entry
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._rules_version: Optional[str] = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(message: str) -> str:
+        """Content address of a message"""
+        return hashlib.sha256(message.encode('utf-8', 'surrogatepass')).hexdigest()
+
+    def get(self, key: str, rules_version: str) -> Optional[Any]:
+        """Return the cached value for key, or None"""
+        with self._lock:
+            self._check_version(rules_version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: Any, rules_version: str):
+        """Store value under key, evicting the least recently used entry if full"""
+        with self._lock:
+            self._check_version(rules_version)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+
+    def _check_version(self, rules_version: str):
+        """Drop all entries computed under a different rule set (lock held)"""
+        if rules_version != self._rules_version:
+            if self._entries:
+                self._entries.clear()
+                self.invalidations += 1
+            self._rules_version = rules_version
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for health and statistics endpoints"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations
+            }
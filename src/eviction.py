@@ -0,0 +1,232 @@
+"""
+Eviction Engine - Conversations kept in order of last activity, evicted when idle or over capacity
+Every touch moves a conversation to the back of an ordered map, so the idlest one is always at
+the front: touching, expiring and evicting are constant time however many are held
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Why an entry left: idle past the TTL, pushed out over capacity, or deleted by a caller
+IDLE = "idle"
+CAPACITY = "capacity"
+DELETED = "deleted"
+
+class Sweeper:
+    """Daemon thread calling sweep() every interval_seconds until stopped"""
+
+    def __init__(self, interval_seconds: float, sweep: Callable[[], int], name: str = "conversation-sweeper"):
+        self.interval_seconds = interval_seconds
+        self._sweep = sweep
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.sweeps = 0
+        self.last_sweep_ms = 0.0
+        self._thread.start()
+
+    def stop(self):
+        """Stop the thread and wait for it"""
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            started = time.perf_counter()
+            try:
+                expired = self._sweep()
+            except Exception as e:
+                logger.error(f"Sweep failed: {e}")
+                continue
+            self.sweeps += 1
+            self.last_sweep_ms = round((time.perf_counter() - started) * 1000, 3)
+            if expired:
+                logger.info(f"Expired {expired} idle conversations in {self.last_sweep_ms}ms")
+
+class EvictionEngine:
+    """
+    Bounded map of conversations evicted least recently active first.
+
+    Entries sit in an OrderedDict in order of last activity. A touch
+    stamps the entry and moves it to the end; expiry pops from the front
+    while the front entry has been idle longer than idle_ttl_seconds, and
+    a put over max_entries pops the front too. Each step is O(1), so an
+    active conversation is never evicted for its age and an insert never
+    scans the map. Idle entries are expired when they are looked up, on
+    every insert, and by an optional background sweeper thread. Listeners
+    hear about every entry that leaves, outside the lock, so state kept
+    beside a conversation (agent controllers) can go with it.
+    """
+
+    def __init__(self, max_entries: int = 1000, idle_ttl_seconds: float = 7200,
+                 sweep_interval_seconds: float = 0):
+        """
+        Initialize engine
+
+        Args:
+            max_entries: Entries kept before the least recently active is evicted
+            idle_ttl_seconds: Inactivity after which an entry expires
+            sweep_interval_seconds: Period of the background sweeper; 0 runs none
+        """
+        self.max_entries = max_entries
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._entries: "OrderedDict[str, list]" = OrderedDict()  # key -> [last_active, value]
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str, Any, str], None]] = []
+        self._sweeper: Optional[Sweeper] = None
+
+        self.inserts = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.deletions = 0
+
+        if sweep_interval_seconds > 0:
+            self.start_sweeper()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, touch=False) is not None
+
+    def add_listener(self, listener: Callable[[str, Any, str], None]):
+        """Call listener(key, value, reason) for every entry that leaves; reason is IDLE, CAPACITY or DELETED"""
+        self._listeners.append(listener)
+
+    def get(self, key: str, touch: bool = True) -> Optional[Any]:
+        """The live value under key, or None; touch counts the lookup as activity"""
+        removed = []
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            now = time.monotonic()
+            if now - entry[0] >= self.idle_ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                removed.append((key, entry[1], IDLE))
+                value = None
+            else:
+                if touch:
+                    entry[0] = now
+                    self._entries.move_to_end(key)
+                value = entry[1]
+        self._notify(removed)
+        return value
+
+    def get_or_create(self, key: str, factory: Callable[[], Any]) -> Any:
+        """The live value under key, touched, or factory()'s result stored there; atomic"""
+        removed = []
+        with self._lock:
+            now = time.monotonic()
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.idle_ttl_seconds:
+                entry[0] = now
+                self._entries.move_to_end(key)
+                value = entry[1]
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                    self.expirations += 1
+                    removed.append((key, entry[1], IDLE))
+                value = factory()
+                self._insert(key, value, now, removed)
+        self._notify(removed)
+        return value
+
+    def put(self, key: str, value: Any):
+        """Store value under key as just active, replacing any entry there"""
+        removed = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None and old[1] is not value:
+                self.deletions += 1
+                removed.append((key, old[1], DELETED))
+            self._insert(key, value, time.monotonic(), removed)
+        self._notify(removed)
+
+    def pop(self, key: str) -> Optional[Any]:
+        """Remove and return the value under key, or None"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self.deletions += 1
+        self._notify([(key, entry[1], DELETED)])
+        return entry[1]
+
+    def values(self) -> List[Any]:
+        """Snapshot of every held value, idlest first"""
+        with self._lock:
+            return [entry[1] for entry in self._entries.values()]
+
+    def expire(self) -> int:
+        """Evict every entry idle past the TTL; returns how many"""
+        removed = []
+        with self._lock:
+            self._expire(time.monotonic(), removed)
+        self._notify(removed)
+        return len(removed)
+
+    def _insert(self, key: str, value: Any, now: float, removed: list):
+        """Store a new entry at the back, then drop idle and excess ones from the front (lock held)"""
+        self._entries[key] = [now, value]
+        self.inserts += 1
+        self._expire(now, removed)
+        while len(self._entries) > self.max_entries:
+            old_key, (_, old_value) = self._entries.popitem(last=False)
+            self.evictions += 1
+            removed.append((old_key, old_value, CAPACITY))
+
+    def _expire(self, now: float, removed: list):
+        """Pop idle entries off the front; the first live one ends the walk (lock held)"""
+        entries = self._entries
+        while entries:
+            key, entry = next(iter(entries.items()))
+            if now - entry[0] < self.idle_ttl_seconds:
+                break
+            del entries[key]
+            self.expirations += 1
+            removed.append((key, entry[1], IDLE))
+
+    def _notify(self, removed: list):
+        for key, value, reason in removed:
+            for listener in self._listeners:
+                try:
+                    listener(key, value, reason)
+                except Exception as e:
+                    logger.error(f"Eviction listener failed for {key}: {e}")
+
+    def start_sweeper(self):
+        """Expire idle entries every sweep_interval_seconds on a daemon thread"""
+        if self._sweeper is None and self.sweep_interval_seconds > 0:
+            self._sweeper = Sweeper(self.sweep_interval_seconds, self.expire)
+
+    def stop_sweeper(self):
+        """Stop the sweeper thread and wait for it"""
+        if self._sweeper is not None:
+            self._sweeper.stop()
+            self._sweeper = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for health and statistics endpoints"""
+        with self._lock:
+            oldest = next(iter(self._entries.values()), None)
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "idle_ttl_seconds": self.idle_ttl_seconds,
+                "oldest_idle_seconds": round(time.monotonic() - oldest[0], 3) if oldest else 0.0,
+                "inserts": self.inserts,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "deletions": self.deletions,
+                "sweeper_running": self._sweeper is not None,
+                "sweeps": self._sweeper.sweeps if self._sweeper else 0,
+                "last_sweep_ms": self._sweeper.last_sweep_ms if self._sweeper else 0.0
+            }
@@ -2,10 +2,141 @@
 Intelligence Extractor - Entity recognition and extraction with validation
 """
 
+import logging
 import re
+from concurrent.futures import BrokenExecutor
 from dataclasses import dataclass
-from typing import List, Dict, Optional, Tuple
+from functools import lru_cache
+from typing import Dict, List, Mapping, Optional, Set, Tuple, Union
 from enum import Enum
+from urllib.parse import urlsplit, urlunsplit
+
+from src.message_analysis import AnalyzedMessage
+from src.phishing_analysis import PhishingAnalyzer
+
+logger = logging.getLogger(__name__)
+
+# Entity shapes
+LINK_PATTERN = r'https?://[^\s)]+'
+UPI_PATTERN = r'[\w.-]+@[\w.-]+'
+EMAIL_PATTERN = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
+ACCOUNT_PATTERN = r'\b(?:\d{4}[\s-]?)?\d{10,14}\b'
+PHONE_PATTERN = r'(?<!\d)[6-9]\d{9}(?!\d)'
+# Anything around an @: UPI and email local parts combined, then the UPI domain. If a
+# run of local-part characters cannot reach an @ from its first character no later
+# character can, so a handle is only tried where a run starts, or at a % or + (where
+# a run resumes after a handle whose domain ended there)
+HANDLE_PATTERN = r'(?:(?<![\w.%+-])|(?=[%+]))[\w.%+-]+@[\w.-]+'
+
+# Span kinds in scan order. Links and handles can contain entities of the kinds listed
+# after their own (a UPI ID in a link, a phone number in phone@upi), so such a match
+# is rescanned, within its own span only, for those kinds.
+SPAN_KINDS = (
+    ("link", LINK_PATTERN),
+    ("handle", HANDLE_PATTERN),
+    ("account", ACCOUNT_PATTERN),
+    ("phone", PHONE_PATTERN),
+)
+# Every entity holds an anchor: :// in a link, @ in a handle, ten digits in a row in an
+# account or phone number. A kind whose anchor is missing from the text cannot match, so
+# it is left out of the alternation; text without any anchor is not scanned at all
+TEN_DIGITS = re.compile(r'\d{10}')
+
+@lru_cache(maxsize=None)
+def span_scanner(first: int, links: bool, handles: bool, numbers: bool) -> Optional[re.Pattern]:
+    """
+    One alternation of named groups for SPAN_KINDS[first:] whose anchors are
+    present (links: ://, handles: @, numbers: ten digits), or None if none are
+    """
+    present = {"link": links, "handle": handles, "account": numbers, "phone": numbers}
+    alternatives = [f"(?P<{kind}>{pattern})" for kind, pattern in SPAN_KINDS[first:] if present[kind]]
+    return re.compile("|".join(alternatives), re.IGNORECASE) if alternatives else None
+
+UPI_SEARCH = re.compile(UPI_PATTERN)
+EMAIL_SEARCH = re.compile(EMAIL_PATTERN)
+PHONE_SEARCH = re.compile(PHONE_PATTERN)
+
+# Canonical forms, so one entity written several ways is stored once
+_NOT_DIGITS = re.compile(r'\D')
+# An Indian mobile number with optional +91/91/0 prefix and spaces, dots or dashes between digits
+_MOBILE = re.compile(r'(?:\+?91|0)?[\s.-]*([6-9](?:[\s.-]*\d){9})')
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+# A link as most are written: no user part, port or unusual host characters; canonicalized
+# without urlsplit, which costs several times more
+_PLAIN_LINK = re.compile(r'(https?)://(?=[a-z0-9.-]*[a-z0-9])([a-z0-9.-]+)((?:/[^?#\s]*)?)(?:\?([^#\s]*))?(?:#\S*)?', re.IGNORECASE)
+
+def _mobile_digits(value: str) -> Optional[str]:
+    """The ten digits of an Indian mobile number in any of its spellings, else None"""
+    if len(value) == 10 and value.isascii() and value.isdigit():
+        # As the extractor finds them: skip the regex
+        return value if value[0] in "6789" else None
+    mobile = _MOBILE.fullmatch(value)
+    return _NOT_DIGITS.sub("", mobile.group(1)) if mobile is not None else None
+
+def canonical_phone(value: str) -> str:
+    """E.164 form of an Indian mobile number (+91XXXXXXXXXX); other numbers as bare digits"""
+    digits = _mobile_digits(value.strip())
+    if digits is not None:
+        return "+91" + digits
+    return _NOT_DIGITS.sub("", value) or value.strip()
+
+def canonical_account(value: str) -> str:
+    """Account number with its spaces and dashes stripped"""
+    return _NOT_DIGITS.sub("", value) or value.strip()
+
+def canonical_link(value: str) -> str:
+    """
+    URL with trailing punctuation, fragment and default port dropped and the
+    scheme and host lowercased; the path and query keep their case
+    """
+    value = value.strip().rstrip(".,;:!?'\"")
+    plain = _PLAIN_LINK.fullmatch(value)
+    if plain is not None:
+        scheme, host, path, query = plain.groups()
+        return f"{scheme.lower()}://{host.lower().rstrip('.')}{path or '/'}{'?' + query if query else ''}"
+    try:
+        parts = urlsplit(value)
+        port = parts.port
+    except ValueError:
+        return value.lower()
+    host = (parts.hostname or "").rstrip(".")
+    if "@" in parts.netloc:
+        # Keep the user part: "https://sbi.co.in@evil.in" is how such links disguise themselves
+        host = parts.netloc.rsplit("@", 1)[0] + "@" + host
+    if port is not None and port != _DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f"{host}:{port}"
+    return urlunsplit((parts.scheme.lower(), host, parts.path or "/", parts.query, ""))
+
+CANONICAL_FORMS = {
+    "upi_ids": lambda value: value.strip().lower(),
+    "phone_numbers": canonical_phone,
+    "bank_accounts": canonical_account,
+    "phishing_links": canonical_link,
+    "email_addresses": lambda value: value.strip().lower(),
+}
+
+def canonical_entity(entity_type: str, value: str) -> str:
+    """Key that every spelling of one entity of entity_type (an EntityType value) shares"""
+    canonical = CANONICAL_FORMS.get(entity_type)
+    return canonical(value) if canonical is not None else value.strip().lower()
+
+def canonical_value(value: str) -> str:
+    """
+    canonical_entity() for a value of unknown type, judged by its shape: a
+    link, a handle, a mobile number, other digits. Digits that read as an
+    Indian mobile number take the phone form even when found as an account.
+    """
+    value = value.strip()
+    if "://" in value:
+        return canonical_link(value)
+    if "@" in value:
+        return value.lower()
+    digits = _mobile_digits(value)
+    if digits is not None:
+        return "+91" + digits
+    if value and not value.strip("0123456789 -"):
+        return canonical_account(value)
+    return value.lower()
 
 class EntityType(Enum):
     """Types of entities to extract"""
@@ -15,7 +146,7 @@ class EntityType(Enum):
     PHISHING_LINK = "phishing_links"
     EMAIL_ADDRESS = "email_addresses"
 
-@dataclass
+@dataclass(slots=True)
 class ExtractedEntity:
     """Extracted entity with confidence"""
     value: str
@@ -43,85 +174,184 @@ class IntelligenceExtractor:
         "karur", "indus", "kotak", "federal", "hsbc"
     }
     
-    def __init__(self):
-        """Initialize extractor"""
+    def __init__(self, offloader=None, watchlist=None, phishing_analyzer: PhishingAnalyzer = None):
+        """
+        Initialize extractor
+        
+        Args:
+            offloader: ProcessOffloader that extracts from long messages off the request thread (optional)
+            watchlist: Watchlist of known scam identifiers; matches are reported in
+                each entity's metadata as {"watchlist": [source, ...]} (optional)
+            phishing_analyzer: Scores every extracted link into its metadata as
+                {"phishing_risk": {...}}; one with default cache settings if omitted
+        """
         self.extraction_patterns = self._build_patterns()
+        self.offloader = offloader
+        self.watchlist = watchlist
+        self.phishing_analyzer = phishing_analyzer or PhishingAnalyzer()
     
     def _build_patterns(self) -> Dict[EntityType, Dict]:
         """Build extraction patterns"""
         return {
             EntityType.UPI_ID: {
-                "pattern": r'[\w.-]+@[\w.-]+',
+                "pattern": UPI_PATTERN,
                 "validators": [self._validate_upi],
                 "weight": 0.9
             },
             EntityType.PHONE_NUMBER: {
-                "pattern": r'(?:^|\D)([6-9]\d{9})(?:\D|$)',
+                "pattern": PHONE_PATTERN,
                 "validators": [self._validate_phone],
                 "weight": 0.85
             },
             EntityType.BANK_ACCOUNT: {
-                "pattern": r'\b(?:\d{4}[\s-]?)?\d{10,14}\b',
+                "pattern": ACCOUNT_PATTERN,
                 "validators": [self._validate_account],
                 "weight": 0.8
             },
             EntityType.PHISHING_LINK: {
-                "pattern": r'https?://[^\s)]+',
+                "pattern": LINK_PATTERN,
                 "validators": [self._validate_link],
                 "weight": 0.95
             },
             EntityType.EMAIL_ADDRESS: {
-                "pattern": r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}',
+                "pattern": EMAIL_PATTERN,
                 "validators": [self._validate_email],
                 "weight": 0.7
             }
         }
     
-    def extract(self, message: str, conversation_history: List[str] = None) -> Dict[EntityType, List[ExtractedEntity]]:
+    def extract(self, message: Union[str, AnalyzedMessage],
+                conversation_history: List[str] = None,
+                mention_counts: Mapping[str, int] = None) -> Dict[EntityType, List[ExtractedEntity]]:
         """
         Extract all entities from message
         
         Args:
-            message: Message text to extract from
+            message: Message text to extract from, or the request's AnalyzedMessage;
+                entities are read from its normalized text
             conversation_history: Previous messages for context
+            mention_counts: canonical_value() of an entity -> number of previous messages
+                mentioning it in any spelling (MemoryStore.mention_counts); replaces the
+                substring scan of conversation_history
             
         Returns:
             Dictionary of EntityType -> List[ExtractedEntity]
         """
+        message = AnalyzedMessage.of(message).normalized
+        if self.offloader is not None and self.offloader.should_offload(message):
+            try:
+                return self._annotate(
+                    self.offloader.submit_extract(message, conversation_history, mention_counts).result()
+                )
+            except BrokenExecutor as e:
+                logger.error(f"Extraction worker pool failed, extracting inline: {e}")
+        return self._annotate(self._extract_text(message, conversation_history, mention_counts))
+    
+    def _annotate(self, results: Dict[EntityType, List[ExtractedEntity]]) -> Dict[EntityType, List[ExtractedEntity]]:
+        """Record the phishing risk of every link and the watchlist sources of every listed entity"""
+        for entity in results[EntityType.PHISHING_LINK]:
+            entity.metadata = {**(entity.metadata or {}),
+                               "phishing_risk": self.phishing_analyzer.analyze(entity.value)}
+        if self.watchlist is not None:
+            entities = [entity for found in results.values() for entity in found]
+            matches = self.watchlist.match_entities([(entity.type.value, entity.value) for entity in entities])
+            for entity, sources in zip(entities, matches):
+                if sources:
+                    entity.metadata = {**(entity.metadata or {}), "watchlist": sources}
+        return results
+    
+    def mentioned_values(self, message: Union[str, AnalyzedMessage]) -> Set[str]:
+        """Every entity value in message, before validation, for a mention index"""
+        message = AnalyzedMessage.of(message).normalized
+        return {message[start:end] for _, start, end in self._find_entities(message)}
+    
+    def _extract_text(self, message: str, conversation_history: Optional[List[str]],
+                      mention_counts: Optional[Mapping[str, int]] = None) -> Dict[EntityType, List[ExtractedEntity]]:
+        """Validate, cross-check and place in context every entity the scan finds"""
         results = {entity_type: [] for entity_type in EntityType}
         
-        # Extract each entity type
-        for entity_type, config in self.extraction_patterns.items():
-            candidates = self._find_candidates(message, config["pattern"])
+        for entity_type, start, end in self._find_entities(message):
+            candidate = message[start:end]
+            config = self.extraction_patterns[entity_type]
+            # Validate candidate
+            confidence = self._validate_entity(candidate, entity_type, config["validators"])
             
-            for candidate in candidates:
-                # Validate candidate
-                confidence = self._validate_entity(candidate, entity_type, config["validators"])
+            if confidence > 0.0:
+                # Add cross-validation bonus (mentioned multiple times)
+                if mention_counts is not None:
+                    mention_count = mention_counts.get(canonical_value(candidate), 0)
+                elif conversation_history:
+                    mention_count = sum(1 for h in conversation_history if candidate in h)
+                else:
+                    mention_count = 0
+                if mention_count > 1:
+                    confidence = min(confidence + 0.15, 1.0)
                 
-                if confidence > 0.0:
-                    # Add cross-validation bonus (mentioned multiple times)
-                    if conversation_history:
-                        mention_count = sum(1 for h in conversation_history if candidate in h)
-                        if mention_count > 1:
-                            confidence = min(confidence + 0.15, 1.0)
-                    
-                    # Add context
-                    context = self._extract_context(message, candidate)
-                    
-                    entity = ExtractedEntity(
-                        value=candidate,
-                        type=entity_type,
-                        confidence=confidence,
-                        context=context
-                    )
-                    results[entity_type].append(entity)
+                entity = ExtractedEntity(
+                    value=candidate,
+                    type=entity_type,
+                    confidence=confidence,
+                    context=self._extract_context(message, start, end)
+                )
+                results[entity_type].append(entity)
         
         return results
     
-    def _find_candidates(self, message: str, pattern: str) -> List[str]:
-        """Find candidate entities matching pattern"""
-        matches = re.findall(pattern, message, re.IGNORECASE)
-        return [m for m in matches if m]  # Filter empty matches
+    def _find_entities(self, message: str, pos: int = 0, endpos: int = None, first: int = 0,
+                       found: list = None) -> List[Tuple[EntityType, int, int]]:
+        """
+        (type, start, end) of every entity of SPAN_KINDS[first:] in message[pos:endpos]
+        
+        One scan finds non-overlapping spans, and each span maps to entity
+        types deterministically: a link is a phishing link; a handle is a
+        UPI ID (from its last email-only character on) and also an email
+        address when its domain has a TLD; an account number is a bank
+        account, plus a phone number when its last digits are one; a bare
+        10-digit mobile number is a phone number. Links and handles are
+        rescanned within themselves for the kinds after their own. Each
+        type's entities come out in text order.
+        """
+        if found is None:
+            found = []
+        endpos = len(message) if endpos is None else endpos
+        scanner = span_scanner(
+            first,
+            first == 0 and message.find("://", pos, endpos) != -1,
+            first <= 1 and message.find("@", pos, endpos) != -1,
+            TEN_DIGITS.search(message, pos, endpos) is not None
+        )
+        if scanner is None:
+            return found
+        for match in scanner.finditer(message, pos, endpos):
+            kind = match.lastgroup
+            start, end = match.span()
+            if kind == "link":
+                found.append((EntityType.PHISHING_LINK, start, end))
+                self._find_entities(message, start, end, 1, found)
+            elif kind == "handle":
+                at = message.find("@", start, end)
+                local = message[start:at]
+                # Without an email-only character in the local part the whole handle is the UPI ID
+                if "%" not in local and "+" not in local:
+                    found.append((EntityType.UPI_ID, start, end))
+                else:
+                    upi = UPI_SEARCH.search(message, start, end)
+                    if upi is not None:
+                        found.append((EntityType.UPI_ID, upi.start(), upi.end()))
+                self._find_entities(message, start, end, 2, found)
+                # Only a handle whose domain has a dot can hold an email address
+                if message.find(".", at, end) != -1:
+                    email = EMAIL_SEARCH.search(message, start, end)
+                    if email is not None:
+                        found.append((EntityType.EMAIL_ADDRESS, email.start(), email.end()))
+            elif kind == "account":
+                found.append((EntityType.BANK_ACCOUNT, start, end))
+                phone = PHONE_SEARCH.search(message, start, end)
+                if phone is not None:
+                    found.append((EntityType.PHONE_NUMBER, phone.start(), phone.end()))
+            else:
+                found.append((EntityType.PHONE_NUMBER, start, end))
+        return found
     
     def _validate_entity(self, value: str, entity_type: EntityType, 
                         validators: List) -> float:
@@ -190,60 +420,20 @@ class IntelligenceExtractor:
         # Simple email validation
         return re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', value) is not None
     
-    def _extract_context(self, message: str, entity: str, 
-                        window_size: int = 50) -> str:
-        """Extract context around entity mention"""
-        try:
-            idx = message.find(entity)
-            if idx == -1:
-                return ""
-            
-            start = max(0, idx - window_size)
-            end = min(len(message), idx + len(entity) + window_size)
-            
-            context = message[start:end].strip()
-            return context
-        except:
-            return ""
+    def _extract_context(self, message: str, start: int, end: int,
+                         window_size: int = 50) -> str:
+        """Context around the entity at message[start:end]"""
+        return message[max(0, start - window_size):end + window_size].strip()
     
     def analyze_phishing_risk(self, url: str) -> Dict:
-        """Analyze URL for phishing risk"""
-        risk_factors = {
-            "mimics_legitimate": False,
-            "suspicious_domain": False,
-            "obfuscated": False,
-            "risk_score": 0.0
-        }
-        
-        # Check for suspicious patterns
-        suspicious_patterns = [
-            r'bit\.ly|tinyurl|short\.link',  # URL shorteners
-            r'secure-.*-.*\.',  # Fake security claims
-            r'verify.*\..*\.(.*\.)?.*\.com',  # Verification pages
-            r'.*login.*bankingsecure',  # Fake banking
-        ]
-        
-        for pattern in suspicious_patterns:
-            if re.search(pattern, url, re.IGNORECASE):
-                risk_factors["suspicious_domain"] = True
-                risk_factors["risk_score"] += 0.3
-        
-        # Check if mimics legitimate domain
-        legit_domains = ['hdfc', 'icici', 'axis', 'sbi', 'paypal', 'google', 'amazon']
-        for domain in legit_domains:
-            if domain in url.lower() and url.count('.') > 2:
-                risk_factors["mimics_legitimate"] = True
-                risk_factors["risk_score"] += 0.4
-        
-        # Cap risk score
-        risk_factors["risk_score"] = min(risk_factors["risk_score"], 1.0)
-        
-        return risk_factors
+        """Analyze URL for phishing risk (PhishingAnalyzer.analyze)"""
+        return self.phishing_analyzer.analyze(url)
     
-    def extract_and_grade(self, message: str, 
-                         conversation_history: List[str] = None) -> Dict:
+    def extract_and_grade(self, message: Union[str, AnalyzedMessage], 
+                         conversation_history: List[str] = None,
+                         mention_counts: Mapping[str, int] = None) -> Dict:
         """Extract entities and grade confidence"""
-        extracted = self.extract(message, conversation_history)
+        extracted = self.extract(message, conversation_history, mention_counts)
         
         # Build result
         result = {}
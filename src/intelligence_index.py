@@ -0,0 +1,123 @@
+"""
+Intelligence Index - Process-wide entity -> conversations index
+The same UPI handles, numbers and links turn up across many scam sessions; every
+extracted entity is recorded here as it is found, so "which conversations used this
+value?" is one dictionary lookup instead of a scan of every MemoryStore
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.intelligence_extractor import canonical_value
+
+@dataclass(slots=True)
+class IndexedEntity:
+    """Everything known about one entity value across conversations; slotted, as there can be millions"""
+    value: str
+    entity_types: List[str]
+    first_seen: float
+    last_seen: float
+    mentions: int = 0
+    conversations: Dict[str, int] = field(default_factory=dict)  # conversation id -> mentions
+
+    def to_dict(self, limit: int = 100) -> dict:
+        """As a dict listing the first limit conversations the value appeared in"""
+        return {
+            "value": self.value,
+            "entity_types": list(self.entity_types),
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "mentions": self.mentions,
+            "conversation_count": len(self.conversations),
+            "conversations": dict(islice(self.conversations.items(), limit))
+        }
+
+class IntelligenceIndex:
+    """
+    Unbounded hash index of extracted entities.
+
+    Entries are keyed by canonical_value(), so "+91 98765 43210" finds what
+    was extracted as 9876543210, and a lookup costs one hash of the queried
+    value whatever the number of entities or conversations.
+    The message pipeline records each message's entities in one call under
+    one lock; lookups copy the entry out under the same lock, so a reader
+    never sees a half-updated entry. Entries outlive their conversations:
+    deleting a conversation does not forget what it revealed.
+    """
+
+    def __init__(self):
+        """Initialize index"""
+        self._entities: Dict[str, IndexedEntity] = {}
+        self._lock = threading.Lock()
+
+        self.records = 0
+        self.lookups = 0
+        self.hits = 0
+
+    def record(self, conversation_id: str, entities: Iterable[Tuple[str, str]],
+               seen_at: float = None):
+        """
+        Record the entities found in one message
+
+        Args:
+            conversation_id: Conversation the message belongs to
+            entities: (entity type, value) pairs, e.g. ("upi_ids", "help@ybl")
+            seen_at: Message time (time.time() when omitted)
+        """
+        seen_at = time.time() if seen_at is None else seen_at
+        # A value counts once per message, whatever number of types it was extracted as
+        types_by_key: Dict[str, List[str]] = {}
+        for entity_type, value in entities:
+            types_by_key.setdefault(canonical_value(value), []).append(entity_type)
+        with self._lock:
+            for key, entity_types in types_by_key.items():
+                entry = self._entities.get(key)
+                if entry is None:
+                    entry = self._entities[key] = IndexedEntity(key, [], seen_at, seen_at)
+                for entity_type in entity_types:
+                    if entity_type not in entry.entity_types:
+                        entry.entity_types.append(entity_type)
+                entry.mentions += 1
+                entry.last_seen = max(entry.last_seen, seen_at)
+                entry.first_seen = min(entry.first_seen, seen_at)
+                entry.conversations[conversation_id] = entry.conversations.get(conversation_id, 0) + 1
+                self.records += 1
+
+    def lookup(self, value: str, limit: int = 100) -> Optional[Dict[str, Any]]:
+        """
+        Everything known about value as a dict, or None if it was never seen
+
+        Args:
+            value: Entity value, in any spelling canonical_value() maps to its key
+            limit: Conversations listed at most (first seen first), so a value
+                shared by thousands of sessions still copies out in constant time
+        """
+        key = canonical_value(value)
+        with self._lock:
+            self.lookups += 1
+            entry = self._entities.get(key)
+            if entry is None:
+                return None
+            self.hits += 1
+            return entry.to_dict(limit)
+
+    def clear(self):
+        """Drop every entity"""
+        with self._lock:
+            self._entities.clear()
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for health and statistics endpoints"""
+        with self._lock:
+            return {
+                "entities": len(self._entities),
+                "records": self.records,
+                "lookups": self.lookups,
+                "hits": self.hits
+            }
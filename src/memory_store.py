@@ -2,21 +2,37 @@
 Memory & Context Store - Conversation history and pattern tracking
 """
 
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, asdict
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional, Tuple
 from collections import defaultdict
+import sys
+import threading
 
-@dataclass
-class Message:
-    """Single message in conversation"""
-    role: str  # 'scammer' or 'victim'
-    content: str
-    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
-    scam_indicators: List[str] = field(default_factory=list)
-    extracted_entities: Dict = field(default_factory=dict)
+from src.aggregates import DailyCounters
+from src.eviction import DELETED
+from src.persistence import ConversationPersistence
+from src.scam_detector import ConversationScamState
+from src.conversation_store import ShardedConversationStore
+from src.intelligence_extractor import IntelligenceExtractor, canonical_entity, canonical_value
+from src.messages import Message, entity_value
 
-@dataclass
+# Finds the entity values in messages added without extracted entities
+_entity_scanner = IntelligenceExtractor()
+
+# Weight of each entity type in the extraction score
+EXTRACTION_WEIGHTS = {
+    "phishing_links": 1.0,  # High value
+    "upi_ids": 0.9,
+    "phone_numbers": 0.7,
+    "bank_accounts": 0.8,
+    "email_addresses": 0.5
+}
+
+# Confidence at which an entity counts as high confidence in summaries
+HIGH_CONFIDENCE = 0.8
+
+@dataclass(slots=True)
 class ConversationState:
     """Current state of conversation"""
     conversation_id: str
@@ -31,13 +47,27 @@ class ConversationState:
 class MemoryStore:
     """Memory store for honeypot conversations"""
     
-    def __init__(self, conversation_id: str, persona_name: str):
-        """Initialize memory store"""
+    __slots__ = (
+        "conversation_id", "persona_name", "created_at", "updated_at", "lock", "message_history",
+        "current_state", "scam_state", "mentioned_entities", "mention_counts", "first_mentions",
+        "extracted_intelligence", "_intelligence_keys", "role_counts", "entity_counts",
+        "high_confidence_counts", "aggregates", "_scam_reported", "behavior_patterns",
+        "operational_metrics", "persistence"
+    )
+    
+    def __init__(self, conversation_id: str, persona_name: str,
+                 aggregates: Optional[DailyCounters] = None):
+        """Initialize memory store; aggregates, if given, hear about its messages, verdict and entities"""
         self.conversation_id = conversation_id
         self.persona_name = persona_name
         self.created_at = datetime.now()
         self.updated_at = datetime.now()
         
+        # Held by a request across its read-modify-write of this conversation, so two
+        # messages on one session are applied one after the other; reentrant, as the
+        # methods below take it too
+        self.lock = threading.RLock()
+        
         # Short-term memory (active conversation)
         self.message_history: List[Message] = []
         self.current_state = ConversationState(
@@ -45,9 +75,18 @@ class MemoryStore:
             persona_name=persona_name
         )
         
+        # Conversation-level detection, folded in one message at a time
+        self.scam_state = ConversationScamState()
+        
         # Tracked entities across conversation
         self.mentioned_entities = defaultdict(list)
         
+        # canonical_value() of an entity -> number of messages mentioning it in any spelling,
+        # and the first one's epoch time; kept up to date by add_message so mention lookups
+        # never rescan the history
+        self.mention_counts: Dict[str, int] = {}
+        self.first_mentions: Dict[str, float] = {}
+        
         # Long-term memory (intelligence repository)
         self.extracted_intelligence = {
             "upi_ids": [],
@@ -56,6 +95,21 @@ class MemoryStore:
             "phishing_links": [],
             "email_addresses": []
         }
+        # Entity type -> canonical value -> its record above, so a repeat updates the record
+        self._intelligence_keys: Dict[str, Dict[str, Dict]] = {
+            entity_type: {} for entity_type in self.extracted_intelligence
+        }
+        
+        # Counts kept as messages and entities are recorded, so summaries never rescan:
+        # messages per role, and records per entity type, all and at HIGH_CONFIDENCE
+        self.role_counts: Dict[str, int] = {}
+        self.entity_counts = {entity_type: 0 for entity_type in self.extracted_intelligence}
+        self.high_confidence_counts = {entity_type: 0 for entity_type in self.extracted_intelligence}
+        self.aggregates = aggregates
+        self._scam_reported = False
+        
+        # ConversationPersistence changes are written behind to, once the manager attaches one
+        self.persistence = None
         
         self.behavior_patterns = {
             "opening_script": None,
@@ -76,24 +130,47 @@ class MemoryStore:
     def add_message(self, role: str, content: str, 
                    scam_indicators: List[str] = None,
                    extracted_entities: Dict = None) -> Message:
-        """Add message to conversation history"""
-        message = Message(
-            role=role,
-            content=content,
-            scam_indicators=scam_indicators or [],
-            extracted_entities=extracted_entities or {}
-        )
+        """
+        Add message to conversation history; extracted_entities maps entity
+        types to the extractor's ExtractedEntity lists, kept by reference, or
+        to their dicts
+        """
+        message = Message.create(role, content, scam_indicators, extracted_entities)
         
+        with self.lock:
+            self._append(message)
+            self.updated_at = datetime.now()
+            if self.aggregates:
+                self.aggregates.incr("messages")
+            if self.persistence:
+                self.persistence.save_message(self, len(self.message_history) - 1, message)
+        
+        return message
+    
+    def _append(self, message: Message):
+        """Add message to the history, counts and mention index (lock held)"""
         self.message_history.append(message)
-        self.updated_at = datetime.now()
+        self.role_counts[message.role] = self.role_counts.get(message.role, 0) + 1
         
         # Track entities
-        if extracted_entities:
-            for entity_type, entities in extracted_entities.items():
-                if entities:
-                    self.mentioned_entities[entity_type].extend(entities)
-        
-        return message
+        for entity_type, entities in zip(message.entity_types, message.entities):
+            if entities:
+                self.mentioned_entities[entity_type].extend(entities)
+        self._index_mentions(message)
+    
+    def _index_mentions(self, message: Message):
+        """
+        Count each entity in message once, under its canonical_value(), from
+        its extracted entities or a scan; "+91 98765 43210" and "9876543210"
+        are mentions of one number
+        """
+        if message.entity_types:
+            values = {canonical_value(entity_value(entity)) for _, entity in message.iter_entities()}
+        else:
+            values = {canonical_value(value) for value in _entity_scanner.mentioned_values(message.content)}
+        for value in values:
+            self.mention_counts[value] = self.mention_counts.get(value, 0) + 1
+            self.first_mentions.setdefault(value, message.created)
     
     def get_recent_messages(self, n: int = 5) -> List[Message]:
         """Get last n messages"""
@@ -116,11 +193,13 @@ class MemoryStore:
                     exposure_risk: float = None):
         """Update conversation state"""
         if scam_detected is not None:
-            self.current_state.scam_detected = scam_detected
+            with self.lock:
+                self._report_verdict(scam_detected)
+                self.current_state.scam_detected = scam_detected
         if scam_type is not None:
             self.current_state.scam_type = scam_type
         if strategy is not None:
-            self.current_state.current_strategy = strategy
+            self.current_state.current_strategy = sys.intern(strategy)
         if emotional_state is not None:
             self.current_state.emotional_state = emotional_state
         if trust_level is not None:
@@ -129,18 +208,134 @@ class MemoryStore:
             self.current_state.honeypot_exposure_risk = exposure_risk
         
         self.updated_at = datetime.now()
+        if self.persistence:
+            self.persistence.save_conversation(self)
     
     def add_extracted_intelligence(self, entity_type: str, value: str, 
                                   confidence: float, metadata: Dict = None):
-        """Add extracted intelligence"""
-        if entity_type in self.extracted_intelligence:
-            self.extracted_intelligence[entity_type].append({
-                "value": value,
-                "confidence": confidence,
-                "metadata": metadata or {},
-                "first_appeared": self._find_first_mention(value),
-                "appearance_count": self._count_mentions(value)
-            })
+        """
+        Add extracted intelligence, once per entity: a value whose canonical
+        form (canonical_entity) is already stored updates that record's
+        confidence, counts and metadata instead of adding another
+        """
+        if entity_type not in self.extracted_intelligence:
+            return
+        key = canonical_entity(entity_type, value)
+        with self.lock:
+            record = self._intelligence_keys[entity_type].get(key)
+            if record is not None:
+                if record["confidence"] < HIGH_CONFIDENCE <= confidence:
+                    self.high_confidence_counts[entity_type] += 1
+                record["confidence"] = max(record["confidence"], confidence)
+                record["appearance_count"] = max(record["appearance_count"], self._count_mentions(value))
+                record["occurrences"] += 1
+                record["metadata"].update(metadata or {})
+            else:
+                record = {
+                    "value": value,
+                    "confidence": confidence,
+                    "metadata": dict(metadata or {}),
+                    "first_appeared": self._find_first_mention(value),
+                    "appearance_count": self._count_mentions(value),
+                    "occurrences": 1
+                }
+                self._store_record(entity_type, key, record)
+                if self.aggregates:
+                    self.aggregates.incr("intelligence")
+            if self.persistence:
+                self.persistence.save_record(self, entity_type, key, record)
+    
+    def _store_record(self, entity_type: str, key: str, record: Dict):
+        """Add a new intelligence record under its canonical key (lock held)"""
+        self._intelligence_keys[entity_type][key] = record
+        self.extracted_intelligence[entity_type].append(record)
+        self.entity_counts[entity_type] += 1
+        if record["confidence"] >= HIGH_CONFIDENCE:
+            self.high_confidence_counts[entity_type] += 1
+    
+    def _report_verdict(self, scam_detected: bool):
+        """
+        Keep the aggregates' count of conversations flagged as scams in step
+        with this one's verdict; a conversation counts towards the day it was
+        first flagged on only once (lock held)
+        """
+        if not self.aggregates or scam_detected == self.current_state.scam_detected:
+            return
+        if scam_detected:
+            self.aggregates.incr("scam_detections", daily=not self._scam_reported)
+            self._scam_reported = True
+        else:
+            self.aggregates.decr("scam_detections")
+    
+    def attach(self, aggregates: DailyCounters):
+        """Report to aggregates from now on, adding this conversation's live counts to their totals"""
+        with self.lock:
+            self.aggregates = aggregates
+            aggregates.incr("conversations", daily=False)
+            aggregates.incr("messages", len(self.message_history), daily=False)
+            aggregates.incr("intelligence", sum(self.entity_counts.values()), daily=False)
+            if self.current_state.scam_detected:
+                aggregates.incr("scam_detections", daily=False)
+    
+    def detach(self):
+        """Stop reporting to the aggregates and persistence, taking this conversation's live counts off the totals"""
+        with self.lock:
+            self.persistence = None
+            aggregates, self.aggregates = self.aggregates, None
+            if aggregates is None:
+                return
+            aggregates.decr("conversations")
+            aggregates.decr("messages", len(self.message_history))
+            aggregates.decr("intelligence", sum(self.entity_counts.values()))
+            if self.current_state.scam_detected:
+                aggregates.decr("scam_detections")
+    
+    def snapshot(self) -> Dict:
+        """
+        Conversation-level state for persistence, JSON-serializable; messages
+        and intelligence records are saved one by one as they are added
+        """
+        return {
+            "conversation_id": self.conversation_id,
+            "persona_name": self.persona_name,
+            "created_at": self.created_at.timestamp(),
+            "updated_at": self.updated_at.timestamp(),
+            "current_state": asdict(self.current_state),
+            "scam_state": self.scam_state.to_record(),
+            "behavior_patterns": self.behavior_patterns,
+            "operational_metrics": self.operational_metrics
+        }
+    
+    def saved(self) -> Tuple[Dict, List[tuple], List[tuple]]:
+        """(snapshot, messages, records) in the form restore() takes, as the database would hold them"""
+        with self.lock:
+            messages = [(message.role, message.content, message.created, list(message.scam_indicators),
+                         message.extracted_entities) for message in self.message_history]
+            records = [(entity_type, key, record) for entity_type, keyed in self._intelligence_keys.items()
+                       for key, record in keyed.items()]
+            return self.snapshot(), messages, records
+    
+    @classmethod
+    def restore(cls, snapshot: Dict, messages: List[tuple], records: List[tuple]) -> "MemoryStore":
+        """
+        Conversation rebuilt from a snapshot() and its saved messages, as
+        (role, content, created, scam_indicators, extracted_entities), and
+        intelligence records, as (entity_type, key, record)
+        """
+        memory = cls(snapshot["conversation_id"], snapshot["persona_name"])
+        memory.created_at = datetime.fromtimestamp(snapshot["created_at"])
+        memory.current_state = ConversationState(**snapshot["current_state"])
+        memory.scam_state = ConversationScamState.from_record(snapshot["scam_state"])
+        memory.behavior_patterns.update(snapshot["behavior_patterns"])
+        memory.operational_metrics.update(snapshot["operational_metrics"])
+        memory._scam_reported = memory.current_state.scam_detected
+        for role, content, created, scam_indicators, extracted_entities in messages:
+            memory._append(Message.create(role, content, scam_indicators, extracted_entities, created))
+        for entity_type, key, record in records:
+            if entity_type in memory.extracted_intelligence:
+                memory._store_record(entity_type, key, record)
+        memory.updated_at = datetime.fromtimestamp(snapshot["updated_at"])
+        return memory
     
     def add_behavior_pattern(self, pattern_type: str, value: Any):
         """Add observed behavior pattern"""
@@ -149,14 +344,22 @@ class MemoryStore:
                 self.behavior_patterns[pattern_type].append(value)
             else:
                 self.behavior_patterns[pattern_type] = value
+            if self.persistence:
+                self.persistence.save_conversation(self)
     
     def add_operational_metric(self, metric_type: str, value: Any):
         """Add operational metric"""
         if metric_type in self.operational_metrics:
             self.operational_metrics[metric_type] = value
+            if self.persistence:
+                self.persistence.save_conversation(self)
     
     def _find_first_mention(self, value: str) -> Optional[str]:
         """Find when value was first mentioned"""
+        key = canonical_value(value)
+        if key in self.first_mentions:
+            return datetime.fromtimestamp(self.first_mentions[key]).isoformat()
+        # Not an entity the index saw: fall back to a substring scan
         for msg in self.message_history:
             if value in msg.content:
                 return msg.timestamp
@@ -164,6 +367,9 @@ class MemoryStore:
     
     def _count_mentions(self, value: str) -> int:
         """Count how many times value is mentioned"""
+        key = canonical_value(value)
+        if key in self.mention_counts:
+            return self.mention_counts[key]
         count = 0
         for msg in self.message_history:
             if value in msg.content:
@@ -174,7 +380,7 @@ class MemoryStore:
         """Get all extracted entities of a type"""
         return self.extracted_intelligence.get(entity_type, [])
     
-    def get_high_confidence_entities(self, threshold: float = 0.8) -> Dict:
+    def get_high_confidence_entities(self, threshold: float = HIGH_CONFIDENCE) -> Dict:
         """Get entities above confidence threshold"""
         result = {}
         for entity_type, entities in self.extracted_intelligence.items():
@@ -185,18 +391,17 @@ class MemoryStore:
     
     def calculate_extraction_score(self) -> float:
         """Calculate overall extraction score (0-1)"""
-        total_entities = sum(len(e) for e in self.extracted_intelligence.values())
-        
-        if total_entities == 0:
+        counts = self.entity_counts
+        if not any(counts.values()):
             return 0.0
         
         # Weight different entity types
         weighted_total = (
-            len(self.extracted_intelligence["phishing_links"]) * 1.0 +  # High value
-            len(self.extracted_intelligence["upi_ids"]) * 0.9 +
-            len(self.extracted_intelligence["phone_numbers"]) * 0.7 +
-            len(self.extracted_intelligence["bank_accounts"]) * 0.8 +
-            len(self.extracted_intelligence["email_addresses"]) * 0.5
+            counts["phishing_links"] * EXTRACTION_WEIGHTS["phishing_links"] +
+            counts["upi_ids"] * EXTRACTION_WEIGHTS["upi_ids"] +
+            counts["phone_numbers"] * EXTRACTION_WEIGHTS["phone_numbers"] +
+            counts["bank_accounts"] * EXTRACTION_WEIGHTS["bank_accounts"] +
+            counts["email_addresses"] * EXTRACTION_WEIGHTS["email_addresses"]
         )
         
         # Normalize: assume max ~10 weighted entities
@@ -210,11 +415,12 @@ class MemoryStore:
             "persona": self.persona_name,
             "duration_minutes": round((self.updated_at - self.created_at).total_seconds() / 60, 1),
             "message_count": len(self.message_history),
-            "scammer_messages": sum(1 for m in self.message_history if m.role == "scammer"),
-            "victim_messages": sum(1 for m in self.message_history if m.role == "victim"),
+            "scammer_messages": self.role_counts.get("scammer", 0),
+            "victim_messages": self.role_counts.get("victim", 0),
             "current_state": asdict(self.current_state),
-            "unique_entities_count": sum(len(e) for e in self.extracted_intelligence.values()),
-            "high_confidence_entities": len(self.get_high_confidence_entities()),
+            "unique_entities_count": sum(self.entity_counts.values()),
+            # Entity types with any entity at HIGH_CONFIDENCE, as get_high_confidence_entities() would list
+            "high_confidence_entities": sum(1 for count in self.high_confidence_counts.values() if count),
             "extraction_score": self.calculate_extraction_score(),
             "mentioned_entity_types": {
                 k: len(v) for k, v in self.mentioned_entities.items() if v
@@ -238,16 +444,7 @@ class MemoryStore:
             "persona_name": self.persona_name,
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
-            "message_history": [
-                {
-                    "role": m.role,
-                    "content": m.content,
-                    "timestamp": m.timestamp,
-                    "scam_indicators": m.scam_indicators,
-                    "extracted_entities": m.extracted_entities
-                }
-                for m in self.message_history
-            ],
+            "message_history": [m.to_dict() for m in self.message_history],
             "current_state": asdict(self.current_state),
             "extracted_intelligence": self.extracted_intelligence,
             "behavior_patterns": self.behavior_patterns,
@@ -256,27 +453,147 @@ class MemoryStore:
         }
 
 class MemoryManager:
-    """Manager for multiple conversation memories"""
+    """
+    Manager for multiple conversation memories, evicting idle ones.
+    Eviction order is kept per shard: over capacity, the shard a new
+    conversation lands in evicts its own least recently active one, which
+    is not necessarily the least recently active overall
+    """
+    
+    def __init__(self, max_conversations: int = 10000, idle_timeout_seconds: float = 7200,
+                 sweep_interval_seconds: float = 0, shards: int = 16,
+                 persistence: Optional[ConversationPersistence] = None):
+        """
+        Initialize memory manager
+        
+        Args:
+            max_conversations: Conversations kept across shards, each capped at its share
+            idle_timeout_seconds: Inactivity after which a conversation is evicted
+            sweep_interval_seconds: Period of the background sweeper; 0 expires only on access
+            shards: Independently locked shards conversations are spread over
+            persistence: Database conversations are written behind to and restored from (optional)
+        """
+        self.active_conversations = ShardedConversationStore(shards, max_conversations, idle_timeout_seconds,
+                                                             sweep_interval_seconds)
+        # Conversations, messages, scam verdicts and entities, counted as they are recorded;
+        # a conversation's share comes off the totals when it leaves
+        self.aggregates = DailyCounters()
+        self.persistence = persistence
+        self.active_conversations.add_listener(self._on_leave)
+    
+    def _new_memory(self, conversation_id: str, persona_name: str) -> MemoryStore:
+        self.aggregates.incr("conversations")
+        memory = MemoryStore(conversation_id, persona_name, self.aggregates)
+        if self.persistence:
+            memory.persistence = self.persistence
+            self.persistence.save_conversation(memory, fresh=True)
+        return memory
     
-    def __init__(self):
-        """Initialize memory manager"""
-        self.active_conversations: Dict[str, MemoryStore] = {}
+    def _adopt(self, memory: MemoryStore) -> MemoryStore:
+        """Report a restored conversation to the aggregates and persist it from now on"""
+        memory.attach(self.aggregates)
+        memory.persistence = self.persistence
+        return memory
+    
+    def _load_saved(self, conversation_id: str) -> Optional[MemoryStore]:
+        """
+        The conversation as saved when it left the store (evicted, or before a
+        restart) within the idle timeout, or None. Writes still queued for it
+        are read from the queue; otherwise this reads the database, so it is
+        never called under a store lock
+        """
+        since = datetime.now().timestamp() - self.active_conversations.idle_ttl_seconds
+        queued, saved = self.persistence.queued_conversation(conversation_id)
+        if not queued:
+            saved = self.persistence.load_conversation(conversation_id, since)
+        elif saved is not None and saved[0]["updated_at"] < since:
+            saved = None
+        return MemoryStore.restore(*saved) if saved is not None else None
+    
+    def _on_leave(self, conversation_id: str, memory: MemoryStore, reason: str):
+        """
+        A conversation left the store: idle and evicted ones stay in the
+        database, deleted ones go, unless a new conversation took the id
+        """
+        memory.detach()
+        if self.persistence and reason == DELETED and conversation_id not in self.active_conversations:
+            self.persistence.delete_conversation(conversation_id)
+    
+    def restore(self) -> int:
+        """
+        Load conversations saved within the idle timeout, the most recently
+        active first up to the store's capacity; returns how many
+        """
+        if not self.persistence:
+            return 0
+        since = datetime.now().timestamp() - self.active_conversations.idle_ttl_seconds
+        restored = 0
+        for saved in self.persistence.load(since, self.active_conversations.max_entries):
+            memory = self._adopt(MemoryStore.restore(*saved))
+            self.active_conversations.put(memory.conversation_id, memory)
+            restored += 1
+        return restored
     
     def create_conversation(self, conversation_id: str, persona_name: str) -> MemoryStore:
         """Create new conversation memory"""
-        memory = MemoryStore(conversation_id, persona_name)
-        self.active_conversations[conversation_id] = memory
+        memory = self._new_memory(conversation_id, persona_name)
+        self.active_conversations.put(conversation_id, memory)
         return memory
     
     def get_conversation(self, conversation_id: str) -> Optional[MemoryStore]:
-        """Get existing conversation memory"""
+        """Get existing conversation memory, counting it as active"""
         return self.active_conversations.get(conversation_id)
     
+    def get_or_create(self, conversation_id: str, persona_name: str = "") -> MemoryStore:
+        """
+        Get existing conversation memory or create it. On a miss, the conversation
+        as saved is loaded first, outside the store's locks, and kept unless
+        another request created the id meanwhile; only ids with nothing saved
+        start fresh
+        """
+        memory = self.active_conversations.get(conversation_id)
+        if memory is not None:
+            return memory
+        saved = self._load_saved(conversation_id) if self.persistence else None
+        return self.active_conversations.get_or_create(
+            conversation_id,
+            lambda: self._adopt(saved) if saved is not None else self._new_memory(conversation_id, persona_name)
+        )
+    
     def delete_conversation(self, conversation_id: str):
         """Delete conversation memory"""
-        if conversation_id in self.active_conversations:
-            del self.active_conversations[conversation_id]
+        self.active_conversations.pop(conversation_id)
+    
+    def add_eviction_listener(self, listener: Callable[[str, MemoryStore, str], None]):
+        """Call listener(conversation_id, memory, reason) whenever a conversation leaves"""
+        self.active_conversations.add_listener(listener)
     
     def get_active_count(self) -> int:
         """Get number of active conversations"""
         return len(self.active_conversations)
+    
+    def get_scam_count_today(self) -> int:
+        """Get count of conversations first detected as scams today"""
+        return self.aggregates.today("scam_detections")
+    
+    def get_total_intelligence_count(self) -> int:
+        """Get total extracted intelligence items across active conversations"""
+        return self.aggregates.total("intelligence")
+    
+    def get_aggregates(self) -> Dict[str, Any]:
+        """Activity totals across active conversations, today's counts and the daily history"""
+        return self.aggregates.get_stats()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Eviction counters for health and statistics endpoints"""
+        return self.active_conversations.get_stats()
+    
+    def get_persistence_stats(self) -> Optional[Dict[str, Any]]:
+        """Write-behind counters, or None when conversations are not persisted"""
+        return self.persistence.get_stats() if self.persistence else None
+    
+    def shutdown(self):
+        """Stop the background sweeper, and commit and close the database"""
+        self.active_conversations.stop_sweeper()
+        if self.persistence:
+            self.persistence.close()
@@ -3,25 +3,20 @@ Memory Manager - Conversation state & conversation history management
 Thread-safe, in-memory store optimized for serverless deployment
 """
 
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, asdict
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 from collections import defaultdict
+import sys
 import threading
 
-@dataclass
-class Message:
-    """Single message in conversation"""
-    role: str  # 'scammer' or 'victim'
-    content: str
-    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
-    scam_indicators: List[str] = field(default_factory=list)
-    extracted_entities: Dict = field(default_factory=dict)
-    
-    def to_dict(self) -> dict:
-        return asdict(self)
+from src.aggregates import DailyCounters
+from src.conversation_store import ShardedConversationStore
+from src.messages import Message
+from src.persistence import ConversationPersistence
+from src.scam_detector import ConversationScamState
 
-@dataclass
+@dataclass(slots=True)
 class ConversationState:
     """Current state of conversation"""
     conversation_id: str
@@ -40,14 +35,24 @@ class MemoryStore:
     Tracks message history, extracted intelligence, and conversation state.
     """
     
-    def __init__(self, conversation_id: str, persona_name: str = ""):
-        """Initialize memory store for a conversation"""
+    __slots__ = (
+        "conversation_id", "persona_name", "created_at", "updated_at", "last_activity", "lock",
+        "message_history", "current_state", "scam_state", "extracted_intelligence", "scammer_profile",
+        "role_counts", "entity_count", "aggregates", "_scam_reported", "persistence"
+    )
+    
+    def __init__(self, conversation_id: str, persona_name: str = "",
+                 aggregates: Optional[DailyCounters] = None):
+        """Initialize memory store for a conversation; aggregates, if given, hear about its activity"""
         self.conversation_id = conversation_id
         self.persona_name = persona_name
         self.created_at = datetime.now()
         self.updated_at = datetime.now()
         self.last_activity = datetime.now()
         
+        # Held across a request's updates to this conversation; reentrant, add_message takes it too
+        self.lock = threading.RLock()
+        
         # Message history
         self.message_history: List[Message] = []
         
@@ -57,6 +62,9 @@ class MemoryStore:
             persona_name=persona_name
         )
         
+        # Conversation-level detection, folded in one message at a time
+        self.scam_state = ConversationScamState()
+        
         # Extracted intelligence storage
         self.extracted_intelligence = {
             "upi_ids": [],
@@ -76,24 +84,127 @@ class MemoryStore:
             "technical_requests": [],
             "emotional_tactics": []
         }
+        
+        # Counts kept as messages are recorded: messages per role, and entities extracted
+        self.role_counts: Dict[str, int] = {}
+        self.entity_count = 0
+        self.aggregates = aggregates
+        self._scam_reported = False
+        
+        # ConversationPersistence changes are written behind to, once the manager attaches one
+        self.persistence = None
     
     def add_message(self, role: str, content: str,
                    scam_indicators: List[str] = None,
                    extracted_entities: Dict = None) -> Message:
-        """Add message to conversation history"""
-        message = Message(
-            role=role,
-            content=content,
-            scam_indicators=scam_indicators or [],
-            extracted_entities=extracted_entities or {}
-        )
+        """Add message to conversation history; extracted entities are kept by reference"""
+        message = Message.create(role, content, scam_indicators, extracted_entities)
         
-        self.message_history.append(message)
-        self.updated_at = datetime.now()
-        self.last_activity = datetime.now()
+        with self.lock:
+            entity_count = self._append(message)
+            self.updated_at = datetime.now()
+            self.last_activity = datetime.now()
+            if self.aggregates:
+                self.aggregates.incr("messages")
+                self.aggregates.incr("intelligence", entity_count)
+            if self.persistence:
+                self.persistence.save_message(self, len(self.message_history) - 1, message)
         
         return message
     
+    def _append(self, message: Message) -> int:
+        """Add message to the history and counts (lock held); returns its entity count"""
+        entity_count = sum(len(entities) for entities in message.entities)
+        self.message_history.append(message)
+        self.role_counts[message.role] = self.role_counts.get(message.role, 0) + 1
+        self.entity_count += entity_count
+        return entity_count
+    
+    def update_state(self, scam_detected: bool = None, scam_type: str = None, strategy: str = None):
+        """Update conversation state, keeping the aggregates' scam count in step with the verdict"""
+        with self.lock:
+            if scam_detected is not None and scam_detected != self.current_state.scam_detected:
+                if self.aggregates and scam_detected:
+                    # A conversation counts towards the day it was first flagged on only once
+                    self.aggregates.incr("scam_detections", daily=not self._scam_reported)
+                    self._scam_reported = True
+                elif self.aggregates:
+                    self.aggregates.decr("scam_detections")
+                self.current_state.scam_detected = scam_detected
+            if scam_type is not None:
+                self.current_state.scam_type = scam_type
+            if strategy is not None:
+                self.current_state.current_strategy = sys.intern(strategy)
+            self.updated_at = datetime.now()
+            if self.persistence:
+                self.persistence.save_conversation(self)
+    
+    def attach(self, aggregates: DailyCounters):
+        """Report to aggregates from now on, adding this conversation's live counts to their totals"""
+        with self.lock:
+            self.aggregates = aggregates
+            aggregates.incr("conversations", daily=False)
+            aggregates.incr("messages", len(self.message_history), daily=False)
+            aggregates.incr("intelligence", self.entity_count, daily=False)
+            if self.current_state.scam_detected:
+                aggregates.incr("scam_detections", daily=False)
+    
+    def detach(self):
+        """Stop reporting to the aggregates and persistence, taking this conversation's live counts off the totals"""
+        with self.lock:
+            self.persistence = None
+            aggregates, self.aggregates = self.aggregates, None
+            if aggregates is None:
+                return
+            aggregates.decr("conversations")
+            aggregates.decr("messages", len(self.message_history))
+            aggregates.decr("intelligence", self.entity_count)
+            if self.current_state.scam_detected:
+                aggregates.decr("scam_detections")
+    
+    def snapshot(self) -> Dict:
+        """Conversation-level state for persistence, JSON-serializable; messages are saved as they are added"""
+        return {
+            "conversation_id": self.conversation_id,
+            "persona_name": self.persona_name,
+            "created_at": self.created_at.timestamp(),
+            "updated_at": self.updated_at.timestamp(),
+            "last_activity": self.last_activity.timestamp(),
+            "current_state": asdict(self.current_state),
+            "scam_state": self.scam_state.to_record(),
+            "extracted_intelligence": self.extracted_intelligence,
+            "scammer_profile": self.scammer_profile
+        }
+    
+    def saved(self) -> Tuple[Dict, List[tuple], List[tuple]]:
+        """
+        (snapshot, messages, records) as the database would hold them; records
+        is always empty, intelligence travels in the snapshot
+        """
+        with self.lock:
+            messages = [(message.role, message.content, message.created, list(message.scam_indicators),
+                         message.extracted_entities) for message in self.message_history]
+            return self.snapshot(), messages, []
+    
+    @classmethod
+    def restore(cls, snapshot: Dict, messages: List[tuple]) -> "MemoryStore":
+        """
+        Conversation rebuilt from a snapshot() and its saved messages, as
+        (role, content, created, scam_indicators, extracted_entities)
+        """
+        memory = cls(snapshot["conversation_id"], snapshot["persona_name"])
+        memory.created_at = datetime.fromtimestamp(snapshot["created_at"])
+        memory.updated_at = datetime.fromtimestamp(snapshot["updated_at"])
+        memory.last_activity = datetime.fromtimestamp(snapshot["last_activity"])
+        memory.current_state = ConversationState(**snapshot["current_state"])
+        memory.scam_state = ConversationScamState.from_record(snapshot["scam_state"])
+        memory.extracted_intelligence.update(snapshot["extracted_intelligence"])
+        memory.scammer_profile.update(snapshot["scammer_profile"])
+        memory._scam_reported = memory.current_state.scam_detected
+        for role, content, created, scam_indicators, extracted_entities in messages:
+            memory._append(Message.create(role, content, scam_indicators, extracted_entities, created))
+        return memory
+    
     def get_recent_messages(self, n: int = 10) -> List[Message]:
         """Get last n messages for context"""
         return self.message_history[-n:]
@@ -127,79 +238,132 @@ class MemoryManager:
     
     Optimized for serverless:
     - No database calls in hot path
-    - In-memory storage (cache-friendly)
-    - Thread-safe for concurrent requests
-    - Automatic cleanup of old conversations
+    - In-memory storage (cache-friendly), optionally written behind to SQLite
+    - Thread-safe for concurrent requests, locked per shard and per conversation
+    - Idle conversations evicted least recently active first, in O(1); the
+      order is kept per shard, so over capacity a shard evicts its own
+      idlest conversation, not necessarily the idlest overall
     """
     
     # Configuration
     MAX_STORED_CONVERSATIONS = 1000
-    CONVERSATION_RETENTION_MINUTES = 120  # Keep for 2 hours
+    CONVERSATION_RETENTION_MINUTES = 120  # Keep for 2 hours after the last message
     
-    def __init__(self):
-        """Initialize memory manager"""
-        self.conversations: Dict[str, MemoryStore] = {}
-        self.lock = threading.Lock()  # Thread safety
-        self.creation_times: Dict[str, datetime] = {}
+    def __init__(self, max_conversations: int = None, retention_minutes: float = None,
+                 sweep_interval_seconds: float = 0, shards: int = 16,
+                 persistence: Optional[ConversationPersistence] = None):
+        """
+        Initialize memory manager; limits default to the class configuration.
+        With persistence, conversations are written behind to its database
+        and restore() brings them back after a restart
+        """
+        # One lock per shard: requests for different conversations rarely wait for each other
+        self.conversations = ShardedConversationStore(
+            shards,
+            max_conversations or self.MAX_STORED_CONVERSATIONS,
+            (retention_minutes or self.CONVERSATION_RETENTION_MINUTES) * 60,
+            sweep_interval_seconds
+        )
+        # Activity counted as it is recorded, so status never scans; departing conversations
+        # take their share off the totals
+        self.aggregates = DailyCounters()
+        self.persistence = persistence
+        self.conversations.add_listener(lambda conversation_id, memory, reason: memory.detach())
+    
+    def _new_memory(self, conversation_id: str, persona_name: str) -> MemoryStore:
+        self.aggregates.incr("conversations")
+        memory = MemoryStore(conversation_id, persona_name, self.aggregates)
+        if self.persistence:
+            memory.persistence = self.persistence
+            self.persistence.save_conversation(memory, fresh=True)
+        return memory
+    
+    def _adopt(self, memory: MemoryStore) -> MemoryStore:
+        """Report a restored conversation to the aggregates and persist it from now on"""
+        memory.attach(self.aggregates)
+        memory.persistence = self.persistence
+        return memory
+    
+    def _load_saved(self, conversation_id: str) -> Optional[MemoryStore]:
+        """
+        The conversation as saved when it left the store (evicted, or before a
+        restart) within the idle timeout, or None. Writes still queued for it
+        are read from the queue; otherwise this reads the database, so it is
+        never called under a store lock
+        """
+        since = datetime.now().timestamp() - self.conversations.idle_ttl_seconds
+        queued, saved = self.persistence.queued_conversation(conversation_id)
+        if not queued:
+            saved = self.persistence.load_conversation(conversation_id, since)
+        elif saved is not None and saved[0]["updated_at"] < since:
+            saved = None
+        return MemoryStore.restore(*saved[:2]) if saved is not None else None
+    
+    def restore(self) -> int:
+        """Load conversations saved within the retention window, most recent first up to capacity; returns how many"""
+        if not self.persistence:
+            return 0
+        since = datetime.now().timestamp() - self.conversations.idle_ttl_seconds
+        restored = 0
+        for saved in self.persistence.load(since, self.conversations.max_entries):
+            memory = self._adopt(MemoryStore.restore(*saved[:2]))
+            self.conversations.put(memory.conversation_id, memory)
+            restored += 1
+        return restored
     
     def get_or_create(self, conversation_id: str, persona_name: str = "") -> MemoryStore:
-        """Get existing conversation or create new one"""
-        with self.lock:
-            if conversation_id in self.conversations:
-                return self.conversations[conversation_id]
-            
-            # Create new conversation
-            memory_store = MemoryStore(conversation_id, persona_name)
-            self.conversations[conversation_id] = memory_store
-            self.creation_times[conversation_id] = datetime.now()
-            
-            # Cleanup old conversations if needed
-            if len(self.conversations) > self.MAX_STORED_CONVERSATIONS:
-                self._cleanup_old_conversations()
-            
-            return memory_store
+        """
+        Get existing conversation or create new one. On a miss, the conversation
+        as saved is loaded first, outside the store's locks, and kept unless
+        another request created the id meanwhile; only ids with nothing saved
+        start fresh
+        """
+        memory = self.conversations.get(conversation_id)
+        if memory is not None:
+            return memory
+        saved = self._load_saved(conversation_id) if self.persistence else None
+        return self.conversations.get_or_create(
+            conversation_id,
+            lambda: self._adopt(saved) if saved is not None else self._new_memory(conversation_id, persona_name)
+        )
     
     def get(self, conversation_id: str) -> Optional[MemoryStore]:
         """Get conversation by ID"""
-        with self.lock:
-            return self.conversations.get(conversation_id)
+        return self.conversations.get(conversation_id)
     
     def get_active_count(self) -> int:
         """Get count of active conversations"""
-        with self.lock:
-            return len(self.conversations)
+        return len(self.conversations)
     
     def get_scam_count_today(self) -> int:
-        """Get count of scam detections"""
-        with self.lock:
-            count = 0
-            for memory in self.conversations.values():
-                if memory.current_state.scam_detected:
-                    count += 1
-            return count
+        """Get count of conversations first detected as scams today"""
+        return self.aggregates.today("scam_detections")
     
     def get_total_intelligence_count(self) -> int:
-        """Get total extracted intelligence items"""
-        with self.lock:
-            count = 0
-            for memory in self.conversations.values():
-                for entity_list in memory.extracted_intelligence.values():
-                    count += len(entity_list)
-            return count
-    
-    def _cleanup_old_conversations(self):
-        """Remove conversations older than retention time"""
-        now = datetime.now()
-        to_delete = []
-        
-        for conv_id, creation_time in self.creation_times.items():
-            age_minutes = (now - creation_time).total_seconds() / 60
-            if age_minutes > self.CONVERSATION_RETENTION_MINUTES:
-                to_delete.append(conv_id)
-        
-        for conv_id in to_delete:
-            del self.conversations[conv_id]
-            del self.creation_times[conv_id]
+        """Get total extracted intelligence items across active conversations"""
+        return self.aggregates.total("intelligence")
+    
+    def get_aggregates(self) -> Dict:
+        """Activity totals across active conversations, today's counts and the daily history"""
+        return self.aggregates.get_stats()
+    
+    def add_eviction_listener(self, listener: Callable[[str, MemoryStore, str], None]):
+        """Call listener(conversation_id, memory, reason) whenever a conversation leaves"""
+        self.conversations.add_listener(listener)
+    
+    def get_stats(self) -> Dict:
+        """Eviction counters"""
+        return self.conversations.get_stats()
+    
+    def get_persistence_stats(self) -> Optional[Dict]:
+        """Write-behind counters, or None when conversations are not persisted"""
+        return self.persistence.get_stats() if self.persistence else None
+    
+    def shutdown(self):
+        """Stop the background sweeper, and commit and close the database"""
+        self.conversations.stop_sweeper()
+        if self.persistence:
+            self.persistence.close()
     
     def get_or_create_agent(self, conversation_id: str):
         """Placeholder for agent creation (handled in api_complete.py)"""
@@ -207,8 +371,7 @@ class MemoryManager:
     
     def export_conversation(self, conversation_id: str) -> Optional[dict]:
         """Export conversation for logging/analysis"""
-        with self.lock:
-            memory = self.conversations.get(conversation_id)
-            if memory:
-                return memory.to_dict()
-            return None
+        memory = self.conversations.get(conversation_id, touch=False)
+        if memory:
+            return memory.to_dict()
+        return None
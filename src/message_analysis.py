@@ -0,0 +1,82 @@
+"""
+Message Analysis - Single-pass analysis shared across the detection pipeline
+Normalization, lowercasing and tokenization happen once per message; every component reads the results
+"""
+
+import re
+from collections import defaultdict
+from functools import cached_property
+from typing import Dict, FrozenSet, Iterable, List, Tuple, Union
+
+from src.sentiment import tokenize
+from src.text_normalization import normalize_text
+
+WORD_PATTERN = re.compile(r'\w+')
+
+class AnalyzedMessage:
+    """
+    A message plus everything derived from its text.
+
+    Each field is computed on first access and then reused, so a message
+    handed from the detector to the extractor, agent controller, persona and
+    conversation engine is normalized, lowercased and tokenized exactly once.
+    ``text`` stays the message as received; ``normalized`` has homoglyphs,
+    invisible characters and spaced-out words undone, and every derived
+    field (``lower``, tokens, words) is built from it.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.normalized = normalize_text(text)
+        self.lower = self.normalized.lower()
+
+    @classmethod
+    def of(cls, message: Union[str, "AnalyzedMessage"]) -> "AnalyzedMessage":
+        """Wrap raw text; already analyzed messages are returned as-is"""
+        return message if isinstance(message, AnalyzedMessage) else cls(message)
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        """Word and punctuation tokens of the lowercased text (NLTK-style)"""
+        return tokenize(self.lower)
+
+    @cached_property
+    def words(self) -> Tuple[str, ...]:
+        """Maximal runs of word characters, i.e. what ``\\bword\\b`` can match"""
+        return tuple(m.group() for m in self._word_matches)
+
+    @cached_property
+    def word_set(self) -> FrozenSet[str]:
+        return frozenset(self.words)
+
+    @cached_property
+    def word_positions(self) -> Dict[str, List[int]]:
+        """Word -> character offsets of each occurrence in the lowercased text"""
+        positions = defaultdict(list)
+        for match in self._word_matches:
+            positions[match.group()].append(match.start())
+        return dict(positions)
+
+    @cached_property
+    def _word_matches(self) -> list:
+        return list(WORD_PATTERN.finditer(self.lower))
+
+    def has_word(self, word: str) -> bool:
+        """True if word occurs as a whole word (lowercase)"""
+        return word in self.word_set
+
+    def contains_any(self, fragments: Iterable[str]) -> bool:
+        """True if any lowercase fragment occurs anywhere in the text"""
+        lower = self.lower
+        return any(fragment in lower for fragment in fragments)
+
+    def count_present(self, fragments: Iterable[str]) -> int:
+        """Number of lowercase fragments that occur anywhere in the text"""
+        lower = self.lower
+        return sum(1 for fragment in fragments if fragment in lower)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __len__(self) -> int:
+        return len(self.text)
@@ -0,0 +1,76 @@
+"""
+Messages - Compact conversation messages
+A conversation holds one Message per side of every turn, so each is slotted, stamped with
+epoch seconds and keeps the extracted entities themselves; the ISO timestamps and entity
+dicts of the JSON are built only when a message is serialized
+"""
+
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+# Entity type names -> the one tuple of them every message with those types shares
+_entity_types: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+def entity_dict(entity) -> Dict:
+    """JSON form of an extracted entity, whether an ExtractedEntity or already a dict"""
+    return entity if isinstance(entity, dict) else entity.to_dict()
+
+def entity_value(entity) -> str:
+    """Value of an extracted entity, whether an ExtractedEntity or already a dict"""
+    return entity["value"] if isinstance(entity, dict) else entity.value
+
+@dataclass(slots=True)
+class Message:
+    """Single message in conversation"""
+    role: str  # 'scammer' or 'victim'
+    content: str
+    created: float = field(default_factory=time.time)  # epoch seconds
+    scam_indicators: Tuple[str, ...] = ()
+    entity_types: Tuple[str, ...] = ()
+    entities: Tuple[tuple, ...] = ()  # entities found per entry of entity_types
+
+    @classmethod
+    def create(cls, role: str, content: str, scam_indicators: List[str] = None,
+               extracted_entities: Dict = None, created: float = None) -> "Message":
+        """
+        Message from add_message's arguments. extracted_entities maps entity
+        types (EntityType or its value) to ExtractedEntity objects, which are
+        kept as they are, or to their dicts; created defaults to now
+        """
+        types: Tuple[str, ...] = ()
+        entities: Tuple[tuple, ...] = ()
+        if extracted_entities:
+            types = tuple(getattr(entity_type, "value", entity_type) for entity_type in extracted_entities)
+            types = _entity_types.setdefault(types, types)
+            entities = tuple(tuple(found) for found in extracted_entities.values())
+        return cls(sys.intern(role), content, time.time() if created is None else created,
+                   tuple(scam_indicators or ()), types, entities)
+
+    @property
+    def timestamp(self) -> str:
+        """When the message was added, in ISO format"""
+        return datetime.fromtimestamp(self.created).isoformat()
+
+    @property
+    def extracted_entities(self) -> Dict[str, List[Dict]]:
+        """Entity type -> the entities found, as dicts"""
+        return {entity_type: [entity_dict(entity) for entity in found]
+                for entity_type, found in zip(self.entity_types, self.entities)}
+
+    def iter_entities(self):
+        """(entity type, entity) for every entity found, without building dicts"""
+        for entity_type, found in zip(self.entity_types, self.entities):
+            for entity in found:
+                yield entity_type, entity
+
+    def to_dict(self) -> dict:
+        return {
+            "role": self.role,
+            "content": self.content,
+            "timestamp": self.timestamp,
+            "scam_indicators": list(self.scam_indicators),
+            "extracted_entities": self.extracted_entities
+        }
@@ -0,0 +1,350 @@
+"""
+N-gram Classifier - Hashed character/word n-gram logistic regression scored with NumPy
+Catches paraphrased scams that no pattern rule covers. The model is trained offline
+from exported conversations (MemoryStore.export_to_dict) and stored as a small .npz file.
+
+Train: python -m src.ngram_classifier exports/*.json --out models/ngram_classifier.npz
+Requires NumPy (pip install numpy); detection runs without this tier when it is missing.
+"""
+
+import argparse
+import json
+import logging
+import re
+import time
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.text_normalization import normalize_text
+
+# Imported on first use, so a disabled tier adds nothing to startup
+np = None
+
+logger = logging.getLogger(__name__)
+
+MODEL_FORMAT = 1
+
+_WORD = re.compile(r'\w+')
+_DIGIT = re.compile(r'\d')
+_SPACE = re.compile(r'\s+')
+
+# Rolling and finalizing constants for 32-bit hashing (FNV prime, murmur3 fmix32);
+# NumPy uint32 arithmetic wraps, so whole feature arrays are hashed at once
+_PRIME = 0x01000193
+_CHAR_SALT = 0x9E3779B9
+_WORD_SALT = 0x7F4A7C15
+_BIGRAM_SALT = 0x2545F491
+
+def _load_numpy() -> bool:
+    """Import NumPy into the module namespace; False when it is not installed"""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
+
+def _fmix(h: "np.ndarray") -> "np.ndarray":
+    h ^= h >> 16
+    h *= 0x85EBCA6B
+    h ^= h >> 13
+    h *= 0xC2B2AE35
+    h ^= h >> 16
+    return h
+
+def _normalize(text: str) -> str:
+    """Lowercase, digits masked, whitespace collapsed and padded, so amounts and numbers share features"""
+    return " " + _SPACE.sub(" ", _DIGIT.sub("0", text.lower())).strip() + " "
+
+def _sigmoid(margin: "np.ndarray") -> "np.ndarray":
+    return 1.0 / (1.0 + np.exp(-np.clip(margin, -30.0, 30.0)))
+
+class HashedNgramClassifier:
+    """
+    Logistic regression over signed, hashed n-gram features.
+
+    Each text becomes a sparse vector of character n-grams (spanning word
+    boundaries) plus word unigrams and bigrams, hashed into 2**feature_bits
+    buckets with a hash-derived sign so collisions cancel out instead of
+    piling up, and scaled by 1/sqrt(n-gram count). The featurizer works on a whole batch
+    at once: character n-grams are rolling hashes over one concatenated
+    byte array, and scores are per-row sums of weight * value gathered with
+    np.bincount, so a batch costs a handful of NumPy calls regardless of
+    its size.
+    """
+
+    def __init__(self, feature_bits: int = 18, char_ngrams: Tuple[int, int] = (3, 5),
+                 threshold: float = 0.5, weights: "np.ndarray" = None, bias: float = 0.0,
+                 metadata: Dict[str, Any] = None):
+        """
+        Initialize classifier
+
+        Args:
+            feature_bits: log2 of the hashed feature space
+            char_ngrams: Smallest and largest character n-gram length
+            threshold: Probability at and above which a message is a scam
+            weights: Trained weights; zeros (untrained) when None
+            bias: Trained intercept
+            metadata: Training details kept with the model file
+        """
+        if not _load_numpy():
+            raise ImportError("HashedNgramClassifier requires NumPy (pip install numpy)")
+        self.feature_bits = feature_bits
+        self.n_features = 1 << feature_bits
+        self.char_ngrams = (int(char_ngrams[0]), int(char_ngrams[1]))
+        self.threshold = threshold
+        self.weights = np.zeros(self.n_features, dtype=np.float32) if weights is None else weights
+        self.bias = float(bias)
+        self.metadata = metadata or {}
+
+    def featurize(self, texts: Sequence[str]) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """
+        Hashed features of a batch of texts
+
+        Returns:
+            (rows, indices, values): one entry per n-gram; rows index into texts
+        """
+        count = len(texts)
+        normalized = [_normalize(text) for text in texts]
+        encoded = [text.encode("utf-8") for text in normalized]
+        lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=count)
+        total = int(lengths.sum())
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8).astype(np.uint32)
+        row_of = np.repeat(np.arange(count, dtype=np.int64), lengths)
+        # Bytes left in its own text from each position
+        room = np.repeat(np.cumsum(lengths), lengths) - np.arange(total, dtype=np.int64)
+
+        keys = []
+        rows = []
+        # After step n, rolling[i] hashes data[i:i + n]; grams running into the next text are dropped
+        smallest, largest = self.char_ngrams
+        rolling = np.full(total, _CHAR_SALT, dtype=np.uint32)
+        for n in range(1, largest + 1):
+            size = total - n + 1
+            if size <= 0:
+                break
+            rolling = rolling[:size] * _PRIME
+            rolling ^= data[n - 1:]
+            if n >= smallest:
+                inside = room[:size] >= n
+                keys.append(rolling[inside] ^ n)
+                rows.append(row_of[:size][inside])
+
+        # Word unigrams and bigrams, from per-word CRC32s
+        words = [[zlib.crc32(word.encode("utf-8")) for word in _WORD.findall(text)] for text in normalized]
+        word_counts = np.fromiter(map(len, words), dtype=np.int64, count=count)
+        word_hashes = np.fromiter((h for text in words for h in text), dtype=np.uint32, count=int(word_counts.sum()))
+        word_rows = np.repeat(np.arange(count, dtype=np.int64), word_counts)
+        keys.append(word_hashes ^ _WORD_SALT)
+        rows.append(word_rows)
+        same_text = word_rows[:-1] == word_rows[1:]
+        bigrams = word_hashes[:-1] * _PRIME
+        bigrams ^= word_hashes[1:]
+        keys.append(bigrams[same_text] ^ _BIGRAM_SALT)
+        rows.append(word_rows[:-1][same_text])
+
+        keys = _fmix(np.concatenate(keys))
+        rows = np.concatenate(rows)
+        # Repeated grams stay separate entries, which the bincount sums add up; scaling by
+        # 1/sqrt(grams) stands in for L2 normalization without a sort to merge them
+        grams = np.bincount(rows, minlength=count)
+        values = np.where(keys >> 31, -1.0, 1.0) / np.sqrt(np.maximum(grams, 1))[rows]
+        return rows, (keys & (self.n_features - 1)).astype(np.intp), values
+
+    def predict_proba(self, texts: Sequence[str]) -> "np.ndarray":
+        """Scam probability of every text, scored in one vectorized pass"""
+        if len(texts) == 0:
+            return np.zeros(0)
+        rows, indices, values = self.featurize(texts)
+        margin = np.bincount(rows, weights=self.weights[indices] * values, minlength=len(texts))
+        return _sigmoid(margin + self.bias)
+
+    def score(self, text: str) -> float:
+        """Scam probability of a single text"""
+        return float(self.predict_proba([text])[0])
+
+    def fit(self, texts: Sequence[str], labels: Sequence[bool], epochs: int = 10,
+            learning_rate: float = 0.5, l2: float = 1e-5, batch_size: int = 128,
+            balanced: bool = True, seed: int = 0) -> "HashedNgramClassifier":
+        """
+        Train with mini-batch AdaGrad on the logistic loss
+
+        Args:
+            texts: Training messages
+            labels: True for scam messages
+            epochs: Passes over the data
+            learning_rate: AdaGrad step size
+            l2: L2 penalty, applied lazily to the features of each batch
+            batch_size: Messages per update
+            balanced: Weight both classes equally, whatever their counts
+            seed: Shuffling seed
+
+        Returns:
+            self
+        """
+        started = time.perf_counter()
+        count = len(texts)
+        y = np.asarray(labels, dtype=np.float64)
+        if count == 0 or y.min() == y.max():
+            raise ValueError("Training needs both scam and benign messages")
+        rows, indices, values = self.featurize(texts)
+        by_row = np.argsort(rows, kind="stable")
+        rows, indices, values = rows[by_row], indices[by_row], values[by_row]
+        indptr = np.searchsorted(rows, np.arange(count + 1))
+        positives = y.sum()
+        sample_weight = (np.where(y > 0, count / (2 * positives), count / (2 * (count - positives)))
+                         if balanced else np.ones(count))
+
+        weights = self.weights.astype(np.float64)
+        squared = np.full(self.n_features, 1e-8)
+        bias, bias_squared = self.bias, 1e-8
+        rng = np.random.default_rng(seed)
+        for _ in range(epochs):
+            order = rng.permutation(count)
+            for batch in np.array_split(order, max(1, -(-count // batch_size))):
+                # Gather the batch's slice of the CSR arrays without a Python loop
+                starts = indptr[batch]
+                lengths = indptr[batch + 1] - starts
+                offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+                picked = offsets + np.arange(int(lengths.sum()))
+                local = np.repeat(np.arange(len(batch)), lengths)
+                batch_indices = indices[picked]
+                batch_values = values[picked]
+
+                margin = np.bincount(local, weights=weights[batch_indices] * batch_values,
+                                     minlength=len(batch)) + bias
+                error = (_sigmoid(margin) - y[batch]) * sample_weight[batch]
+                active, slot = np.unique(batch_indices, return_inverse=True)
+                gradient = np.bincount(slot, weights=error[local] * batch_values) / len(batch)
+                gradient += l2 * weights[active]
+                squared[active] += gradient * gradient
+                weights[active] -= learning_rate * gradient / np.sqrt(squared[active])
+                bias_gradient = error.mean()
+                bias_squared += bias_gradient * bias_gradient
+                bias -= learning_rate * bias_gradient / np.sqrt(bias_squared)
+
+        self.weights = weights.astype(np.float32)
+        self.bias = float(bias)
+        self.metadata = {
+            "trained_at": datetime.now().isoformat(),
+            "samples": count,
+            "scam_samples": int(positives),
+            "epochs": epochs,
+            "train_seconds": round(time.perf_counter() - started, 3)
+        }
+        return self
+
+    def save(self, path: str):
+        """Write the model as an uncompressed .npz"""
+        meta = {
+            "format": MODEL_FORMAT,
+            "feature_bits": self.feature_bits,
+            "char_ngrams": list(self.char_ngrams),
+            "threshold": self.threshold,
+            "bias": self.bias,
+            **self.metadata
+        }
+        with open(path, "wb") as f:
+            np.savez(f, weights=self.weights, meta=np.array(json.dumps(meta)))
+
+    @classmethod
+    def load(cls, path: str) -> "HashedNgramClassifier":
+        """
+        Read a model written by save()
+
+        Raises:
+            ValueError: The file is not a model of a supported format
+        """
+        if not _load_numpy():
+            raise ImportError("HashedNgramClassifier requires NumPy (pip install numpy)")
+        with np.load(path, allow_pickle=False) as archive:
+            meta = json.loads(str(archive["meta"]))
+            weights = archive["weights"]
+        if meta.pop("format", None) != MODEL_FORMAT or len(weights) != 1 << meta["feature_bits"]:
+            raise ValueError(f"{path} is not a format {MODEL_FORMAT} n-gram model")
+        return cls(
+            feature_bits=meta.pop("feature_bits"),
+            char_ngrams=tuple(meta.pop("char_ngrams")),
+            threshold=meta.pop("threshold"),
+            weights=weights,
+            bias=meta.pop("bias"),
+            metadata=meta
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "feature_bits": self.feature_bits,
+            "char_ngrams": list(self.char_ngrams),
+            "threshold": self.threshold,
+            "nonzero_weights": int(np.count_nonzero(self.weights)),
+            **self.metadata
+        }
+
+def load_classifier(path: Optional[str]) -> Optional[HashedNgramClassifier]:
+    """Load the model at path for the detection engine; None (tier off) when unset or unusable"""
+    if not path:
+        return None
+    if not _load_numpy():
+        logger.warning(f"N-gram model {path} configured but NumPy is not installed; tier disabled")
+        return None
+    started = time.perf_counter()
+    try:
+        classifier = HashedNgramClassifier.load(path)
+    except (OSError, ValueError, KeyError) as e:
+        logger.error(f"N-gram model not loaded, tier disabled: {e}")
+        return None
+    logger.info(f"Loaded n-gram model {path} in {(time.perf_counter() - started) * 1000:.1f}ms")
+    return classifier
+
+def samples_from_exports(exports: Iterable[Dict[str, Any]]) -> Tuple[List[str], List[bool]]:
+    """
+    Training messages from exported conversations
+
+    Every scammer-side message is labelled with its conversation's verdict
+    (current_state.scam_detected); victim replies are the honeypot's own text
+    and are skipped. Texts are normalized the way the engine normalizes what
+    it scores.
+    """
+    texts, labels = [], []
+    for export in exports:
+        label = bool(export.get("current_state", {}).get("scam_detected"))
+        for message in export.get("message_history", []):
+            if message.get("role") == "scammer" and message.get("content", "").strip():
+                texts.append(normalize_text(message["content"]))
+                labels.append(label)
+    return texts, labels
+
+def _read_exports(paths: List[str]) -> List[Dict[str, Any]]:
+    """Exports from JSON files holding one export or a list of them, or JSONL"""
+    exports = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                exports.extend(json.loads(line) for line in f if line.strip())
+                continue
+            data = json.load(f)
+        exports.extend(data if isinstance(data, list) else [data])
+    return exports
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the n-gram scam classifier from exported conversations")
+    parser.add_argument("exports", nargs="+", help="JSON/JSONL files of MemoryStore.export_to_dict() output")
+    parser.add_argument("--out", required=True, help="Model file to write (.npz)")
+    parser.add_argument("--feature-bits", type=int, default=18)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=0.5)
+    args = parser.parse_args()
+
+    texts, labels = samples_from_exports(_read_exports(args.exports))
+    classifier = HashedNgramClassifier(feature_bits=args.feature_bits, threshold=args.threshold)
+    classifier.fit(texts, labels, epochs=args.epochs)
+    classifier.save(args.out)
+    accuracy = float(np.mean((classifier.predict_proba(texts) >= args.threshold) == np.asarray(labels)))
+    print(f"Trained on {len(texts)} messages ({sum(labels)} scam), training accuracy {accuracy:.1%}")
+    print(f"Model written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Offload - Pre-warmed process pool for detection and extraction on long messages
+Regex, sentiment and entity extraction on a long message hold the GIL for milliseconds;
+scoring such messages in worker processes keeps a threaded server's other requests moving
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+# Per-worker state, built once by the pool initializer
+_engine = None
+_extractor = None
+
+def in_worker_process() -> bool:
+    """
+    Whether this is a spawned child process rather than the server
+
+    Spawn re-imports the parent's __main__ module in every child, as
+    __mp_main__, so a server started with `python -m src.api` runs its
+    module-level startup again in each worker. The process name is set
+    before that import; multiprocessing.parent_process() is not.
+    """
+    return multiprocessing.current_process().name != "MainProcess"
+
+def _init_worker(rule_pack_path: Optional[str], engine_options: Dict[str, Any], profile_rules: bool = False):
+    """Build the worker's engine and extractor; rules compile here, not on the first task"""
+    global _engine, _extractor
+    from src.scam_detector import ScamDetectionEngine
+    from src.intelligence_extractor import IntelligenceExtractor
+    from src.rule_profiler import RuleProfiler
+    _engine = ScamDetectionEngine(rule_pack_path=rule_pack_path,
+                                  rule_profiler=RuleProfiler() if profile_rules else None, **engine_options)
+    _extractor = IntelligenceExtractor()
+
+def _warm_up() -> int:
+    """Run every tier once (lexicon load, first-call overhead) and report the worker pid"""
+    sample = "URGENT: your account will be blocked, verify UPI at support@ybl or call 9876543210"
+    _engine.detect(sample)
+    _extractor.extract(sample)
+    _counts()  # The sample is not traffic
+    return os.getpid()
+
+def _counts() -> Dict[str, Any]:
+    """Tier and rule counters recorded since the last task, zeroed here, for the parent to merge"""
+    profiler = _engine.rule_profiler
+    return {"tiers": _engine.take_tier_counts(), "rules": profiler.take() if profiler is not None else None}
+
+def _use_rules(rules_source: str, rules_digest: str):
+    """Switch to the parent's rule pack when it was reloaded since this worker last saw it"""
+    if _engine.rules.digest != rules_digest:
+        _engine.reload_rules(rules_source)
+
+def _detect(text: str, rules_source: str, rules_digest: str) -> tuple:
+    """(ScamDetectionResult, within_budget, counters) under the same rule pack as the parent"""
+    from src.message_analysis import AnalyzedMessage
+    _use_rules(rules_source, rules_digest)
+    return _engine._detect_uncached(AnalyzedMessage(text), _engine.rules) + (_counts(),)
+
+def _detect_many(texts: List[str], ngram_scores: List[Optional[float]], rules_source: str,
+                 rules_digest: str) -> tuple:
+    """
+    ([(ScamDetectionResult, within_budget)], counters) for a slice of a batch,
+    with the classifier scores the parent computed
+    """
+    from src.message_analysis import AnalyzedMessage
+    _use_rules(rules_source, rules_digest)
+    return [_engine._detect_uncached(AnalyzedMessage(text), _engine.rules, score)
+            for text, score in zip(texts, ngram_scores)], _counts()
+
+def _extract(text: str, conversation_history: Optional[List[str]],
+             mention_counts: Optional[Dict[str, int]] = None) -> dict:
+    return _extractor.extract(text, conversation_history, mention_counts)
+
+class ProcessOffloader:
+    """
+    Process pool that detection and extraction hand long messages to.
+
+    Workers are started with the spawn method (forking a threaded server is
+    unsafe) and each builds its own ScamDetectionEngine from the parent's
+    rule pack and options in the pool initializer, then scores a sample
+    message, so no request pays for compiling rules or loading the
+    sentiment lexicon. Only the uncached tiers run in a worker: the parent
+    keeps its result cache, campaign index and conversation state. Tasks
+    carry the rule pack digest, and a worker on an older pack reloads
+    before scoring, so a reload in the parent reaches the pool as well.
+    Each detection also returns the tier counters (and, with profile_rules,
+    the rule profiler's) the worker recorded for it, for the parent engine
+    to merge into its own stats.
+    """
+
+    def __init__(self, min_chars: int = 2000, workers: int = None, rule_pack_path: str = None,
+                 engine_options: Dict[str, Any] = None, profile_rules: bool = False):
+        """
+        Initialize offloader; no process starts until warm_up() or the first task
+
+        Args:
+            min_chars: Messages at least this long are offloaded
+            workers: Worker processes; one per CPU when None
+            rule_pack_path: Rule pack the workers load; the bundled default when None
+            engine_options: Extra ScamDetectionEngine arguments for the workers
+                (cpu_budget_ms, early_exit, classifier)
+            profile_rules: Workers profile their rules too, as the parent's RuleProfiler does
+        """
+        self.min_chars = min_chars
+        self.workers = workers or os.cpu_count() or 1
+        self.rule_pack_path = rule_pack_path
+        self.engine_options = engine_options or {}
+        self.profile_rules = profile_rules
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.restarts = 0
+        self._stats = {
+            "detect": {"tasks": 0, "seconds": 0.0},
+            "extract": {"tasks": 0, "seconds": 0.0}
+        }
+
+    def should_offload(self, text: str) -> bool:
+        return len(text) >= self.min_chars
+
+    def warm_up(self, wait_seconds: Optional[float] = None) -> List[Future]:
+        """
+        Start every worker and run its warm-up task
+
+        Does nothing inside a spawned child, so a server module re-imported
+        there never starts a pool of its own.
+
+        Args:
+            wait_seconds: Block until the workers are warm, at most this long (optional)
+        """
+        if in_worker_process():
+            return []
+        pool = self._get_pool()
+        # Each submission to a pool without idle workers starts one more process
+        futures = [pool.submit(_warm_up) for _ in range(self.workers)]
+        if wait_seconds:
+            wait(futures, timeout=wait_seconds)
+        return futures
+
+    def submit_detect(self, text: str, rules) -> Future:
+        """Score text under rules (a RulePack) in a worker; resolves to (result, within_budget, counters)"""
+        return self._submit("detect", _detect, text, rules.source, rules.digest)
+
+    def submit_detect_batch(self, texts: List[str], rules, ngram_scores: List[Optional[float]]) -> List[Future]:
+        """
+        Score texts under rules in one slice per worker, whatever their length
+
+        Returns:
+            Futures in slice order, each resolving to ((result, within_budget) pairs in input
+            order, counters)
+        """
+        size = -(-len(texts) // self.workers)
+        return [self._submit("detect", _detect_many, texts[start:start + size], ngram_scores[start:start + size],
+                             rules.source, rules.digest)
+                for start in range(0, len(texts), size)]
+
+    def submit_extract(self, text: str, conversation_history: List[str] = None,
+                       mention_counts: Dict[str, int] = None) -> Future:
+        """Extract entities from text in a worker; resolves to IntelligenceExtractor.extract()'s dict"""
+        return self._submit("extract", _extract, text, conversation_history, mention_counts)
+
+    def _submit(self, kind: str, fn, *args) -> Future:
+        started = time.perf_counter()
+        pool = self._get_pool()
+        try:
+            future = pool.submit(fn, *args)
+        except BrokenExecutor:
+            # A worker died since the last task; retry once on a fresh pool
+            self._discard(pool)
+            pool = self._get_pool()
+            future = pool.submit(fn, *args)
+
+        def record(done: Future):
+            if not done.cancelled() and isinstance(done.exception(), BrokenExecutor):
+                self._discard(pool)
+                return
+            with self._lock:
+                self._stats[kind]["tasks"] += 1
+                self._stats[kind]["seconds"] += time.perf_counter() - started
+        future.add_done_callback(record)
+        return future
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.rule_pack_path, self.engine_options, self.profile_rules)
+                )
+            return self._pool
+
+    def _discard(self, pool: ProcessPoolExecutor):
+        """Drop a broken pool so the next task starts a new one"""
+        with self._lock:
+            if self._pool is not pool:
+                return
+            self._pool = None
+            self.restarts += 1
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        """Stop the workers; the next task starts a fresh pool"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Task counts and mean round-trip time per kind"""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "min_chars": self.min_chars,
+                "started": self._pool is not None,
+                "restarts": self.restarts,
+                **{
+                    kind: {
+                        "tasks": stats["tasks"],
+                        "avg_ms": round(stats["seconds"] / stats["tasks"] * 1000, 3) if stats["tasks"] else 0.0
+                    }
+                    for kind, stats in self._stats.items()
+                }
+            }
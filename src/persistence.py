@@ -0,0 +1,382 @@
+"""
+Persistence - Conversations, messages and intelligence written behind to SQLite
+Requests only queue references to what changed; a background writer serializes them and
+commits them in batched transactions to a database in WAL mode, so no request waits on disk
+and a crash loses at most what was queued since the last flush. Rows of conversations idle
+longer than the retention period are pruned by the same writer
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    conversation_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL,  -- epoch seconds
+    snapshot TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS conversations_updated ON conversations (updated_at);
+CREATE TABLE IF NOT EXISTS messages (
+    conversation_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created REAL NOT NULL,
+    scam_indicators TEXT NOT NULL,
+    extracted_entities TEXT NOT NULL,
+    PRIMARY KEY (conversation_id, seq)
+);
+CREATE TABLE IF NOT EXISTS intelligence (
+    conversation_id TEXT NOT NULL,
+    entity_type TEXT NOT NULL,
+    entity_key TEXT NOT NULL,
+    record TEXT NOT NULL,
+    PRIMARY KEY (conversation_id, entity_type, entity_key)
+);
+"""
+
+# Queued operations: (kind, conversation_id, payload...)
+_SAVE = "save"        # (memory, fresh): upsert the snapshot; fresh clears the id's older rows first
+_MESSAGE = "message"  # (memory, seq, message)
+_RECORD = "record"    # (memory, entity_type, key, record)
+_DELETE = "delete"    # (): remove the conversation and its rows
+
+PRUNE_INTERVAL_SECONDS = 60.0  # How often the writer looks for expired conversations
+
+class ConversationPersistence:
+    """
+    SQLite store conversations are written behind to.
+
+    Memory stores call save_conversation, save_message and save_record as
+    they change; each call only appends a reference to a queue. A writer
+    thread wakes every flush_interval_seconds, or as soon as batch_size
+    operations are waiting, and commits everything queued in one
+    transaction: snapshots and intelligence records are serialized at
+    that point, under the conversation's lock, so a burst of updates to
+    one conversation is written once. The database runs in WAL mode with
+    synchronous=NORMAL, so commits do not wait for fsync and reads
+    (restoring at startup, reloading an evicted conversation) never block
+    the writer. Loss on a crash is bounded by what was queued since the
+    last flush; past max_queue operations new ones are dropped and
+    counted rather than letting the queue grow without bound. With
+    retention_seconds, the writer also
+    deletes conversations last updated longer ago than that, with their
+    messages and intelligence, so the database holds what could still be
+    resumed rather than every conversation ever seen; without it, rows
+    stay until the conversation is deleted.
+    """
+
+    def __init__(self, path: str, flush_interval_seconds: float = 0.5, batch_size: int = 500,
+                 max_queue: int = 100000, retention_seconds: float = 0):
+        """
+        Open (creating if needed) the database at path and start the writer
+
+        Args:
+            path: SQLite database file
+            flush_interval_seconds: Longest an operation waits in the queue
+            batch_size: Queued operations that wake the writer early
+            max_queue: Queued operations past which new ones are dropped
+            retention_seconds: Idle time after which a conversation's rows are pruned (0: never)
+        """
+        self.path = path
+        self.flush_interval_seconds = flush_interval_seconds
+        self.batch_size = batch_size
+        self.max_queue = max_queue
+        self.retention_seconds = retention_seconds
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        # Reads on the request path (a conversation coming back after eviction)
+        self._reader = sqlite3.connect(path, check_same_thread=False)
+        self._read_lock = threading.Lock()
+        self._queue: deque = deque()
+        # conversation_id -> memory its latest queued operation came from (None: a delete),
+        # for operations still queued and for those in the flush under way
+        self._pending: Dict[str, Any] = {}
+        self._writing: Dict[str, Any] = {}
+        self._queue_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.pruned = 0
+        self._last_prune = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="conversation-writer", daemon=True)
+        self._thread.start()
+
+    # ---- request path: queue references only ----
+
+    def save_conversation(self, memory, fresh: bool = False):
+        """Queue memory's snapshot; fresh marks a new conversation replacing any saved under its id"""
+        self._enqueue((_SAVE, memory.conversation_id, memory, fresh))
+
+    def save_message(self, memory, seq: int, message):
+        """Queue message as the seq-th of memory's history"""
+        self._enqueue((_MESSAGE, memory.conversation_id, memory, seq, message))
+
+    def save_record(self, memory, entity_type: str, key: str, record: Dict):
+        """Queue an intelligence record of memory under its canonical key"""
+        self._enqueue((_RECORD, memory.conversation_id, memory, entity_type, key, record))
+
+    def delete_conversation(self, conversation_id: str):
+        """Queue removal of a conversation and everything saved with it"""
+        self._enqueue((_DELETE, conversation_id))
+
+    def _enqueue(self, operation: tuple):
+        with self._queue_lock:
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                return
+            self._queue.append(operation)
+            self._pending[operation[1]] = operation[2] if operation[0] != _DELETE else None
+            self.queued += 1
+            full = len(self._queue) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    # ---- writer ----
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+                if self.retention_seconds and time.time() - self._last_prune >= PRUNE_INTERVAL_SECONDS:
+                    self._last_prune = time.time()
+                    self.prune(self._last_prune - self.retention_seconds)
+            except Exception as e:
+                logger.error(f"Conversation write-behind failed: {e}")
+
+    def flush(self) -> int:
+        """Commit everything queued so far; returns how many operations were written"""
+        with self._write_lock:
+            with self._queue_lock:
+                operations, self._queue = self._queue, deque()
+                self._writing, self._pending = self._pending, {}
+            if not operations:
+                return 0
+            started = time.perf_counter()
+            self._conn.execute("BEGIN")
+            try:
+                self._write(operations)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            finally:
+                with self._queue_lock:
+                    self._writing = {}
+            self.written += len(operations)
+            self.flushes += 1
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 3)
+            return len(operations)
+
+    def _write(self, operations: deque):
+        """Apply operations in queue order (inside the flush transaction), then the snapshots they touched"""
+        execute = self._conn.execute
+        touched: Dict[str, Any] = {}  # conversation_id -> memory whose snapshot is written last
+        saved = set()  # Records already written this flush, by object
+        message_rows: List[tuple] = []  # Inserted together, before any delete that follows them
+        for operation in operations:
+            kind, conversation_id = operation[0], operation[1]
+            if kind == _MESSAGE:
+                _, _, memory, seq, message = operation
+                touched[conversation_id] = memory
+                message_rows.append((
+                    conversation_id, seq, message.role, message.content, message.created,
+                    json.dumps(list(message.scam_indicators)), json.dumps(message.extracted_entities, default=str)
+                ))
+            elif kind == _RECORD:
+                _, _, memory, entity_type, key, record = operation
+                touched[conversation_id] = memory
+                if id(record) in saved:
+                    continue
+                saved.add(id(record))
+                with memory.lock:
+                    serialized = json.dumps(record, default=str)
+                # An upsert keeps the rowid, and with it the order records were first found in
+                execute("INSERT INTO intelligence VALUES (?, ?, ?, ?) ON CONFLICT "
+                        "(conversation_id, entity_type, entity_key) DO UPDATE SET record = excluded.record",
+                        (conversation_id, entity_type, key, serialized))
+            elif kind == _SAVE:
+                _, _, memory, fresh = operation
+                if fresh:
+                    self._insert_messages(message_rows)
+                    self._delete(conversation_id)
+                touched[conversation_id] = memory
+            elif kind == _DELETE:
+                touched.pop(conversation_id, None)
+                self._insert_messages(message_rows)
+                self._delete(conversation_id)
+        self._insert_messages(message_rows)
+        # One snapshot per conversation, so its updated_at covers the messages and records above
+        for conversation_id, memory in touched.items():
+            with memory.lock:
+                snapshot = memory.snapshot()
+            execute("INSERT OR REPLACE INTO conversations VALUES (?, ?, ?)",
+                    (conversation_id, snapshot["updated_at"], json.dumps(snapshot, default=str)))
+
+    def _insert_messages(self, rows: List[tuple]):
+        if rows:
+            self._conn.executemany("INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            rows.clear()
+
+    def _delete(self, conversation_id: str):
+        for table in ("conversations", "messages", "intelligence"):
+            self._conn.execute(f"DELETE FROM {table} WHERE conversation_id = ?", (conversation_id,))
+
+    def prune(self, before: float) -> int:
+        """Delete conversations last updated before the given epoch time, with their rows; returns how many"""
+        with self._write_lock:
+            self._conn.execute("BEGIN")
+            try:
+                for table in ("messages", "intelligence"):
+                    self._conn.execute(
+                        f"DELETE FROM {table} WHERE conversation_id IN "
+                        "(SELECT conversation_id FROM conversations WHERE updated_at < ?)", (before,)
+                    )
+                pruned = self._conn.execute("DELETE FROM conversations WHERE updated_at < ?", (before,)).rowcount
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self.pruned += pruned
+            return pruned
+
+    # ---- reads ----
+
+    def queued_conversation(self, conversation_id: str) -> Tuple[bool, Optional[Tuple[Dict, List, List]]]:
+        """
+        Whether the id has operations not yet committed, and if so the
+        conversation as they will leave it, as load_conversation returns it
+        (None when the latest deletes it). The memory they were queued from
+        holds everything the rows are about to, so a conversation evicted
+        before its writes landed comes back from it, through the same JSON
+        round trip as the database, rather than from rows that are behind.
+        Never touches the database
+        """
+        with self._queue_lock:
+            for operations in (self._pending, self._writing):
+                if conversation_id in operations:
+                    memory = operations[conversation_id]
+                    break
+            else:
+                return False, None
+        if memory is None:
+            return True, None
+        return True, json.loads(json.dumps(memory.saved(), default=str))
+
+    def load_conversation(self, conversation_id: str,
+                          since: float = 0.0) -> Optional[Tuple[Dict, List[tuple], List[tuple]]]:
+        """
+        (snapshot, messages, records) of one conversation, as load() yields
+        them, or None when it is not saved or was last updated before since.
+        Reads committed rows only: check queued_conversation first
+        """
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT snapshot FROM conversations WHERE conversation_id = ? AND updated_at >= ?",
+                (conversation_id, since)
+            ).fetchone()
+            if row is None:
+                return None
+            return (json.loads(row[0]),) + self._history(self._reader, conversation_id)
+
+    @staticmethod
+    def _history(reader: sqlite3.Connection, conversation_id: str) -> Tuple[List[tuple], List[tuple]]:
+        """(messages, records) saved for conversation_id"""
+        messages = [
+            (role, content, created, json.loads(indicators), json.loads(entities))
+            for role, content, created, indicators, entities in reader.execute(
+                "SELECT role, content, created, scam_indicators, extracted_entities FROM messages "
+                "WHERE conversation_id = ? ORDER BY seq", (conversation_id,)
+            )
+        ]
+        records = [
+            (entity_type, key, json.loads(record))
+            for entity_type, key, record in reader.execute(
+                "SELECT entity_type, entity_key, record FROM intelligence WHERE conversation_id = ? "
+                "ORDER BY rowid", (conversation_id,)
+            )
+        ]
+        return messages, records
+
+    def load(self, since: float = 0.0, limit: int = -1) -> Iterator[Tuple[Dict, List[tuple], List[tuple]]]:
+        """
+        (snapshot, messages, records) of conversations updated since the
+        given epoch time, least recently updated first, at most limit of the
+        most recent; messages are (role, content, created, scam_indicators,
+        extracted_entities) in order, records are (entity_type, key, record).
+        Reads through its own connection, alongside the writer
+        """
+        reader = sqlite3.connect(self.path)
+        try:
+            rows = reader.execute(
+                "SELECT conversation_id, snapshot FROM (SELECT * FROM conversations WHERE updated_at >= ? "
+                "ORDER BY updated_at DESC LIMIT ?) ORDER BY updated_at", (since, limit)
+            ).fetchall()
+            for conversation_id, snapshot in rows:
+                yield (json.loads(snapshot),) + self._history(reader, conversation_id)
+        finally:
+            reader.close()
+
+    def close(self):
+        """Stop the writer, commit what is still queued and close the database"""
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        self._conn.close()
+        self._reader.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for health and statistics endpoints"""
+        return {
+            "path": self.path,
+            "pending": len(self._queue),
+            "queued": self.queued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "last_flush_ms": self.last_flush_ms,
+            "flush_interval_seconds": self.flush_interval_seconds,
+            "pruned": self.pruned,
+            "retention_seconds": self.retention_seconds
+        }
+
+def load_persistence(url: Optional[str], flush_interval_seconds: float = 0.5, batch_size: int = 500,
+                     max_queue: int = 100000, retention_seconds: float = 0) -> Optional[ConversationPersistence]:
+    """Open the sqlite:/// database at url for write-behind; None (memory only) when unset or unusable"""
+    if not url:
+        return None
+    if not url.startswith("sqlite:///") or url == "sqlite:///:memory:":
+        logger.error(f"Conversations will not be persisted: {url} is not a sqlite:/// file URL")
+        return None
+    try:
+        persistence = ConversationPersistence(url[len("sqlite:///"):], flush_interval_seconds, batch_size, max_queue,
+                                              retention_seconds)
+    except (OSError, sqlite3.Error) as e:
+        logger.error(f"Conversations will not be persisted: {e}")
+        return None
+    logger.info(f"Persisting conversations to {persistence.path} (WAL, write-behind every "
+                f"{flush_interval_seconds}s)")
+    return persistence
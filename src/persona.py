@@ -4,10 +4,12 @@ Persona Engine - Realistic human persona simulation
 
 from dataclasses import dataclass, asdict
 from enum import Enum
-from typing import Optional
+from typing import Optional, Union
 import random
 import time
 
+from src.message_analysis import AnalyzedMessage
+
 class LanguageStyle(Enum):
     """Language style profiles"""
     FORMAL_ENGLISH = "formal_english"
@@ -193,21 +195,21 @@ class PersonaEngine:
         total_delay = base_delay * fatigue_factor * emotional_factor * randomness
         return total_delay
     
-    def update_emotional_state(self, scammer_message: str, extracted_entities: dict):
+    def update_emotional_state(self, scammer_message: Union[str, AnalyzedMessage], extracted_entities: dict):
         """Update emotional state based on scammer interaction"""
-        message_lower = scammer_message.lower()
+        message = AnalyzedMessage.of(scammer_message)
         
         # Fear triggers
-        if any(word in message_lower for word in ["blocked", "locked", "suspended", "urgent"]):
+        if message.contains_any(["blocked", "locked", "suspended", "urgent"]):
             self.persona.emotional_state = EmotionalState.FEARFUL
             self.persona.trust_level = min(self.persona.trust_level + 0.1, 1.0)
         
         # Confusion triggers
-        elif any(word in message_lower for word in ["verify", "authenticate", "confirm", "download"]):
+        elif message.contains_any(["verify", "authenticate", "confirm", "download"]):
             self.persona.emotional_state = EmotionalState.CONFUSED
         
         # Excitement triggers (reward promises)
-        elif any(word in message_lower for word in ["won", "prize", "reward", "claim"]):
+        elif message.contains_any(["won", "prize", "reward", "claim"]):
             self.persona.emotional_state = EmotionalState.EXCITED
             self.persona.trust_level = min(self.persona.trust_level + 0.15, 1.0)
         
@@ -0,0 +1,411 @@
+"""
+Phishing Analysis - Risk scoring of links against an embedded public-suffix table and brand index
+A campaign sends the same handful of domains thousands of times; each registered domain is
+analyzed once and its verdict cached, so a repeated link costs a parse and a dictionary lookup
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+# Public suffixes a registered domain sits under: the ICANN suffixes scam links use, and the
+# hosting platforms where every customer gets their own subdomain. A suffix not listed is
+# its last label, as the public suffix list's default rule has it.
+PUBLIC_SUFFIXES: FrozenSet[str] = frozenset("""
+com net org info biz edu gov mil int io co ai app dev me tv cc ws us uk in au ca de fr nl ru
+cn jp br sg my pk bd np lk ae sa za ng ke
+xyz top online site club shop store live link click icu buzz vip win work support today
+tk ml ga cf gq pw cyou rest bar sbs cfd
+co.in net.in org.in gen.in firm.in ind.in gov.in nic.in ac.in edu.in res.in mil.in bank.in
+co.uk org.uk ac.uk gov.uk me.uk com.au net.au org.au co.jp com.br com.sg com.my com.pk
+com.bd com.np co.za com.ng co.ke com.cn ae.org
+github.io gitlab.io herokuapp.com vercel.app netlify.app web.app firebaseapp.com
+pages.dev workers.dev blogspot.com glitch.me repl.co ngrok.io ngrok-free.app
+000webhostapp.com weebly.com wixsite.com azurewebsites.net appspot.com onrender.com
+""".split())
+# Suffixes cheap or free enough that scams register most of their domains there
+RISKY_SUFFIXES: FrozenSet[str] = frozenset("""
+tk ml ga cf gq pw xyz top icu buzz click link cyou rest bar sbs cfd win work support
+""".split())
+# URL shorteners: the real destination is hidden from the victim
+SHORTENERS: FrozenSet[str] = frozenset("""
+bit.ly tinyurl.com short.link t.co goo.gl is.gd cutt.ly rb.gy ow.ly shorturl.at
+tiny.cc rebrand.ly bit.do s.id v.gd t.ly
+""".split())
+# Words that claim urgency or security in a host name
+BAIT_WORDS: FrozenSet[str] = frozenset("""
+secure security verify verification login signin logon update kyc account accounts banking
+netbanking support helpdesk reward rewards refund bonus alert confirm unlock blocked
+suspend suspended validate auth wallet customer service care claim
+""".split())
+
+# Brands scams impersonate and the domains they really use; a host on one of these
+# domains (or below it) is the brand itself
+BRAND_DOMAINS: Dict[str, Tuple[str, ...]] = {
+    "sbi": ("sbi.co.in", "onlinesbi.sbi", "onlinesbi.com", "sbi.bank.in", "sbicard.com"),
+    "hdfc": ("hdfcbank.com", "hdfc.com", "hdfcbank.bank.in"),
+    "icici": ("icicibank.com", "icici.bank.in"),
+    "axis": ("axisbank.com", "axis.bank.in"),
+    "kotak": ("kotak.com", "kotak.bank.in"),
+    "pnb": ("pnbindia.in", "netpnb.com"),
+    "bankofbaroda": ("bankofbaroda.in", "bankofbaroda.com"),
+    "canara": ("canarabank.com", "canarabank.in"),
+    "unionbank": ("unionbankofindia.co.in",),
+    "yesbank": ("yesbank.in",),
+    "indusind": ("indusind.com",),
+    "paytm": ("paytm.com", "paytmbank.com"),
+    "phonepe": ("phonepe.com",),
+    "npci": ("npci.org.in",),
+    "bhim": ("bhimupi.org.in",),
+    "rbi": ("rbi.org.in",),
+    "uidai": ("uidai.gov.in",),
+    "incometax": ("incometax.gov.in",),
+    "epfo": ("epfindia.gov.in",),
+    "irctc": ("irctc.co.in",),
+    "indiapost": ("indiapost.gov.in",),
+    "airtel": ("airtel.in", "airtel.com"),
+    "jio": ("jio.com",),
+    "flipkart": ("flipkart.com",),
+    "amazon": ("amazon.in", "amazon.com"),
+    "paypal": ("paypal.com", "paypal.me"),
+    "google": ("google.com", "google.co.in"),
+    "microsoft": ("microsoft.com", "live.com", "office.com"),
+    "apple": ("apple.com", "icloud.com"),
+    "whatsapp": ("whatsapp.com", "wa.me"),
+    "facebook": ("facebook.com", "fb.com"),
+    "instagram": ("instagram.com",),
+    "netflix": ("netflix.com",),
+}
+
+# Ordinary words a brand name is one edit away from
+NOT_LOOKALIKES: FrozenSet[str] = frozenset("apply ample kodak canary googly goggle".split())
+# Look-alike characters folded before brand names are compared
+_HOMOGLYPHS = str.maketrans("0134578$", "oleastbs")
+
+# Points each finding adds to risk_score, which is capped at 1.0
+RISK_WEIGHTS = {
+    "shortener": 0.3,
+    "bait_words": 0.3,
+    "risky_suffix": 0.2,
+    "brand_name": 0.4,
+    "brand_lookalike": 0.5,
+    "obfuscated": 0.3,
+}
+
+def _risk_score(reasons) -> float:
+    return round(min(sum((RISK_WEIGHTS[reason] for reason in reasons), 0.0), 1.0), 3)
+
+class LabelTrie:
+    """
+    Trie of domain names keyed by their labels in reverse ("in" -> "co" -> "sbi"), so the
+    walk for a host follows its labels from the top-level domain down and stops at the
+    first domain that owns it: an owned host and all its subdomains cost one step per label.
+    """
+
+    _OWNER = ""  # Labels are never empty, so this key cannot collide with a child
+
+    def __init__(self, owners: Dict[str, Tuple[str, ...]]):
+        """Build from owner -> the domains it owns"""
+        self._root: Dict[str, Any] = {}
+        for owner, domains in owners.items():
+            for domain in domains:
+                node = self._root
+                for label in reversed(domain.split(".")):
+                    node = node.setdefault(label, {})
+                node[self._OWNER] = owner
+
+    def owner(self, labels: List[str]) -> Optional[str]:
+        """Owner of the host whose labels (left to right) are given, or None"""
+        node = self._root
+        for label in reversed(labels):
+            node = node.get(label)
+            if node is None:
+                return None
+            if self._OWNER in node:
+                return node[self._OWNER]
+        return None
+
+class EditIndex:
+    """
+    Symmetric-delete index of brand names: every string a brand becomes with up to
+    max_distance characters deleted points back at the brand. A token is near a brand
+    when one of its own deletions is in the index and the Damerau-Levenshtein distance
+    confirms it, so finding "flipkrt" or "paypa1" costs a few dictionary lookups instead of a
+    distance computation against every brand.
+    """
+
+    def __init__(self, names: List[str]):
+        """Index names; short names tolerate fewer edits, so "axis" never matches "axes" """
+        self._deletes: Dict[str, List[str]] = {}
+        for name in names:
+            for variant in self._variants(name, self.max_distance(name)):
+                self._deletes.setdefault(variant, []).append(name)
+
+    @staticmethod
+    def max_distance(name: str) -> int:
+        """Edits allowed for a name of this length"""
+        return 0 if len(name) <= 4 else 1 if len(name) <= 7 else 2
+
+    @staticmethod
+    def _variants(word: str, distance: int) -> set:
+        """word and every string it becomes with up to distance deletions"""
+        variants = {word}
+        frontier = {word}
+        for _ in range(distance):
+            frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+            variants |= frontier
+        return variants
+
+    def nearest(self, token: str) -> Optional[str]:
+        """The brand token is within that brand's allowed edits of (not equal to), or None"""
+        best, best_distance = None, None
+        for variant in self._variants(token, 2 if len(token) >= 6 else 1):
+            for name in self._deletes.get(variant, ()):
+                if name == token or abs(len(name) - len(token)) > self.max_distance(name):
+                    continue
+                distance = _edit_distance(name, token)
+                if distance <= self.max_distance(name) and (best is None or distance < best_distance):
+                    best, best_distance = name, distance
+        return best
+
+def _edit_distance(a: str, b: str) -> int:
+    """Damerau-Levenshtein distance (optimal string alignment) between a and b"""
+    previous, current = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        before, previous, current = previous, current, [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], before[j - 2] + 1)
+    return current[len(b)]
+
+_OFFICIAL = LabelTrie(BRAND_DOMAINS)
+_BRANDS = EditIndex(list(BRAND_DOMAINS))
+# Brand names long enough to be recognized inside a longer token ("hdfcbank", "sbionline")
+_EMBEDDABLE = sorted((name for name in BRAND_DOMAINS if len(name) >= 3), key=len, reverse=True)
+
+@lru_cache(maxsize=65536)
+def _classify_token(token: str) -> Tuple[Optional[str], bool, bool]:
+    """
+    (brand named by a host token, whether only as a look-alike, whether a bait word).
+    Tokens are the hyphen-separated parts of host labels; most repeat across links.
+    """
+    bait = token in BAIT_WORDS
+    folded = token.translate(_HOMOGLYPHS)
+    if folded in BRAND_DOMAINS:
+        return folded, folded != token, bait
+    for name in _EMBEDDABLE:
+        # Short names only at the start or end of a token, long ones anywhere in it
+        if folded.startswith(name) or folded.endswith(name) or (len(name) >= 4 and name in folded):
+            return name, name not in token, bait
+    if len(folded) >= 4 and folded not in NOT_LOOKALIKES:
+        near = _BRANDS.nearest(folded)
+        if near is not None:
+            return near, True, bait
+    return None, False, bait
+
+# Scheme, then the authority up to the path, query or fragment
+_AUTHORITY = re.compile(r'(?:[a-z][a-z0-9+.-]*://)?([^/?#\\]*)', re.IGNORECASE)
+
+def split_host(url: str) -> Tuple[str, bool]:
+    """
+    Lowercase host of a link without user part, port or trailing dot, and whether the
+    authority carried a user part ("https://sbi.co.in@evil.in/" goes to evil.in)
+    """
+    _, at, host = _AUTHORITY.match(url).group(1).rpartition("@")
+    if host.startswith("["):  # IPv6 literal
+        return host.partition("]")[0].lower() + "]", bool(at)
+    return host.partition(":")[0].rstrip(".").lower(), bool(at)
+
+def _is_ip(host: str) -> bool:
+    return host.startswith("[") or host.replace(".", "").isdigit()
+
+@lru_cache(maxsize=65536)
+def split_domain(host: str) -> Tuple[str, str, str]:
+    """
+    (subdomain, registered domain, public suffix) of a host by the longest listed suffix:
+    "pay.sbi-kyc.co.in" is ("pay", "sbi-kyc.co.in", "co.in")
+    """
+    if _is_ip(host):
+        return "", host, ""
+    labels = host.split(".")
+    for i in range(max(1, len(labels) - 3), len(labels)):
+        suffix = ".".join(labels[i:])
+        if suffix in PUBLIC_SUFFIXES or i == len(labels) - 1:
+            return ".".join(labels[:i - 1]), ".".join(labels[i - 1:]), suffix
+    return "", host, ""
+
+@lru_cache(maxsize=65536)
+def _host_findings(host: str) -> Tuple[str, str, str, Optional[str], bool, bool, bool]:
+    """
+    split_domain(host), then what its subdomain says (brand named, only as a look-alike,
+    bait words) and whether the host itself is disguised (IP, punycode, escapes, deep nesting)
+    """
+    subdomain, domain, suffix = split_domain(host)
+    brand, lookalike, bait = None, False, False
+    if subdomain:
+        for label in subdomain.split("."):
+            for token in label.split("-"):
+                named, imitated, is_bait = _classify_token(token)
+                bait = bait or is_bait
+                if named is not None and brand is None:
+                    brand, lookalike = named, imitated
+    disguised = (_is_ip(host) or "xn--" in host or "%" in host or not host.isascii()
+                 or subdomain.count(".") >= 3)
+    return subdomain, domain, suffix, brand, lookalike, bait, disguised
+
+class PhishingAnalyzer:
+    """
+    Link risk scorer with a per-domain verdict cache.
+
+    A link's host is split once against PUBLIC_SUFFIXES into subdomain,
+    registered domain and suffix. The registered domain's verdict (is it a
+    brand's own domain, a shortener, on a throwaway suffix, does it name or
+    imitate a brand) is computed once and kept in a bounded LRU cache with a
+    TTL, like DetectionCache: campaigns reuse their domains, so almost every
+    link is a cache hit. Brand ownership is a walk of a reversed-label trie
+    of the brands' domains, and look-alike brand names are found through a
+    symmetric-delete edit-distance index after folding homoglyphs ("paypa1").
+    What varies per link (subdomain words, user parts, IP and punycode
+    hosts) is checked on every call, from memoized token verdicts.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600):
+        """
+        Initialize analyzer
+
+        Args:
+            max_entries: Domain verdicts kept before the least recently used is evicted
+            ttl_seconds: Lifetime of a domain verdict
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._verdicts: "OrderedDict[str, tuple]" = OrderedDict()  # domain -> (expires_at, verdict)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def analyze(self, url: str) -> Dict[str, Any]:
+        """
+        Risk factors of a link
+
+        Returns:
+            Dict with the registered domain, official (the host belongs to the
+            brand it names), impersonates (the brand named or imitated, if any),
+            mimics_legitimate, lookalike, suspicious_domain, obfuscated, the
+            reasons found and risk_score in [0, 1]
+        """
+        host, has_user = split_host(url)
+        subdomain, domain, suffix, sub_brand, sub_lookalike, sub_bait, disguised = _host_findings(host)
+        verdict = self._domain_verdict(domain, suffix)
+        official, brand, lookalike = verdict["official"], verdict["impersonates"], verdict["lookalike"]
+        reasons = verdict["reasons"]
+        # What this link adds to its domain's verdict; usually nothing
+        added = []
+        if not official:
+            if brand is None and sub_brand is not None:
+                brand, lookalike = sub_brand, sub_lookalike
+                added.append("brand_lookalike" if lookalike else "brand_name")
+            if sub_bait and "bait_words" not in reasons:
+                added.append("bait_words")
+            if has_user or disguised:
+                added.append("obfuscated")
+        if added:
+            reasons = reasons + tuple(added)
+
+        return {
+            "url": url,
+            "host": host,
+            "domain": domain,
+            "official": official,
+            "impersonates": brand,
+            "mimics_legitimate": not official and brand is not None,
+            "lookalike": not official and lookalike,
+            "suspicious_domain": verdict["suspicious_domain"] or "bait_words" in added,
+            "obfuscated": "obfuscated" in added,
+            "reasons": list(reasons),
+            "risk_score": _risk_score(reasons) if added else verdict["risk_score"]
+        }
+
+    def _domain_verdict(self, domain: str, suffix: str) -> Dict[str, Any]:
+        """Cached verdict for a registered domain"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._verdicts.get(domain)
+            if entry is not None:
+                if entry[0] > now:
+                    self._verdicts.move_to_end(domain)
+                    self.hits += 1
+                    return entry[1]
+                del self._verdicts[domain]
+                self.expirations += 1
+            self.misses += 1
+        verdict = self._analyze_domain(domain, suffix)
+        with self._lock:
+            self._verdicts[domain] = (now + self.ttl_seconds, verdict)
+            self._verdicts.move_to_end(domain)
+            while len(self._verdicts) > self.max_entries:
+                self._verdicts.popitem(last=False)
+                self.evictions += 1
+        return verdict
+
+    @staticmethod
+    def _analyze_domain(domain: str, suffix: str) -> Dict[str, Any]:
+        """Verdict for a registered domain, from its name alone"""
+        labels = domain.split(".")
+        owner = _OFFICIAL.owner(labels)
+        if owner is not None:
+            return {"official": True, "impersonates": owner, "lookalike": False, "reasons": (),
+                    "suspicious_domain": False, "risk_score": 0.0}
+        reasons = []
+        if domain in SHORTENERS:
+            reasons.append("shortener")
+        if suffix in RISKY_SUFFIXES:
+            reasons.append("risky_suffix")
+        brand, lookalike, bait = None, False, False
+        # The registered label, without the suffix: "sbi-kyc" of "sbi-kyc.co.in"
+        name = domain[:len(domain) - len(suffix) - 1] if suffix else domain
+        for token in name.split("-"):
+            named, imitated, is_bait = _classify_token(token)
+            bait = bait or is_bait
+            if named is not None and brand is None:
+                brand, lookalike = named, imitated
+        if brand is not None:
+            reasons.append("brand_lookalike" if lookalike else "brand_name")
+        if bait:
+            reasons.append("bait_words")
+        return {
+            "official": False,
+            "impersonates": brand,
+            "lookalike": lookalike,
+            "reasons": tuple(reasons),
+            "suspicious_domain": any(r in reasons for r in ("shortener", "bait_words", "risky_suffix")),
+            "risk_score": _risk_score(reasons)
+        }
+
+    def clear(self):
+        """Drop every cached verdict"""
+        with self._lock:
+            self._verdicts.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Counters for health and statistics endpoints"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._verdicts),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
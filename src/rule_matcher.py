@@ -0,0 +1,399 @@
+"""
+Rule Matcher - Linear-time evaluation of scam detection patterns
+Compiles a pattern table once into a single trie scan plus in-order fragment checks
+"""
+
+import hashlib
+import re
+import time
+from dataclasses import dataclass
+from collections import defaultdict
+from typing import Any, Iterable, List, Optional, Tuple, Union
+
+# Characters that make a fragment a regex rather than a literal
+_META = set('.^$*+?{}[]\\|()')
+
+# (?:a|b|c) with literal alternatives and optional literal prefix/suffix
+_LITERAL_GROUP = re.compile(r'^([^.^$*+?{}\[\]\\|()]*)\(\?:([^.^$*+?{}\[\]\\()]+)\)([^.^$*+?{}\[\]\\|()]*)$')
+
+# A quantifier following an atom, greedy, lazy or possessive
+_QUANTIFIER = re.compile(r'(?:[*+?]|\{\d*,?\d*\})[?+]?')
+
+Fragment = Union[str, re.Pattern]
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """A detection pattern compiled into fragment chains.
+
+    Each chain is one top-level alternative of the pattern, split on ``.*``.
+    Fragments are plain strings when literal and compiled patterns otherwise.
+    """
+    index: int
+    pattern: str
+    name: str
+    weight: float
+    category: Any = None
+    chains: Tuple[Tuple[Fragment, ...], ...] = ()
+
+def split_top_level(pattern: str, separator: str) -> List[str]:
+    """Split pattern on separator outside groups, classes and escapes"""
+    parts, start, depth, i = [], 0, 0, 0
+    in_class = False
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == '\\':
+            i += 2
+            continue
+        if in_class:
+            if ch == ']':
+                in_class = False
+        elif ch == '[':
+            in_class = True
+            if pattern[i + 1:i + 2] == ']':
+                i += 1
+        elif ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif depth == 0 and pattern.startswith(separator, i):
+            parts.append(pattern[start:i])
+            i += len(separator)
+            # A lazy .*? means the same as .* for a search
+            if separator == '.*' and pattern[i:i + 1] == '?':
+                i += 1
+            start = i
+            continue
+        i += 1
+    parts.append(pattern[start:])
+    return parts
+
+def _atoms(fragment: str) -> List[Tuple[str, str]]:
+    """Split a regex fragment into (atom, quantifier) pairs; classes and groups stay whole"""
+    atoms, i = [], 0
+    while i < len(fragment):
+        ch = fragment[i]
+        if ch == '\\':
+            end = i + 2
+        elif ch == '[':
+            end = i + 1
+            if fragment[end:end + 1] == '^':
+                end += 1
+            if fragment[end:end + 1] == ']':
+                end += 1
+            while end < len(fragment) and fragment[end] != ']':
+                end += 2 if fragment[end] == '\\' else 1
+            end += 1
+        elif ch == '(':
+            end, depth = i, 0
+            while end < len(fragment):
+                if fragment[end] == '\\':
+                    end += 1
+                elif fragment[end] == '(':
+                    depth += 1
+                elif fragment[end] == ')':
+                    depth -= 1
+                    if depth == 0:
+                        break
+                end += 1
+            end += 1
+        else:
+            end = i + 1
+        quantifier = _QUANTIFIER.match(fragment, end)
+        atoms.append((fragment[i:end], quantifier.group() if quantifier else ''))
+        i = quantifier.end() if quantifier else end
+    return atoms
+
+def _unbounded(quantifier: str) -> bool:
+    return quantifier[:1] in ('*', '+') or quantifier.rstrip('?+').endswith(',}')
+
+def _repeats_inside(group: str) -> bool:
+    """Whether anything inside a group, at any depth, repeats without bound"""
+    return any(_unbounded(quantifier) or (atom[0] == '(' and _repeats_inside(atom))
+               for atom, quantifier in _atoms(group[1:-1]))
+
+def _is_literal(atom: str) -> bool:
+    return (len(atom) == 1 and atom not in _META) or (len(atom) == 2 and atom[0] == '\\' and not atom[1].isalnum())
+
+def linear_time(fragment: str, flags: int = 0) -> bool:
+    """Whether re.search of fragment stays linear in the length of the text.
+
+    Backreferences are refused, as is any unbounded quantifier inside or on a
+    group. At most one atom may repeat without bound, and only right after a
+    literal character it cannot match: a search then only starts a repetition
+    at that character, and the runs it scans never overlap. ``\\w+!`` or
+    ``\\w+\\w+!`` would rescan the same run from every position.
+    """
+    unbounded = 0
+    previous = None
+    for atom, quantifier in _atoms(fragment):
+        if atom[0] == '\\' and atom[1:2].isdigit() and atom[1] != '0':
+            return False
+        if atom[0] == '(' and (_unbounded(quantifier) or _repeats_inside(atom)):
+            return False
+        if _unbounded(quantifier):
+            unbounded += 1
+            anchored = (previous is not None and not previous[1] and _is_literal(previous[0])
+                        and re.fullmatch(atom, previous[0][-1], flags) is None)
+            if unbounded > 1 or not anchored:
+                return False
+        previous = (atom, quantifier)
+    return True
+
+def _expand_fragment(fragment: str, flags: int) -> List[Fragment]:
+    """Turn one fragment into literal alternatives, or a single compiled regex"""
+    if fragment and not any(ch in _META for ch in fragment):
+        return [fragment.lower() if flags & re.IGNORECASE else fragment]
+    group = _LITERAL_GROUP.match(fragment)
+    if group:
+        prefix, body, suffix = group.groups()
+        options = [prefix + option + suffix for option in body.split('|')]
+        if all(options):
+            return [o.lower() if flags & re.IGNORECASE else o for o in options]
+    if not fragment or not linear_time(fragment, flags):
+        raise ValueError(f"Pattern fragment {fragment!r} cannot be matched in linear time")
+    return [re.compile(fragment, flags)]
+
+def compile_chains(pattern: str, flags: int = 0) -> Tuple[Tuple[Fragment, ...], ...]:
+    """Compile ``a.*b|(?:c|d)`` into (("a", "b"), ("c",), ("d",)).
+
+    Literal groups are distributed over their alternatives so that as much of
+    the table as possible ends up in the literal trie scan. A regex fragment
+    may only end a chain (see chain_matches).
+    """
+    chains = []
+    for alternative in split_top_level(pattern, '|'):
+        expanded: List[Tuple[Fragment, ...]] = [()]
+        fragments = split_top_level(alternative, '.*')
+        for position, fragment in enumerate(fragments):
+            options = _expand_fragment(fragment, flags)
+            if position < len(fragments) - 1 and not all(isinstance(option, str) for option in options):
+                raise ValueError(f"Pattern fragment {fragment!r} has to be the last of its .* chain")
+            expanded = [chain + (option,) for chain in expanded for option in options]
+        chains.extend(expanded)
+    return tuple(dict.fromkeys(chains))
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """Fold literal words into a prefix-trie regex.
+
+    At every node the branches start with distinct characters and the greedy
+    optional group prefers the longer word, so a match is always the longest
+    word starting at that position - the same as a longest-first alternation,
+    but without retrying every word at every offset.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def render(node: dict) -> str:
+        branches = [re.escape(ch) + render(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return '(?:' + body + ')?' if '' in node else body
+
+    return render(trie)
+
+def _find(text: str, fragment: Fragment, start: int, end: int) -> Tuple[int, int]:
+    """Leftmost (start, end) of fragment inside text[start:end], or (-1, -1)"""
+    if isinstance(fragment, str):
+        pos = text.find(fragment, start, end)
+        return (pos, pos + len(fragment)) if pos != -1 else (-1, -1)
+    match = fragment.search(text, start, end)
+    return match.span() if match else (-1, -1)
+
+def chain_matches(text: str, chain: Tuple[Fragment, ...]) -> bool:
+    """In-order check equivalent to re.search('f1.*f2.*...', text).
+
+    ``.`` does not match newlines, so a chain has to fit in one line. Taking
+    the earliest occurrence of every fragment is always optimal for literal
+    fragments, but not for a regex one, whose leftmost match need not end
+    earliest; compile_chains therefore only lets a regex fragment end a
+    chain, where all that matters is whether it occurs after the cursor.
+    Each line is visited once, so the cost stays linear in the length of
+    the text however many partial matches it contains.
+    """
+    if len(chain) == 1:
+        if isinstance(chain[0], str):
+            return chain[0] in text
+        return chain[0].search(text) is not None
+
+    length = len(text)
+    pos, cursor = _find(text, chain[0], 0, length)
+    while pos != -1:
+        line_end = text.find('\n', pos)
+        if line_end == -1:
+            line_end = length
+        for fragment in chain[1:]:
+            found, cursor = _find(text, fragment, cursor, line_end)
+            if found == -1:
+                break
+        else:
+            return True
+        if line_end == length:
+            return False
+        pos, cursor = _find(text, chain[0], line_end + 1, length)
+    return False
+
+class RuleMatcher:
+    """Matches a whole rule table against a message in linear time.
+
+    All literal fragments are folded into one trie regex and found with a
+    single ``findall``. That scan is non-overlapping, so fragments hidden
+    inside or across a reported match are recovered from tables built at
+    compile time: fragments contained in another are implied by it, and
+    fragments that can straddle its end are re-checked directly. Only rules
+    whose literal fragments are all present get their chains resolved.
+
+    Rules are evaluated in descending weight so that, when a CPU budget cuts
+    evaluation short, the hits found so far are the most significant ones.
+    """
+
+    def __init__(self, rules: List[Tuple[str, str, float, Any]], ignore_case: bool = False):
+        """
+        Compile rules.
+
+        Args:
+            rules: (pattern, name, weight, category) tuples in table order
+            ignore_case: Match case-insensitively; text passed to match()
+                must then already be lowercased
+        """
+        flags = re.IGNORECASE if ignore_case else 0
+        self.rules: List[CompiledRule] = [
+            CompiledRule(
+                index=index,
+                pattern=pattern,
+                name=name,
+                weight=weight,
+                category=category,
+                chains=compile_chains(pattern, flags)
+            )
+            for index, (pattern, name, weight, category) in enumerate(rules)
+        ]
+        # Identifies this exact rule set, e.g. for invalidating cached verdicts
+        self.fingerprint = hashlib.sha256(
+            repr([(r.pattern, r.name, r.weight, r.category) for r in self.rules]).encode()
+        ).hexdigest()[:16]
+
+        fragments = sorted({f for rule in self.rules for chain in rule.chains
+                            for f in chain if isinstance(f, str)})
+        self._scan = re.compile(trie_pattern(fragments)) if fragments else None
+        # fragment -> fragments it contains (itself included)
+        self._implied = {f: frozenset(g for g in fragments if g in f) for f in fragments}
+        # fragment -> fragments that may start inside it and run past its end
+        self._straddling = {
+            f: tuple(g for g in fragments
+                     if any(g.startswith(f[i:]) and len(g) > len(f) - i for i in range(1, len(f))))
+            for f in fragments
+        }
+
+        # Rules reachable from a literal fragment; rules with a chain made only
+        # of regex fragments have to be tried on every message
+        rules_by_fragment = defaultdict(set)
+        always = set()
+        for rule in self.rules:
+            for chain in rule.chains:
+                literals = [f for f in chain if isinstance(f, str)]
+                if literals:
+                    rules_by_fragment[literals[0]].add(rule.index)
+                else:
+                    always.add(rule.index)
+        self._rules_by_fragment = {f: frozenset(r) for f, r in rules_by_fragment.items()}
+        self._always = frozenset(always)
+        self._priority = {rule.index: (-rule.weight, rule.index) for rule in self.rules}
+        # Per rule: (literal fragments required, chain, resolved by presence alone)
+        self._plans = {
+            rule.index: tuple(
+                (frozenset(f for f in chain if isinstance(f, str)), chain,
+                 len(chain) == 1 and isinstance(chain[0], str))
+                for chain in rule.chains
+            )
+            for rule in self.rules
+        }
+        # Optional RuleProfiler; None keeps match() free of timing calls
+        self.profiler = None
+
+    def attach_profiler(self, profiler):
+        """Feed per-rule hit and latency counters to profiler, or stop with None"""
+        if profiler is not None:
+            profiler.register(self.rules)
+        self.profiler = profiler
+
+    def present_fragments(self, text: str) -> set:
+        """Set of every literal fragment that occurs anywhere in text"""
+        if self._scan is None:
+            return set()
+        present = set()
+        for fragment in set(self._scan.findall(text)):
+            present |= self._implied[fragment]
+            for candidate in self._straddling[fragment]:
+                if candidate not in present and candidate in text:
+                    present.add(candidate)
+        return present
+
+    def match(self, text: str, budget_seconds: Optional[float] = None) -> Tuple[List[CompiledRule], bool]:
+        """
+        Find every rule that matches text.
+
+        Args:
+            text: Message text (lowercased if compiled with ignore_case)
+            budget_seconds: Stop evaluating rules once this much time is spent
+
+        Returns:
+            (hits in table order, whether every candidate rule was evaluated)
+        """
+        if self.profiler is not None:
+            return self._match_profiled(text, budget_seconds)
+        deadline = time.perf_counter() + budget_seconds if budget_seconds is not None else None
+        present = self.present_fragments(text)
+
+        hits = []
+        complete = True
+        for index in self._candidates(present):
+            if deadline is not None and time.perf_counter() > deadline:
+                complete = False
+                break
+            if self._rule_matches(text, index, present):
+                hits.append(self.rules[index])
+        hits.sort(key=lambda rule: rule.index)
+        return hits, complete
+
+    def _match_profiled(self, text: str, budget_seconds: Optional[float]) -> Tuple[List[CompiledRule], bool]:
+        """match() with every candidate rule timed and reported to the profiler"""
+        clock = time.perf_counter
+        started = clock()
+        deadline = started + budget_seconds if budget_seconds is not None else None
+        present = self.present_fragments(text)
+        scanned = clock()
+
+        hits = []
+        evaluations = []
+        complete = True
+        for index in self._candidates(present):
+            rule_start = clock()
+            if deadline is not None and rule_start > deadline:
+                complete = False
+                break
+            hit = self._rule_matches(text, index, present)
+            evaluations.append((self.rules[index], clock() - rule_start, hit))
+            if hit:
+                hits.append(self.rules[index])
+        self.profiler.record_message(scanned - started, evaluations)
+        hits.sort(key=lambda rule: rule.index)
+        return hits, complete
+
+    def _candidates(self, present: set) -> List[int]:
+        """Rules worth checking given the literal fragments present, strongest first"""
+        candidates = set(self._always)
+        for fragment in present:
+            if fragment in self._rules_by_fragment:
+                candidates |= self._rules_by_fragment[fragment]
+        return sorted(candidates, key=self._priority.__getitem__)
+
+    def _rule_matches(self, text: str, index: int, present: set) -> bool:
+        for needs, chain, resolved in self._plans[index]:
+            if needs <= present and (resolved or chain_matches(text, chain)):
+                return True
+        return False
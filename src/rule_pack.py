@@ -0,0 +1,204 @@
+"""
+Rule Packs - Versioned, declarative detection rules compiled at load time
+A pack is a JSON file of pattern groups and keyword weights; loading validates it and
+compiles it into a RuleMatcher once, so a running engine can swap rule sets atomically
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import signal
+import threading
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from src.rule_matcher import RuleMatcher
+
+logger = logging.getLogger(__name__)
+
+RULE_PACK_FORMAT = 1
+DEFAULT_RULE_PACK = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'rules', 'default.json')
+
+class RulePackError(ValueError):
+    """A rule pack that cannot be loaded; the running rules stay in place"""
+
+@dataclass
+class RulePack:
+    """
+    A validated, compiled rule set.
+
+    Everything detection reads from the rules hangs off one object, so an
+    engine that swaps its pack reference switches every tier at once, and a
+    request that already holds the old pack finishes on it.
+    """
+    version: str
+    source: str
+    digest: str
+    pattern_database: Dict[Enum, List[Dict[str, Any]]]
+    keyword_weights: Dict[str, float]
+    matcher: RuleMatcher
+    loaded_at: float = field(default_factory=time.time)
+    compile_ms: float = 0.0
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the rules and keyword weights, e.g. for invalidating cached verdicts"""
+        return self.digest[:16]
+
+    @property
+    def rule_count(self) -> int:
+        return len(self.matcher.rules)
+
+    def to_dict(self) -> dict:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "fingerprint": self.fingerprint,
+            "groups": sum(len(groups) for groups in self.pattern_database.values()),
+            "rules": self.rule_count,
+            "keywords": len(self.keyword_weights),
+            "loaded_at": self.loaded_at,
+            "compile_ms": round(self.compile_ms, 2)
+        }
+
+def _check(condition: bool, message: str):
+    if not condition:
+        raise RulePackError(message)
+
+def _is_weight(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and 0.0 <= value <= 1.0
+
+def parse_rule_pack(data: Dict[str, Any], categories: Type[Enum], source: str = "<memory>",
+                    digest: Optional[str] = None) -> RulePack:
+    """
+    Validate a decoded rule pack and compile it
+
+    Args:
+        data: Decoded pack
+        categories: Enum whose values are the allowed scam_type strings
+        source: Where the pack came from, for messages and status
+        digest: SHA-256 of the pack file; derived from data when omitted
+
+    Returns:
+        Compiled RulePack
+
+    Raises:
+        RulePackError: The pack is malformed or a pattern cannot be matched in linear time
+    """
+    started = time.perf_counter()
+    _check(isinstance(data, dict), f"{source}: a rule pack must be a JSON object")
+    _check(data.get("format") == RULE_PACK_FORMAT,
+           f"{source}: unsupported format {data.get('format')!r} (expected {RULE_PACK_FORMAT})")
+    version = data.get("version")
+    _check(isinstance(version, str) and version != "", f"{source}: version must be a non-empty string")
+    groups = data.get("groups")
+    _check(isinstance(groups, list) and groups, f"{source}: groups must be a non-empty list")
+
+    pattern_database: Dict[Enum, List[Dict[str, Any]]] = {}
+    for position, group in enumerate(groups):
+        where = f"{source}: group {position}"
+        _check(isinstance(group, dict), f"{where} must be an object")
+        name = group.get("name")
+        _check(isinstance(name, str) and name != "", f"{where}: name must be a non-empty string")
+        where = f"{source}: group {name!r}"
+        try:
+            scam_type = categories(group.get("scam_type"))
+        except ValueError:
+            raise RulePackError(f"{where}: unknown scam_type {group.get('scam_type')!r}") from None
+        _check(_is_weight(group.get("weight")), f"{where}: weight must be a number between 0 and 1")
+        patterns = group.get("patterns")
+        _check(isinstance(patterns, list) and patterns and all(isinstance(p, str) and p for p in patterns),
+               f"{where}: patterns must be a non-empty list of strings")
+        keywords = group.get("keywords", [])
+        _check(isinstance(keywords, list) and all(isinstance(k, str) for k in keywords),
+               f"{where}: keywords must be a list of strings")
+        pattern_database.setdefault(scam_type, []).append({
+            "name": name,
+            "patterns": list(patterns),
+            "keywords": list(keywords),
+            "weight": float(group["weight"])
+        })
+
+    keyword_weights = data.get("keyword_weights", {})
+    _check(isinstance(keyword_weights, dict), f"{source}: keyword_weights must be an object")
+    for keyword, weight in keyword_weights.items():
+        _check(keyword != "" and _is_weight(weight), f"{source}: keyword {keyword!r} needs a weight between 0 and 1")
+
+    rules = [
+        (pattern, group["name"], group["weight"], scam_type)
+        for scam_type, scam_groups in pattern_database.items()
+        for group in scam_groups
+        for pattern in group["patterns"]
+    ]
+    try:
+        matcher = RuleMatcher(rules, ignore_case=True)
+    except (ValueError, re.error) as e:
+        raise RulePackError(f"{source}: {e}") from None
+
+    if digest is None:
+        digest = hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+    return RulePack(
+        version=version,
+        source=source,
+        digest=digest,
+        pattern_database=pattern_database,
+        keyword_weights={k: float(w) for k, w in keyword_weights.items()},
+        matcher=matcher,
+        compile_ms=(time.perf_counter() - started) * 1000
+    )
+
+def load_rule_pack(path: str, categories: Type[Enum]) -> RulePack:
+    """
+    Read, validate and compile a rule pack file
+
+    Raises:
+        RulePackError: The file is missing, not JSON, or not a valid pack
+    """
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw)
+    except (OSError, ValueError) as e:
+        raise RulePackError(f"{path}: {e}") from None
+    return parse_rule_pack(data, categories, source=path, digest=hashlib.sha256(raw).hexdigest())
+
+def file_digest(path: str) -> Optional[str]:
+    """SHA-256 of a pack file, or None if it cannot be read"""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+def install_reload_signal(reload: Callable[[], Any]) -> bool:
+    """
+    Call reload on SIGHUP, off the signal handler's frame
+
+    The handler only starts a thread, so a request interrupted by the signal
+    never waits for a pack to compile. Failures are logged and leave the
+    running rules in place.
+
+    Returns:
+        False when the platform has no SIGHUP or this is not the main thread
+    """
+    if not hasattr(signal, 'SIGHUP'):
+        return False
+
+    def run_reload():
+        try:
+            reload()
+        except RulePackError as e:
+            logger.error(f"Rule pack reload rejected: {e}")
+
+    def on_sighup(signum, frame):
+        threading.Thread(target=run_reload, name="rule-pack-reload", daemon=True).start()
+
+    try:
+        signal.signal(signal.SIGHUP, on_sighup)
+    except ValueError:
+        return False
+    return True
@@ -0,0 +1,144 @@
+"""
+Rule Profiler - Opt-in per-rule hit and latency counters for the rule matcher
+Shows which detection patterns fire and which cost the most CPU, so dead rules can be
+pruned and slow ones rewritten from data
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List
+
+class RuleProfiler:
+    """
+    Per-rule evaluation counters, fed by RuleMatcher when attached.
+
+    Rules are keyed by their pattern text, so counters survive recompiling
+    the same table. A rule counts as evaluated when the literal prefilter
+    made it a candidate and its chains were checked; rules that are never
+    evaluated cost nothing beyond the shared scan, which is timed separately.
+    Latencies keep a bounded window of recent samples for the p99.
+    """
+
+    def __init__(self, sample_size: int = 1024):
+        """
+        Initialize profiler
+
+        Args:
+            sample_size: Recent latency samples kept per rule for percentiles
+        """
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._messages = 0
+        self._scan_seconds = 0.0
+        self._rules: Dict[str, Dict[str, Any]] = {}
+
+    def register(self, rules: List[Any]):
+        """Make every rule of a table visible, including ones that never run"""
+        with self._lock:
+            for rule in rules:
+                if rule.pattern not in self._rules:
+                    self._rules[rule.pattern] = {
+                        "name": rule.name,
+                        "category": getattr(rule.category, "value", rule.category),
+                        "evaluations": 0,
+                        "hits": 0,
+                        "seconds": 0.0,
+                        "samples": deque(maxlen=self.sample_size)
+                    }
+
+    def record_message(self, scan_seconds: float, evaluations: List[tuple]):
+        """
+        Record one match() call
+
+        Args:
+            scan_seconds: Time spent in the shared literal scan
+            evaluations: (rule, seconds, hit) for every candidate rule checked
+        """
+        with self._lock:
+            self._messages += 1
+            self._scan_seconds += scan_seconds
+            for rule, seconds, hit in evaluations:
+                stats = self._rules.get(rule.pattern)
+                if stats is None:
+                    continue
+                stats["evaluations"] += 1
+                stats["hits"] += hit
+                stats["seconds"] += seconds
+                stats["samples"].append(seconds)
+
+    def reset(self):
+        """Zero every counter, keeping the registered rules"""
+        with self._lock:
+            self._started = time.time()
+            self._zero()
+
+    def _zero(self):
+        """Zero the counters, keeping the registered rules (lock held)"""
+        self._messages = 0
+        self._scan_seconds = 0.0
+        for stats in self._rules.values():
+            stats.update(evaluations=0, hits=0, seconds=0.0)
+            stats["samples"].clear()
+
+    def take(self) -> Dict[str, Any]:
+        """Counters recorded since the last take() or reset(), zeroing them; for merge() into another profiler"""
+        with self._lock:
+            taken = {
+                "messages": self._messages,
+                "scan_seconds": self._scan_seconds,
+                "rules": {pattern: {"evaluations": stats["evaluations"], "hits": stats["hits"],
+                                    "seconds": stats["seconds"], "samples": list(stats["samples"])}
+                          for pattern, stats in self._rules.items() if stats["evaluations"]}
+            }
+            self._zero()
+        return taken
+
+    def merge(self, taken: Dict[str, Any]):
+        """Add what another profiler's take() returned (an offload worker's) to these counters"""
+        with self._lock:
+            self._messages += taken["messages"]
+            self._scan_seconds += taken["scan_seconds"]
+            for pattern, counts in taken["rules"].items():
+                stats = self._rules.get(pattern)
+                if stats is None:
+                    continue
+                stats["evaluations"] += counts["evaluations"]
+                stats["hits"] += counts["hits"]
+                stats["seconds"] += counts["seconds"]
+                stats["samples"].extend(counts["samples"])
+
+    def report(self) -> Dict[str, Any]:
+        """Per-rule counters, most expensive rule first"""
+        with self._lock:
+            rules = []
+            for pattern, stats in self._rules.items():
+                samples = sorted(stats["samples"])
+                p99 = samples[min(int(len(samples) * 0.99), len(samples) - 1)] if samples else 0.0
+                evaluations = stats["evaluations"]
+                rules.append({
+                    "name": stats["name"],
+                    "category": stats["category"],
+                    "pattern": pattern,
+                    "evaluations": evaluations,
+                    "hits": stats["hits"],
+                    "hit_rate": round(stats["hits"] / self._messages, 4) if self._messages else 0.0,
+                    "total_ms": round(stats["seconds"] * 1000, 3),
+                    "mean_us": round(stats["seconds"] / evaluations * 1e6, 2) if evaluations else 0.0,
+                    "p99_us": round(p99 * 1e6, 2)
+                })
+            rules.sort(key=lambda r: r["total_ms"], reverse=True)
+            return {
+                "since": self._started,
+                "messages": self._messages,
+                "scan_ms": round(self._scan_seconds * 1000, 3),
+                "rules": rules,
+                "dead_rules": [r["name"] + ": " + r["pattern"] for r in rules if r["hits"] == 0]
+            }
+
+    def dump(self, path: str):
+        """Write report() to a JSON file"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
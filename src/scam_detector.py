@@ -2,17 +2,28 @@
 Scam Detection Engine - Pattern matching, NLP classification, and confidence scoring
 """
 
-import re
+import logging
+import time
+import threading
+from concurrent.futures import BrokenExecutor
 from enum import Enum
-from dataclasses import dataclass
-from typing import List, Dict, Tuple
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
-from nltk.tokenize import word_tokenize
+from dataclasses import dataclass, field, replace
+from typing import List, Dict, Optional, Tuple, Union
 
-# Download required NLTK data (uncomment on first run)
-# nltk.download('vader_lexicon')
-# nltk.download('punkt')
+from src.rule_matcher import RuleMatcher
+from src.detection_cache import DetectionCache
+from src.campaign_index import CampaignIndex
+from src.rule_profiler import RuleProfiler
+from src.rule_pack import DEFAULT_RULE_PACK, RulePack, file_digest, load_rule_pack
+from src.ngram_classifier import HashedNgramClassifier
+from src.offload import ProcessOffloader
+from src.sentiment import get_sentiment_analyzer
+from src.message_analysis import AnalyzedMessage
+
+logger = logging.getLogger(__name__)
+
+# Sentiment uses the lexicon bundled in src/data and loads on first use; tokens
+# come from the regex tokenizer in src.sentiment, so NLTK is never required
 
 class ScamType(Enum):
     """Enumeration of scam types"""
@@ -35,10 +46,15 @@ class ScamDetectionResult:
     detection_method: str
     extracted_keywords: List[str]
     explanation: str
+    # Per-tier evidence, kept for conversation-level scoring (not serialized)
+    matched_patterns: List[str] = field(default_factory=list)
+    tier_scores: Dict[str, float] = field(default_factory=dict)
+    # Set when the message belongs to a known scam campaign
+    campaign_id: Optional[str] = None
     
     def to_dict(self) -> dict:
         """Convert to dictionary"""
-        return {
+        data = {
             "is_scam": self.is_scam,
             "scam_type": self.scam_type.value,
             "confidence": round(self.confidence, 3),
@@ -46,204 +62,538 @@ class ScamDetectionResult:
             "extracted_keywords": self.extracted_keywords,
             "explanation": self.explanation
         }
+        if self.campaign_id:
+            data["campaign_id"] = self.campaign_id
+        return data
 
-class ScamDetectionEngine:
-    """Scam Detection Engine using pattern matching and NLP"""
+class ConversationScamState:
+    """
+    Running conversation-level detection state
+    
+    Folds each message's detection evidence into accumulated pattern hits,
+    keyword weights and sentiment, so the conversation verdict costs O(1) per
+    turn instead of rescanning history. The pattern and keyword sets are
+    bounded by the rule tables, so memory does not grow with turns either.
+    """
     
     def __init__(self):
-        """Initialize detection engine"""
-        self.sia = SentimentIntensityAnalyzer()
-        self.pattern_database = self._build_pattern_database()
-        self.keyword_weights = self._build_keyword_weights()
+        self.messages = 0
+        self.scam_messages = 0
+        self.max_confidence = 0.0
+        self.patterns = set()
+        self.keyword_weights: Dict[str, float] = {}
+        self.keyword_weight_sum = 0.0
+        self.nlp_score_sum = 0.0
+        self.type_counts: Dict[ScamType, int] = {}
+        self.scam_type = ScamType.UNKNOWN
+        self.confidence = 0.0
+    
+    def update(self, result: ScamDetectionResult, keyword_weights: Dict[str, float]):
+        """Fold one message's detection result into the running state"""
+        self.messages += 1
+        self.scam_messages += result.is_scam
+        self.max_confidence = max(self.max_confidence, result.confidence)
+        self.patterns.update(result.matched_patterns)
+        for keyword in result.extracted_keywords:
+            if keyword not in self.keyword_weights:
+                self.keyword_weights[keyword] = keyword_weights.get(keyword, 0.0)
+                self.keyword_weight_sum += self.keyword_weights[keyword]
+        # A message whose NLP tier did not run scored 0 there in its own confidence too
+        self.nlp_score_sum += result.tier_scores.get("nlp", 0.0)
+        if result.scam_type != ScamType.UNKNOWN:
+            count = self.type_counts.get(result.scam_type, 0) + 1
+            self.type_counts[result.scam_type] = count
+            # Most frequent type so far; ties go to the latest
+            if count >= self.type_counts.get(self.scam_type, 0):
+                self.scam_type = result.scam_type
         
-    def _build_pattern_database(self) -> Dict[ScamType, List[Dict]]:
-        """Build database of scam patterns"""
+        # Same weighting as a single message, over the evidence seen so far
+        pattern_score = min(len(self.patterns) * 0.3, 1.0)
+        keyword_score = self.keyword_weight_sum / len(self.keyword_weights) if self.keyword_weights else 0.0
+        nlp_score = self.nlp_score_sum / self.messages
+        combined = (pattern_score * ScamDetectionEngine.PATTERN_WEIGHT + nlp_score * ScamDetectionEngine.NLP_WEIGHT +
+                    keyword_score * ScamDetectionEngine.KEYWORD_WEIGHT)
+        self.confidence = max(combined, self.max_confidence)
+    
+    @property
+    def is_scam(self) -> bool:
+        return self.confidence > ScamDetectionEngine.SCAM_THRESHOLD
+    
+    def to_dict(self) -> dict:
+        """Conversation verdict in the shape of ScamDetectionResult.to_dict()"""
         return {
-            ScamType.PHISHING_UPI: [
-                {
-                    "name": "upi_verification",
-                    "patterns": [
-                        r"verify.*upi|upi.*verify",
-                        r"confirm.*upi|upi.*confirm",
-                        r"update.*upi|upi.*update",
-                        r"@[a-zA-Z0-9._-]+"
-                    ],
-                    "keywords": ["verify", "upi", "urgent", "confirm"],
-                    "weight": 0.8
-                },
-                {
-                    "name": "account_compromise",
-                    "patterns": [
-                        r"account.*compr|hack|compromis",
-                        r"unauthorized.*access",
-                        r"suspicious.*activ"
-                    ],
-                    "keywords": ["account", "compromised", "hacked", "unauthorized"],
-                    "weight": 0.7
-                }
-            ],
-            ScamType.PHISHING_BANKING: [
-                {
-                    "name": "banking_credential_request",
-                    "patterns": [
-                        r"confirm.*password|password.*confirm",
-                        r"verify.*account|account.*verify",
-                        r"banking.*details|credentials"
-                    ],
-                    "keywords": ["password", "username", "credentials", "login"],
-                    "weight": 0.85
-                },
-                {
-                    "name": "bank_impersonation",
-                    "patterns": [
-                        r"from\s+(?:hdfc|icici|axis|sbi|yes|bob)",
-                        r"(?:hdfc|icici|axis|sbi|yes|bob).*bank"
-                    ],
-                    "keywords": ["bank", "security", "fraud", "alert"],
-                    "weight": 0.75
-                }
-            ],
-            ScamType.LOTTERY_SCAM: [
-                {
-                    "name": "lottery_winning",
-                    "patterns": [
-                        r"won.*lottery|lottery.*won",
-                        r"prize.*claim|claim.*prize",
-                        r"congratulation|winner"
-                    ],
-                    "keywords": ["winner", "won", "prize", "congratulations"],
-                    "weight": 0.8
-                }
-            ],
-            ScamType.INVESTMENT_FRAUD: [
-                {
-                    "name": "investment_promise",
-                    "patterns": [
-                        r"invest.*return|return.*invest",
-                        r"guarantee.*profit|profit.*guarantee",
-                        r"double.*money|triple.*return"
-                    ],
-                    "keywords": ["invest", "profit", "return", "guarantee", "double"],
-                    "weight": 0.8
-                }
-            ]
+            "is_scam": self.is_scam,
+            "scam_type": self.scam_type.value,
+            "confidence": round(self.confidence, 3),
+            "detection_method": "conversation",
+            "messages_scored": self.messages,
+            "scam_messages": self.scam_messages,
+            "matched_patterns": sorted(self.patterns),
+            "extracted_keywords": sorted(self.keyword_weights)
         }
-    
-    def _build_keyword_weights(self) -> Dict[str, float]:
-        """Build keyword weight dictionary"""
+
+    def to_record(self) -> dict:
+        """Everything the state has folded in, JSON-serializable, for from_record()"""
         return {
-            # High urgency indicators
-            "urgent": 0.9,
-            "immediately": 0.9,
-            "quickly": 0.8,
-            "asap": 0.85,
-            "emergency": 0.85,
-            
-            # Verification/confirmation
-            "verify": 0.8,
-            "confirm": 0.7,
-            "validate": 0.75,
-            "authenticate": 0.8,
+            "messages": self.messages,
+            "scam_messages": self.scam_messages,
+            "max_confidence": self.max_confidence,
+            "patterns": sorted(self.patterns),
+            "keyword_weights": self.keyword_weights,
+            "keyword_weight_sum": self.keyword_weight_sum,
+            "nlp_score_sum": self.nlp_score_sum,
+            "type_counts": {scam_type.value: count for scam_type, count in self.type_counts.items()},
+            "scam_type": self.scam_type.value,
+            "confidence": self.confidence
+        }
+
+    @classmethod
+    def from_record(cls, record: dict) -> "ConversationScamState":
+        """State that continues where the one saved by to_record() left off"""
+        state = cls()
+        state.messages = record["messages"]
+        state.scam_messages = record["scam_messages"]
+        state.max_confidence = record["max_confidence"]
+        state.patterns = set(record["patterns"])
+        state.keyword_weights = dict(record["keyword_weights"])
+        state.keyword_weight_sum = record["keyword_weight_sum"]
+        state.nlp_score_sum = record["nlp_score_sum"]
+        state.type_counts = {ScamType(value): count for value, count in record["type_counts"].items()}
+        state.scam_type = ScamType(record["scam_type"])
+        state.confidence = record["confidence"]
+        return state
+
+class ScamDetectionEngine:
+    """Scam Detection Engine using pattern matching and NLP"""
+    
+    # Combined score = weighted tier scores, compared against the scam threshold
+    PATTERN_WEIGHT = 0.5
+    NLP_WEIGHT = 0.3
+    KEYWORD_WEIGHT = 0.2
+    SCAM_THRESHOLD = 0.30
+    # Highest score _calculate_nlp_score can return: 0.4*0.7 + 0.3*0.5 + 0.3*0.6
+    NLP_SCORE_MAX = 0.61
+    TIERS = ("pattern_matching", "nlp", "keywords", "ngram_classifier")
+    
+    def __init__(self, cpu_budget_ms: float = None,
+                 batch_parallel_threshold: int = 64, cache: DetectionCache = None,
+                 early_exit: bool = False, campaigns: CampaignIndex = None,
+                 rule_profiler: RuleProfiler = None, rule_pack_path: str = None,
+                 classifier: HashedNgramClassifier = None, offloader: ProcessOffloader = None):
+        """
+        Initialize detection engine
+        
+        Args:
+            cpu_budget_ms: Per-message time budget; once spent, remaining
+                pattern rules and the NLP stage are skipped (optional)
+            batch_parallel_threshold: Batches with at least this many distinct messages are
+                split across the offloader's processes; smaller ones, or any batch
+                without an offloader, are scored inline
+            cache: Result cache for repeated messages (optional)
+            early_exit: Skip the NLP tier when the cheap tiers already decide the verdict;
+                off by default, as the reported confidence and explanation then leave out
+                the NLP score (the verdict itself is the same either way)
+            campaigns: Near-duplicate index of classified scams; matches skip the tiers (optional)
+            rule_profiler: Collects per-rule hit and latency counters; off when None (optional)
+            rule_pack_path: Rule pack file; the bundled default pack when None (optional)
+            classifier: Trained n-gram model, scored when the rules do not already flag
+                the message; catches paraphrases no pattern covers (optional)
+            offloader: Process pool that scores long messages off the request thread (optional)
+        """
+        self.cpu_budget_ms = cpu_budget_ms
+        self.batch_parallel_threshold = batch_parallel_threshold
+        self.rule_profiler = rule_profiler
+        self.rule_pack_path = rule_pack_path or DEFAULT_RULE_PACK
+        self._reload_lock = threading.Lock()
+        # Every rule-derived table lives on this one pack; reload_rules() swaps it
+        self.rules: RulePack = load_rule_pack(self.rule_pack_path, ScamType)
+        self.rules.matcher.attach_profiler(rule_profiler)
+        self.cache = cache
+        self.early_exit = early_exit
+        self.campaigns = campaigns
+        self.classifier = classifier
+        self.offloader = offloader
+        self._tier_lock = threading.Lock()
+        self._evaluated, self._tier_stats, self._exit_counts = self._zero_tier_counts()
+        
+    @property
+    def sia(self):
+        """VADER analyzer, loaded on first use"""
+        return get_sentiment_analyzer()
+        
+    @property
+    def matcher(self) -> RuleMatcher:
+        """Compiled matcher of the current rule pack"""
+        return self.rules.matcher
+    
+    @property
+    def pattern_database(self) -> Dict[ScamType, List[Dict]]:
+        return self.rules.pattern_database
+    
+    @property
+    def keyword_weights(self) -> Dict[str, float]:
+        return self.rules.keyword_weights
+    
+    def reload_rules(self, path: str = None) -> Tuple[RulePack, bool]:
+        """
+        Load a rule pack and swap it in atomically
+        
+        The pack is validated and compiled before the swap; requests already
+        running finish on the rules they started with. Reloading a file whose
+        content has not changed is a no-op, so repeated signals compile nothing.
+        
+        Args:
+            path: Rule pack file; defaults to the one loaded last
             
-            # Threat indicators
-            "blocked": 0.85,
-            "locked": 0.8,
-            "suspended": 0.8,
-            "compromised": 0.9,
-            "hacked": 0.9,
-            "unauthorized": 0.85,
+        Returns:
+            (current rule pack, whether it changed)
             
-            # Authority markers
-            "bank": 0.6,
-            "security": 0.6,
-            "fraud": 0.7,
-            "officer": 0.6,
-            "official": 0.5,
+        Raises:
+            RulePackError: The new pack is invalid; the running rules stay in place
+        """
+        with self._reload_lock:
+            path = path or self.rule_pack_path
+            current = self.rules
+            if path == current.source and file_digest(path) == current.digest:
+                logger.info(f"Rule pack {current.version} unchanged; nothing to reload")
+                return current, False
             
-            # Financial terms
-            "otp": 0.85,
-            "password": 0.8,
-            "credentials": 0.8,
-            "account": 0.6,
-            "balance": 0.5,
-        }
+            started = time.perf_counter()
+            pack = load_rule_pack(path, ScamType)
+            pack.matcher.attach_profiler(self.rule_profiler)
+            self.rules = pack
+            self.rule_pack_path = path
+            logger.info(f"Loaded rule pack {pack.version} from {path}: {pack.rule_count} rules, "
+                        f"{len(pack.keyword_weights)} keywords in {(time.perf_counter() - started) * 1000:.1f}ms "
+                        f"(was {current.version})")
+            return pack, True
     
-    def detect(self, message: str, conversation_history: List[str] = None) -> ScamDetectionResult:
+    def detect(self, message: Union[str, AnalyzedMessage],
+               conversation_history: List[str] = None,
+               conversation_state: ConversationScamState = None) -> ScamDetectionResult:
         """
         Detect if message is a scam
         
         Args:
-            message: Raw message text
+            message: Raw message text, or the request's AnalyzedMessage; every
+                tier reads its normalized text
             conversation_history: Previous messages in conversation (optional)
+            conversation_state: Running state of the conversation; the result
+                is folded into it in O(1), history is never rescanned (optional)
             
         Returns:
-            ScamDetectionResult object
+            ScamDetectionResult object for this message alone
+        """
+        result = self._detect_message(AnalyzedMessage.of(message))
+        if conversation_state is not None:
+            conversation_state.update(result, self.keyword_weights)
+        return result
+    
+    def _detect_message(self, message: AnalyzedMessage, ngram_score: float = None) -> ScamDetectionResult:
+        """
+        Detect a single message, through the result cache and campaign index when configured
+        
+        ngram_score is the classifier's probability when detect_batch already
+        scored the message in its vectorized pass.
+        """
+        # One rule pack for the whole request; verdicts are cached per pack, so a
+        # reload invalidates everything computed under the previous rules
+        rules = self.rules
+        known = self._known_verdict(message, rules)
+        if known is not None:
+            return known
+        if self._should_offload(message):
+            try:
+                # Blocks this thread only; the GIL is free while the worker scores
+                result, within_budget, counts = self.offloader.submit_detect(message.text, rules).result()
+                self._merge_worker_counts(counts)
+                return self._remember(message, rules, result, within_budget)
+            except BrokenExecutor as e:
+                logger.error(f"Detection worker pool failed, scoring inline: {e}")
+        return self._remember(message, rules, *self._detect_uncached(message, rules, ngram_score))
+    
+    def _should_offload(self, message: AnalyzedMessage) -> bool:
+        return self.offloader is not None and self.offloader.should_offload(message.text)
+    
+    def _known_verdict(self, message: AnalyzedMessage, rules: RulePack) -> Optional[ScamDetectionResult]:
+        """Verdict from the result cache or a known campaign, or None"""
+        if self.cache is not None:
+            cached = self.cache.get(DetectionCache.key(message.text), rules.fingerprint)
+            if cached is not None:
+                return cached
+        if self.campaigns is not None:
+            near = self.campaigns.match(message.normalized, rules.fingerprint)
+            if near is not None:
+                return self._campaign_verdict(message, rules, *near)
+        return None
+    
+    def _campaign_verdict(self, message: AnalyzedMessage, rules: RulePack, campaign,
+                          distance: int) -> ScamDetectionResult:
+        """
+        The campaign's verdict for a near-duplicate message
+        
+        Verdict, type and confidence come from the campaign; keywords are this
+        message's own (a word-set lookup), and the template's matched patterns
+        and tier scores are dropped, since no rule was run on this text.
         """
-        message_lower = message.lower()
+        template = campaign.value
+        keyword_score, keywords = self._calculate_keyword_score(message, rules.keyword_weights)
+        return replace(
+            template,
+            detection_method="campaign_fingerprint",
+            extracted_keywords=keywords,
+            explanation=f"Near-duplicate of scam campaign {template.campaign_id} "
+                        f"({distance} bits apart); Confidence: {template.confidence:.1%}",
+            matched_patterns=[],
+            tier_scores={"keywords": keyword_score}
+        )
+    
+    def _remember(self, message: AnalyzedMessage, rules: RulePack, result: ScamDetectionResult,
+                  within_budget: bool) -> ScamDetectionResult:
+        """Cache a freshly computed verdict and seed its campaign"""
+        # Verdicts cut short by the CPU budget depend on load, not content
+        if within_budget:
+            # Only scams seed campaigns; benign text always gets the full tiers
+            if self.campaigns is not None and result.is_scam:
+                result.campaign_id = self.campaigns.add(message.normalized, result, rules.fingerprint)
+            if self.cache is not None:
+                self.cache.put(DetectionCache.key(message.text), result, rules.fingerprint)
+        return result
+    
+    def _detect_uncached(self, message: AnalyzedMessage, rules: RulePack,
+                         ngram_score: float = None) -> Tuple[ScamDetectionResult, bool]:
+        """
+        Run the detection tiers, cheapest first
+        
+        Pattern and keyword scores are computed first. The n-gram classifier,
+        when configured, runs unless those already flag the message, and flags
+        it on its own above its threshold. The NLP tier only runs when its
+        score could still change the verdict, and is skipped once the CPU
+        budget is spent. Also reports whether detection finished within budget.
+        """
+        started = time.perf_counter()
+        budget = self.cpu_budget_ms / 1000 if self.cpu_budget_ms else None
+        timings = {}
         
-        # Calculate pattern-based score
-        pattern_score, matched_patterns = self._calculate_pattern_score(message_lower)
+        # Tier 1: pattern-based score
+        pattern_score, matched_patterns, complete = self._calculate_pattern_score(message.lower, rules.matcher, budget)
+        timings["pattern_matching"] = (time.perf_counter() - started, pattern_score > 0)
         
-        # Calculate NLP-based score
-        nlp_score = self._calculate_nlp_score(message)
+        # Tier 2: keyword score
+        tier_start = time.perf_counter()
+        keyword_score, matched_keywords = self._calculate_keyword_score(message, rules.keyword_weights)
+        timings["keywords"] = (time.perf_counter() - tier_start, keyword_score > 0)
         
-        # Calculate keyword score
-        keyword_score, matched_keywords = self._calculate_keyword_score(message_lower)
+        # The cheap tiers alone may already decide the verdict
+        within_budget = complete and (budget is None or time.perf_counter() - started < budget)
+        known_score = pattern_score * self.PATTERN_WEIGHT + keyword_score * self.KEYWORD_WEIGHT
+        exit_reason = None
+        if not within_budget:
+            exit_reason = "cpu_budget"
+        elif self.early_exit and known_score > self.SCAM_THRESHOLD:
+            exit_reason = "scam"
+        
+        # Tier 3: n-gram classifier - paraphrases the rules and keywords miss
+        classifier_flagged = False
+        if self.classifier is not None and exit_reason is None and known_score <= self.SCAM_THRESHOLD:
+            tier_start = time.perf_counter()
+            if ngram_score is None:
+                ngram_score = self.classifier.score(message.normalized)
+            classifier_flagged = ngram_score >= self.classifier.threshold
+            timings["ngram_classifier"] = (time.perf_counter() - tier_start, classifier_flagged)
+            if classifier_flagged and self.early_exit:
+                exit_reason = "ngram_classifier"
+        
+        # Tier 4: NLP-based score - only while it can still flip the verdict
+        if exit_reason is None and self.early_exit and \
+                known_score + self.NLP_WEIGHT * self.NLP_SCORE_MAX < self.SCAM_THRESHOLD - 1e-9:
+            exit_reason = "benign"
+        
+        nlp_score = 0.0
+        if exit_reason is None:
+            tier_start = time.perf_counter()
+            nlp_score = self._calculate_nlp_score(message)
+            timings["nlp"] = (time.perf_counter() - tier_start, nlp_score > 0)
+        self._record_tiers(timings, exit_reason)
         
         # Combine scores - increased pattern weight
-        combined_score = (pattern_score * 0.5 + nlp_score * 0.3 + keyword_score * 0.2)
+        combined_score = (pattern_score * self.PATTERN_WEIGHT + nlp_score * self.NLP_WEIGHT +
+                          keyword_score * self.KEYWORD_WEIGHT)
         
         # Determine scam type
-        scam_type = self._classify_scam_type(message_lower, matched_patterns)
+        scam_type = self._classify_scam_type(message, matched_patterns)
         
         # Is it a scam? - Threshold at 0.30 to catch clear phishing attempts
-        is_scam = combined_score > 0.30
+        is_scam = combined_score > self.SCAM_THRESHOLD
         
         # Build explanation
         explanation = self._build_explanation(matched_patterns, matched_keywords, combined_score)
+        if classifier_flagged and not is_scam:
+            is_scam = True
+            combined_score = max(combined_score, ngram_score)
+            explanation = f"Classified as scam by the n-gram model; Confidence: {ngram_score:.1%}"
+        
+        tier_scores = {"pattern_matching": pattern_score, "keywords": keyword_score}
+        if "nlp" in timings:
+            tier_scores["nlp"] = nlp_score
+        if "ngram_classifier" in timings:
+            tier_scores["ngram_classifier"] = ngram_score
+        detection_method = " + ".join(tier for tier in self.TIERS if tier in timings)
+        if exit_reason == "cpu_budget":
+            detection_method += " (cpu budget exceeded)"
         
         return ScamDetectionResult(
             is_scam=is_scam,
             scam_type=scam_type,
             confidence=combined_score,
-            detection_method="pattern_matching + nlp + keywords",
+            detection_method=detection_method,
             extracted_keywords=matched_keywords,
-            explanation=explanation
-        )
+            explanation=explanation,
+            matched_patterns=matched_patterns,
+            tier_scores=tier_scores
+        ), within_budget
     
-    def _calculate_pattern_score(self, message: str) -> Tuple[float, List[str]]:
-        """Calculate pattern matching score"""
-        matches = []
-        total_weight = 0
-        matched_count = 0
+    def _record_tiers(self, timings: Dict[str, Tuple[float, bool]], exit_reason: str = None):
+        """Accumulate per-tier counters for one evaluated message"""
+        with self._tier_lock:
+            self._evaluated += 1
+            for tier, (seconds, hit) in timings.items():
+                stats = self._tier_stats[tier]
+                stats["runs"] += 1
+                stats["hits"] += hit
+                stats["seconds"] += seconds
+            if exit_reason:
+                self._exit_counts[exit_reason] += 1
+    
+    def _zero_tier_counts(self) -> Tuple[int, Dict, Dict]:
+        return (0, {tier: {"runs": 0, "hits": 0, "seconds": 0.0} for tier in self.TIERS},
+                {"scam": 0, "benign": 0, "cpu_budget": 0, "ngram_classifier": 0})
+    
+    def take_tier_counts(self) -> Dict:
+        """Raw tier counters recorded since the last call, zeroing them; for merge_tier_counts()"""
+        with self._tier_lock:
+            counts = {"evaluated": self._evaluated, "tiers": self._tier_stats, "exits": self._exit_counts}
+            self._evaluated, self._tier_stats, self._exit_counts = self._zero_tier_counts()
+        return counts
+    
+    def merge_tier_counts(self, counts: Dict):
+        """Add counters taken from another engine (an offload worker's) to this one's"""
+        with self._tier_lock:
+            self._evaluated += counts["evaluated"]
+            for tier, stats in counts["tiers"].items():
+                for counter, value in stats.items():
+                    self._tier_stats[tier][counter] += value
+            for reason, count in counts["exits"].items():
+                self._exit_counts[reason] += count
+    
+    def _merge_worker_counts(self, counts: Dict):
+        """Credit tiers and rules run by an offload worker to this engine's stats"""
+        self.merge_tier_counts(counts["tiers"])
+        if counts["rules"] is not None and self.rule_profiler is not None:
+            self.rule_profiler.merge(counts["rules"])
+    
+    def get_tier_stats(self) -> Dict:
+        """
+        Per-tier activity since startup
         
-        for scam_type, patterns in self.pattern_database.items():
-            for pattern_group in patterns:
-                for pattern in pattern_group["patterns"]:
-                    if re.search(pattern, message, re.IGNORECASE):
-                        matches.append(pattern_group["name"])
-                        total_weight += pattern_group["weight"]
-                        matched_count += 1
+        run_rate is the share of evaluated messages that reached a tier,
+        hit_rate the share of its runs that produced a non-zero score.
+        Cached results are not evaluated and do not count.
+        """
+        with self._tier_lock:
+            evaluated = self._evaluated
+            tiers = {}
+            for tier in self.TIERS:
+                stats = self._tier_stats[tier]
+                runs = stats["runs"]
+                tiers[tier] = {
+                    "runs": runs,
+                    "hits": stats["hits"],
+                    "run_rate": round(runs / evaluated, 4) if evaluated else 0.0,
+                    "hit_rate": round(stats["hits"] / runs, 4) if runs else 0.0,
+                    "avg_ms": round(stats["seconds"] / runs * 1000, 4) if runs else 0.0
+                }
+            return {
+                "evaluated": evaluated,
+                "early_exit_enabled": self.early_exit,
+                "tiers": tiers,
+                "nlp_skipped": dict(self._exit_counts)
+            }
+    
+    def detect_batch(self, messages: List[str]) -> List[ScamDetectionResult]:
+        """
+        Detect a batch of messages
+        
+        Identical messages are analyzed once. With an offloader, large
+        batches are split across its worker processes; threads would not
+        help, since scoring holds the GIL.
+        
+        Args:
+            messages: Raw message texts
+            
+        Returns:
+            ScamDetectionResult objects in input order
+        """
+        unique = [AnalyzedMessage(message) for message in dict.fromkeys(messages)]
+        # The classifier scores the whole batch in one vectorized pass up front
+        ngram_scores = (self.classifier.predict_proba([m.normalized for m in unique]).tolist()
+                        if self.classifier is not None else [None] * len(unique))
+        if self.offloader is not None and len(unique) >= self.batch_parallel_threshold:
+            results = self._detect_offloaded_batch(unique, ngram_scores)
+        else:
+            results = [self._detect_message(message, score) for message, score in zip(unique, ngram_scores)]
+        by_message = {analyzed.text: result for analyzed, result in zip(unique, results)}
+        return [by_message[message] for message in messages]
+    
+    def _detect_offloaded_batch(self, messages: List[AnalyzedMessage],
+                                ngram_scores: List[Optional[float]]) -> List[ScamDetectionResult]:
+        """Known verdicts here, everything else scored by the offloader's processes in parallel"""
+        rules = self.rules
+        results = [self._known_verdict(message, rules) for message in messages]
+        todo = [i for i, result in enumerate(results) if result is None]
+        if not todo:
+            return results
+        try:
+            futures = self.offloader.submit_detect_batch([messages[i].text for i in todo], rules,
+                                                         [ngram_scores[i] for i in todo])
+            scored = []
+            for future in futures:
+                pairs, counts = future.result()
+                self._merge_worker_counts(counts)
+                scored.extend(pairs)
+        except BrokenExecutor as e:
+            logger.error(f"Detection worker pool failed, scoring inline: {e}")
+            scored = [self._detect_uncached(messages[i], rules, ngram_scores[i]) for i in todo]
+        for i, (result, within_budget) in zip(todo, scored):
+            results[i] = self._remember(messages[i], rules, result, within_budget)
+        return results
+    
+    def _calculate_pattern_score(self, message: str, matcher: RuleMatcher,
+                                 budget: float = None) -> Tuple[float, List[str], bool]:
+        """Calculate pattern matching score; also reports whether every rule was evaluated"""
+        hits, complete = matcher.match(message, budget)
+        matches = [rule.name for rule in hits]
+        matched_count = len(hits)
         
         # Normalize score: more matches = higher confidence
         if matched_count == 0:
-            return 0.0, []
+            return 0.0, [], complete
         
         # Cap at 1.0 and apply diminishing returns
         score = min(matched_count * 0.3, 1.0)
-        return score, matches
+        return score, matches, complete
     
-    def _calculate_nlp_score(self, message: str) -> float:
+    def _calculate_nlp_score(self, message: AnalyzedMessage) -> float:
         """Calculate NLP-based score"""
         try:
             # Sentiment analysis - scams often use negative/urgent sentiment
-            sentiment = self.sia.polarity_scores(message)
+            sentiment = self.sia.polarity_scores(message.normalized)
             
             # High negative compound score = concern/threat language
             negative_score = max(0, -sentiment['compound']) * 0.7  # Compound ranges -1 to 1
             
             # Check for imperative/command language (common in scams)
-            words = word_tokenize(message.lower())
+            words = message.tokens
             imperatives = 0
             for word in words:
                 if word.endswith('!') or word.endswith('?'):
@@ -253,7 +603,7 @@ class ScamDetectionEngine:
             
             # Urgency language detection
             urgency_keywords = ["must", "should", "need to", "have to", "immediately"]
-            urgency_count = sum(1 for keyword in urgency_keywords if keyword in message.lower())
+            urgency_count = message.count_present(urgency_keywords)
             urgency_score = min(urgency_count / 5, 1.0) * 0.6
             
             combined_nlp = (negative_score * 0.4 + imperative_score * 0.3 + urgency_score * 0.3)
@@ -262,13 +612,15 @@ class ScamDetectionEngine:
             print(f"NLP error: {e}")
             return 0.0
     
-    def _calculate_keyword_score(self, message: str) -> Tuple[float, List[str]]:
+    def _calculate_keyword_score(self, message: AnalyzedMessage,
+                                 keyword_weights: Dict[str, float]) -> Tuple[float, List[str]]:
         """Calculate keyword-based score"""
         matched_keywords = []
         total_weight = 0
         
-        for keyword, weight in self.keyword_weights.items():
-            if re.search(r'\b' + keyword + r'\b', message, re.IGNORECASE):
+        # Keywords are single words, so \bkeyword\b is a lookup in the word set
+        for keyword, weight in keyword_weights.items():
+            if message.has_word(keyword):
                 matched_keywords.append(keyword)
                 total_weight += weight
         
@@ -279,13 +631,13 @@ class ScamDetectionEngine:
         avg_weight = total_weight / len(matched_keywords)
         return avg_weight, matched_keywords
     
-    def _classify_scam_type(self, message: str, matched_patterns: List[str]) -> ScamType:
+    def _classify_scam_type(self, message: AnalyzedMessage, matched_patterns: List[str]) -> ScamType:
         """Classify scam type based on patterns"""
         if not matched_patterns:
             return ScamType.UNKNOWN
         
         # Simple classification based on matched patterns
-        message_lower = message.lower()
+        message_lower = message.lower
         
         if any(pat in matched_patterns for pat in ["upi_verification", "account_compromise"]):
             if "@" in message_lower:
@@ -311,7 +663,7 @@ class ScamDetectionEngine:
         explanation_parts = []
         
         if patterns:
-            explanation_parts.append(f"Matched patterns: {', '.join(set(patterns))}")
+            explanation_parts.append(f"Matched patterns: {', '.join(dict.fromkeys(patterns))}")
         
         if keywords:
             explanation_parts.append(f"Scam keywords detected: {', '.join(keywords[:3])}")
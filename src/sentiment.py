@@ -0,0 +1,351 @@
+"""
+Sentiment - Lazily loaded VADER scoring backed by a bundled compact lexicon
+The lexicon is memory-mapped from src/data/vader_lexicon.bin and scored by a port of
+NLTK's VADER rules, so nothing is parsed at import time and detection keeps working
+when NLTK or its data packages are missing.
+
+Rebuild the lexicon: python -m src.sentiment [path/to/vader_lexicon.txt]
+"""
+
+import math
+import mmap
+import os
+import re
+import string
+import struct
+import sys
+import threading
+from typing import Dict, Iterable, List, Optional
+
+
+LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "vader_lexicon.bin")
+
+# Layout: header | float64 valences[count] | uint32 key offsets[count + 1] | UTF-8 keys,
+# keys sorted by their encoded bytes
+_MAGIC = b"VLEX"
+_VERSION = 1
+_HEADER = struct.Struct("<4sIII")  # magic, version, count, key bytes
+
+class CompactLexicon:
+    """
+    Read-only word -> valence mapping over a memory-mapped lexicon file.
+
+    Lookups binary-search the sorted key table in place; pages are only
+    faulted in when touched, so opening the file costs a single mmap call.
+    Supports the ``in`` / ``[]`` / ``get`` protocol VADER expects of its
+    lexicon dictionary.
+    """
+
+    def __init__(self, path: str = LEXICON_PATH):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, key_bytes = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a version {_VERSION} compact lexicon")
+        buffer = memoryview(self._mmap)
+        valences_start = _HEADER.size
+        offsets_start = valences_start + 8 * count
+        keys_start = offsets_start + 4 * (count + 1)
+        self._count = count
+        self._valences = buffer[valences_start:offsets_start].cast("d")
+        self._offsets = buffer[offsets_start:keys_start].cast("I")
+        self._keys = buffer[keys_start:keys_start + key_bytes]
+
+    def _index(self, word: str) -> int:
+        """Position of word in the key table, or -1"""
+        target = word.encode("utf-8", "surrogatepass")
+        offsets, keys = self._offsets, self._keys
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            key = keys[offsets[mid]:offsets[mid + 1]].tobytes()
+            if key == target:
+                return mid
+            if key < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return -1
+
+    def __contains__(self, word) -> bool:
+        return isinstance(word, str) and self._index(word) >= 0
+
+    def __getitem__(self, word: str) -> float:
+        index = self._index(word)
+        if index < 0:
+            raise KeyError(word)
+        return self._valences[index]
+
+    def get(self, word: str, default: Optional[float] = None) -> Optional[float]:
+        index = self._index(word)
+        return self._valences[index] if index >= 0 else default
+
+    def __len__(self) -> int:
+        return self._count
+
+def build_compact_lexicon(entries: Dict[str, float], path: str = LEXICON_PATH):
+    """Write a word -> valence mapping in the compact lexicon format"""
+    keys = sorted(word.encode("utf-8") for word in entries)
+    offsets = [0]
+    for key in keys:
+        offsets.append(offsets[-1] + len(key))
+    blob = b"".join(keys)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(keys), len(blob)))
+        f.write(struct.pack(f"<{len(keys)}d", *(entries[key.decode("utf-8")] for key in keys)))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.write(blob)
+
+def parse_vader_lexicon(lines: Iterable[str]) -> Dict[str, float]:
+    """Parse vader_lexicon.txt the way NLTK does (later duplicates win)"""
+    entries = {}
+    for line in lines:
+        if line.strip():
+            word, measure = line.strip().split("\t")[0:2]
+            entries[word] = float(measure)
+    return entries
+
+# ============================================================================
+# VADER scoring - follows nltk.sentiment.vader rule for rule, without NLTK
+# ============================================================================
+
+B_INCR = 0.293
+B_DECR = -0.293
+C_INCR = 0.733
+N_SCALAR = -0.74
+
+NEGATE = {
+    "aint", "arent", "cannot", "cant", "couldnt", "darent", "didnt", "doesnt",
+    "ain't", "aren't", "can't", "couldn't", "daren't", "didn't", "doesn't",
+    "dont", "hadnt", "hasnt", "havent", "isnt", "mightnt", "mustnt", "neither",
+    "don't", "hadn't", "hasn't", "haven't", "isn't", "mightn't", "mustn't",
+    "neednt", "needn't", "never", "none", "nope", "nor", "not", "nothing",
+    "nowhere", "oughtnt", "shant", "shouldnt", "uhuh", "wasnt", "werent",
+    "oughtn't", "shan't", "shouldn't", "uh-uh", "wasn't", "weren't", "without",
+    "wont", "wouldnt", "won't", "wouldn't", "rarely", "seldom", "despite",
+}
+
+BOOSTER_DICT = {
+    **dict.fromkeys([
+        "absolutely", "amazingly", "awfully", "completely", "considerably", "decidedly",
+        "deeply", "effing", "enormously", "entirely", "especially", "exceptionally",
+        "extremely", "fabulously", "flipping", "flippin", "fricking", "frickin",
+        "frigging", "friggin", "fully", "fucking", "greatly", "hella", "highly",
+        "hugely", "incredibly", "intensely", "majorly", "more", "most", "particularly",
+        "purely", "quite", "really", "remarkably", "so", "substantially", "thoroughly",
+        "totally", "tremendously", "uber", "unbelievably", "unusually", "utterly", "very",
+    ], B_INCR),
+    **dict.fromkeys([
+        "almost", "barely", "hardly", "just enough", "kind of", "kinda", "kindof",
+        "kind-of", "less", "little", "marginally", "occasionally", "partly", "scarcely",
+        "slightly", "somewhat", "sort of", "sorta", "sortof", "sort-of",
+    ], B_DECR),
+}
+
+SPECIAL_CASE_IDIOMS = {
+    "the shit": 3, "the bomb": 3, "bad ass": 1.5, "yeah right": -2,
+    "cut the mustard": 2, "kiss of death": -1.5, "hand to mouth": -2,
+}
+
+PUNC_LIST = [".", "!", "?", ",", ";", ":", "-", "'", '"', "!!", "!!!", "??", "???",
+             "?!?", "!?!", "?!?!", "!?!?"]
+
+_REMOVE_PUNCTUATION = re.compile(f"[{re.escape(string.punctuation)}]")
+
+def _negated(word: str) -> bool:
+    word = word.lower()
+    return word in NEGATE or "n't" in word
+
+class LexiconSentimentAnalyzer:
+    """Pure-Python VADER ``polarity_scores`` over a CompactLexicon"""
+
+    def __init__(self, lexicon: CompactLexicon):
+        self.lexicon = lexicon
+
+    @staticmethod
+    def _words_and_emoticons(text: str) -> List[str]:
+        """Whitespace tokens longer than one character, stripped of one punctuation mark"""
+        words_only = {w for w in _REMOVE_PUNCTUATION.sub("", text).split() if len(w) > 1}
+        tokens = []
+        for token in text.split():
+            if len(token) <= 1:
+                continue
+            for punc in PUNC_LIST:
+                if token.endswith(punc) and token[:-len(punc)] in words_only:
+                    token = token[:-len(punc)]
+                    break
+                if token.startswith(punc) and token[len(punc):] in words_only:
+                    token = token[len(punc):]
+                    break
+            tokens.append(token)
+        return tokens
+
+    def _scalar_inc_dec(self, word: str, valence: float, is_cap_diff: bool) -> float:
+        scalar = 0.0
+        word_lower = word.lower()
+        if word_lower in BOOSTER_DICT:
+            scalar = BOOSTER_DICT[word_lower]
+            if valence < 0:
+                scalar *= -1
+            if word.isupper() and is_cap_diff:
+                scalar += C_INCR if valence > 0 else -C_INCR
+        return scalar
+
+    def _never_check(self, valence: float, words: List[str], start_i: int, i: int) -> float:
+        if start_i == 0:
+            if _negated(words[i - 1]):
+                valence *= N_SCALAR
+        elif start_i == 1:
+            if words[i - 2] == "never" and words[i - 1] in ("so", "this"):
+                valence *= 1.5
+            elif _negated(words[i - 2]):
+                valence *= N_SCALAR
+        else:
+            if (words[i - 3] == "never" and words[i - 2] in ("so", "this")) or words[i - 1] in ("so", "this"):
+                valence *= 1.25
+            elif _negated(words[i - 3]):
+                valence *= N_SCALAR
+        return valence
+
+    def _idioms_check(self, valence: float, words: List[str], i: int) -> float:
+        onezero = f"{words[i - 1]} {words[i]}"
+        twoonezero = f"{words[i - 2]} {words[i - 1]} {words[i]}"
+        twoone = f"{words[i - 2]} {words[i - 1]}"
+        threetwoone = f"{words[i - 3]} {words[i - 2]} {words[i - 1]}"
+        threetwo = f"{words[i - 3]} {words[i - 2]}"
+        for sequence in (onezero, twoonezero, twoone, threetwoone, threetwo):
+            if sequence in SPECIAL_CASE_IDIOMS:
+                valence = SPECIAL_CASE_IDIOMS[sequence]
+                break
+        if len(words) - 1 > i:
+            zeroone = f"{words[i]} {words[i + 1]}"
+            if zeroone in SPECIAL_CASE_IDIOMS:
+                valence = SPECIAL_CASE_IDIOMS[zeroone]
+        if len(words) - 1 > i + 1:
+            zeroonetwo = f"{words[i]} {words[i + 1]} {words[i + 2]}"
+            if zeroonetwo in SPECIAL_CASE_IDIOMS:
+                valence = SPECIAL_CASE_IDIOMS[zeroonetwo]
+        if threetwo in BOOSTER_DICT or twoone in BOOSTER_DICT:
+            valence += B_DECR
+        return valence
+
+    def _least_check(self, valence: float, words: List[str], i: int) -> float:
+        if i > 1 and words[i - 1].lower() not in self.lexicon and words[i - 1].lower() == "least":
+            if words[i - 2].lower() not in ("at", "very"):
+                valence *= N_SCALAR
+        elif i > 0 and words[i - 1].lower() not in self.lexicon and words[i - 1].lower() == "least":
+            valence *= N_SCALAR
+        return valence
+
+    def _valence(self, words: List[str], item: str, i: int, is_cap_diff: bool) -> float:
+        item_lowercase = item.lower()
+        valence = self.lexicon.get(item_lowercase)
+        if valence is None:
+            return 0
+        if item.isupper() and is_cap_diff:
+            valence += C_INCR if valence > 0 else -C_INCR
+        for start_i in range(3):
+            if i > start_i and words[i - (start_i + 1)].lower() not in self.lexicon:
+                s = self._scalar_inc_dec(words[i - (start_i + 1)], valence, is_cap_diff)
+                if start_i == 1 and s != 0:
+                    s *= 0.95
+                if start_i == 2 and s != 0:
+                    s *= 0.9
+                valence = self._never_check(valence + s, words, start_i, i)
+                if start_i == 2:
+                    valence = self._idioms_check(valence, words, i)
+        return self._least_check(valence, words, i)
+
+    def polarity_scores(self, text: str) -> Dict[str, float]:
+        """Same output as nltk's SentimentIntensityAnalyzer.polarity_scores"""
+        words = self._words_and_emoticons(text)
+        allcaps = sum(1 for word in words if word.isupper())
+        is_cap_diff = 0 < len(words) - allcaps < len(words)
+
+        # NLTK scores repeated tokens at their first position
+        first_index = {}
+        for index, token in enumerate(words):
+            first_index.setdefault(token, index)
+
+        sentiments = []
+        for item in words:
+            i = first_index[item]
+            if (i < len(words) - 1 and item.lower() == "kind" and words[i + 1].lower() == "of") \
+                    or item.lower() in BOOSTER_DICT:
+                sentiments.append(0)
+                continue
+            sentiments.append(self._valence(words, item, i, is_cap_diff))
+
+        lowered = [word.lower() for word in words]
+        if "but" in lowered:
+            bi = lowered.index("but")
+            sentiments = [s * 0.5 if index < bi else s * 1.5 if index > bi else s
+                          for index, s in enumerate(sentiments)]
+
+        if not sentiments:
+            return {"neg": 0.0, "neu": 0.0, "pos": 0.0, "compound": 0.0}
+
+        sum_s = float(sum(sentiments))
+        ep_count = min(text.count("!"), 4)
+        qm_count = text.count("?")
+        qm_amplifier = 0 if qm_count <= 1 else (qm_count * 0.18 if qm_count <= 3 else 0.96)
+        amplifier = ep_count * 0.292 + qm_amplifier
+        if sum_s > 0:
+            sum_s += amplifier
+        elif sum_s < 0:
+            sum_s -= amplifier
+        compound = sum_s / math.sqrt(sum_s * sum_s + 15)
+
+        pos_sum = sum(float(s) + 1 for s in sentiments if s > 0)
+        neg_sum = sum(float(s) - 1 for s in sentiments if s < 0)
+        neu_count = sum(1 for s in sentiments if s == 0)
+        if pos_sum > math.fabs(neg_sum):
+            pos_sum += amplifier
+        elif pos_sum < math.fabs(neg_sum):
+            neg_sum -= amplifier
+        total = pos_sum + math.fabs(neg_sum) + neu_count
+        return {
+            "neg": round(math.fabs(neg_sum / total), 3),
+            "neu": round(math.fabs(neu_count / total), 3),
+            "pos": round(math.fabs(pos_sum / total), 3),
+            "compound": round(compound, 4),
+        }
+
+# ============================================================================
+# Lazy accessors
+# ============================================================================
+
+_lock = threading.Lock()
+_analyzer = None
+
+def _load_analyzer() -> "LexiconSentimentAnalyzer":
+    """VADER over the bundled lexicon; importing NLTK alone costs ~300ms at cold start"""
+    return LexiconSentimentAnalyzer(CompactLexicon())
+
+def get_sentiment_analyzer():
+    """Shared sentiment analyzer, created on first use"""
+    global _analyzer
+    if _analyzer is None:
+        with _lock:
+            if _analyzer is None:
+                _analyzer = _load_analyzer()
+    return _analyzer
+
+_TOKEN_PATTERN = re.compile(r"\w+(?:'\w+)?|[^\w\s]")
+
+def tokenize(text: str) -> List[str]:
+    """Word and punctuation tokens, close to NLTK's word_tokenize for chat text"""
+    return _TOKEN_PATTERN.findall(text)
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding="utf-8") as f:
+            entries = parse_vader_lexicon(f)
+    else:
+        import nltk.data
+        entries = parse_vader_lexicon(
+            nltk.data.load("sentiment/vader_lexicon.zip/vader_lexicon/vader_lexicon.txt").split("\n")
+        )
+    build_compact_lexicon(entries)
+    print(f"Wrote {len(entries)} entries to {LEXICON_PATH} ({os.path.getsize(LEXICON_PATH)} bytes)")
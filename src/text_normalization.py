@@ -0,0 +1,61 @@
+"""
+Text Normalization - Undo Unicode and spacing evasions before detection
+Full-width letters, Cyrillic/Greek lookalikes, zero-width characters and "v e r i f y"
+spacing are mapped back to plain text with one precomputed str.translate table and one
+compiled de-spacing pass, so the rules never need alternatives for each trick
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Optional
+
+# Invisible formatting characters: zero-width space/joiners, direction marks, soft hyphen, BOM
+_INVISIBLE = [0x00AD, 0x034F, 0x061C, 0x115F, 0x1160, 0x17B4, 0x17B5, 0x180E,
+              *range(0x200B, 0x2010), *range(0x202A, 0x202F), *range(0x2060, 0x2070), 0xFEFF]
+# Unicode spaces that render like a plain space
+_SPACES = [0x00A0, 0x1680, *range(0x2000, 0x200B), 0x202F, 0x205F, 0x3000]
+# Compatibility forms whose NFKC decomposition is plain ASCII: ligatures, full-width forms,
+# circled and parenthesized alphanumerics, mathematical alphanumerics, squared letters
+_COMPATIBILITY_RANGES = [(0xFB00, 0xFB07), (0xFF01, 0xFF5F), (0x2460, 0x24EA),
+                         (0x1D400, 0x1D800), (0x1F130, 0x1F18A)]
+# Cyrillic and Greek letters that render like Latin ones (lookalike, replacement)
+_HOMOGLYPHS = (
+    "аa вb еe кk мm нh оo рp сc тt уy хx ѕs іi јj ԁd һh ӏl ԛq ԝw ɡg ɑa "
+    "АA ВB ЕE КK МM НH ОO РP СC ТT ХX ЅS ІI ЈJ ԌG ӀI "
+    "αa βb εe ιi κk νv οo ρp τt υu χx "
+    "ΑA ΒB ΕE ΖZ ΗH ΙI ΚK ΜM ΝN ΟO ΡP ΤT ΥY ΧX"
+)
+
+# Three or more single letters split by one separator each: "v e r i f y", "u.p.i". Digits are
+# left alone, so "ip 1.2.3.4" and "version 2.0.1" keep their dots
+_SPACED_OUT = re.compile(r'(?<![^\W_])(?:[^\W\d_][ .\-_*]){2,}[^\W\d_](?![^\W_])')
+
+@lru_cache(maxsize=None)
+def translation_table() -> Dict[int, Optional[str]]:
+    """Code point -> replacement (None deletes); built on first use"""
+    table: Dict[int, Optional[str]] = {code: None for code in _INVISIBLE}
+    table.update((code, " ") for code in _SPACES)
+    for start, end in _COMPATIBILITY_RANGES:
+        for code in range(start, end):
+            plain = unicodedata.normalize("NFKC", chr(code))
+            if plain != chr(code) and plain.isascii() and plain.strip():
+                table[code] = plain
+    table.update((ord(pair[0]), pair[1]) for pair in _HOMOGLYPHS.split())
+    return table
+
+def _join(match: "re.Match") -> str:
+    # The run alternates one character and one separator
+    return match.group()[::2]
+
+def normalize_text(text: str) -> str:
+    """
+    Text with lookalike characters, invisible characters and spaced-out words undone
+
+    O(n) in two passes with at most one new string each: ASCII text skips the
+    table pass entirely, and text without a spaced-out run is returned as-is.
+    Letter case is kept, so callers still lowercase as before.
+    """
+    if not text.isascii():
+        text = text.translate(translation_table())
+    return _SPACED_OUT.sub(_join, text)
@@ -0,0 +1,172 @@
+"""
+Watchlist Test - building a watchlist index from feeds and looking identifiers up in it
+Every index is built from fixed values into a temporary directory, so lookups,
+source order and the entities the extractor flags are the same on every run.
+
+Run: python watchlist_test.py
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, '.')
+
+from src.intelligence_extractor import EntityType, IntelligenceExtractor
+from src.watchlist import (MAX_SOURCES, Watchlist, WatchlistError, _read_feeds, build_watchlist,
+                           load_watchlist)
+
+FEED = [
+    ("verify@paytm", "cybercrime"),
+    ("9876543210", "cybercrime"),
+    ("9876543210", "bank_reports"),
+    ("+91 98765 43210", "bank_reports"),  # The same number respelled: listed once per source
+    ("sbi-kyc.in", "bank_reports"),
+    ("  ", "cybercrime"),  # Blank values are skipped
+]
+
+def build(tmp_path, entries, name: str = "watchlist.idx") -> str:
+    path = os.path.join(tmp_path, name)
+    build_watchlist(entries, path)
+    return path
+
+def test_build_and_lookup(tmp_path):
+    """Values match in any spelling, with their sources in feed order, and unlisted ones do not"""
+    path = build(tmp_path, FEED)
+    watchlist = Watchlist(path)
+    assert len(watchlist) == 4
+    assert watchlist.sources == ["cybercrime", "bank_reports"]
+    assert watchlist.metadata["entries"] == 4
+    assert watchlist.match("Verify@Paytm") == ["cybercrime"]
+    assert watchlist.match("+91-98765-43210") == ["cybercrime", "bank_reports"]
+    assert watchlist.match("9876543211") == []
+    assert watchlist.match("refund@ybl") == []
+    assert watchlist.to_dict()["lookups"] == 4 and watchlist.to_dict()["matches"] == 2
+    watchlist.close()
+
+def test_entity_forms(tmp_path):
+    """Links match on their host and parent domains, emails on their domain, never on a bare TLD"""
+    watchlist = Watchlist(build(tmp_path, FEED + [("in", "too_broad")]))
+    assert watchlist.match_entity("phishing_links", "HTTP://Pay.SBI-kyc.in/login?id=1") == ["bank_reports"]
+    assert watchlist.match_entity("email_addresses", "help@SBI-KYC.in") == ["bank_reports"]
+    assert watchlist.match_entity("phishing_links", "https://example.in/") == []
+    assert watchlist.match_entities([("upi_ids", "verify@paytm"), ("phone_numbers", "98765 43210"),
+                                     ("upi_ids", "other@paytm")]) == [
+        ["cybercrime"], ["cybercrime", "bank_reports"], []
+    ]
+    watchlist.close()
+
+def test_large_index(tmp_path):
+    """Every listed value is found in a larger index, and none of a disjoint set is"""
+    listed = [f"user{n}@ybl" for n in range(20000)]
+    watchlist = Watchlist(build(tmp_path, ((value, f"feed{n % 3}") for n, value in enumerate(listed))))
+    assert len(watchlist) == 20000
+    assert all(watchlist.match(value) == [f"feed{n % 3}"] for n, value in enumerate(listed))
+    assert not any(watchlist.match(f"user{n}@okaxis") for n in range(20000))
+    watchlist.close()
+
+def test_empty_index(tmp_path):
+    """An index built from no entries opens and matches nothing"""
+    watchlist = Watchlist(build(tmp_path, []))
+    assert len(watchlist) == 0 and watchlist.sources == []
+    assert watchlist.match("verify@paytm") == []
+    watchlist.close()
+
+def test_rejected_builds_and_files(tmp_path):
+    """Too many sources fail the build; empty, foreign and truncated files fail to open"""
+    try:
+        build_watchlist(((f"user{n}@ybl", f"feed{n}") for n in range(MAX_SOURCES + 1)),
+                        os.path.join(tmp_path, "sources.idx"))
+    except WatchlistError:
+        pass
+    else:
+        raise AssertionError("more than MAX_SOURCES sources accepted")
+
+    with open(build(tmp_path, FEED), "rb") as f:
+        valid = f.read()
+    for name, content in (("empty.idx", b""), ("foreign.idx", b"NOTWATCH" + valid[8:]),
+                          ("truncated.idx", valid[:-5]), ("short.idx", valid[:10])):
+        path = os.path.join(tmp_path, name)
+        with open(path, "wb") as f:
+            f.write(content)
+        try:
+            Watchlist(path)
+        except WatchlistError:
+            pass
+        else:
+            raise AssertionError(f"{name} opened")
+        assert load_watchlist(path) is None
+    assert load_watchlist(os.path.join(tmp_path, "missing.idx")) is None
+    assert load_watchlist(None) is None
+
+def test_rebuild_keeps_open_map(tmp_path):
+    """Rebuilding replaces the file; a watchlist already open keeps answering from the old one"""
+    path = build(tmp_path, FEED)
+    old = Watchlist(path)
+    build(tmp_path, [("refund@ybl", "cybercrime")])
+    new = Watchlist(path)
+    assert old.match("verify@paytm") == ["cybercrime"] and old.match("refund@ybl") == []
+    assert new.match("verify@paytm") == [] and new.match("refund@ybl") == ["cybercrime"]
+    assert not os.path.exists(f"{path}.tmp")
+    old.close()
+    new.close()
+
+def test_read_feeds(tmp_path):
+    """CSV feeds: a header row is skipped, a source column is used, the file name is the fallback"""
+    with_header = os.path.join(tmp_path, "reports.csv")
+    with open(with_header, "w", encoding="utf-8") as f:
+        f.write("value,source\nverify@paytm,cybercrime\n# comment\n\n9876543210,bank_reports\n9876543211\n")
+    without_header = os.path.join(tmp_path, "numbers.csv")
+    with open(without_header, "w", encoding="utf-8") as f:
+        f.write("9876543210\nsbi-kyc.in\n")
+    assert list(_read_feeds([with_header, without_header], None)) == [
+        ("verify@paytm", "cybercrime"), ("9876543210", "bank_reports"), ("9876543211", "reports"),
+        ("9876543210", "numbers"), ("sbi-kyc.in", "numbers"),
+    ]
+    assert {source for _, source in _read_feeds([with_header], "manual")} == {"manual"}
+
+def test_extractor_flags_listed_entities(tmp_path):
+    """The extractor reports watchlist sources in the metadata of listed entities only"""
+    watchlist = Watchlist(build(tmp_path, FEED))
+    extractor = IntelligenceExtractor(watchlist=watchlist)
+    found = extractor.extract("Pay verify@paytm or other@paytm, call 9876543210, "
+                              "login at http://pay.sbi-kyc.in/login", [])
+    flagged = {entity.value: (entity.metadata or {}).get("watchlist")
+               for entities in found.values() for entity in entities}
+    assert flagged["verify@paytm"] == ["cybercrime"]
+    assert flagged["other@paytm"] is None
+    assert flagged["http://pay.sbi-kyc.in/login"] == ["bank_reports"]
+    phones = found[EntityType.PHONE_NUMBER]
+    assert phones and all(entity.metadata["watchlist"] == ["cybercrime", "bank_reports"] for entity in phones)
+    watchlist.close()
+
+TESTS = [
+    test_build_and_lookup,
+    test_entity_forms,
+    test_large_index,
+    test_empty_index,
+    test_rejected_builds_and_files,
+    test_rebuild_keeps_open_map,
+    test_read_feeds,
+    test_extractor_flags_listed_entities,
+]
+
+def main():
+    print("=" * 80)
+    print("[TEST] WATCHLIST")
+    print("=" * 80)
+    failures = 0
+    for test in TESTS:
+        with tempfile.TemporaryDirectory() as workdir:
+            try:
+                test(workdir)
+                print(f"[OK] {test.__doc__}")
+            except AssertionError as e:
+                failures += 1
+                print(f"[FAIL] {test.__doc__} {e}")
+    print("=" * 80)
+    print(f"[OK] ALL {len(TESTS)} TESTS PASSED" if not failures else f"[FAIL] {failures}/{len(TESTS)} TESTS FAILED")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()